@@ -12,6 +12,7 @@ All business logic is in the mapmover/ package - this file only handles:
 import sys
 import io
 import json
+import asyncio
 import hashlib
 import logging
 import traceback
@@ -27,7 +28,7 @@ if sys.stderr.encoding != 'utf-8':
 import msgpack
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 
@@ -61,11 +62,14 @@ from mapmover import (
 )
 
 # Order Taker system (Phase 1B - replaces old multi-LLM chat)
-from mapmover.order_taker import interpret_request
+from mapmover.order_taker import interpret_request, close_llm_client, interpret_cache_stats, clear_interpret_cache
+from mapmover.order_builder import build_fast_order, fast_order_stats
 from mapmover.order_executor import execute_order
 
 # Preprocessor for tiered context system
-from mapmover.preprocessor import preprocess_query
+from mapmover.preprocessor import (
+    preprocess_query, get_preprocess_timing_stats, preprocess_memo_stats, clear_preprocess_memo,
+)
 
 # Postprocessor for validation and derived field expansion
 from mapmover.postprocessor import postprocess_order, get_display_items
@@ -82,8 +86,39 @@ from mapmover.geometry_handlers import (
     get_viewport_geometry as get_viewport_geometry_handler,
     get_selection_geometries as get_selection_geometries_handler,
     clear_cache as clear_geometry_cache,
+    get_cache_stats as get_geometry_cache_stats,
+    get_country_traffic,
+)
+
+# Point-in-polygon reverse geocoding (loc_id hierarchy for points)
+from mapmover.reverse_geocode import (
+    locate_points, locate_stats, clear_locate_cache, MAX_LOCATE_POINTS,
+)
+
+# Background cache warm-up (progress in /health, readiness in /ready)
+from mapmover.warmup import warmup, save_traffic
+
+# Weather frame reader (parallel reads, frame LRU, playback prefetch)
+from mapmover.weather_frames import (
+    frame_reader as weather_frame_reader,
+    frames_to_series as weather_frames_to_series,
+    list_tier_files as list_weather_files,
+    PREFETCH_FRAMES as WEATHER_PREFETCH_FRAMES,
+    PREFETCH_MAX as WEATHER_PREFETCH_MAX,
+    WEATHER_VARIABLES,
 )
 
+# Server-side weather raster rendering (colour-mapped PNG/WebP frames and tiles)
+from mapmover.weather_render import (
+    render_weather_image,
+    IMAGE_FORMATS as WEATHER_IMAGE_FORMATS,
+    get_color_scale as get_weather_color_scale,
+    color_scale_version as weather_color_scale_version,
+)
+
+# Pre-packed geometry fragments for MessagePack / JSON responses
+from mapmover.geometry_cache import packb as pack_msgpack, json_default as geometry_json_default
+
 # Settings management
 from mapmover.settings import (
     get_settings_with_status,
@@ -97,11 +132,13 @@ from mapmover.settings import (
 def msgpack_response(data: dict, status_code: int = 200) -> Response:
     """Standard MessagePack response for all API endpoints.
 
+    Pre-packed geometries (geometry_cache.PackedGeometry) are spliced in as-is.
+
     Usage:
         return msgpack_response({"data": result, "count": len(result)})
     """
     return Response(
-        content=msgpack.packb(data, use_bin_type=True),
+        content=pack_msgpack(data),
         media_type="application/msgpack",
         status_code=status_code
     )
@@ -480,15 +517,53 @@ async def startup_event():
     order_processor.set_executor(async_execute_order)
     await order_processor.start()
 
+    # Warm geometry, reference data and event stores without delaying startup
+    app.state.warmup_task = asyncio.create_task(warmup.run())
+
     logger.info("Startup complete - data catalog and order processor initialized")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Save per-country geometry traffic for the next warm-up and close the LLM client."""
+    save_traffic(get_country_traffic())
+    await close_llm_client()
+
+
 # === Health Check ===
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint for Railway/Docker deployments."""
-    return {"status": "healthy", "service": "county-map-api"}
+    """
+    Health check endpoint for Railway/Docker deployments.
+
+    Always returns 200 once the app is serving, with "warming" set while the
+    background warm-up runs (liveness and warm-up progress). The deploy
+    healthcheck (railway.toml healthcheckPath) uses /ready, which holds
+    traffic until caches are loaded.
+    """
+    warm = warmup.status()
+    return {
+        "status": "healthy",
+        "service": "county-map-api",
+        "warming": not warm["ready"],
+        "warmup": warm,
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: 503 until the background warm-up has finished, then 200.
+
+    This is the deploy healthcheck (railway.toml healthcheckPath, within
+    healthcheckTimeout), so a new deploy only gets traffic once warm.
+    """
+    warm = warmup.status()
+    content = {"status": "ready" if warm["ready"] else "warming", "warmup": warm}
+    if not warm["ready"]:
+        return JSONResponse(content=content, status_code=503)
+    return content
 
 
 # === Frontend ===
@@ -517,16 +592,20 @@ async def get_countries_geometry_endpoint(debug: bool = False):
 
 
 @app.get("/geometry/{loc_id}/children")
-async def get_location_children_endpoint(loc_id: str):
+async def get_location_children_endpoint(loc_id: str, format: str = "geojson"):
     """
     Get child geometries for a location (drill-down).
     Examples:
     - /geometry/USA/children -> US states
     - /geometry/USA-CA/children -> California counties
     - /geometry/FRA/children -> French regions
+
+    format=topojson returns shared-arc, quantized geometry under "topology".
     """
+    if format not in ("geojson", "topojson"):
+        return msgpack_error("format must be geojson or topojson", 400)
     try:
-        result = get_location_children_handler(loc_id)
+        result = get_location_children_handler(loc_id, topology=(format == "topojson"))
         return msgpack_response(result)
     except Exception as e:
         logger.error(f"Error in /geometry/{loc_id}/children: {e}")
@@ -561,7 +640,8 @@ async def get_location_info_endpoint(loc_id: str):
 
 
 @app.get("/geometry/viewport")
-async def get_viewport_geometry_endpoint(level: int = 0, bbox: str = None, debug: bool = False):
+async def get_viewport_geometry_endpoint(level: int = 0, bbox: str = None, debug: bool = False, cells: str = None,
+                                         format: str = "geojson"):
     """
     Get geometry features within a viewport bounding box.
 
@@ -569,11 +649,33 @@ async def get_viewport_geometry_endpoint(level: int = 0, bbox: str = None, debug
         level: Admin level (0=countries, 1=states, 2=counties, 3=subdivisions)
         bbox: Bounding box as "minLon,minLat,maxLon,maxLat"
         debug: If true, include coverage info for level 0 features
+        cells: Optional grid cells as "cx:cy,cx:cy" (see metadata.cell_size);
+               when given, only these cells are returned and bbox only selects
+               the geometry detail level
+        format: "geojson" (default) or "topojson" for a shared-arc, quantized Topology
 
     Returns:
         GeoJSON FeatureCollection with features intersecting the viewport
     """
+    if format not in ("geojson", "topojson"):
+        return msgpack_error("format must be geojson or topojson", 400)
+    topology = format == "topojson"
     try:
+        if cells is not None:
+            try:
+                cell_list = [tuple(int(v) for v in c.split(':')) for c in cells.split(',') if c]
+                bbox_tuple = tuple(float(x) for x in bbox.split(',')) if bbox else None
+            except ValueError:
+                return msgpack_error("cells must be cx:cy,cx:cy", 400)
+            if any(len(c) != 2 for c in cell_list) or (bbox_tuple and len(bbox_tuple) != 4):
+                return msgpack_error("cells must be cx:cy,cx:cy", 400)
+            try:
+                result = get_viewport_geometry_handler(level, bbox_tuple, debug=debug, cells=cell_list,
+                                                       topology=topology)
+            except ValueError as e:
+                return msgpack_error(str(e), 400)
+            return msgpack_response(result)
+
         if bbox:
             # Parse bbox string
             parts = [float(x) for x in bbox.split(',')]
@@ -584,24 +686,121 @@ async def get_viewport_geometry_endpoint(level: int = 0, bbox: str = None, debug
             # Default to world view
             bbox_tuple = (-180, -90, 180, 90)
 
-        result = get_viewport_geometry_handler(level, bbox_tuple, debug=debug)
+        result = get_viewport_geometry_handler(level, bbox_tuple, debug=debug, topology=topology)
         return msgpack_response(result)
     except Exception as e:
         logger.error(f"Error in /geometry/viewport: {e}")
         return msgpack_error(str(e), 500)
 
 
+@app.get("/geometry/locate")
+async def locate_point_endpoint(lat: float, lon: float, max_level: int = None):
+    """
+    Reverse geocode one point to its loc_id hierarchy (country -> admin1 -> ...).
+
+    Args:
+        lat, lon: Point coordinates
+        max_level: Deepest admin level to resolve (default: all with geometry)
+
+    Returns:
+        {loc_id: deepest match or null, hierarchy: [{admin_level, loc_id, name}, ...]}
+    """
+    try:
+        loop = asyncio.get_event_loop()
+        results = await loop.run_in_executor(None, locate_points, [lon], [lat], max_level)
+        return msgpack_response(results[0])
+    except RuntimeError as e:
+        return msgpack_error(str(e), 503)
+    except Exception as e:
+        logger.error(f"Error in /geometry/locate: {e}")
+        return msgpack_error(str(e), 500)
+
+
+@app.post("/geometry/locate")
+async def locate_points_endpoint(req: Request):
+    """
+    Reverse geocode a batch of points.
+
+    Body: { points: [[lon, lat], ...], max_level: optional int }
+    Returns: { results: [{loc_id, hierarchy}, ...] } in input order
+    """
+    try:
+        body = await decode_request_body(req)
+        points = body.get("points") or []
+        if len(points) > MAX_LOCATE_POINTS:
+            return msgpack_error(f"Too many points ({len(points)} > {MAX_LOCATE_POINTS})", 400)
+        if any(not isinstance(p, (list, tuple)) or len(p) != 2 for p in points):
+            return msgpack_error("points must be [[lon, lat], ...]", 400)
+
+        lons = [p[0] for p in points]
+        lats = [p[1] for p in points]
+        loop = asyncio.get_event_loop()
+        results = await loop.run_in_executor(None, locate_points, lons, lats, body.get("max_level"))
+        return msgpack_response({"results": results})
+    except RuntimeError as e:
+        return msgpack_error(str(e), 503)
+    except (TypeError, ValueError) as e:
+        return msgpack_error(str(e), 400)
+    except Exception as e:
+        logger.error(f"Error in POST /geometry/locate: {e}")
+        return msgpack_error(str(e), 500)
+
+
 @app.post("/geometry/cache/clear")
 async def clear_geometry_cache_endpoint():
     """Clear the geometry cache. Useful after updating data files."""
     try:
         clear_geometry_cache()
+        clear_locate_cache()
+        clear_preprocess_memo()
         return msgpack_response({"message": "Geometry cache cleared"})
     except Exception as e:
         logger.error(f"Error clearing geometry cache: {e}")
         return msgpack_error(str(e), 500)
 
 
+@app.post("/admin/interpret/cache/clear")
+async def clear_interpret_cache_endpoint():
+    """
+    Drop cached LLM interpretations. Not needed after a catalog update (the
+    cache is keyed by catalog generation) or a geometry refresh.
+    """
+    try:
+        clear_interpret_cache()
+        return msgpack_response({"message": "Interpretation cache cleared"})
+    except Exception as e:
+        logger.error(f"Error clearing interpretation cache: {e}")
+        return msgpack_error(str(e), 500)
+
+
+@app.get("/admin/cache/stats")
+async def get_cache_stats_endpoint():
+    """
+    In-process cache statistics: entries, estimated bytes, byte budget,
+    hits, misses, evictions and hit rate per cache.
+    """
+    try:
+        caches = get_geometry_cache_stats() + [locate_stats(), weather_frame_reader.stats()] + preprocess_memo_stats() + [interpret_cache_stats()]
+        return msgpack_response({"caches": caches})
+    except Exception as e:
+        logger.error(f"Error in /admin/cache/stats: {e}")
+        return msgpack_error(str(e), 500)
+
+
+@app.get("/admin/preprocess/stats")
+async def get_preprocess_stats_endpoint():
+    """
+    Preprocessor stage timings: p50/p99/max ms per detector over recent
+    chat queries, and the configured budget (PREPROCESS_BUDGET_MS), plus
+    fast-path orders built and LLM fallbacks by reason.
+    """
+    try:
+        return msgpack_response({**get_preprocess_timing_stats(), "fast_orders": fast_order_stats()})
+    except Exception as e:
+        logger.error(f"Error in /admin/preprocess/stats: {e}")
+        return msgpack_error(str(e), 500)
+
+
 @app.post("/geometry/selection")
 async def get_selection_geometry_endpoint(req: Request):
     """
@@ -2908,12 +3107,16 @@ async def get_weather_grid(
     tier: str,
     variable: str = None,
     variables: str = None,
-    year: int = None
+    year: int = None,
+    direction: str = 'forward',
+    prefetch: int = None
 ):
     """
     Get weather grid data for animation.
 
     Loads parquet files and pivots to wide format for efficient animation.
+    Frames are read concurrently and cached (see mapmover/weather_frames.py);
+    after responding, the next frames in the playback direction are prefetched.
     Returns timestamps array + values dict (keyed by variable, 16,020 values per timestamp).
 
     Args:
@@ -2921,29 +3124,21 @@ async def get_weather_grid(
         variable: Single variable (legacy, for backwards compatibility)
         variables: Comma-separated list of variables (e.g., 'temp_c,humidity,snow_depth_m')
         year: For monthly tier, which year to load
+        direction: Playback direction for prefetch ('forward' or 'backward')
+        prefetch: Frames to prefetch past this request (default WEATHER_PREFETCH_FRAMES,
+            at most WEATHER_PREFETCH_MAX)
 
     Response format:
         Single variable: { values: [[...], ...], variable: 'temp_c', ... }
         Multiple variables: { values: { temp_c: [[...], ...], humidity: [[...], ...] }, variables: [...], ... }
     """
-    import pandas as pd
-    import numpy as np
-    from glob import glob
-    from datetime import datetime, timezone
-
     try:
-        weather_base = GLOBAL_DIR / "climate" / "weather"
-
         # Validate tier
         if tier not in ('hourly', 'weekly', 'monthly'):
             return msgpack_error(f"Invalid tier: {tier}. Must be hourly, weekly, or monthly", 400)
 
         # Parse variables - support both single 'variable' and multi 'variables' params
-        valid_vars = {
-            'temp_c', 'humidity', 'snow_depth_m',
-            'precipitation_mm', 'cloud_cover_pct', 'pressure_hpa',
-            'solar_radiation', 'soil_temp_c', 'soil_moisture'
-        }
+        valid_vars = WEATHER_VARIABLES
         if variables:
             # Multi-variable request
             requested_vars = [v.strip() for v in variables.split(',')]
@@ -2961,35 +3156,18 @@ async def get_weather_grid(
 
         is_multi = len(requested_vars) > 1
 
+        if direction not in ('forward', 'backward'):
+            return msgpack_error(f"Invalid direction: {direction}. Must be forward or backward", 400)
+
         # Tier cascade: if requested tier unavailable for year, fall back to finer resolution
         actual_tier = tier
         files = []
 
         def get_files_for_tier(t, y):
             """Get parquet files for a tier/year combo."""
-            t_dir = weather_base / t
-            if not t_dir.exists():
+            if t == 'monthly' and y is None:
                 return []
-
-            if t == 'monthly':
-                if y is None:
-                    return []
-                y_dir = t_dir / str(y)
-                if not y_dir.exists():
-                    return []
-                return sorted(glob(str(y_dir / "*.parquet")))
-            elif t == 'weekly':
-                # For weekly, filter to requested year if specified
-                all_files = sorted(glob(str(t_dir / "**" / "*.parquet"), recursive=True))
-                if y is not None:
-                    return [f for f in all_files if f"/{y}/" in f.replace("\\", "/") or f"\\{y}\\" in f]
-                return all_files
-            else:  # hourly
-                # For hourly, filter to requested year if specified
-                all_files = sorted(glob(str(t_dir / "**" / "*.parquet"), recursive=True))
-                if y is not None:
-                    return [f for f in all_files if f"/{y}/" in f.replace("\\", "/") or f"\\{y}\\" in f]
-                return all_files
+            return list_weather_files(t, y)
 
         # Try requested tier first
         files = get_files_for_tier(tier, year)
@@ -3022,150 +3200,27 @@ async def get_weather_grid(
         if not files:
             return msgpack_error(f"No {tier} data files found for year {year}", 404)
 
-        # Read and pivot data - support multiple variables in one pass
-        timestamps = []
-        all_values = {var: [] for var in requested_vars}  # Dict of lists per variable
-        grid_info = None  # Will be set from first file
-
-        # Columns to read: lat, lon, plus all requested variables
-        columns_to_read = ['lat', 'lon'] + requested_vars
+        # Read frames concurrently (only lat, lon + requested variables) in a worker
+        # thread so the event loop keeps serving other requests during the read
+        def read_series():
+            frames = weather_frame_reader.read_frames(files, actual_tier, requested_vars)
+            return weather_frames_to_series(frames, requested_vars)
 
-        for filepath in files:
-            try:
-                df = pd.read_parquet(filepath, columns=columns_to_read)
-
-                # Parse timestamp from path based on actual tier (not requested tier)
-                path_parts = Path(filepath).parts
-                if actual_tier == 'monthly':
-                    # monthly/YYYY/MM.parquet
-                    yr = int(path_parts[-2])
-                    mo = int(path_parts[-1].replace('.parquet', ''))
-                    ts = datetime(yr, mo, 1, tzinfo=timezone.utc)
-                elif actual_tier == 'weekly':
-                    # weekly/YYYY/WW.parquet
-                    yr = int(path_parts[-2])
-                    wk = int(path_parts[-1].replace('.parquet', ''))
-                    # Convert ISO week to timestamp (Monday of that week)
-                    ts = datetime.strptime(f'{yr}-W{wk:02d}-1', '%G-W%V-%u').replace(tzinfo=timezone.utc)
-                else:  # hourly
-                    # hourly/YYYY/MM/DD/HH.parquet
-                    yr = int(path_parts[-4])
-                    mo = int(path_parts[-3])
-                    dy = int(path_parts[-2])
-                    hr = int(path_parts[-1].replace('.parquet', ''))
-                    ts = datetime(yr, mo, dy, hr, tzinfo=timezone.utc)
-
-                # Sort by lat (desc) then lon (asc) for consistent grid ordering
-                df = df.sort_values(['lat', 'lon'], ascending=[False, True])
-
-                # Extract actual grid coordinates from first file
-                if grid_info is None:
-                    unique_lats = sorted(df['lat'].unique(), reverse=True)  # Descending
-                    unique_lons = sorted(df['lon'].unique())  # Ascending
-
-                    # Calculate step size from actual data
-                    lat_step = abs(unique_lats[1] - unique_lats[0]) if len(unique_lats) > 1 else 2
-                    lon_step = abs(unique_lons[1] - unique_lons[0]) if len(unique_lons) > 1 else 2
-
-                    grid_info = {
-                        'lat_start': float(unique_lats[0]),  # First (highest) latitude
-                        'lon_start': float(unique_lons[0]),  # First (lowest) longitude
-                        'lat_step': float(lat_step),
-                        'lon_step': float(lon_step),
-                        'rows': len(unique_lats),
-                        'cols': len(unique_lons)
-                    }
-
-                # Extract values for each requested variable
-                ts_ms = int(ts.timestamp() * 1000)
-                timestamps.append(ts_ms)
-
-                for var in requested_vars:
-                    values = df[var].values.tolist()
-                    # Replace NaN with None for JSON compatibility
-                    values = [None if (isinstance(v, float) and np.isnan(v)) else v for v in values]
-                    all_values[var].append(values)
-
-            except Exception as e:
-                logger.warning(f"Could not read {filepath}: {e}")
-                continue
+        loop = asyncio.get_event_loop()
+        timestamps, all_values, grid_info = await loop.run_in_executor(None, read_series)
 
         if not timestamps:
             return msgpack_error("No valid data files could be read", 500)
 
-        # Sort by timestamp - need to sort all variables together
-        sort_indices = sorted(range(len(timestamps)), key=lambda i: timestamps[i])
-        timestamps = [timestamps[i] for i in sort_indices]
-        for var in requested_vars:
-            all_values[var] = [all_values[var][i] for i in sort_indices]
-
-        # Color scale configuration
-        color_scales = {
-            'temp_c': {
-                'min': -40, 'max': 45,
-                'stops': [
-                    [-40, '#00008B'], [-30, '#0000FF'], [-10, '#87CEEB'],
-                    [0, '#FFFFFF'], [10, '#FFFF99'], [25, '#FFA500'],
-                    [35, '#FF0000'], [45, '#8B0000']
-                ]
-            },
-            'humidity': {
-                'min': 0, 'max': 100,
-                'stops': [
-                    [0, '#FFFFFF'], [25, '#E0FFFF'], [50, '#87CEEB'],
-                    [75, '#4682B4'], [100, '#000080']
-                ]
-            },
-            'snow_depth_m': {
-                'min': 0, 'max': 2,
-                'stops': [
-                    [0, '#FFFFFF'], [0.1, '#FFFFFF'], [0.5, '#E6E6FA'],
-                    [1.0, '#9370DB'], [2.0, '#4B0082']
-                ]
-            },
-            'precipitation_mm': {
-                'min': 0, 'max': 50,
-                'stops': [
-                    [0, '#FFFFFF'], [1, '#E0FFE0'], [5, '#90EE90'],
-                    [15, '#228B22'], [30, '#006400'], [50, '#00008B']
-                ]
-            },
-            'cloud_cover_pct': {
-                'min': 0, 'max': 100,
-                'stops': [
-                    [0, '#87CEEB'], [25, '#B0C4DE'], [50, '#A9A9A9'],
-                    [75, '#696969'], [100, '#404040']
-                ]
-            },
-            'pressure_hpa': {
-                'min': 970, 'max': 1050,
-                'stops': [
-                    [970, '#8B0000'], [990, '#FF6347'], [1010, '#FFFFFF'],
-                    [1030, '#87CEEB'], [1050, '#00008B']
-                ]
-            },
-            'solar_radiation': {
-                'min': 0, 'max': 1000,
-                'stops': [
-                    [0, '#000000'], [100, '#4B0082'], [300, '#FF8C00'],
-                    [600, '#FFD700'], [1000, '#FFFFFF']
-                ]
-            },
-            'soil_temp_c': {
-                'min': -20, 'max': 40,
-                'stops': [
-                    [-20, '#00008B'], [-10, '#0000FF'], [0, '#8B4513'],
-                    [15, '#D2691E'], [30, '#FF4500'], [40, '#8B0000']
-                ]
-            },
-            'soil_moisture': {
-                'min': 0, 'max': 0.5,
-                'stops': [
-                    [0, '#DEB887'], [0.1, '#D2B48C'], [0.2, '#8FBC8F'],
-                    [0.3, '#228B22'], [0.5, '#006400']
-                ]
-            }
-        }
+        # Warm the frame cache for the next stretch of playback (not awaited -
+        # listing and queueing run off the event loop while we respond)
+        prefetch_count = WEATHER_PREFETCH_FRAMES if prefetch is None else min(max(0, prefetch), WEATHER_PREFETCH_MAX)
+        loop.run_in_executor(
+            None,
+            lambda: weather_frame_reader.prefetch_after(
+                files, actual_tier, requested_vars, direction=direction, count=prefetch_count
+            )
+        )
 
         # Use actual grid info from data, with fallback defaults
         if grid_info is None:
@@ -3185,7 +3240,8 @@ async def get_weather_grid(
                 'timestamps': timestamps,
                 'values': all_values,  # Dict: { 'temp_c': [[...], ...], 'humidity': [[...], ...] }
                 'grid': grid_info,
-                'color_scales': {var: color_scales.get(var, color_scales['temp_c']) for var in requested_vars},
+                'color_scales': {var: get_weather_color_scale(var) for var in requested_vars},
+                'color_scale_versions': {var: weather_color_scale_version(var) for var in requested_vars},
                 'count': len(timestamps)
             })
         else:
@@ -3198,7 +3254,8 @@ async def get_weather_grid(
                 'timestamps': timestamps,
                 'values': all_values[single_var],  # List: [[...], ...]
                 'grid': grid_info,
-                'color_scale': color_scales.get(single_var, color_scales['temp_c']),
+                'color_scale': get_weather_color_scale(single_var),
+                'color_scale_version': weather_color_scale_version(single_var),
                 'count': len(timestamps)
             })
 
@@ -3282,6 +3339,78 @@ async def get_weather_available():
         return msgpack_error(str(e), 500)
 
 
+async def _weather_image_response(variable: str, tier: str, timestamp: int, fmt: str,
+                                  width: int = None, tile: tuple = None) -> Response:
+    """Render (or load from disk cache) a weather image in a worker thread."""
+    valid_vars = WEATHER_VARIABLES
+    if variable not in valid_vars:
+        return msgpack_error(f"Invalid variable: {variable}. Must be one of: {valid_vars}", 400)
+    if tier not in ('hourly', 'weekly', 'monthly'):
+        return msgpack_error(f"Invalid tier: {tier}. Must be hourly, weekly, or monthly", 400)
+    if fmt not in WEATHER_IMAGE_FORMATS:
+        return msgpack_error(f"Invalid format: {fmt}. Must be one of: {', '.join(WEATHER_IMAGE_FORMATS)}", 400)
+
+    kwargs = {"fmt": fmt, "tile": tile}
+    if width is not None:
+        kwargs["width"] = width
+
+    try:
+        loop = asyncio.get_event_loop()
+        content = await loop.run_in_executor(
+            None, lambda: render_weather_image(variable, tier, timestamp, **kwargs)
+        )
+    except FileNotFoundError as e:
+        return msgpack_error(str(e), 404)
+    except ValueError as e:
+        return msgpack_error(str(e), 400)
+    except Exception as e:
+        logger.error(f"Error rendering weather image: {e}")
+        return msgpack_error(str(e), 500)
+
+    # URL includes the colour scale version (v=...) on the client, so renders are immutable
+    return Response(
+        content=content,
+        media_type=f"image/{fmt}",
+        headers={"Cache-Control": "public, max-age=86400"}
+    )
+
+
+@app.get("/api/weather/frame")
+async def get_weather_frame_image(
+    variable: str,
+    tier: str,
+    timestamp: int,
+    format: str = 'png',
+    width: int = None
+):
+    """
+    Render one weather frame as a whole-globe colour-mapped image.
+
+    Equirectangular, lat 89.9 to -89.9 and lon -180 to 180 (same extent as the
+    client-side canvas overlay). Rendered images are cached on disk by
+    (variable, colour scale version, tier, timestamp, width).
+
+    Args:
+        variable: Weather variable (e.g., 'temp_c')
+        tier: 'hourly', 'weekly', or 'monthly'
+        timestamp: Frame timestamp in ms (from /api/weather/grid timestamps)
+        format: 'png' (default) or 'webp'
+        width: Image width in pixels (default 360, height = width / 2)
+    """
+    return await _weather_image_response(variable, tier, timestamp, format, width=width)
+
+
+@app.get("/api/weather/tiles/{variable}/{z}/{x}/{y}.{format}")
+async def get_weather_tile_image(variable: str, z: int, x: int, y: int, format: str,
+                                 tier: str, timestamp: int):
+    """
+    Render one weather frame as a 256px Web Mercator XYZ tile.
+
+    Example: /api/weather/tiles/temp_c/2/1/1.png?tier=weekly&timestamp=1577664000000
+    """
+    return await _weather_image_response(variable, tier, timestamp, format, tile=(z, x, y))
+
+
 # === Reference Data Endpoints ===
 
 @app.get("/reference/admin-levels")
@@ -3769,8 +3898,11 @@ async def chat_endpoint(req: Request):
         # Navigation, disambiguation, and filter intents are now in hints.candidates
         # =======================================================================
 
-        # Single LLM call to interpret request (with Tier 3/4 context from hints)
-        result = interpret_request(query, chat_history, hints=hints)
+        # Unambiguous "X in Y for Z" data requests are built from the hints directly;
+        # otherwise a single LLM call interprets the request (with Tier 3/4 context from hints)
+        result = build_fast_order(hints)
+        if result is None:
+            result = await interpret_request(query, chat_history, hints=hints, endpoint="chat")
 
         # =======================================================================
         # POST-LLM ROUTING (Phase 4 Refactor)
@@ -4022,7 +4154,7 @@ async def chat_stream_endpoint(req: Request):
                             "original_query": query,
                             "geojson": geojson,
                         }
-                        yield f"data: {json.dumps({'stage': 'complete', 'result': result})}\n\n"
+                        yield f"data: {json.dumps({'stage': 'complete', 'result': result}, default=geometry_json_default)}\n\n"
                         return
                 result = {"type": "chat", "reply": "I don't have a list of locations to display."}
                 yield f"data: {json.dumps({'stage': 'complete', 'result': result})}\n\n"
@@ -4045,14 +4177,16 @@ async def chat_stream_endpoint(req: Request):
                     yield f"data: {json.dumps({'stage': 'complete', 'result': result})}\n\n"
                     return
 
-            # Stage 2: Thinking (LLM call)
-            t_llm_start = time.time()
-            yield f"data: {json.dumps({'stage': 'thinking', 'message': 'Understanding your intent...'})}\n\n"
-            await asyncio.sleep(0)
+            # Stage 2: Thinking (LLM call, unless the order can be built from the hints)
+            result = build_fast_order(hints)
+            if result is None:
+                t_llm_start = time.time()
+                yield f"data: {json.dumps({'stage': 'thinking', 'message': 'Understanding your intent...'})}\n\n"
+                await asyncio.sleep(0)
 
-            result = interpret_request(query, chat_history, hints=hints)
-            t_llm_end = time.time()
-            logger.info(f"[TIMING] LLM call: {(t_llm_end - t_llm_start)*1000:.0f}ms")
+                result = await interpret_request(query, chat_history, hints=hints, endpoint="chat_stream")
+                t_llm_end = time.time()
+                logger.info(f"[TIMING] LLM call: {(t_llm_end - t_llm_start)*1000:.0f}ms")
 
             # Stage 3: Preparing (postprocessor for orders)
             if result["type"] == "order":
@@ -9,6 +9,7 @@ This package provides:
 - Geometry joining (geometry_joining.py)
 - Geometry endpoint handlers (geometry_handlers.py)
 - Order Taker LLM (order_taker.py)
+- Fast-path order builder (order_builder.py)
 - Order Executor (order_executor.py)
 - Logging and analytics (logging_analytics.py)
 - Utility functions (utils.py)
@@ -38,6 +39,7 @@ from .paths import (
     LOGS_DIR,
     CONFIG_PATH,
     SETTINGS_PATH,
+    CACHE_DIR,
     # Private paths
     BUILD_DIR,
     CONVERTERS_DIR,
@@ -87,6 +89,8 @@ from .data_loading import (
     get_data_folder,
     get_catalog_path,
     load_catalog,
+    get_catalog_index,
+    catalog_generation,
     load_source_metadata,
     get_source_by_topic,
     clear_metadata_cache,
@@ -125,6 +129,7 @@ from .geometry_handlers import (
 
 # Order Taker system
 from .order_taker import interpret_request
+from .order_builder import build_fast_order
 from .order_executor import execute_order
 
 # Preprocessor for tiered context
@@ -182,6 +187,7 @@ __all__ = [
     "LOGS_DIR",
     "CONFIG_PATH",
     "SETTINGS_PATH",
+    "CACHE_DIR",
     "BUILD_DIR",
     "CONVERTERS_DIR",
     "DOWNLOADERS_DIR",
@@ -219,6 +225,8 @@ __all__ = [
     "get_data_folder",
     "get_catalog_path",
     "load_catalog",
+    "get_catalog_index",
+    "catalog_generation",
     "load_source_metadata",
     "get_source_by_topic",
     "clear_metadata_cache",
@@ -243,6 +251,7 @@ __all__ = [
     "clear_cache",
     # Order Taker
     "interpret_request",
+    "build_fast_order",
     "execute_order",
     # Preprocessor
     "preprocess_query",
@@ -0,0 +1,204 @@
+"""
+Search index over catalog sources for preprocessor source detection.
+
+Source detection used to loop over every catalog source per query,
+substring-testing its name, name parts and source_id, and topic matching
+substring-tested every source's topic tags and keywords. CatalogIndex is built
+once per catalog (data_loading.get_catalog_index, rebuilt when catalog.json
+changes) and answers those questions from inverted indexes:
+
+- phrase_candidates(text): sources whose name, a name part or source_id could
+  occur in text. Every word (alphanumeric run) of a phrase found in text is a
+  substring of a word of text, so only sources indexed under a substring of a
+  query word are returned - the exact substring tests then run on those only.
+- tag_matches(terms): sources with a topic tag or keyword containing a term.
+- scope_positions(scope): sources with this scope (e.g. an ISO3 code).
+- scores(text): BM25 relevance of each source to text over its name, source_id,
+  topic tags, keywords and metric labels (fields weighted by FIELD_WEIGHTS),
+  plus PHRASE_BOOSTS for a whole name, name part or source_id found as
+  consecutive words of text. Used to rank sources where detection rules tie:
+  rule-based confidences are kept as they are (order_builder and the hint
+  builder compare them against fixed cutoffs); relevance only orders sources
+  of equal confidence.
+
+Sources are referred to by their position in the catalog's sources list.
+
+Usage:
+    from mapmover.catalog_index import CatalogIndex
+
+    index = CatalogIndex(catalog["sources"])
+    for position in index.phrase_candidates("abs population data"):
+        print(index.sources[position]["source_id"])
+    ranked = sorted(index.scores("co2 emissions").items(), key=lambda item: -item[1])
+"""
+
+import math
+import re
+
+# Words: alphanumeric runs (underscores split source_ids and metric keys)
+_WORD_RE = re.compile(r"[^\W_]+")
+
+# Per-field term frequency weights (BM25F-style)
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "id": 3.0,
+    "tags": 2.0,
+    "keywords": 2.0,
+    "metrics": 1.0,
+}
+
+# Added to a source's score when the phrase occurs as consecutive query words
+PHRASE_BOOSTS = {
+    "name": 10.0,
+    "part": 5.0,
+    "id": 8.0,
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list:
+    """Lowercase words of text."""
+    return _WORD_RE.findall(text.lower()) if text else []
+
+
+def name_parts(source_name: str) -> list:
+    """Main parts of a source name, split on ' - ' and ': ' (e.g. 'ABS - Regional Demographics')."""
+    if not source_name:
+        return []
+    return [p.strip() for p in source_name.replace(' - ', '|').replace(': ', '|').split('|')]
+
+
+class CatalogIndex:
+    """Inverted indexes over a list of catalog sources."""
+
+    def __init__(self, sources: list):
+        self.sources = sources
+        n = len(sources)
+
+        postings = {}        # term -> {position: weighted term frequency}
+        lengths = [0.0] * n  # weighted document lengths
+        phrase_words = {}    # word of a name / part / source_id -> {positions}
+        always = set()       # sources with a phrase that has no words (never ruled out)
+        tag_words = {}       # word of a topic tag / keyword -> {positions}
+        tag_strings = []     # lowercased topic tags + keywords per source
+        phrases = {}         # first word -> [(words tuple, boost, position)]
+        scopes = {}          # lowercased scope -> [positions]
+
+        for position, source in enumerate(sources):
+            source_id = source.get("source_id", "") or ""
+            source_name = source.get("source_name", "") or ""
+            scope = source.get("scope", "global") or ""
+            scopes.setdefault(scope.lower(), []).append(position)
+            tags = [t for t in source.get("topic_tags", []) or [] if isinstance(t, str)]
+            keywords = [k for k in source.get("keywords", []) or [] if isinstance(k, str)]
+            metrics = source.get("metrics", {}) or {}
+            labels = [info.get("name", key) if isinstance(info, dict) else key for key, info in metrics.items()]
+
+            fields = {
+                "name": tokenize(source_name),
+                "id": tokenize(source_id),
+                "tags": [w for t in tags for w in tokenize(t)],
+                "keywords": [w for k in keywords for w in tokenize(k)],
+                "metrics": [w for label in labels if isinstance(label, str) for w in tokenize(label)],
+            }
+            for field, words in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                lengths[position] += weight * len(words)
+                for word in words:
+                    tf = postings.setdefault(word, {})
+                    tf[position] = tf.get(position, 0.0) + weight
+
+            exact = []
+            if source_name:
+                exact.append((source_name.lower(), "name"))
+                exact.extend((part.lower(), "part") for part in name_parts(source_name) if len(part) >= 4)
+            if source_id:
+                exact.append((source_id.lower(), "id"))
+            for phrase, kind in exact:
+                words = tokenize(phrase)
+                if not words:
+                    always.add(position)
+                    continue
+                for word in words:
+                    phrase_words.setdefault(word, set()).add(position)
+                phrases.setdefault(words[0], []).append((tuple(words), PHRASE_BOOSTS[kind], position))
+
+            strings = [s.lower() for s in tags + keywords]
+            tag_strings.append(strings)
+            for s in strings:
+                for word in tokenize(s):
+                    tag_words.setdefault(word, set()).add(position)
+
+        self._postings = postings
+        self._idf = {term: math.log(1 + (n - len(tf) + 0.5) / (len(tf) + 0.5)) for term, tf in postings.items()}
+        average = sum(lengths) / n if n else 0.0
+        self._norms = [BM25_K1 * (1 - BM25_B + BM25_B * length / average) if average else BM25_K1
+                       for length in lengths]
+        self._phrase_words = phrase_words
+        self._phrase_word_lengths = sorted({len(w) for w in phrase_words})
+        self._always = always
+        self._tag_words = tag_words
+        self._tag_strings = tag_strings
+        self._phrases = phrases
+        self._scopes = scopes
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def phrase_candidates(self, text: str) -> list:
+        """
+        Positions of sources whose lowercased name, name parts or source_id
+        may be substrings of text (a superset of those that are), ascending.
+        """
+        found = set(self._always)
+        phrase_words = self._phrase_words
+        for word in tokenize(text):
+            for size in self._phrase_word_lengths:
+                if size > len(word):
+                    break
+                for start in range(len(word) - size + 1):
+                    positions = phrase_words.get(word[start:start + size])
+                    if positions:
+                        found |= positions
+        return sorted(found)
+
+    def tag_matches(self, terms) -> set:
+        """Positions of sources with a topic tag or keyword containing any of terms (case-insensitive)."""
+        found = set()
+        for term in terms:
+            term = term.lower()
+            if _WORD_RE.fullmatch(term):
+                # A single word can only occur inside one word of a tag. The
+                # tag vocabulary is small, so it is scanned rather than caching
+                # results per query term (which would grow with every query).
+                for word, matched in self._tag_words.items():
+                    if term in word:
+                        found |= matched
+            else:
+                found.update(p for p, strings in enumerate(self._tag_strings)
+                             if any(term in s for s in strings))
+        return found
+
+    def scope_positions(self, scope: str) -> list:
+        """Positions of sources whose scope is scope (case-insensitive)."""
+        return self._scopes.get(scope.lower(), []) if scope else []
+
+    def scores(self, text: str) -> dict:
+        """BM25 score plus phrase boosts of every source sharing a word with text: {position: score}."""
+        words = tokenize(text)
+        scores = {}
+        for word in set(words):
+            tf = self._postings.get(word)
+            if tf is None:
+                continue
+            idf = self._idf[word]
+            for position, f in tf.items():
+                scores[position] = scores.get(position, 0.0) + idf * f * (BM25_K1 + 1) / (f + self._norms[position])
+
+        for i, word in enumerate(words):
+            for phrase, boost, position in self._phrases.get(word, ()):
+                if tuple(words[i:i + len(phrase)]) == phrase:
+                    scores[position] = scores.get(position, 0.0) + boost
+        return scores
@@ -0,0 +1,259 @@
+"""
+Geometry coverage manifest for viewport debug mode.
+
+Debug mode shows, per country, how many rows each admin level has and how
+many of them carry geometry. Computing that from the parquet on every request
+loaded every country's full geometry for a single world-view request. This
+module keeps the per-level counts in a small JSON manifest keyed by iso3,
+stored at CACHE_DIR/geometry_coverage.json.
+
+Entries record the source file's size and mtime and are recomputed when the
+file changes. Missing entries are computed on first lookup by reading only the
+admin_level column; rows without geometry come from the geometry column's
+row-group null counts, and the geometry column itself is only read for row
+groups whose statistics can't attribute them to one level (see _count_levels).
+build_manifest() computes every country up front (run by warmup.py, or from
+the command line after a data update).
+
+- coverage_for(iso3, from_level) -> level_counts, geometry_counts, coverage, depths
+- build_manifest() -> number of countries (re)computed
+
+Usage:
+    python -m mapmover.coverage_manifest    # rebuild stale/missing entries
+"""
+
+import json
+import logging
+import os
+import threading
+
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .paths import CACHE_DIR, COUNTRIES_DIR, GEOMETRY_DIR
+
+logger = logging.getLogger("mapmover")
+
+MANIFEST_FILE = CACHE_DIR / "geometry_coverage.json"
+
+_manifest = None
+_validated = set()
+_lock = threading.Lock()
+
+
+def _country_file(iso3: str):
+    """Geometry parquet used for a country (same priority as load_country_parquet)."""
+    country_file = COUNTRIES_DIR / iso3 / "geometry.parquet"
+    if country_file.exists():
+        return country_file
+    global_file = GEOMETRY_DIR / f"{iso3}.parquet"
+    if global_file.exists():
+        return global_file
+    return None
+
+
+def _file_stamp(path) -> dict:
+    stat = path.stat()
+    return {"file": str(path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _missing_geometry(row_group, index):
+    """
+    Rows of a row group without geometry, from the geometry column's statistics.
+    None if the statistics can't tell (no null count, or empty strings present).
+    """
+    if index is None:
+        return row_group.num_rows
+    stats = row_group.column(index).statistics
+    if stats is None or not stats.has_null_count:
+        return None
+    if stats.has_min_max:
+        # Empty strings count as no geometry but are not nulls; they sort first
+        if stats.min in ("", b""):
+            return None
+    elif stats.null_count != row_group.num_rows:
+        return None
+    return stats.null_count
+
+
+def _count_levels(path) -> dict:
+    """
+    {level: [rows, rows_with_geometry]}.
+
+    Reads only the admin_level column. Rows without geometry are taken from
+    the geometry column's row-group null counts when they can be attributed:
+    the row group has no nulls, only nulls, or a single admin level (files
+    written by scripts/cluster_geometry.py are sorted by level). Otherwise
+    that row group's geometry column is read.
+    """
+    counts = {}
+    parquet = pq.ParquetFile(path)
+    metadata = parquet.metadata
+    names = metadata.schema.names
+    geometry_index = names.index('geometry') if 'geometry' in names else None
+
+    for g in range(metadata.num_row_groups):
+        row_group = metadata.row_group(g)
+        levels = parquet.read_row_group(g, columns=['admin_level']).column('admin_level')
+        levels = levels.to_numpy(zero_copy_only=False)
+        present = sorted({v for v in levels.tolist() if v is not None and v == v})
+        masks = [(level, levels == level) for level in present]
+
+        missing = _missing_geometry(row_group, geometry_index)
+        single_level = len(masks) == 1 and int(masks[0][1].sum()) == row_group.num_rows
+        if missing is not None and (missing in (0, row_group.num_rows) or single_level):
+            has_geom = None
+        else:
+            geometry = parquet.read_row_group(g, columns=['geometry']).column('geometry')
+            has_geom = pc.fill_null(pc.greater(pc.utf8_length(geometry), 0), False)
+            has_geom = has_geom.to_numpy(zero_copy_only=False)
+
+        for level, mask in masks:
+            rows = int(mask.sum())
+            if has_geom is not None:
+                with_geom = int(has_geom[mask].sum())
+            elif missing == 0:
+                with_geom = rows
+            elif missing == row_group.num_rows:
+                with_geom = 0
+            else:
+                with_geom = rows - missing
+            entry = counts.setdefault(str(int(level)), [0, 0])
+            entry[0] += rows
+            entry[1] += with_geom
+    return counts
+
+
+def _load_manifest() -> dict:
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(MANIFEST_FILE, encoding='utf-8') as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+
+def _save_manifest():
+    try:
+        MANIFEST_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = MANIFEST_FILE.with_name(f"{MANIFEST_FILE.name}.{os.getpid()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(_manifest, f, separators=(',', ':'))
+        os.replace(tmp, MANIFEST_FILE)
+    except OSError as e:
+        logger.warning(f"Could not save coverage manifest: {e}")
+
+
+def _entry(iso3: str, save: bool = True):
+    """
+    Manifest entry for a country, (re)computed if missing or stale. None if no file.
+
+    The file is scanned without holding _lock, so lookups for other countries
+    aren't blocked; the result is swapped in under the lock.
+    """
+    with _lock:
+        entry = _load_manifest().get(iso3)
+        if iso3 in _validated:
+            return entry
+
+    path = _country_file(iso3)
+    if path is None:
+        with _lock:
+            _load_manifest().pop(iso3, None)
+            _validated.add(iso3)
+        return None
+
+    stamp = _file_stamp(path)
+    if entry is not None and all(entry.get(k) == v for k, v in stamp.items()):
+        with _lock:
+            _validated.add(iso3)
+        return entry
+
+    try:
+        entry = dict(stamp, levels=_count_levels(path))
+    except Exception as e:
+        logger.error(f"Error computing coverage for {iso3}: {e}")
+        return None
+
+    with _lock:
+        _load_manifest()[iso3] = entry
+        _validated.add(iso3)
+        if save:
+            _save_manifest()
+    return entry
+
+
+def coverage_for(iso3: str, from_level: int = 1) -> dict:
+    """
+    Coverage stats for a country from the manifest.
+
+    Args:
+        iso3: Country ISO3 code
+        from_level: Start counting from this level (default 1, excludes country level)
+
+    Returns:
+        dict with level_counts, geometry_counts, coverage, actual_depth, drillable_depth
+    """
+    entry = _entry(iso3) if iso3 else None
+    levels = {k: v for k, v in (entry or {}).get("levels", {}).items() if int(k) >= from_level}
+    if not levels:
+        return {
+            "level_counts": {},
+            "geometry_counts": {},
+            "coverage": 0,
+            "actual_depth": 0,
+            "drillable_depth": 0
+        }
+
+    level_counts = {k: v[0] for k, v in levels.items()}
+    geometry_counts = {k: v[1] for k, v in levels.items()}
+
+    total = sum(level_counts.values())
+    with_geom = sum(geometry_counts.values())
+
+    max_level = max(int(k) for k in levels)
+    min_level = min(int(k) for k in levels)
+    # Drillable depth = deepest level with geometry
+    levels_with_geom = [int(k) for k, v in geometry_counts.items() if v > 0]
+
+    return {
+        "level_counts": level_counts,
+        "geometry_counts": geometry_counts,
+        "coverage": with_geom / total if total > 0 else 0,
+        "actual_depth": max_level - min_level + 1,
+        "drillable_depth": max(levels_with_geom) if levels_with_geom else min_level
+    }
+
+
+def build_manifest() -> int:
+    """Compute entries for every country with geometry. Returns the number recomputed."""
+    countries = {p.stem for p in GEOMETRY_DIR.glob("*.parquet")} if GEOMETRY_DIR.exists() else set()
+    if COUNTRIES_DIR.exists():
+        countries.update(p.parent.name for p in COUNTRIES_DIR.glob("*/geometry.parquet"))
+
+    with _lock:
+        before = {k: (v.get("mtime_ns"), v.get("size")) for k, v in _load_manifest().items()}
+
+    for iso3 in sorted(countries):
+        _entry(iso3, save=False)
+
+    with _lock:
+        _save_manifest()
+        changed = sum(1 for k, v in _manifest.items() if before.get(k) != (v.get("mtime_ns"), v.get("size")))
+    return changed
+
+
+def clear_manifest_cache():
+    """Revalidate entries against their files on next lookup."""
+    global _manifest
+    with _lock:
+        _manifest = None
+        _validated.clear()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    count = build_manifest()
+    print(f"Coverage manifest: {count} countries recomputed, {len(_manifest)} total -> {MANIFEST_FILE}")
@@ -21,6 +21,7 @@ from pathlib import Path
 from typing import Optional, Dict, List, Any, Union
 
 from .paths import GEOMETRY_DIR
+from .geometry_store import geometry_store
 
 # Paths
 SCRIPT_DIR = Path(__file__).parent
@@ -29,7 +30,6 @@ CONVERSIONS_FILE = SCRIPT_DIR / "conversions.json"
 
 # Cache
 _conversions_cache = None
-_geometry_cache = {}  # iso3 -> DataFrame
 
 
 def load_conversions():
@@ -41,18 +41,9 @@ def load_conversions():
     return _conversions_cache
 
 
-def load_geometry(iso3: str) -> Optional[pd.DataFrame]:
-    """Load geometry parquet for a country (cached)."""
-    if iso3 in _geometry_cache:
-        return _geometry_cache[iso3]
-
-    parquet_file = GEOMETRY_PATH / f"{iso3}.parquet"
-    if not parquet_file.exists():
-        return None
-
-    df = pd.read_parquet(parquet_file)
-    _geometry_cache[iso3] = df
-    return df
+def load_geometry(iso3: str, view: str = None) -> Optional[pd.DataFrame]:
+    """Load geometry parquet for a country (held by geometry_store; view: see geometry_store.VIEWS)."""
+    return geometry_store.get(GEOMETRY_PATH / f"{iso3}.parquet", view=view)
 
 
 def get_parent_id(loc_id: str) -> Optional[str]:
@@ -72,7 +63,7 @@ def get_parent_id(loc_id: str) -> Optional[str]:
     iso3 = parts[0]
 
     # Load geometry and find parent
-    df = load_geometry(iso3)
+    df = load_geometry(iso3, view="hierarchy")
     if df is None:
         # Fallback: simple string parsing
         return '-'.join(parts[:-1]) if len(parts) > 1 else None
@@ -118,7 +109,7 @@ def get_children(loc_id: str) -> List[str]:
     parts = loc_id.split('-')
     iso3 = parts[0] if parts else loc_id
 
-    df = load_geometry(iso3)
+    df = load_geometry(iso3, view="hierarchy")
     if df is None:
         return []
 
@@ -432,10 +423,10 @@ class DataCascade:
 
 
 def clear_cache():
-    """Clear all cached data."""
-    global _conversions_cache, _geometry_cache
+    """Clear all cached data (including geometry held by geometry_store)."""
+    global _conversions_cache
     _conversions_cache = None
-    _geometry_cache = {}
+    geometry_store.clear()
 
 
 # Quick test
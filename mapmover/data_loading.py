@@ -36,6 +36,7 @@ import logging
 from pathlib import Path
 
 from .paths import DATA_ROOT, CATALOG_PATH, GEOMETRY_DIR, COUNTRIES_DIR
+from .catalog_index import CatalogIndex
 
 logger = logging.getLogger("mapmover")
 
@@ -48,6 +49,12 @@ _metadata_cache = {}
 # Cache for catalog.json (loaded once)
 _catalog_cache = None
 
+# Search index over the catalog sources: (catalog.json (mtime_ns, size), CatalogIndex)
+_catalog_index = None
+
+# Bumped each time catalog.json is (re)loaded (keys caches of results that used it)
+_catalog_generation = 0
+
 
 def get_data_folder():
     """Get the data folder path (resolved via paths.py)."""
@@ -67,7 +74,7 @@ def load_catalog():
     Returns:
         dict: Catalog with sources, or empty dict if not found
     """
-    global _catalog_cache
+    global _catalog_cache, _catalog_generation
 
     if _catalog_cache is not None:
         return _catalog_cache
@@ -80,6 +87,7 @@ def load_catalog():
     try:
         with open(catalog_path, 'r', encoding='utf-8') as f:
             _catalog_cache = json.load(f)
+            _catalog_generation += 1
             logger.debug(f"Loaded catalog.json with {len(_catalog_cache.get('sources', []))} sources")
             return _catalog_cache
     except Exception as e:
@@ -87,6 +95,54 @@ def load_catalog():
         return {"sources": [], "total_sources": 0}
 
 
+def _catalog_stamp():
+    """(mtime_ns, size) of catalog.json, or None if missing."""
+    try:
+        stat = get_catalog_path().stat()
+    except (OSError, AttributeError):
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_catalog_index() -> CatalogIndex:
+    """
+    Search index over the catalog sources (see catalog_index.py).
+
+    Built on first use (initialize_catalog builds it at startup) and rebuilt,
+    with the catalog reloaded, only when catalog.json changes.
+    """
+    global _catalog_cache, _catalog_index, data_catalog
+
+    stamp = _catalog_stamp()
+    if _catalog_index is not None and _catalog_index[0] == stamp:
+        return _catalog_index[1]
+
+    if _catalog_index is not None:
+        # catalog.json changed since the index was built: reload it
+        initialized = data_catalog is _catalog_cache
+        _catalog_cache = None
+        if initialized:
+            data_catalog = load_catalog()
+        logger.info("catalog.json changed - reloaded catalog")
+
+    index = CatalogIndex(load_catalog().get("sources", []))
+    _catalog_index = (stamp, index)
+    logger.debug(f"Built catalog index over {len(index)} sources")
+    return index
+
+
+def catalog_generation() -> int:
+    """
+    Version of the catalog; changes whenever catalog.json is reloaded.
+
+    Checks catalog.json first (via get_catalog_index), so a changed file is
+    picked up here. Unlike id() of the catalog or its index, a generation is
+    never reused after the old objects are freed.
+    """
+    get_catalog_index()
+    return _catalog_generation
+
+
 def get_source_path(source_id: str):
     """
     Get the path to a source folder using the path field from catalog.
@@ -171,12 +227,13 @@ def get_source_by_topic(topic: str):
 
 def initialize_catalog():
     """
-    Initialize the data catalog by loading catalog.json.
-    Called at server startup.
+    Initialize the data catalog by loading catalog.json and building its
+    search index. Called at server startup.
     """
     global data_catalog
 
     data_catalog = load_catalog()
+    get_catalog_index()
 
     if data_catalog.get("total_sources", 0) > 0:
         logger.info(f"Data catalog loaded: {data_catalog['total_sources']} sources")
@@ -217,48 +274,30 @@ def load_geometry_for_country(iso3: str):
     2. countries/{ISO3}/crosswalk.json -> geometry/{ISO3}.parquet (translated)
     3. geometry/{ISO3}.parquet (GADM fallback)
 
+    If the country-specific file cannot be read, GADM is used instead.
+    The DataFrame is held by geometry_store (shared - copy before modifying).
+
     Returns:
         tuple: (GeoDataFrame, crosswalk_dict or None)
     """
-    import pandas as pd
-
-    countries_folder = get_countries_folder()
-    geometry_folder = get_geometry_folder()
+    from .geometry_store import geometry_store
+    from .loc_index import country_geometry_sources
 
-    # Tier 1: Country-specific geometry (NUTS, ABS LGA, etc.)
-    if countries_folder:
-        country_geom_path = countries_folder / iso3 / "geometry.parquet"
-        if country_geom_path.exists():
-            try:
-                gdf = pd.read_parquet(country_geom_path)
-                logger.debug(f"Loaded {len(gdf)} features from {country_geom_path}")
-                return gdf, None
-            except Exception as e:
-                logger.warning(f"Error loading {country_geom_path}: {e}")
-
-    # Tier 2: Load crosswalk if exists (for translating loc_ids)
     crosswalk = None
-    if countries_folder:
-        crosswalk_path = countries_folder / iso3 / "crosswalk.json"
-        if crosswalk_path.exists():
+    for path, crosswalk_path in country_geometry_sources(iso3):
+        crosswalk = None
+        if crosswalk_path is not None:
             try:
-                import json
                 with open(crosswalk_path, 'r') as f:
                     crosswalk = json.load(f)
                 logger.debug(f"Loaded crosswalk for {iso3}: {len(crosswalk.get('mappings', {}))} mappings")
             except Exception as e:
                 logger.warning(f"Error loading crosswalk {crosswalk_path}: {e}")
 
-    # Tier 3: GADM fallback geometry
-    if geometry_folder:
-        gadm_path = geometry_folder / f"{iso3}.parquet"
-        if gadm_path.exists():
-            try:
-                gdf = pd.read_parquet(gadm_path)
-                logger.debug(f"Loaded {len(gdf)} features from GADM {gadm_path}")
-                return gdf, crosswalk
-            except Exception as e:
-                logger.warning(f"Error loading {gadm_path}: {e}")
+        gdf = geometry_store.get(path)
+        if gdf is not None:
+            return gdf, crosswalk
+        logger.warning(f"Error loading {path}, trying next geometry source")
 
     logger.warning(f"No geometry found for {iso3}")
     return None, crosswalk
@@ -270,14 +309,19 @@ def fetch_geometries_by_loc_ids(loc_ids: list) -> dict:
     Uses 3-tier geometry fallback: country folder -> crosswalk -> GADM.
     Used for "show borders" functionality.
 
+    Rows are found through the loc_id locator index (loc_index.py), so only
+    the row groups holding the requested loc_ids are read. Every row with a
+    requested loc_id is returned. If the country-specific file cannot be
+    indexed or read, GADM is used instead.
+
     Args:
         loc_ids: List of location IDs (e.g., ["USA-WA-53073", "USA-OR-41067"])
 
     Returns:
         GeoJSON FeatureCollection with geometries
     """
-    import pandas as pd
-    import json as json_module
+    from .geometry_cache import pack_geometry
+    from .loc_index import country_geometry_sources, load_locator
 
     if not loc_ids:
         return {"type": "FeatureCollection", "features": []}
@@ -291,93 +335,78 @@ def fetch_geometries_by_loc_ids(loc_ids: list) -> dict:
             country_loc_ids[country] = []
         country_loc_ids[country].append(loc_id)
 
+    columns = ["loc_id", "name", "admin_level", "parent_id", "geometry"]
     all_features = []
 
+    def to_feature(row, loc_id=None, crosswalk_from=None):
+        # Handle geometry - could be string or shapely geometry
+        geom = row.get('geometry')
+        if geom is None:
+            return None
+
+        # Convert to dict if needed (strings are parsed once and kept pre-packed)
+        if hasattr(geom, '__geo_interface__'):
+            geom_dict = geom.__geo_interface__
+        elif isinstance(geom, str):
+            geom_dict = pack_geometry(geom)
+        else:
+            return None
+
+        properties = {
+            "loc_id": loc_id or row.get("loc_id"),  # Original loc_id for crosswalk matches
+            "name": row.get("name"),
+            "admin_level": row.get("admin_level"),
+            "parent_id": row.get("parent_id"),
+        }
+        if crosswalk_from:
+            properties["_crosswalk_from"] = crosswalk_from  # Track translation
+        return {"type": "Feature", "geometry": geom_dict, "properties": properties}
+
     for country, lids in country_loc_ids.items():
-        # Load geometry using 3-tier fallback
-        gdf, crosswalk = load_geometry_for_country(country)
+        # Country-specific file first; GADM if it can't be indexed or read
+        for path, crosswalk_path in country_geometry_sources(country):
+            locator = load_locator(path)
+            if locator is None:
+                continue
 
-        if gdf is None:
-            logger.warning(f"No geometry found for {country}")
-            continue
+            remaining_lids = set(lids)
+            features = []
+
+            try:
+                # First try direct match (rows in file order)
+                for row in locator.read(locator.find(remaining_lids), columns).to_dict('records'):
+                    feature = to_feature(row)
+                    if feature is not None:
+                        features.append(feature)
+                        remaining_lids.discard(row.get("loc_id"))
+
+                # If crosswalk exists and we still have unmatched loc_ids, try translation
+                if crosswalk_path is not None and remaining_lids:
+                    with open(crosswalk_path, 'r') as f:
+                        mappings = json.load(f).get('mappings', {})
+                    translated = {loc_id: mappings[loc_id] for loc_id in remaining_lids if mappings.get(loc_id)}
+                    if translated:
+                        # First row per GADM loc_id
+                        by_gadm = {}
+                        for row in locator.read(locator.find(translated.values()), columns).to_dict('records'):
+                            by_gadm.setdefault(row.get("loc_id"), row)
+                        for loc_id, gadm_id in translated.items():
+                            row = by_gadm.get(gadm_id)
+                            feature = to_feature(row, loc_id, gadm_id) if row is not None else None
+                            if feature is not None:
+                                features.append(feature)
+                                remaining_lids.discard(loc_id)
 
-        # Build lookup set for requested loc_ids
-        remaining_lids = set(lids)
-        found_lids = set()
-
-        try:
-            # First try direct match
-            filtered = gdf[gdf['loc_id'].isin(remaining_lids)]
-
-            if len(filtered) > 0:
-                for _, row in filtered.iterrows():
-                    # Handle geometry - could be string or shapely geometry
-                    geom = row.get('geometry')
-                    if geom is None:
-                        continue
-
-                    # Convert to dict if needed
-                    if hasattr(geom, '__geo_interface__'):
-                        geom_dict = geom.__geo_interface__
-                    elif isinstance(geom, str):
-                        geom_dict = json_module.loads(geom)
-                    else:
-                        continue
-
-                    feature = {
-                        "type": "Feature",
-                        "geometry": geom_dict,
-                        "properties": {
-                            "loc_id": row.get("loc_id"),
-                            "name": row.get("name"),
-                            "admin_level": row.get("admin_level"),
-                            "parent_id": row.get("parent_id"),
-                        }
-                    }
-                    all_features.append(feature)
-                    found_lids.add(row.get("loc_id"))
-
-            remaining_lids -= found_lids
-
-            # If crosswalk exists and we still have unmatched loc_ids, try translation
-            if crosswalk and remaining_lids:
-                mappings = crosswalk.get('mappings', {})
-                for loc_id in list(remaining_lids):
-                    gadm_id = mappings.get(loc_id)
-                    if gadm_id:
-                        match = gdf[gdf['loc_id'] == gadm_id]
-                        if len(match) > 0:
-                            row = match.iloc[0]
-                            geom = row.get('geometry')
-                            if geom is None:
-                                continue
-
-                            if hasattr(geom, '__geo_interface__'):
-                                geom_dict = geom.__geo_interface__
-                            elif isinstance(geom, str):
-                                geom_dict = json_module.loads(geom)
-                            else:
-                                continue
-
-                            feature = {
-                                "type": "Feature",
-                                "geometry": geom_dict,
-                                "properties": {
-                                    "loc_id": loc_id,  # Use original loc_id
-                                    "name": row.get("name"),
-                                    "admin_level": row.get("admin_level"),
-                                    "parent_id": row.get("parent_id"),
-                                    "_crosswalk_from": gadm_id,  # Track translation
-                                }
-                            }
-                            all_features.append(feature)
-                            remaining_lids.discard(loc_id)
+            except Exception as e:
+                logger.error(f"Error processing geometry for {country} from {path}: {e}")
+                continue
 
+            all_features.extend(features)
             if remaining_lids:
                 logger.debug(f"No geometry found for {len(remaining_lids)} loc_ids in {country}: {list(remaining_lids)[:5]}")
-
-        except Exception as e:
-            logger.error(f"Error processing geometry for {country}: {e}")
+            break
+        else:
+            logger.warning(f"No geometry found for {country}")
 
     logger.info(f"Fetched {len(all_features)} geometries for {len(loc_ids)} loc_ids")
 
@@ -0,0 +1,230 @@
+"""
+Multi-pattern name matching for preprocessor location detection.
+
+Location detection used to test every known name against the query with its
+own r'\b' + name + r'\b' regex, re-sorting the names on every call. NameMatcher
+compiles a list of names into an Aho-Corasick automaton once; a query is then
+scanned in a single pass over its characters, reporting every occurrence of
+every name. Each hit is kept only if it starts and ends on a word boundary
+(the same rule as regex \b).
+
+Names keep their position in the list the matcher was built from (their
+rank), so callers can reproduce "first name in list order" semantics - e.g.
+build from names sorted longest first and take the lowest rank.
+
+FuzzyNameIndex finds near matches for misspelled names ("missisippi",
+"tuscon") with a symmetric-delete dictionary (as in SymSpell): every name is
+indexed under the strings obtained by deleting up to max_edits characters
+from its prefix, a query generates its own deletes, and names sharing a key
+are verified with a bounded edit distance (optimal string alignment, so a
+swap of two adjacent letters is one edit). Lookups are a few dict probes.
+
+Usage:
+    from mapmover.gazetteer import NameMatcher, FuzzyNameIndex
+
+    matcher = NameMatcher(sorted(names, key=len, reverse=True))
+    for rank in matcher.ranks("population of new york"):
+        print(matcher.names[rank])
+
+    fuzzy = FuzzyNameIndex(names, max_edits=1)
+    for rank, edits in fuzzy.lookup("tuscon"):
+        print(fuzzy.names[rank], edits)
+"""
+
+from collections import deque
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+def _at_boundary(text: str, pos: int) -> bool:
+    """Regex \\b at pos: exactly one side is a word character."""
+    before = pos > 0 and _is_word(text[pos - 1])
+    after = pos < len(text) and _is_word(text[pos])
+    return before != after
+
+
+class NameMatcher:
+    """Aho-Corasick automaton over a fixed list of (lowercase) names."""
+
+    __slots__ = ('names', '_goto', '_fail', '_out')
+
+    def __init__(self, names):
+        self.names = list(names)
+
+        # Trie: goto[node] = {char: child}, out[node] = ranks of names ending here
+        goto = [{}]
+        out = [()]
+        for rank, name in enumerate(self.names):
+            if not name:
+                continue
+            node = 0
+            for ch in name:
+                child = goto[node].get(ch)
+                if child is None:
+                    child = len(goto)
+                    goto[node][ch] = child
+                    goto.append({})
+                    out.append(())
+                node = child
+            out[node] = out[node] + (rank,)
+
+        # Failure links in BFS order; outputs are merged along the failure chain
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(ch, 0)
+                if out[fail[child]]:
+                    out[child] = out[child] + out[fail[child]]
+                queue.append(child)
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def nbytes(self) -> int:
+        """Rough memory estimate (trie dicts dominate)."""
+        return len(self._goto) * 240 + sum(len(n) for n in self.names) * 2 + 1024
+
+    def find(self, text: str) -> list:
+        """
+        Every whole-word occurrence of a name in text.
+
+        Returns:
+            List of (rank, start, end) in order of end position
+        """
+        goto, fail, out, names = self._goto, self._fail, self._out, self.names
+        hits = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                end = i + 1
+                for rank in out[node]:
+                    start = end - len(names[rank])
+                    if _at_boundary(text, start) and _at_boundary(text, end):
+                        hits.append((rank, start, end))
+        return hits
+
+    def ranks(self, text: str) -> list:
+        """Ranks of the names occurring in text (whole words), ascending."""
+        return sorted({rank for rank, _, _ in self.find(text)})
+
+
+def edit_distance(a: str, b: str, max_edits: int) -> int:
+    """
+    Optimal string alignment distance between a and b (insert, delete,
+    substitute, swap adjacent), or max_edits + 1 if it exceeds max_edits.
+    """
+    if abs(len(a) - len(b)) > max_edits:
+        return max_edits + 1
+    if a == b:
+        return 0
+    over = max_edits + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        ca = a[i - 1]
+        for j in range(1, len(b) + 1):
+            cost = 0 if ca == b[j - 1] else 1
+            d = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and j > 1 and ca == b[j - 2] and a[i - 2] == b[j - 1]:
+                d = min(d, prev2[j - 2] + 1)
+            row[j] = d
+        if min(row) > max_edits:
+            return over
+        prev2, prev = prev, row
+    return prev[-1] if prev[-1] <= max_edits else over
+
+
+def _deletes(text: str, max_edits: int) -> set:
+    """text and every string made by deleting up to max_edits of its characters."""
+    keys = {text}
+    frontier = keys
+    for _ in range(max_edits):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        keys |= frontier
+    return keys
+
+
+class FuzzyNameIndex:
+    """Symmetric-delete index for names within a bounded edit distance of a query."""
+
+    __slots__ = ('names', 'max_edits', 'min_length', 'prefix_length', '_keys')
+
+    def __init__(self, names, max_edits: int = 1, min_length: int = 5, prefix_length: int = 7):
+        """
+        Args:
+            names: Names to index (lowercase); ranks are positions in this list
+            max_edits: Largest edit distance reported
+            min_length: Names and queries shorter than this are not matched
+            prefix_length: Deletes are generated from this many leading
+                characters only (bounds index size; matches are still
+                verified against the whole name)
+        """
+        self.names = list(names)
+        self.max_edits = max_edits
+        self.min_length = min_length
+        self.prefix_length = prefix_length
+
+        keys = {}
+        for rank, name in enumerate(self.names):
+            if len(name) < min_length:
+                continue
+            for key in _deletes(name[:prefix_length], max_edits):
+                postings = keys.get(key)
+                if postings is None:
+                    keys[key] = rank
+                elif isinstance(postings, int):
+                    keys[key] = [postings, rank]
+                else:
+                    postings.append(rank)
+        self._keys = keys
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def nbytes(self) -> int:
+        """Rough memory estimate (delete keys dominate)."""
+        return len(self._keys) * 120 + sum(len(n) for n in self.names) * 2 + 1024
+
+    def lookup(self, text: str, max_edits: int = None) -> list:
+        """
+        Names within max_edits of text (exact matches included).
+
+        Returns:
+            List of (rank, edits), fewest edits first, then by rank
+        """
+        max_edits = self.max_edits if max_edits is None else min(max_edits, self.max_edits)
+        if len(text) < self.min_length:
+            return []
+
+        seen = set()
+        hits = []
+        for key in _deletes(text[:self.prefix_length], max_edits):
+            postings = self._keys.get(key)
+            if postings is None:
+                continue
+            for rank in ((postings,) if isinstance(postings, int) else postings):
+                if rank in seen:
+                    continue
+                seen.add(rank)
+                edits = edit_distance(text, self.names[rank], max_edits)
+                if edits <= max_edits:
+                    hits.append((rank, edits))
+        hits.sort(key=lambda hit: (hit[1], hit[0]))
+        return hits
@@ -0,0 +1,175 @@
+"""
+Pre-packed geometry cache.
+
+Geometry is stored as GeoJSON strings in the geometry parquets and global.csv.
+Parsing those strings and re-packing the same polygons as MessagePack on every
+pan/zoom request dominated geometry endpoint CPU time. This module parses each
+geometry once, keeps its MessagePack encoding, and splices the encoded bytes
+straight into responses.
+
+- pack_geometry(geom_str) -> PackedGeometry (cached by the geometry string)
+- packb(data) -> MessagePack bytes, with PackedGeometry values emitted verbatim
+- json_default(obj) -> json.dumps hook for the few JSON (SSE) responses
+
+PackedGeometry is a read-only Mapping, so existing code that inspects
+geometry['type'] keeps working; other keys decode the packed bytes on demand.
+
+The cache is keyed by the geometry string itself. Strings held by cached
+DataFrames are the same objects on every request, so the lookup hash is
+computed once per string and hits compare by identity.
+
+Configuration (environment variables):
+    GEOMETRY_PACK_CACHE_MB - Packed geometry cache budget in MB (default 256)
+
+Usage:
+    from mapmover.geometry_cache import pack_geometry, packb
+
+    feature = {"type": "Feature", "properties": props, "geometry": pack_geometry(geom_str)}
+    body = packb({"type": "FeatureCollection", "features": [feature]})
+"""
+
+import os
+from collections.abc import Mapping
+
+import msgpack
+
+from .lru_cache import ByteBudgetLRU
+
+# Try orjson for faster JSON parsing (3-10x faster than stdlib json)
+try:
+    import orjson
+    def fast_json_loads(s):
+        return orjson.loads(s)
+except ImportError:
+    import json
+    def fast_json_loads(s):
+        return json.loads(s)
+
+PACK_CACHE_BYTES = int(os.environ.get("GEOMETRY_PACK_CACHE_MB", "256")) * 1024 * 1024
+
+# Extension type code used only as an in-flight placeholder inside packb()
+_FRAGMENT_EXT_CODE = 0x47
+
+
+class PackedGeometry(Mapping):
+    """
+    A GeoJSON geometry held as its MessagePack encoding.
+
+    type is kept decoded (for polygon/point filtering); everything else is
+    decoded lazily from packed when accessed.
+    """
+
+    __slots__ = ('type', 'packed', 'nbytes')
+
+    def __init__(self, geom_type: str, packed: bytes, source_len: int = 0):
+        self.type = geom_type
+        self.packed = packed
+        # Estimated memory held: encoded bytes plus the source string the cache key retains
+        self.nbytes = len(packed) + source_len + 64
+
+    def to_dict(self) -> dict:
+        """Decode to a plain GeoJSON geometry dict."""
+        return msgpack.unpackb(self.packed, raw=False)
+
+    def __getitem__(self, key):
+        if key == 'type':
+            return self.type
+        return self.to_dict()[key]
+
+    def __iter__(self):
+        return iter(self.to_dict())
+
+    def __len__(self):
+        return len(self.to_dict())
+
+    def __repr__(self):
+        return f"PackedGeometry({self.type}, {len(self.packed)} bytes)"
+
+
+_pack_cache = ByteBudgetLRU("packed_geometry", PACK_CACHE_BYTES, sizeof=lambda g: g.nbytes)
+
+
+def pack_geometry(geom):
+    """
+    Get the packed form of a geometry.
+
+    Args:
+        geom: GeoJSON string (cached), or an already-parsed dict (packed, not cached)
+
+    Returns:
+        PackedGeometry
+
+    Raises:
+        ValueError/TypeError: geom is not valid GeoJSON
+    """
+    if isinstance(geom, PackedGeometry):
+        return geom
+
+    if isinstance(geom, str):
+        cached = _pack_cache.get(geom)
+        if cached is not None:
+            return cached
+        geom_dict = fast_json_loads(geom)
+    else:
+        geom_dict = geom
+
+    if not isinstance(geom_dict, dict):
+        raise TypeError(f"Geometry must be a GeoJSON object, got {type(geom_dict).__name__}")
+
+    packed = PackedGeometry(
+        geom_dict.get('type'),
+        msgpack.packb(geom_dict, use_bin_type=True),
+        len(geom) if isinstance(geom, str) else 0
+    )
+    if isinstance(geom, str):
+        _pack_cache.put(geom, packed)
+    return packed
+
+
+def packb(data) -> bytes:
+    """
+    Pack data as MessagePack, emitting PackedGeometry values verbatim.
+
+    Packing stays in msgpack's C encoder: each PackedGeometry is first packed
+    as a 16-byte extension placeholder (random per-call nonce + index), then
+    the placeholders are replaced by the pre-encoded fragments. The output is
+    identical to packing the decoded geometry dicts.
+    """
+    fragments = []
+    nonce = os.urandom(12)
+
+    def default(obj):
+        if isinstance(obj, PackedGeometry):
+            fragments.append(obj.packed)
+            return msgpack.ExtType(_FRAGMENT_EXT_CODE, nonce + (len(fragments) - 1).to_bytes(4, 'big'))
+        raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+    body = msgpack.packb(data, use_bin_type=True, default=default)
+    if not fragments:
+        return body
+
+    # fixext16 header (0xd8) + ext type + nonce marks each placeholder
+    marker = b'\xd8' + bytes([_FRAGMENT_EXT_CODE]) + nonce
+    parts = body.split(marker)
+    out = [parts[0]]
+    for part in parts[1:]:
+        out.append(fragments[int.from_bytes(part[:4], 'big')])
+        out.append(part[4:])
+    return b''.join(out)
+
+
+def json_default(obj):
+    """json.dumps default hook that decodes PackedGeometry values."""
+    if isinstance(obj, PackedGeometry):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def clear_pack_cache():
+    """Drop all packed geometries (called when geometry files change)."""
+    _pack_cache.clear()
+
+
+def pack_cache_stats() -> dict:
+    """Get packed geometry cache statistics."""
+    return _pack_cache.stats()
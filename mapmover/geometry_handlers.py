@@ -13,34 +13,76 @@ Schema (13 columns):
 
 import json
 import logging
+import math
+import os
+from collections import Counter
+
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
-# Try orjson for faster JSON parsing (3-10x faster than stdlib json)
-try:
-    import orjson
-    def fast_json_loads(s):
-        return orjson.loads(s)
-except ImportError:
-    def fast_json_loads(s):
-        return json.loads(s)
-
 from .paths import GEOMETRY_DIR, DATA_ROOT
+from .geometry_cache import pack_geometry, clear_pack_cache, pack_cache_stats
+from .lru_cache import ByteBudgetLRU
+from .geometry_store import geometry_store
+from .spatial_index import BBoxIndex, register_source, index_for_df, load_or_build, df_bounds, has_bounds, clear_registry
+from .coverage_manifest import coverage_for, clear_manifest_cache
+from .loc_index import country_geometry_source, load_locator, clear_locators, locator_stats
+from .place_index import clear_place_index
+from .topology import build_topology, encode_features, TopologyWriter, TOPOLOGY_QUANTUM, DEFAULT_QUANTUM
 
 logger = logging.getLogger("mapmover")
 
-# Cache for country parquet data - keyed by (iso3, admin_level) or just iso3 for full
-_country_parquet_cache = {}
-
 # Cache for global countries data
 _global_countries_cache = None
 
-# Cache for country bounding boxes (for viewport filtering)
-_country_bounds_cache = None
+# Spatial index over country bounding boxes (for viewport filtering)
+_country_index = None
 
 # Cache for admin level names from reference/admin_levels.json
 _admin_levels_cache = None
 
+# Crosswalk reverse maps (GADM loc_id -> local loc_id), keyed by (path, mtime_ns)
+_crosswalk_cache = {}
+
+# Per-country geometry requests (viewport queries and drill-downs) since
+# startup - saved at shutdown so warmup.py can preload the busiest countries
+_country_traffic = Counter()
+
+# Viewport area thresholds (square degrees) - mirror areaThresholds in
+# static/modules/viewport-loader.js. The index of the first threshold a
+# viewport exceeds is its detail level (0 = world view ... 6 = street view).
+VIEWPORT_AREA_THRESHOLDS = (3000, 300, 30, 3, 0.3, 0.03)
+
+# Pre-simplified geometry columns by detail level, written by
+# scripts/simplify_geometry.py --pyramid. Finer detail levels (and rows or
+# files without the column) use the full 'geometry' column.
+GEOMETRY_LOD_COLUMNS = {
+    0: "geometry_lod0",
+    1: "geometry_lod1",
+    2: "geometry_lod2",
+    3: "geometry_lod3",
+    4: "geometry_lod4",
+}
+
+
+def get_viewport_detail(bbox: tuple) -> int:
+    """Detail level (0-6) for a viewport bbox, from its area in square degrees."""
+    area = abs(bbox[2] - bbox[0]) * abs(bbox[3] - bbox[1])
+    for detail, threshold in enumerate(VIEWPORT_AREA_THRESHOLDS):
+        if area > threshold:
+            return detail
+    return len(VIEWPORT_AREA_THRESHOLDS)
+
+
+def get_geometry_column(detail: int) -> str:
+    """Geometry column to serve at a detail level."""
+    return GEOMETRY_LOD_COLUMNS.get(detail, "geometry")
+
+
+def _is_geometry_column(col: str) -> bool:
+    return col == "geometry" or col.startswith("geometry_lod")
+
 
 def get_geometry_path():
     """Get the geometry folder path using centralized path resolution."""
@@ -79,7 +121,7 @@ def load_global_countries():
 
 def load_country_parquet(iso3: str, admin_level: int = None):
     """
-    Load country geometry parquet file into cache.
+    Load country geometry parquet file (held by geometry_store).
     Returns DataFrame or None if file doesn't exist.
 
     Priority order (3-tier fallback):
@@ -87,227 +129,210 @@ def load_country_parquet(iso3: str, admin_level: int = None):
     2. countries/{ISO3}/crosswalk.json + geometry/{ISO3}.parquet - Crosswalk translation to GADM
     3. geometry/{ISO3}.parquet - Global GADM geometry (fallback)
 
-    If admin_level is specified, uses predicate pushdown for efficiency.
-    """
-    # Check cache - if admin_level specified, cache by (iso3, level)
-    cache_key = (iso3, admin_level) if admin_level is not None else iso3
-    if cache_key in _country_parquet_cache:
-        return _country_parquet_cache[cache_key]
-
-    # If we have the full dataframe cached, filter from it
-    if admin_level is not None and iso3 in _country_parquet_cache:
-        full_df = _country_parquet_cache[iso3]
-        filtered = full_df[full_df['admin_level'] == admin_level]
-        _country_parquet_cache[cache_key] = filtered
-        return filtered
-
-    # Priority 1: Country-specific geometry (matches data loc_ids like NUTS)
-    country_geom_file = DATA_ROOT / "countries" / iso3 / "geometry.parquet"
-    # Priority 2: Crosswalk file (for translating loc_ids)
-    crosswalk_file = DATA_ROOT / "countries" / iso3 / "crosswalk.json"
-    # Priority 3: Global geometry folder (GADM fallback)
-    global_geom_file = GEOMETRY_DIR / f"{iso3}.parquet"
-
-    # Try country-specific first
-    parquet_file = None
-    crosswalk_data = None
-
-    if country_geom_file.exists():
-        parquet_file = country_geom_file
-        logger.debug(f"Using country-specific geometry: {country_geom_file}")
-    elif crosswalk_file.exists() and global_geom_file.exists():
-        # Load crosswalk for later translation
-        try:
-            with open(crosswalk_file, 'r') as f:
-                crosswalk_data = json.load(f)
-            parquet_file = global_geom_file
-            logger.debug(f"Using crosswalk + GADM geometry: {crosswalk_file}")
-        except Exception as e:
-            logger.warning(f"Error loading crosswalk {crosswalk_file}: {e}")
-            parquet_file = global_geom_file
-    elif global_geom_file.exists():
-        parquet_file = global_geom_file
-        logger.debug(f"Using global geometry fallback: {global_geom_file}")
-    else:
+    If admin_level is specified, only that level's rows are returned (filtered
+    from the full table if held, else read with predicate pushdown).
+    """
+    parquet_file, crosswalk_file = country_geometry_source(iso3)
+    if parquet_file is None:
         logger.debug(f"No geometry file found for {iso3}")
         return None
 
-    try:
-        # Use predicate pushdown if admin_level specified
-        if admin_level is not None:
-            df = pd.read_parquet(
-                parquet_file,
-                filters=[('admin_level', '==', admin_level)]
-            )
-        else:
-            df = pd.read_parquet(parquet_file)
-
-        # If crosswalk exists, add reverse mapping for lookup
-        # This allows data with local loc_ids to find GADM geometry
-        if crosswalk_data:
-            mappings = crosswalk_data.get('mappings', {})
-            # Create reverse lookup: GADM loc_id -> local loc_id
-            reverse_map = {v: k for k, v in mappings.items()}
-            # Add local_loc_id column for joining
-            df['local_loc_id'] = df['loc_id'].map(reverse_map)
-            logger.debug(f"Applied crosswalk: {len(reverse_map)} mappings")
-
-        _country_parquet_cache[cache_key] = df
-        logger.debug(f"Loaded {len(df)} features for {iso3} (level={admin_level}) from {parquet_file.name}")
+    df = geometry_store.get(parquet_file, admin_level=admin_level)
+    if df is None or crosswalk_file is None:
         return df
-    except Exception as e:
-        logger.error(f"Error loading geometry for {iso3}: {e}")
-        return None
 
+    # Crosswalk: add local_loc_id (GADM loc_id -> local loc_id) so data with
+    # local loc_ids can find GADM geometry. Held as a shallow copy of the table,
+    # which keeps the base table's columns alive even after the base entry is
+    # evicted, so it is sized as the whole frame. (Keeping just the column and
+    # joining it on read would hand out a new frame per call and lose the
+    # spatial index registered on it.)
+    try:
+        crosswalk_key = crosswalk_file.stat().st_mtime_ns
+    except OSError:
+        return df
 
-def load_country_bounds():
-    """
-    Load country bounding boxes from global.csv for fast viewport filtering.
-    Returns dict of iso3 -> (min_lon, min_lat, max_lon, max_lat).
-    """
-    global _country_bounds_cache
-    if _country_bounds_cache is not None:
-        return _country_bounds_cache
+    def with_crosswalk():
+        reverse_map = _crosswalk_reverse_map(crosswalk_file)
+        out = df.copy(deep=False)
+        out['local_loc_id'] = out['loc_id'].map(reverse_map)
+        register_source(out, parquet_file, "all" if admin_level is None else f"admin_level={admin_level}")
+        logger.debug(f"Applied crosswalk: {len(reverse_map)} mappings")
+        return out
 
-    _country_bounds_cache = {}
+    return geometry_store.derived(parquet_file, ("crosswalk", admin_level, crosswalk_key), with_crosswalk,
+                                  sizeof=lambda out: int(out.memory_usage(deep=True).sum()))
 
-    df = load_global_countries()
-    if df is None:
-        return _country_bounds_cache
 
-    try:
-        from shapely.geometry import shape
+def _held_country_parquet(iso3: str):
+    """Full country DataFrame if geometry_store already holds it, else None (never loads)."""
+    parquet_file, _ = country_geometry_source(iso3)
+    if parquet_file is None or geometry_store.peek(parquet_file) is None:
+        return None
+    return load_country_parquet(iso3)
 
-        for _, row in df.iterrows():
-            loc_id = row.get('loc_id')
-            geom_str = row.get('geometry')
 
-            if not loc_id or pd.isna(geom_str) or not geom_str:
-                continue
+def _crosswalk_reverse_map(crosswalk_file: Path) -> dict:
+    """GADM loc_id -> local loc_id from a crosswalk file (cached by path and mtime)."""
+    try:
+        key = (str(crosswalk_file), crosswalk_file.stat().st_mtime_ns)
+    except OSError:
+        return {}
+    cached = _crosswalk_cache.get(key)
+    if cached is None:
+        try:
+            with open(crosswalk_file, 'r') as f:
+                mappings = json.load(f).get('mappings', {})
+            cached = {v: k for k, v in mappings.items()}
+        except Exception as e:
+            logger.warning(f"Error loading crosswalk {crosswalk_file}: {e}")
+            cached = {}
+        _crosswalk_cache[key] = cached
+    return cached
 
-            try:
-                geom_data = json.loads(geom_str) if isinstance(geom_str, str) else geom_str
-                geom = shape(geom_data)
-                bounds = geom.bounds  # (minx, miny, maxx, maxy)
-                _country_bounds_cache[loc_id] = bounds
-            except Exception:
-                continue
 
-        logger.info(f"Loaded bounds for {len(_country_bounds_cache)} countries")
-    except ImportError:
-        logger.warning("shapely not available for country bounds computation")
+def _country_locator(iso3: str):
+    """
+    Locator index over a country's geometry parquet, with its crosswalk file.
 
-    return _country_bounds_cache
+    Returns:
+        (LocIndex or None, crosswalk path or None)
+    """
+    path, crosswalk_file = country_geometry_source(iso3)
+    if path is None:
+        return None, None
+    return load_locator(path), crosswalk_file
+
+
+def _read_located_rows(locator, crosswalk_file, rows, columns: list = None):
+    """Read located rows, adding local_loc_id like load_country_parquet when a crosswalk applies."""
+    df = locator.read(rows, columns)
+    if crosswalk_file is not None and 'loc_id' in df.columns:
+        reverse_map = _crosswalk_reverse_map(crosswalk_file)
+        if reverse_map:
+            df['local_loc_id'] = df['loc_id'].map(reverse_map)
+    return df
 
 
-def get_countries_in_bbox(min_lon: float, min_lat: float, max_lon: float, max_lat: float):
+def _find_country_rows(iso3: str, loc_ids, columns: list = None):
     """
-    Return ISO3 codes whose bounds intersect the query bbox.
-    """
-    bounds = load_country_bounds()
-    result = []
+    Rows of a country's geometry parquet for loc_ids (missing ones are skipped).
 
-    for iso3, (c_min_lon, c_min_lat, c_max_lon, c_max_lat) in bounds.items():
-        # Check bbox intersection
-        if (c_max_lon >= min_lon and c_min_lon <= max_lon and
-            c_max_lat >= min_lat and c_min_lat <= max_lat):
-            result.append(iso3)
+    Filters the full DataFrame if it is already cached, otherwise reads only
+    the located rows (and columns, if given). None if the country has no file.
+    """
+    df = _held_country_parquet(iso3)
+    if df is not None:
+        found = df[df["loc_id"].isin(list(loc_ids))]
+        return found[[c for c in columns if c in found.columns]] if columns else found
 
-    return result
+    locator, crosswalk_file = _country_locator(iso3)
+    if locator is None:
+        return None
+    return _read_located_rows(locator, crosswalk_file, locator.find(loc_ids), columns)
 
 
-def calculate_coverage_from_parquet(iso3: str, from_level: int = 1):
+def load_country_index():
     """
-    Calculate coverage stats on-the-fly from actual parquet data.
+    Load the spatial index over country bounding boxes from global.csv.
 
-    Args:
-        iso3: Country ISO3 code
-        from_level: Start counting from this level (default 1, excludes country level)
+    Bounds come from the bbox columns where present, otherwise from the
+    polygons (parsed vectorized with shapely). The index is persisted next to
+    other derived caches and rebuilt only when global.csv changes.
 
-    Returns:
-        dict with level_counts, geometry_counts, coverage, actual_depth, drillable_depth
+    Returns BBoxIndex with loc_id ids, or None if global.csv is unavailable.
     """
-    # Load full parquet for the country
-    df = load_country_parquet(iso3)
-    if df is None or len(df) == 0:
-        return {
-            "level_counts": {},
-            "geometry_counts": {},
-            "coverage": 0,
-            "actual_depth": 0,
-            "drillable_depth": 0
-        }
+    global _country_index
+    if _country_index is not None:
+        return _country_index
 
-    # Calculate stats from actual data
-    level_counts = {}
-    geometry_counts = {}
+    df = load_global_countries()
+    if df is None:
+        return None
 
-    for level in df['admin_level'].unique():
-        level = int(level)
-        if level < from_level:
-            continue
-        level_df = df[df['admin_level'] == level]
-        level_counts[str(level)] = len(level_df)
-        # Count rows with actual geometry (not null/empty)
-        has_geom = level_df['geometry'].notna() & (level_df['geometry'] != '')
-        geometry_counts[str(level)] = int(has_geom.sum())
-
-    # Calculate coverage
-    total = sum(level_counts.values())
-    with_geom = sum(geometry_counts.values())
-    coverage = with_geom / total if total > 0 else 0
-
-    # Calculate depth
-    if level_counts:
-        max_level = max(int(k) for k in level_counts.keys())
-        min_level = min(int(k) for k in level_counts.keys())
-        actual_depth = max_level - min_level + 1
-        # Drillable depth = deepest level with geometry
-        levels_with_geom = [int(k) for k, v in geometry_counts.items() if v > 0]
-        drillable_depth = max(levels_with_geom) if levels_with_geom else min_level
-    else:
-        actual_depth = 0
-        drillable_depth = 0
+    def build():
+        boxes = df_bounds(df) if 'bbox_min_lon' in df.columns else np.full((len(df), 4), np.nan)
+        missing = np.isnan(boxes).any(axis=1)
+        if missing.any() and 'geometry' in df.columns:
+            try:
+                import shapely
+                geom_strs = np.array([g if isinstance(g, str) and g else None
+                                      for g in df['geometry'].to_numpy()[missing]], dtype=object)
+                boxes[missing] = shapely.bounds(shapely.from_geojson(geom_strs, on_invalid='ignore'))
+            except ImportError:
+                logger.warning("shapely not available for country bounds computation")
+        ids = df['loc_id'].to_numpy(dtype=object)
+        valid = np.array([isinstance(i, str) and bool(i) for i in ids], dtype=bool)
+        boxes[~valid] = np.nan
+        return BBoxIndex(boxes, np.where(valid, ids, ""))
+
+    _country_index = load_or_build(get_geometry_path() / "global.csv", "countries", len(df), build)
+    logger.info(f"Loaded country bounds index ({_country_index.size} countries)")
+    return _country_index
 
+
+def load_country_bounds():
+    """
+    Load country bounding boxes from global.csv for fast viewport filtering.
+    Returns dict of iso3 -> (min_lon, min_lat, max_lon, max_lat).
+    """
+    index = load_country_index()
+    if index is None:
+        return {}
     return {
-        "level_counts": level_counts,
-        "geometry_counts": geometry_counts,
-        "coverage": coverage,
-        "actual_depth": actual_depth,
-        "drillable_depth": drillable_depth
+        loc_id: tuple(box)
+        for loc_id, box in zip(index.ids, index.boxes.tolist())
+        if loc_id and not any(np.isnan(box))
     }
 
 
-def df_to_geojson(df, polygon_only=False):
+def get_countries_in_bbox(min_lon: float, min_lat: float, max_lon: float, max_lat: float):
+    """
+    Return ISO3 codes whose bounds intersect the query bbox.
+    """
+    index = load_country_index()
+    if index is None:
+        return []
+    return index.query_ids((min_lon, min_lat, max_lon, max_lat))
+
+
+def df_to_geojson(df, polygon_only=False, geometry_column="geometry"):
     """
     Convert a DataFrame with geometry column to GeoJSON FeatureCollection.
 
     Args:
         df: DataFrame with geometry column (GeoJSON string)
         polygon_only: If True, skip Point geometries
+        geometry_column: Simplified geometry column to prefer (see GEOMETRY_LOD_COLUMNS);
+                         rows where it is missing or null use 'geometry'
 
     Performance notes:
         - Uses to_dict('records') instead of iterrows() (10-100x faster)
-        - Uses orjson for JSON parsing when available (3-10x faster)
+        - Geometry is parsed once per process and kept pre-packed
+          (geometry_cache.PackedGeometry), so repeat requests skip JSON parsing
         - Pre-computes column list to avoid repeated lookups
     """
     if df is None or len(df) == 0:
         return {"type": "FeatureCollection", "features": []}
 
-    # Get property columns once (all except geometry)
-    prop_cols = [c for c in df.columns if c != 'geometry']
+    # Get property columns once (all except geometry columns)
+    prop_cols = [c for c in df.columns if not _is_geometry_column(c)]
+    if geometry_column not in df.columns:
+        geometry_column = 'geometry'
 
     # Convert to list of dicts - MUCH faster than iterrows()
     records = df.to_dict('records')
 
     features = []
     for row in records:
-        geom_str = row.get('geometry')
+        geom_str = row.get(geometry_column)
+        if not isinstance(geom_str, str) or not geom_str:
+            geom_str = row.get('geometry')
         if not geom_str or (isinstance(geom_str, float) and pd.isna(geom_str)):
             continue
 
         try:
-            geometry = fast_json_loads(geom_str) if isinstance(geom_str, str) else geom_str
+            geometry = pack_geometry(geom_str)
         except (ValueError, TypeError):
             continue
 
@@ -333,7 +358,7 @@ def get_countries_geometry(debug: bool = False):
     Get all country geometries for initial map display.
     Returns a GeoJSON FeatureCollection with polygon countries only.
 
-    If debug=True, calculates coverage info on-the-fly from parquet files.
+    If debug=True, adds coverage info from the coverage manifest.
     """
     df = load_global_countries()
 
@@ -349,13 +374,13 @@ def get_countries_geometry(debug: bool = False):
     # Convert to GeoJSON (polygons only)
     geojson = df_to_geojson(df, polygon_only=True)
 
-    # If debug mode, calculate coverage info on-the-fly from parquet
+    # If debug mode, add coverage info from the manifest
     if debug:
         for feature in geojson.get("features", []):
             loc_id = feature.get("properties", {}).get("loc_id")
             if loc_id:
-                # Calculate from actual parquet data, starting from level 1
-                cov_info = calculate_coverage_from_parquet(loc_id, from_level=1)
+                # Coverage from actual parquet data, starting from level 1
+                cov_info = coverage_for(loc_id, from_level=1)
                 feature["properties"]["actual_depth"] = cov_info.get("actual_depth", 0)
                 feature["properties"]["expected_depth"] = cov_info.get("actual_depth", 0)
                 feature["properties"]["coverage"] = cov_info.get("coverage", 0)
@@ -378,11 +403,14 @@ def get_countries_geometry(debug: bool = False):
     }
 
 
-def get_location_children(loc_id: str):
+def get_location_children(loc_id: str, topology: bool = False):
     """
     Get child geometries for a location (drill-down).
     Uses parquet files with parent_id filtering.
 
+    With topology=True the children are returned as a cached topology
+    (see topology.py) under "topology" instead of "geojson".
+
     If direct children have no geometry (hierarchy-only levels),
     recursively finds the first descendant level with geometry.
 
@@ -403,26 +431,34 @@ def get_location_children(loc_id: str):
         }
 
     iso3 = parts[0]
+    _country_traffic[iso3] += 1
 
-    # Load country parquet
-    df = load_country_parquet(iso3)
+    # Use the full country DataFrame if it is already in memory; otherwise
+    # locate the children and read only their rows
+    df = _held_country_parquet(iso3)
+    locator = crosswalk_file = None
     if df is None:
-        return {
-            "geojson": {"type": "FeatureCollection", "features": []},
-            "count": 0,
-            "level": "none",
-            "parent_loc_id": loc_id,
-            "error": f"No geometry data for {iso3}. Download GADM data first."
-        }
+        locator, crosswalk_file = _country_locator(iso3)
+        if locator is None:
+            return {
+                "geojson": {"type": "FeatureCollection", "features": []},
+                "count": 0,
+                "level": "none",
+                "parent_loc_id": loc_id,
+                "error": f"No geometry data for {iso3}. Download GADM data first."
+            }
 
     # Find children with geometry, drilling through hierarchy-only levels
     current_parents = {loc_id}
-    children = pd.DataFrame()
+    children = None
     max_depth = 10  # Safety limit
 
     for _ in range(max_depth):
         # Get all direct children of current parent set
-        children = df[df["parent_id"].isin(current_parents)]
+        if locator is not None:
+            children = locator.children(current_parents)
+        else:
+            children = df[df["parent_id"].isin(current_parents)]
 
         if len(children) == 0:
             return {
@@ -434,7 +470,10 @@ def get_location_children(loc_id: str):
             }
 
         # Check if these children have geometry
-        children_with_geom = children[children["geometry"].notna()]
+        if locator is not None:
+            children_with_geom = children[locator.has_geometry[children]]
+        else:
+            children_with_geom = children[children["geometry"].notna()]
 
         if len(children_with_geom) > 0:
             # Found children with geometry
@@ -443,16 +482,40 @@ def get_location_children(loc_id: str):
 
         # No geometry at this level - drill down further
         # Use these children as the new parent set
-        current_parents = set(children["loc_id"].tolist())
+        if locator is not None:
+            current_parents = set(locator.loc_ids[children].tolist())
+        else:
+            current_parents = set(children["loc_id"].tolist())
         logger.debug(f"Level has no geometry, drilling to {len(current_parents)} children")
 
     # Determine child level name
-    child_level = int(children["admin_level"].iloc[0])
+    if locator is not None:
+        child_level = int(locator.admin_levels[children[0]])
+    else:
+        child_level = int(children["admin_level"].iloc[0])
     level_names = {0: "country", 1: "state", 2: "county", 3: "place", 4: "locality", 5: "neighborhood"}
     level_name = level_names.get(child_level, f"admin_{child_level}")
 
+    def children_geojson():
+        if locator is not None:
+            return df_to_geojson(_read_located_rows(locator, crosswalk_file, children))
+        return df_to_geojson(children)
+
+    if topology:
+        encoded = _children_topology_cache.get(loc_id)
+        if encoded is None:
+            encoded = encode_features(children_geojson()["features"], DEFAULT_QUANTUM)
+            _children_topology_cache.put(loc_id, encoded)
+        return {
+            "topology": encoded,
+            "count": len(encoded["objects"]["features"]["geometries"]),
+            "level": level_name,
+            "admin_level": child_level,
+            "parent_loc_id": loc_id
+        }
+
     # Convert to GeoJSON
-    geojson = df_to_geojson(children)
+    geojson = children_geojson()
 
     return {
         "geojson": geojson,
@@ -530,6 +593,11 @@ def get_location_places(loc_id: str):
     }
 
 
+# Columns read for location info (geometry is never needed)
+_INFO_COLUMNS = ["loc_id", "name", "admin_level", "parent_id", "children_count", "children_by_level",
+                 "descendants_count", "descendants_by_level"]
+
+
 def get_location_info(loc_id: str):
     """
     Get detailed information about a specific location for popup display.
@@ -540,7 +608,8 @@ def get_location_info(loc_id: str):
         - Memberships: regional groupings (G20, BRICS, etc.) for countries
         - Dataset count: number of datasets available for this location
 
-    Uses pre-computed children counts from parquet when available.
+    Uses pre-computed children counts from parquet when available. Rows are
+    read through the loc_id locator index without geometry.
     """
     parts = loc_id.split("-")
     if not parts:
@@ -564,10 +633,10 @@ def get_location_info(loc_id: str):
                 result["name"] = row.get("name")
                 result["admin_level"] = 0
 
-                # Get children info from country parquet
-                country_df = load_country_parquet(iso3)
-                if country_df is not None and len(country_df) > 0:
-                    country_row = country_df[country_df["loc_id"] == loc_id]
+                # Get children info from country parquet (located row, no geometry)
+                locator, _ = _country_locator(iso3)
+                if locator is not None and locator.size > 0:
+                    country_row = _find_country_rows(iso3, [loc_id], _INFO_COLUMNS)
                     if len(country_row) > 0:
                         cr = country_row.iloc[0]
                         result["children_count"] = int(cr.get("children_count", 0)) if pd.notna(cr.get("children_count")) else 0
@@ -576,10 +645,9 @@ def get_location_info(loc_id: str):
                         result["descendants_by_level"] = cr.get("descendants_by_level", "{}")
                     else:
                         # Calculate from parquet if not in parquet (country-only entry)
-                        children = country_df[country_df["parent_id"] == loc_id]
-                        result["children_count"] = len(children)
-                        result["descendants_count"] = len(country_df) - 1  # Exclude country itself
-                    result["max_depth"] = int(country_df['admin_level'].max())
+                        result["children_count"] = len(locator.children([loc_id]))
+                        result["descendants_count"] = locator.size - 1  # Exclude country itself
+                    result["max_depth"] = int(locator.admin_levels.max())
                     result["has_children"] = result.get("children_count", 0) > 0 or result["max_depth"] > 0
                 else:
                     result["children_count"] = 0
@@ -599,12 +667,11 @@ def get_location_info(loc_id: str):
 
                 return result
 
-    # For sub-national, check country parquet
-    df = load_country_parquet(iso3)
-    if df is None:
+    # For sub-national, read the located row from the country parquet (no geometry)
+    location = _find_country_rows(iso3, [loc_id], _INFO_COLUMNS)
+    if location is None:
         return {"error": f"No data for {iso3}"}
 
-    location = df[df["loc_id"] == loc_id]
     if len(location) == 0:
         return {"error": f"Location not found: {loc_id}"}
 
@@ -616,7 +683,7 @@ def get_location_info(loc_id: str):
     # Get parent name for "Part of" display
     parent_id = row.get("parent_id")
     if parent_id:
-        parent_names = _get_parent_hierarchy(df, parent_id, iso3)
+        parent_names = _get_parent_hierarchy(parent_id, iso3)
         result["memberships"] = [f"Part of: {', '.join(parent_names)}"] if parent_names else []
     else:
         result["memberships"] = []
@@ -732,13 +799,9 @@ DEFAULT_LEVEL_NAMES = {
     6: "blocks"
 }
 
-# Cache for sub-county geometry files (ZCTAs, tracts, block groups, blocks)
-_subcounty_geometry_cache = {}
-
-
-def load_subcounty_geometry(iso3: str, admin_level: int, state_abbrev: str = None):
+def subcounty_geometry_file(iso3: str, admin_level: int, state_abbrev: str = None):
     """
-    Load sub-county geometry for deep admin levels (3+).
+    Sub-county geometry file for deep admin levels (3+).
 
     Supports tiered geometry files stored in:
     - geometry_{type}.parquet (national files, e.g., geometry_zcta.parquet)
@@ -760,7 +823,7 @@ def load_subcounty_geometry(iso3: str, admin_level: int, state_abbrev: str = Non
         state_abbrev: Region/state code (required for state-partitioned levels)
 
     Returns:
-        DataFrame or None
+        Path of an existing file, or None
     """
     countries_dir = DATA_ROOT / "countries" / iso3
 
@@ -792,23 +855,11 @@ def load_subcounty_geometry(iso3: str, admin_level: int, state_abbrev: str = Non
 
     if not is_partitioned:
         # National file
-        cache_key = f"{iso3}_{geom_type}"
-        if cache_key in _subcounty_geometry_cache:
-            return _subcounty_geometry_cache[cache_key]
-
         file_path = countries_dir / f"geometry_{geom_type}.parquet"
         if not file_path.exists():
             logger.debug(f"Sub-county geometry not found: {file_path}")
             return None
-
-        try:
-            df = pd.read_parquet(file_path)
-            _subcounty_geometry_cache[cache_key] = df
-            logger.debug(f"Loaded {len(df)} features from {file_path}")
-            return df
-        except Exception as e:
-            logger.error(f"Error loading sub-county geometry: {e}")
-            return None
+        return file_path
 
     else:
         # Partitioned by region/state
@@ -817,24 +868,38 @@ def load_subcounty_geometry(iso3: str, admin_level: int, state_abbrev: str = Non
             return None
 
         subdir = f"geometry_{geom_type}"
-        cache_key = f"{iso3}_{subdir}_{state_abbrev}"
-
-        if cache_key in _subcounty_geometry_cache:
-            return _subcounty_geometry_cache[cache_key]
-
         file_path = countries_dir / subdir / f"{iso3}-{state_abbrev}.parquet"
         if not file_path.exists():
             logger.debug(f"Sub-county geometry not found: {file_path}")
             return None
+        return file_path
 
-        try:
-            df = pd.read_parquet(file_path)
-            _subcounty_geometry_cache[cache_key] = df
-            logger.debug(f"Loaded {len(df)} features for {state_abbrev} level {admin_level}")
+
+def load_subcounty_geometry(iso3: str, admin_level: int, state_abbrev: str = None):
+    """
+    Load sub-county geometry for deep admin levels (3+), see subcounty_geometry_file().
+
+    Returns:
+        DataFrame or None
+    """
+    file_path = subcounty_geometry_file(iso3, admin_level, state_abbrev)
+    return geometry_store.get(file_path) if file_path is not None else None
+
+
+def _subcounty_rows_in_bbox(file_path: Path, buffered_bbox: tuple):
+    """
+    Rows of a sub-county file in a bbox.
+
+    Files clustered by scripts/cluster_geometry.py are read only for the row
+    groups intersecting the bbox, unless the whole file is already held.
+    Other files are loaded whole (held by geometry_store) and filtered.
+    """
+    if geometry_store.peek(file_path) is None:
+        df = geometry_store.read_bbox(file_path, buffered_bbox)
+        if df is not None:
             return df
-        except Exception as e:
-            logger.error(f"Error loading sub-county geometry: {e}")
-            return None
+    df = geometry_store.get(file_path)
+    return _filter_df_by_bbox(df, buffered_bbox) if df is not None else None
 
 
 def get_states_in_bbox(min_lon: float, min_lat: float, max_lon: float, max_lat: float):
@@ -928,7 +993,7 @@ def _get_level_names(iso3: str) -> dict:
         return DEFAULT_LEVEL_NAMES
 
 
-def _get_parent_hierarchy(df, parent_id: str, iso3: str) -> list:
+def _get_parent_hierarchy(parent_id: str, iso3: str) -> list:
     """
     Get list of parent names from immediate parent up to country.
     Returns list like ["California", "United States of America"].
@@ -954,8 +1019,8 @@ def _get_parent_hierarchy(df, parent_id: str, iso3: str) -> list:
             break
 
         # Find in country parquet
-        parent_row = df[df["loc_id"] == current_id]
-        if len(parent_row) == 0:
+        parent_row = _find_country_rows(iso3, [current_id], ["loc_id", "name", "parent_id"])
+        if parent_row is None or len(parent_row) == 0:
             break
 
         parent_name = parent_row.iloc[0].get("name", current_id)
@@ -967,36 +1032,31 @@ def _get_parent_hierarchy(df, parent_id: str, iso3: str) -> list:
     return names
 
 
-def _load_subcounty_for_viewport(iso3: str, admin_level: int, buffered_bbox: tuple, debug: bool = False):
+def _subcounty_frames_for_viewport(iso3: str, admin_level: int, buffered_bbox: tuple) -> list:
     """
-    Load sub-county geometry (levels 3+) from tiered files for a specific country.
+    Find sub-county geometry rows (levels 3+) in a bbox from tiered files for a specific country.
 
     Args:
         iso3: Country code
         admin_level: Target admin level (3+)
         buffered_bbox: (min_lon, min_lat, max_lon, max_lat) with buffer
-        debug: If True, add debug properties
 
     Returns:
-        List of GeoJSON features
+        List of bbox-filtered DataFrames (geometry not yet decoded)
     """
-    all_features = []
+    frames = []
     logger.info(f"Loading subcounty geometry for {iso3} level {admin_level}, bbox={buffered_bbox}")
 
     # Check if this country has sub-county geometry at this level
     # First try non-partitioned (national file)
-    df = load_subcounty_geometry(iso3, admin_level=admin_level)
-
-    if df is not None and len(df) > 0:
-        # National file exists - filter by bbox
-        logger.info(f"Found national file with {len(df)} features for {iso3} level {admin_level}")
-        df_filtered = _filter_df_by_bbox(df, buffered_bbox)
-        logger.info(f"After bbox filter: {len(df_filtered)} features")
-        geojson = df_to_geojson(df_filtered, polygon_only=True)
-        if debug:
-            for feature in geojson.get("features", []):
-                feature["properties"]["current_admin_level"] = admin_level
-        all_features.extend(geojson.get("features", []))
+    national_file = subcounty_geometry_file(iso3, admin_level=admin_level)
+
+    if national_file is not None:
+        # National file exists - read rows in bbox
+        df_filtered = _subcounty_rows_in_bbox(national_file, buffered_bbox)
+        if df_filtered is not None:
+            logger.info(f"National file {national_file.name}: {len(df_filtered)} features in bbox")
+            frames.append(df_filtered)
 
     else:
         # Try partitioned files (by state/region)
@@ -1007,28 +1067,31 @@ def _load_subcounty_for_viewport(iso3: str, admin_level: int, buffered_bbox: tup
 
         if regions:
             for region_code in regions:
-                df = load_subcounty_geometry(iso3, admin_level=admin_level, state_abbrev=region_code)
-                if df is None or len(df) == 0:
+                file_path = subcounty_geometry_file(iso3, admin_level=admin_level, state_abbrev=region_code)
+                df_filtered = _subcounty_rows_in_bbox(file_path, buffered_bbox) if file_path else None
+                if df_filtered is None:
                     logger.debug(f"No data for {iso3}-{region_code} level {admin_level}")
                     continue
-
-                logger.info(f"Loaded {len(df)} features for {iso3}-{region_code} level {admin_level}")
-                df_filtered = _filter_df_by_bbox(df, buffered_bbox)
-                logger.info(f"After bbox filter: {len(df_filtered)} features")
-                geojson = df_to_geojson(df_filtered, polygon_only=True)
-                if debug:
-                    for feature in geojson.get("features", []):
-                        feature["properties"]["current_admin_level"] = admin_level
-                all_features.extend(geojson.get("features", []))
+                logger.info(f"{iso3}-{region_code} level {admin_level}: {len(df_filtered)} features in bbox")
+                frames.append(df_filtered)
         else:
             logger.warning(f"No regions found in bbox for {iso3}")
 
-    logger.info(f"Total subcounty features for {iso3} level {admin_level}: {len(all_features)}")
-    return all_features
+    logger.info(f"Total subcounty rows for {iso3} level {admin_level}: {sum(len(f) for f in frames)}")
+    return [f for f in frames if len(f) > 0]
 
 
 def _filter_df_by_bbox(df, buffered_bbox):
-    """Filter DataFrame by bounding box using bbox or centroid columns."""
+    """
+    Filter DataFrame by bounding box using bbox or centroid columns.
+
+    Large (or file-backed) DataFrames are queried through their spatial
+    index; small ones use a plain mask.
+    """
+    index = index_for_df(df)
+    if index is not None:
+        return df.iloc[index.query(buffered_bbox)]
+
     if 'bbox_min_lon' in df.columns:
         mask = (
             (df['bbox_max_lon'] >= buffered_bbox[0]) &
@@ -1058,142 +1121,159 @@ def get_regions_in_bbox(iso3: str, min_lon: float, min_lat: float, max_lon: floa
         logger.debug(f"No admin_level=1 data found for {iso3}")
         return []
 
-    result = []
-    has_bbox = 'bbox_min_lon' in df.columns
-    has_centroid = 'centroid_lon' in df.columns
-
-    if not has_bbox and not has_centroid:
+    if not has_bounds(df):
         logger.warning(f"No bbox or centroid columns in {iso3} admin_level=1 parquet")
         # Fallback: return all regions (let the sub-county loader filter by bbox)
-        for _, row in df.iterrows():
-            loc_id = row.get('loc_id', '')
-            if '-' in loc_id:
-                region_code = loc_id.split('-')[1]
-                result.append(region_code)
-        logger.debug(f"Returning all {len(result)} regions for {iso3} (no spatial filter)")
-        return result
-
-    for _, row in df.iterrows():
-        intersects = False
-
-        if has_bbox:
-            c_min_lon = row.get('bbox_min_lon')
-            c_min_lat = row.get('bbox_min_lat')
-            c_max_lon = row.get('bbox_max_lon')
-            c_max_lat = row.get('bbox_max_lat')
+        matched = df
+    else:
+        # bbox columns, or centroid check as fallback (less accurate but better than nothing)
+        matched = _filter_df_by_bbox(df, (min_lon, min_lat, max_lon, max_lat))
 
-            if pd.notna(c_min_lon) and pd.notna(c_max_lon):
-                intersects = (c_max_lon >= min_lon and c_min_lon <= max_lon and
-                              c_max_lat >= min_lat and c_min_lat <= max_lat)
-        elif has_centroid:
-            # Fallback to centroid check (less accurate but better than nothing)
-            c_lon = row.get('centroid_lon')
-            c_lat = row.get('centroid_lat')
-            if pd.notna(c_lon) and pd.notna(c_lat):
-                intersects = (c_lon >= min_lon and c_lon <= max_lon and
-                              c_lat >= min_lat and c_lat <= max_lat)
-
-        if intersects:
-            loc_id = row.get('loc_id', '')
-            if '-' in loc_id:
-                region_code = loc_id.split('-')[1]
-                result.append(region_code)
+    result = [loc_id.split('-')[1] for loc_id in matched['loc_id']
+              if isinstance(loc_id, str) and '-' in loc_id]
 
     logger.debug(f"Found {len(result)} regions in bbox for {iso3}: {result}")
     return result
 
 
-def get_viewport_geometry(admin_level: int, bbox: tuple, debug: bool = False):
+# =============================================================================
+# Viewport cell cache
+# =============================================================================
+# Viewport requests are snapped to a fixed grid per admin level. Each grid cell's
+# features are built once and cached, and responses are composed from cells, so
+# panning re-uses cells instead of re-filtering for every unique bbox.
+
+# Cell size in degrees per admin level, roughly half the viewport width at which
+# viewport-loader.js switches to that level
+VIEWPORT_CELL_DEGREES = {0: 45.0, 1: 15.0, 2: 5.0, 3: 2.0, 4: 0.5, 5: 0.2, 6: 0.05}
+
+# Above this many cells (e.g. a locked deep level zoomed far out) the viewport
+# is queried directly without caching
+MAX_VIEWPORT_CELLS = 400
+
+# Safety limit to prevent browser memory issues
+MAX_VIEWPORT_FEATURES = 10000
+
+VIEWPORT_CELL_CACHE_BYTES = int(os.environ.get("VIEWPORT_CELL_CACHE_MB", "128")) * 1024 * 1024
+
+
+def _cell_nbytes(features: list) -> int:
+    """Estimate memory held by a cell's feature list (geometry bytes + properties)."""
+    return sum(getattr(f["geometry"], "nbytes", 0) + 512 for f in features) + 64
+
+
+# VIEWPORT_CELL_CACHE_MB is the ceiling for all three caches below: half for
+# GeoJSON cells, a quarter each for the topology-encoded ones
+_viewport_cell_cache = ByteBudgetLRU("viewport_cells", VIEWPORT_CELL_CACHE_BYTES // 2, sizeof=_cell_nbytes)
+
+# Topology-encoded cells and drill-down children (format=topojson)
+_cell_topology_cache = ByteBudgetLRU("viewport_topology", VIEWPORT_CELL_CACHE_BYTES // 4, sizeof=lambda e: e[1].nbytes)
+_children_topology_cache = ByteBudgetLRU("children_topology", VIEWPORT_CELL_CACHE_BYTES // 4,
+                                         sizeof=lambda t: sum(len(a) for a in t["arcs"]) * 120 + 1024)
+
+
+def get_viewport_cell_size(admin_level: int) -> float:
+    """Grid cell size in degrees for an admin level."""
+    return VIEWPORT_CELL_DEGREES.get(admin_level, VIEWPORT_CELL_DEGREES[6])
+
+
+def get_viewport_cells(admin_level: int, bbox: tuple) -> list:
     """
-    Load features at admin_level within bounding box.
+    List the grid cells (cx, cy) covering a bbox at an admin level.
 
-    Args:
-        admin_level: Target admin level (0=countries, 1=states, 2=counties, 3=ZCTAs,
-                     4=census tracts, 5=block groups, 6=blocks)
-        bbox: (min_lon, min_lat, max_lon, max_lat)
-        debug: If True, add coverage info for level 0 features
+    Cell (cx, cy) spans lon [cx*size, (cx+1)*size) and lat [cy*size, (cy+1)*size).
+    The bbox is clamped to the world first.
+    """
+    size = get_viewport_cell_size(admin_level)
+    min_lon = max(bbox[0], -180.0)
+    min_lat = max(bbox[1], -90.0)
+    max_lon = min(bbox[2], 180.0)
+    max_lat = min(bbox[3], 90.0)
+    if min_lon > max_lon or min_lat > max_lat:
+        return []
 
-    Returns:
-        GeoJSON FeatureCollection with features in viewport
-    """
-    min_lon, min_lat, max_lon, max_lat = bbox
-
-    # Add buffer for smooth panning - proportional to viewport size (2x total preload)
-    # 50% buffer on each side = 2x the viewport area total
-    viewport_width = max_lon - min_lon
-    viewport_height = max_lat - min_lat
-    buffer_lon = viewport_width * 0.5
-    buffer_lat = viewport_height * 0.5
-    buffered_bbox = (
-        min_lon - buffer_lon,
-        min_lat - buffer_lat,
-        max_lon + buffer_lon,
-        max_lat + buffer_lat
-    )
+    x0, x1 = math.floor(min_lon / size), math.floor(max_lon / size)
+    y0, y1 = math.floor(min_lat / size), math.floor(max_lat / size)
+    return [(cx, cy) for cy in range(y0, y1 + 1) for cx in range(x0, x1 + 1)]
 
-    # For level 0 (countries), just return from global.csv
-    if admin_level == 0:
-        df = load_global_countries()
-        if df is None:
-            return {"type": "FeatureCollection", "features": []}
 
-        # Filter by bbox if bbox columns exist
-        if 'bbox_min_lon' in df.columns:
-            mask = (
-                (df['bbox_max_lon'] >= buffered_bbox[0]) &
-                (df['bbox_min_lon'] <= buffered_bbox[2]) &
-                (df['bbox_max_lat'] >= buffered_bbox[1]) &
-                (df['bbox_min_lat'] <= buffered_bbox[3])
-            )
-            df = df[mask]
+def _cells_bbox(cells: list, size: float) -> tuple:
+    """Bounding box covering a set of grid cells."""
+    xs = [c[0] for c in cells]
+    ys = [c[1] for c in cells]
+    return (min(xs) * size, min(ys) * size, (max(xs) + 1) * size, (max(ys) + 1) * size)
 
-        geojson = df_to_geojson(df, polygon_only=True)
 
-        # Add coverage info for debug mode (calculate on-the-fly from parquet)
-        if debug:
-            for feature in geojson.get("features", []):
-                loc_id = feature.get("properties", {}).get("loc_id")
-                feature["properties"]["current_admin_level"] = admin_level
-
-                if loc_id:
-                    # Calculate from actual parquet data, starting from level 1
-                    cov_info = calculate_coverage_from_parquet(loc_id, from_level=1)
-                    feature["properties"]["actual_depth"] = cov_info.get("actual_depth", 0)
-                    feature["properties"]["expected_depth"] = cov_info.get("actual_depth", 0)
-                    feature["properties"]["coverage"] = cov_info.get("coverage", 0)
-                    feature["properties"]["level_counts"] = cov_info.get("level_counts", {})
-                    feature["properties"]["geometry_counts"] = cov_info.get("geometry_counts", {})
-                    feature["properties"]["drillable_depth"] = cov_info.get("drillable_depth", 0)
-                else:
-                    feature["properties"]["actual_depth"] = 0
-                    feature["properties"]["expected_depth"] = 0
-                    feature["properties"]["coverage"] = 0
-                    feature["properties"]["level_counts"] = {}
-                    feature["properties"]["geometry_counts"] = {}
-                    feature["properties"]["drillable_depth"] = 0
+def _feature_cell_range(props: dict, size: float):
+    """Cell index range (x0, x1, y0, y1) a feature's bbox (or centroid) touches, or None."""
+    b = (props.get("bbox_min_lon"), props.get("bbox_min_lat"),
+         props.get("bbox_max_lon"), props.get("bbox_max_lat"))
+    if None in b:
+        lon, lat = props.get("centroid_lon"), props.get("centroid_lat")
+        if lon is None or lat is None:
+            return None
+        b = (lon, lat, lon, lat)
+    return (math.floor(b[0] / size), math.floor(b[2] / size),
+            math.floor(b[1] / size), math.floor(b[3] / size))
+
+
+def _add_debug_coverage(features: list, admin_level: int, iso3: str = None):
+    """Add coverage info for debug mode (from the coverage manifest)."""
+    if iso3 is not None:
+        # Sub-country levels: one country, coverage from the current admin_level
+        cov_info = coverage_for(iso3, from_level=admin_level)
+
+    for feature in features:
+        feature["properties"]["current_admin_level"] = admin_level
+
+        if iso3 is None:
+            # Level 0: each feature is a country, coverage starts from level 1
+            loc_id = feature.get("properties", {}).get("loc_id")
+            cov_info = coverage_for(loc_id, from_level=1) if loc_id else {}
 
-        return geojson
+        feature["properties"]["actual_depth"] = cov_info.get("actual_depth", 0)
+        feature["properties"]["expected_depth"] = cov_info.get("actual_depth", 0)
+        feature["properties"]["coverage"] = cov_info.get("coverage", 0)
+        feature["properties"]["level_counts"] = cov_info.get("level_counts", {})
+        feature["properties"]["geometry_counts"] = cov_info.get("geometry_counts", {})
+        feature["properties"]["drillable_depth"] = cov_info.get("drillable_depth", 0)
 
-    # Find countries that intersect the viewport
-    countries = get_countries_in_bbox(*buffered_bbox)
 
+def _viewport_candidates(admin_level: int, query_bbox: tuple):
+    """
+    Find the rows at admin_level intersecting query_bbox, without decoding geometry.
+
+    Returns:
+        (candidates, countries_searched) where candidates is a list of
+        (kind, iso3, DataFrame) and kind is "global", "country" or "subcounty"
+    """
+    # For level 0 (countries), just return from global.csv
+    if admin_level == 0:
+        df = load_global_countries()
+        if df is None:
+            return [], 0
+        return [("global", None, _filter_df_by_bbox(df, query_bbox))], 0
+
+    # Find countries that intersect the query bbox
+    countries = get_countries_in_bbox(*query_bbox)
     if not countries:
-        return {"type": "FeatureCollection", "features": []}
+        return [], 0
 
-    all_features = []
+    candidates = []
 
     # For admin levels 3+, try sub-county geometry files for each country
     countries_with_subcounty = []
     if admin_level >= 3:
         for iso3 in countries:
-            subcounty_features = _load_subcounty_for_viewport(iso3, admin_level, buffered_bbox, debug)
-            if subcounty_features:
-                all_features.extend(subcounty_features)
+            frames = _subcounty_frames_for_viewport(iso3, admin_level, query_bbox)
+            if frames:
+                candidates.extend(("subcounty", iso3, df) for df in frames)
                 countries_with_subcounty.append(iso3)
         # Remove countries that were handled via subcounty geometry
         countries = [c for c in countries if c not in countries_with_subcounty]
 
     for iso3 in countries:
+        _country_traffic[iso3] += 1
         # Load only this level from parquet (predicate pushdown)
         df = load_country_parquet(iso3, admin_level=admin_level)
 
@@ -1204,99 +1284,384 @@ def get_viewport_geometry(admin_level: int, bbox: tuple, debug: bool = False):
             if df is None or len(df) == 0:
                 continue
 
-        # Filter by bbox intersection using pre-computed bbox columns
-        if 'bbox_min_lon' in df.columns:
-            mask = (
-                (df['bbox_max_lon'] >= buffered_bbox[0]) &
-                (df['bbox_min_lon'] <= buffered_bbox[2]) &
-                (df['bbox_max_lat'] >= buffered_bbox[1]) &
-                (df['bbox_min_lat'] <= buffered_bbox[3])
-            )
-            df_filtered = df[mask]
+        # Filter by bbox intersection using pre-computed bbox columns (centroid fallback)
+        candidates.append(("country", iso3, _filter_df_by_bbox(df, query_bbox)))
+
+    return candidates, len(countries) + len(countries_with_subcounty)
+
+
+def _row_centers(df):
+    """Centroid (or bbox center) per row as float arrays; NaN where neither exists."""
+    n = len(df)
+    lon = np.full(n, np.nan)
+    lat = np.full(n, np.nan)
+    if 'centroid_lon' in df.columns and 'centroid_lat' in df.columns:
+        lon = df['centroid_lon'].to_numpy(dtype=np.float64, na_value=np.nan)
+        lat = df['centroid_lat'].to_numpy(dtype=np.float64, na_value=np.nan)
+    if 'bbox_min_lon' in df.columns:
+        # Fallback to bbox center
+        missing = np.isnan(lon) | np.isnan(lat)
+        if missing.any():
+            b = df[['bbox_min_lon', 'bbox_min_lat', 'bbox_max_lon', 'bbox_max_lat']].to_numpy(
+                dtype=np.float64, na_value=np.nan)
+            lon = np.where(missing, (b[:, 0] + b[:, 2]) / 2, lon)
+            lat = np.where(missing, (b[:, 1] + b[:, 3]) / 2, lat)
+    return lon, lat
+
+
+def _nearest_rows(candidates: list, center_lon: float, center_lat: float, limit: int) -> list:
+    """
+    Trim candidates to the limit rows closest to the viewport center.
+
+    Ranks on the centroid/bbox columns with argpartition, so only kept rows
+    are ever decoded. Rows without coordinates rank last.
+    """
+    dist = []
+    for _, _, df in candidates:
+        lon, lat = _row_centers(df)
+        d = (lon - center_lon) ** 2 + (lat - center_lat) ** 2
+        dist.append(np.where(np.isnan(d), np.inf, d))
+    dist = np.concatenate(dist)
+
+    keep = np.zeros(len(dist), dtype=bool)
+    keep[np.argpartition(dist, limit - 1)[:limit]] = True
+
+    trimmed = []
+    offset = 0
+    for kind, iso3, df in candidates:
+        rows = np.flatnonzero(keep[offset:offset + len(df)])
+        offset += len(df)
+        if len(rows):
+            trimmed.append((kind, iso3, df.iloc[rows]))
+    return trimmed
+
+
+def _candidates_to_features(candidates: list, admin_level: int, debug: bool = False,
+                            geometry_column: str = "geometry") -> list:
+    """Decode candidate rows to GeoJSON features (polygons only), adding debug info."""
+    all_features = []
+    for kind, iso3, df in candidates:
+        features = df_to_geojson(df, polygon_only=True, geometry_column=geometry_column)["features"]
+        if debug:
+            if kind == "global":
+                _add_debug_coverage(features, admin_level)
+            elif kind == "country":
+                _add_debug_coverage(features, admin_level, iso3)
+            else:
+                for feature in features:
+                    feature["properties"]["current_admin_level"] = admin_level
+        all_features.extend(features)
+    return all_features
+
+
+def _query_viewport_features(admin_level: int, query_bbox: tuple, debug: bool = False,
+                             geometry_column: str = "geometry", limit: int = None, center: tuple = None,
+                             prefetched: tuple = None):
+    """
+    Load features at admin_level intersecting query_bbox (uncached).
+
+    With limit, rows beyond it are dropped by distance from center (default:
+    query_bbox center) before any geometry is decoded. prefetched is a
+    (candidates, countries_searched) result of _viewport_candidates for a
+    bbox covering query_bbox, used instead of querying again.
+
+    Returns:
+        (features, countries_searched, truncated)
+    """
+    if prefetched is not None:
+        candidates, countries_searched = prefetched
+    else:
+        candidates, countries_searched = _viewport_candidates(admin_level, query_bbox)
+
+    truncated = False
+    total = sum(len(df) for _, _, df in candidates)
+    if limit is not None and total > limit:
+        if center is None:
+            center = ((query_bbox[0] + query_bbox[2]) / 2, (query_bbox[1] + query_bbox[3]) / 2)
+        logger.warning(f"Truncating {total} features to {limit} for admin level {admin_level}")
+        candidates = _nearest_rows(candidates, center[0], center[1], limit)
+        truncated = True
+
+    features = _candidates_to_features(candidates, admin_level, debug, geometry_column)
+    return features, countries_searched, truncated
+
+
+def _load_viewport_cells(admin_level: int, cells: list, debug: bool = False, detail: int = None,
+                         limit: int = None):
+    """
+    Get the feature lists for grid cells, building missing cells in one query.
+
+    Missing cells are loaded with a single query over their combined bbox; each
+    feature is then assigned to every missing cell its bbox touches. Cells are
+    cached per geometry column, so each detail level has its own entries.
+
+    If the missing cells hold more than limit rows, nothing is decoded and the
+    cell map is None - the caller should query the viewport truncated instead,
+    reusing the returned candidates if every cell was missing (they then cover
+    the whole viewport).
+
+    Returns:
+        ({(cx, cy): [features]} or None, cache_hits, countries_searched,
+        candidates over the limit or None)
+    """
+    size = get_viewport_cell_size(admin_level)
+    geometry_column = get_geometry_column(detail)
+    result = {}
+    missing = []
+    for cell in cells:
+        features = _viewport_cell_cache.get((admin_level, debug, geometry_column) + cell)
+        if features is None:
+            missing.append(cell)
         else:
-            # No bbox columns - use centroid as fallback
-            if 'centroid_lon' in df.columns and 'centroid_lat' in df.columns:
-                mask = (
-                    (df['centroid_lon'] >= buffered_bbox[0]) &
-                    (df['centroid_lon'] <= buffered_bbox[2]) &
-                    (df['centroid_lat'] >= buffered_bbox[1]) &
-                    (df['centroid_lat'] <= buffered_bbox[3])
-                )
-                df_filtered = df[mask]
+            result[cell] = features
+
+    hits = len(result)
+    countries_searched = 0
+    if missing:
+        candidates, countries_searched = _viewport_candidates(admin_level, _cells_bbox(missing, size))
+        if limit is not None and sum(len(df) for _, _, df in candidates) > limit:
+            return None, hits, countries_searched, candidates
+
+        built = {cell: [] for cell in missing}
+        features = _candidates_to_features(candidates, admin_level, debug, geometry_column)
+
+        for feature in features:
+            span = _feature_cell_range(feature["properties"], size)
+            if span is None:
+                # No bbox or centroid to place it by - keep it in every cell
+                for cell_features in built.values():
+                    cell_features.append(feature)
+                continue
+
+            x0, x1, y0, y1 = span
+            if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(built):
+                for cx in range(x0, x1 + 1):
+                    for cy in range(y0, y1 + 1):
+                        cell_features = built.get((cx, cy))
+                        if cell_features is not None:
+                            cell_features.append(feature)
             else:
-                df_filtered = df
+                for (cx, cy), cell_features in built.items():
+                    if x0 <= cx <= x1 and y0 <= cy <= y1:
+                        cell_features.append(feature)
 
-        # Convert to features
-        geojson = df_to_geojson(df_filtered, polygon_only=True)
+        for cell, cell_features in built.items():
+            _viewport_cell_cache.put((admin_level, debug, geometry_column) + cell, cell_features)
+            result[cell] = cell_features
 
-        # Add debug info for sub-country levels (calculate on-the-fly from parquet)
-        if debug:
-            # Calculate from actual parquet data, starting from current admin_level
-            cov_info = calculate_coverage_from_parquet(iso3, from_level=admin_level)
+    return result, hits, countries_searched, None
 
-            for feature in geojson.get("features", []):
-                feature["properties"]["current_admin_level"] = admin_level
-                feature["properties"]["actual_depth"] = cov_info.get("actual_depth", 0)
-                feature["properties"]["expected_depth"] = cov_info.get("actual_depth", 0)
-                feature["properties"]["coverage"] = cov_info.get("coverage", 0)
-                feature["properties"]["level_counts"] = cov_info.get("level_counts", {})
-                feature["properties"]["geometry_counts"] = cov_info.get("geometry_counts", {})
-                feature["properties"]["drillable_depth"] = cov_info.get("drillable_depth", 0)
 
-        all_features.extend(geojson.get("features", []))
+def _compose_topology(cell_features, all_features: list, cell_key: tuple, quantum: float) -> dict:
+    """
+    Encode the response features as one topology.
+
+    Each grid cell's topology is built once and cached alongside its feature
+    list, so borders are shared within a cell; borders crossing cell edges
+    are sent once per cell.
+    """
+    writer = TopologyWriter(quantum)
+
+    if cell_features is None:
+        part = build_topology(all_features, quantum)
+        for i, f in enumerate(all_features):
+            writer.add(part, i, f["properties"])
+        return writer.to_dict()
+
+    keep = {f["properties"].get("loc_id") or id(f) for f in all_features}
+    added = set()
+    for cell, features in cell_features.items():
+        key = cell_key + cell
+        entry = _cell_topology_cache.get(key)
+        if entry is None or entry[0] is not features:
+            entry = (features, build_topology(features, quantum))
+            _cell_topology_cache.put(key, entry)
+        part = entry[1]
+
+        for i, f in enumerate(features):
+            fkey = f["properties"].get("loc_id") or id(f)
+            if fkey in keep and fkey not in added:
+                added.add(fkey)
+                writer.add(part, i, f["properties"])
+
+    return writer.to_dict()
+
+
+def _truncate_by_distance(features: list, center_lon: float, center_lat: float, limit: int) -> list:
+    """Keep the limit features closest to the viewport center so edges get trimmed naturally."""
+    def center(props):
+        f_lon, f_lat = props.get("centroid_lon"), props.get("centroid_lat")
+        if f_lon is None or f_lat is None:
+            # Fallback to bbox center
+            b = (props.get("bbox_min_lon"), props.get("bbox_min_lat"),
+                 props.get("bbox_max_lon"), props.get("bbox_max_lat"))
+            if None in b:
+                return (np.nan, np.nan)
+            f_lon, f_lat = (b[0] + b[2]) / 2, (b[1] + b[3]) / 2
+        return (f_lon, f_lat)
+
+    xy = np.array([center(f.get("properties", {})) for f in features], dtype=np.float64).reshape(-1, 2)
+    dist = (xy[:, 0] - center_lon) ** 2 + (xy[:, 1] - center_lat) ** 2
+    dist = np.where(np.isnan(dist), np.inf, dist)
+    kept = np.argpartition(dist, limit - 1)[:limit]
+    return [features[i] for i in kept[np.argsort(dist[kept], kind="stable")]]
+
+
+def get_viewport_geometry(admin_level: int, bbox: tuple = None, debug: bool = False, cells: list = None,
+                          topology: bool = False):
+    """
+    Load features at admin_level within bounding box.
+
+    The buffered viewport is snapped to fixed grid cells (VIEWPORT_CELL_DEGREES)
+    and the response is composed from cached per-cell feature lists. Clients
+    that already hold some cells can pass cells= to fetch only the others.
+
+    Polygons come from the pre-simplified column for the viewport's detail
+    level (get_viewport_detail), so large viewports get coarse outlines.
+
+    Args:
+        admin_level: Target admin level (0=countries, 1=states, 2=counties, 3=ZCTAs,
+                     4=census tracts, 5=block groups, 6=blocks)
+        bbox: (min_lon, min_lat, max_lon, max_lat)
+        debug: If True, add coverage info for level 0 features
+        cells: Optional list of (cx, cy) grid cells to load instead of bbox
+               (bbox, if also given, then only selects the detail level)
+        topology: If True, return a Topology (shared arcs, quantized for the
+                  detail level) instead of a FeatureCollection
+
+    Returns:
+        GeoJSON FeatureCollection (or Topology) with features in viewport.
+        metadata.cells maps "cx:cy" to the loc_ids in that cell,
+        metadata.cell_size gives the grid and metadata.detail the detail level served.
+
+    Raises:
+        ValueError: More than MAX_VIEWPORT_CELLS cells requested
+    """
+    size = get_viewport_cell_size(admin_level)
+    detail = get_viewport_detail(bbox) if bbox else len(VIEWPORT_AREA_THRESHOLDS)
+
+    if cells is not None:
+        if len(cells) > MAX_VIEWPORT_CELLS:
+            raise ValueError(f"Too many cells requested ({len(cells)} > {MAX_VIEWPORT_CELLS})")
+        min_lon, min_lat, max_lon, max_lat = _cells_bbox(cells, size) if cells else (0, 0, 0, 0)
+        query_bbox = (min_lon, min_lat, max_lon, max_lat)
+    else:
+        min_lon, min_lat, max_lon, max_lat = bbox
+
+        # Add buffer for smooth panning - proportional to viewport size (2x total preload)
+        # 50% buffer on each side = 2x the viewport area total
+        viewport_width = max_lon - min_lon
+        viewport_height = max_lat - min_lat
+        buffer_lon = viewport_width * 0.5
+        buffer_lat = viewport_height * 0.5
+        buffered_bbox = (
+            min_lon - buffer_lon,
+            min_lat - buffer_lat,
+            max_lon + buffer_lon,
+            max_lat + buffer_lat
+        )
+        query_bbox = buffered_bbox
+        cells = get_viewport_cells(admin_level, buffered_bbox)
+
+    center = ((min_lon + max_lon) / 2, (min_lat + max_lat) / 2)
+    cell_hits = 0
+    cell_features = None
+    prefetched = None
+    if len(cells) <= MAX_VIEWPORT_CELLS:
+        cell_features, cell_hits, countries_searched, candidates = _load_viewport_cells(
+            admin_level, cells, debug, detail, limit=MAX_VIEWPORT_FEATURES
+        )
+        if candidates is not None and cell_hits == 0:
+            # Every cell was missing: the candidates already cover the viewport
+            prefetched = (candidates, countries_searched)
 
-    # Safety limit to prevent browser memory issues
-    # Sort by distance from viewport center so edges get trimmed naturally
-    MAX_FEATURES = 10000
     truncated = False
-    if len(all_features) > MAX_FEATURES:
-        logger.warning(f"Truncating {len(all_features)} features to {MAX_FEATURES} for admin level {admin_level}")
-
-        # Calculate viewport center
-        center_lon = (min_lon + max_lon) / 2
-        center_lat = (min_lat + max_lat) / 2
-
-        # Pre-compute distances once (O(n)) instead of during sort (O(n log n) function calls)
-        distances = []
-        for f in all_features:
-            props = f.get("properties", {})
-            f_lon = props.get("centroid_lon")
-            f_lat = props.get("centroid_lat")
-            if f_lon is None or f_lat is None:
-                # Fallback to bbox center
-                b1, b2 = props.get("bbox_min_lon"), props.get("bbox_max_lon")
-                b3, b4 = props.get("bbox_min_lat"), props.get("bbox_max_lat")
-                if b1 is not None and b2 is not None:
-                    f_lon, f_lat = (b1 + b2) / 2, (b3 + b4) / 2
-                else:
-                    distances.append(float('inf'))
-                    continue
-            distances.append((f_lon - center_lon) ** 2 + (f_lat - center_lat) ** 2)
+    if cell_features is None:
+        # Too fine a grid, or too many features to cache - query the viewport
+        # directly, truncating by distance before geometry is decoded
+        all_features, countries_searched, truncated = _query_viewport_features(
+            admin_level, query_bbox, debug, get_geometry_column(detail),
+            limit=MAX_VIEWPORT_FEATURES, center=center, prefetched=prefetched
+        )
+    else:
+        # Compose from cells; features spanning several cells are listed once
+        seen = set()
+        all_features = []
+        for features in cell_features.values():
+            for f in features:
+                key = f["properties"].get("loc_id") or id(f)
+                if key not in seen:
+                    seen.add(key)
+                    all_features.append(f)
+
+        if len(all_features) > MAX_VIEWPORT_FEATURES:
+            # Cached cells plus new ones can still exceed the limit
+            logger.warning(f"Truncating {len(all_features)} features to {MAX_VIEWPORT_FEATURES} for admin level {admin_level}")
+            all_features = _truncate_by_distance(all_features, center[0], center[1], MAX_VIEWPORT_FEATURES)
+            truncated = True
+
+    metadata = {
+        "admin_level": admin_level,
+        "countries_searched": countries_searched,
+        "feature_count": len(all_features),
+        "truncated": truncated,
+        "cell_size": size,
+        "cells_cached": cell_hits,
+        "detail": detail,
+    }
+    if cell_features is not None and not truncated:
+        metadata["cells"] = {
+            f"{cx}:{cy}": [f["properties"].get("loc_id") for f in features]
+            for (cx, cy), features in cell_features.items()
+        }
 
-        # Sort indices by distance, take first N
-        sorted_indices = sorted(range(len(all_features)), key=lambda i: distances[i])
-        all_features = [all_features[i] for i in sorted_indices[:MAX_FEATURES]]
-        truncated = True
+    if topology:
+        quantum = TOPOLOGY_QUANTUM.get(detail, DEFAULT_QUANTUM)
+        encoded = _compose_topology(
+            cell_features, all_features, (admin_level, debug, get_geometry_column(detail), quantum), quantum
+        )
+        encoded["metadata"] = metadata
+        return encoded
 
     return {
         "type": "FeatureCollection",
         "features": all_features,
-        "metadata": {
-            "admin_level": admin_level,
-            "countries_searched": len(countries),
-            "feature_count": len(all_features),
-            "truncated": truncated
-        }
+        "metadata": metadata
     }
 
 
+def get_cache_stats() -> list:
+    """Get statistics (entries, bytes, hits, misses, evictions) for all geometry caches."""
+    return [
+        geometry_store.stats(),
+        _viewport_cell_cache.stats(),
+        _cell_topology_cache.stats(),
+        _children_topology_cache.stats(),
+        locator_stats(),
+        pack_cache_stats(),
+    ]
+
+
+def get_country_traffic() -> Counter:
+    """Snapshot of per-country geometry request counts since startup."""
+    return Counter(_country_traffic)
+
+
 def clear_cache():
     """Clear all cached geometry data. Useful when data files are updated."""
-    global _country_parquet_cache, _global_countries_cache, _country_bounds_cache, _subcounty_geometry_cache
-    _country_parquet_cache = {}
+    global _global_countries_cache, _country_index
+    geometry_store.clear()
     _global_countries_cache = None
-    _country_bounds_cache = None
-    _subcounty_geometry_cache = {}
+    _country_index = None
+    _viewport_cell_cache.clear()
+    _cell_topology_cache.clear()
+    _children_topology_cache.clear()
+    _crosswalk_cache.clear()
+    clear_registry()
+    clear_locators()
+    clear_manifest_cache()
+    clear_place_index()
+    clear_pack_cache()
     logger.info("Geometry cache cleared")
 
 
@@ -1339,14 +1704,12 @@ def get_selection_geometries(loc_ids: list):
                     country_geojson = df_to_geojson(country_rows, polygon_only=True)
                     features.extend(country_geojson.get("features", []))
 
-        # Fetch sub-country levels from parquet
+        # Fetch sub-country levels from parquet (only the requested rows)
         if sub_level_ids:
-            country_df = load_country_parquet(iso3)
-            if country_df is not None:
-                filtered = country_df[country_df["loc_id"].isin(sub_level_ids)]
-                if len(filtered) > 0:
-                    sub_geojson = df_to_geojson(filtered, polygon_only=True)
-                    features.extend(sub_geojson.get("features", []))
+            filtered = _find_country_rows(iso3, sub_level_ids)
+            if filtered is not None and len(filtered) > 0:
+                sub_geojson = df_to_geojson(filtered, polygon_only=True)
+                features.extend(sub_geojson.get("features", []))
 
     logger.debug(f"Loaded {len(features)} geometries for selection from {len(loc_ids)} loc_ids")
 
@@ -0,0 +1,321 @@
+"""
+Shared store for geometry parquet files.
+
+Country and sub-county geometry parquets used to be read by several loaders
+(viewport handlers, data cascade, preprocessor, name standardizer, data
+loading), each with its own cache or none, so one file could be held several
+times with different columns. GeometryStore reads each file once and hands
+out views of it:
+
+- columns / view: column projection (VIEWS: names, hierarchy, bbox, geometry)
+- admin_level: rows of one admin level
+
+A view is served from what is already held for the file - the full table if
+loaded, else the level's rows - and only read from disk (just its columns and
+rows) when nothing held covers it. Loading the full table drops the narrower
+reads of that file. Values computed from a file (e.g. name lookup dicts) are
+held alongside it with derived().
+
+All entries share one byte budget (GEOMETRY_CACHE_MB) and are revalidated
+against the file's size and mtime, so an updated file is reloaded. clear()
+or invalidate(path) drops entries. Returned DataFrames are shared: copy
+before modifying.
+
+Files rewritten by scripts/cluster_geometry.py are sorted along a Hilbert
+curve with small row groups; read_bbox() reads only the row groups whose bbox
+statistics intersect a viewport, without holding the whole file.
+
+Usage:
+    from mapmover.geometry_store import geometry_store
+
+    df = geometry_store.get(path)                      # full table
+    df = geometry_store.get(path, admin_level=2)       # one level, all columns
+    df = geometry_store.get(path, view="hierarchy")    # loc_id, parent_id, admin_level
+    df = geometry_store.read_bbox(path, bbox)          # clustered files only (else None)
+"""
+
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .lru_cache import ByteBudgetLRU
+from .spatial_index import register_source, df_bounds
+
+logger = logging.getLogger("mapmover")
+
+GEOMETRY_CACHE_BYTES = int(os.environ.get("GEOMETRY_CACHE_MB", "512")) * 1024 * 1024
+
+# Column projections by view name (None = all columns)
+VIEWS = {
+    "names": ("loc_id", "name", "parent_id", "admin_level"),
+    "hierarchy": ("loc_id", "parent_id", "admin_level"),
+    "bbox": ("loc_id", "parent_id", "admin_level", "bbox_min_lon", "bbox_min_lat",
+             "bbox_max_lon", "bbox_max_lat", "centroid_lon", "centroid_lat"),
+    "geometry": None,
+}
+
+# Second key element of derived() entries
+_DERIVED = "derived"
+
+# Parquet key/value metadata marking a spatially clustered file (scripts/cluster_geometry.py)
+LAYOUT_KEY = b"mapmover.layout"
+LAYOUT_HILBERT = b"hilbert"
+
+# Columns whose row-group statistics bound a file's row groups: bbox, else centroid
+_BOUNDS_COLUMNS = (
+    ("bbox_min_lon", "bbox_min_lat", "bbox_max_lon", "bbox_max_lat"),
+    ("centroid_lon", "centroid_lat", "centroid_lon", "centroid_lat"),
+)
+
+
+def _row_group_bounds(path: Path):
+    """(groups, 4) bounds per row group from column statistics (no rows if not clustered)."""
+    metadata = pq.read_metadata(path)
+    names = metadata.schema.names
+    columns = next((c for c in _BOUNDS_COLUMNS if all(n in names for n in c)), None)
+    if columns is None or (metadata.metadata or {}).get(LAYOUT_KEY) != LAYOUT_HILBERT:
+        return np.zeros((0, 4), dtype=np.float64)
+
+    index = [names.index(c) for c in columns]
+    bounds = np.empty((metadata.num_row_groups, 4), dtype=np.float64)
+    # Missing statistics never exclude a row group
+    unbounded = (-np.inf, -np.inf, np.inf, np.inf)
+    for g in range(metadata.num_row_groups):
+        row_group = metadata.row_group(g)
+        for k, j in enumerate(index):
+            stats = row_group.column(j).statistics
+            if stats is None or not stats.has_min_max:
+                bounds[g, k] = unbounded[k]
+            else:
+                bounds[g, k] = stats.min if k < 2 else stats.max
+    return bounds
+
+
+def _stamp(path: Path):
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _df_nbytes(df, deep: bool = True) -> int:
+    """Estimated memory held by a DataFrame (deep: including string contents)."""
+    return int(df.memory_usage(deep=deep).sum())
+
+
+class GeometryStore:
+    """Byte-budgeted cache of geometry parquet files and views of them."""
+
+    def __init__(self, max_bytes: int):
+        # key -> (file stamp, value, estimated bytes)
+        self._cache = ByteBudgetLRU("geometry_store", max_bytes, sizeof=lambda entry: entry[2],
+                                    log_evictions=True)
+
+    def _held(self, key, stamp, touch: bool = True):
+        entry = self._cache.get(key) if touch else self._cache.peek(key)
+        if entry is None:
+            return None
+        if entry[0] != stamp:
+            # The file changed: everything held for it is stale
+            self.invalidate(key[0])
+            return None
+        return entry[1]
+
+    def peek(self, path, admin_level: int = None):
+        """Full table (or one level's rows) if already held, without loading. Else None."""
+        path = Path(path)
+        stamp = _stamp(path)
+        if stamp is None:
+            return None
+        return self._held((str(path), None, admin_level), stamp, touch=False)
+
+    def get(self, path, view: str = None, columns=None, admin_level: int = None):
+        """
+        Load a view of a geometry parquet file.
+
+        Args:
+            path: Parquet file
+            view: Named column projection from VIEWS (ignored if columns is given)
+            columns: Columns to return (names not in the file are skipped); None = all
+            admin_level: Only rows at this admin level
+
+        Returns:
+            DataFrame, or None if the file does not exist or cannot be read
+        """
+        path = Path(path)
+        stamp = _stamp(path)
+        if stamp is None:
+            return None
+        if columns is None and view is not None:
+            columns = VIEWS[view]
+        columns = tuple(columns) if columns is not None else None
+        name = str(path)
+        key = (name, columns, admin_level)
+
+        df = self._held(key, stamp)
+        if df is not None:
+            return df
+
+        try:
+            # Narrow the widest view already held, else read just this view
+            base = self._held((name, None, None), stamp, touch=False)
+            if base is None and admin_level is not None:
+                base = self._held((name, None, admin_level), stamp, touch=False)
+            if base is not None:
+                df = self._narrow(base, columns, admin_level)
+                self._put(key, stamp, df, _df_nbytes(df, deep=False), path)
+                return df
+
+            df = self._read(path, columns, admin_level)
+        except Exception as e:
+            logger.error(f"Error loading geometry from {path}: {e}")
+            return None
+
+        if columns is None and admin_level is None:
+            # The full table covers every other view of this file
+            for other in self._cache.keys():
+                if other[0] == name and other != key and other[1] != _DERIVED:
+                    self._cache.pop(other)
+        self._put(key, stamp, df, _df_nbytes(df), path)
+        logger.debug(f"Loaded {len(df)} rows from {path.name} (columns={columns}, level={admin_level})")
+        return df
+
+    @staticmethod
+    def _narrow(df, columns, admin_level):
+        if admin_level is not None and 'admin_level' in df.columns and (df['admin_level'] != admin_level).any():
+            df = df[df['admin_level'] == admin_level]
+        if columns is not None:
+            df = df[[c for c in columns if c in df.columns]]
+        return df
+
+    @staticmethod
+    def _read(path: Path, columns, admin_level):
+        if columns is not None:
+            names = pq.read_schema(path).names
+            columns = [c for c in columns if c in names]
+        filters = [('admin_level', '==', admin_level)] if admin_level is not None else None
+        return pd.read_parquet(path, columns=columns, filters=filters)
+
+    def _put(self, key, stamp, df, nbytes, path):
+        if key[1] is None:
+            # Full-column tables get a persisted spatial index
+            register_source(df, path, "all" if key[2] is None else f"admin_level={key[2]}")
+        self._cache.put(key, (stamp, df, nbytes))
+
+    def derived(self, path, name: str, build, sizeof=None):
+        """
+        Value computed from a file by build(), held until the file changes.
+
+        Args:
+            path: Source file (its size/mtime validate the value)
+            name: Key for the value among this file's derived values
+            build: Callable returning the value (None is not cached)
+            sizeof: Callable estimating the value's bytes (default: len * 256)
+
+        Returns:
+            The value, or None if the file does not exist
+        """
+        path = Path(path)
+        stamp = _stamp(path)
+        if stamp is None:
+            return None
+        key = (str(path), _DERIVED, name)
+        value = self._held(key, stamp)
+        if value is not None:
+            return value
+        value = build()
+        if value is not None:
+            nbytes = sizeof(value) if sizeof else len(value) * 256
+            self._cache.put(key, (stamp, value, nbytes))
+        return value
+
+    def read_bbox(self, path, bbox: tuple, admin_level: int = None):
+        """
+        Rows of a clustered file intersecting bbox, reading only the row groups
+        whose statistics intersect it. Not held by the store.
+
+        Args:
+            path: Parquet file written by scripts/cluster_geometry.py
+            bbox: (min_lon, min_lat, max_lon, max_lat)
+            admin_level: Only rows at this admin level
+
+        Returns:
+            DataFrame, or None if the file is missing or not clustered
+        """
+        path = Path(path)
+        try:
+            bounds = self.derived(path, "row_group_bounds", lambda: _row_group_bounds(path),
+                                  sizeof=lambda b: b.nbytes)
+        except Exception as e:
+            logger.warning(f"Could not read row group statistics for {path}: {e}")
+            return None
+        if bounds is None or len(bounds) == 0:
+            return None
+
+        min_lon, min_lat, max_lon, max_lat = bbox
+        groups = np.flatnonzero(
+            (bounds[:, 2] >= min_lon) & (bounds[:, 0] <= max_lon) &
+            (bounds[:, 3] >= min_lat) & (bounds[:, 1] <= max_lat)
+        )
+        parquet = pq.ParquetFile(path)
+        if len(groups) == 0:
+            return parquet.schema_arrow.empty_table().to_pandas()
+        df = parquet.read_row_groups(groups.tolist()).to_pandas()
+
+        if admin_level is not None and 'admin_level' in df.columns:
+            df = df[df['admin_level'] == admin_level]
+        rows = df_bounds(df)
+        if rows is not None:
+            df = df[(rows[:, 2] >= min_lon) & (rows[:, 0] <= max_lon) &
+                    (rows[:, 3] >= min_lat) & (rows[:, 1] <= max_lat)]
+        logger.debug(f"Read {len(groups)}/{len(bounds)} row groups of {path.name} for bbox: {len(df)} rows")
+        return df.reset_index(drop=True)
+
+    def invalidate(self, path):
+        """Drop everything held for one file."""
+        name = str(Path(path))
+        for key in self._cache.keys():
+            if key[0] == name:
+                self._cache.pop(key)
+
+    def clear(self):
+        """Drop everything held (e.g. after data files are replaced)."""
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+geometry_store = GeometryStore(GEOMETRY_CACHE_BYTES)
+
+
+def name_index(path) -> dict:
+    """
+    Locations by lowercased name for a geometry parquet, in file order.
+
+    Returns:
+        {name_lower: [{"loc_id", "parent_id", "admin_level"}, ...]}, or {} if
+        the file does not exist. Multiple locations can share a name (e.g.
+        Washington County in 30+ states).
+    """
+    def build():
+        df = geometry_store.get(path, view="names")
+        if df is None or 'name' not in df.columns:
+            return None
+        names = {}
+        parents = df['parent_id'] if 'parent_id' in df.columns else [None] * len(df)
+        levels = df['admin_level'] if 'admin_level' in df.columns else [None] * len(df)
+        for name, loc_id, parent_id, level in zip(df['name'], df['loc_id'], parents, levels):
+            if name and isinstance(name, str):
+                names.setdefault(name.lower(), []).append(
+                    {"loc_id": loc_id, "parent_id": parent_id, "admin_level": level}
+                )
+        return names
+
+    return geometry_store.derived(path, "name_index", build, sizeof=lambda names: len(names) * 400) or {}
@@ -0,0 +1,256 @@
+"""
+loc_id locator index for country geometry parquets.
+
+Selection, drill-down, info and "show borders" lookups need a handful of rows
+(named loc_ids, or the children of one parent) from a country parquet that
+holds every admin level and every geometry. This index maps each loc_id to its
+row and each parent_id to its child rows, so lookups read only the row groups
+holding those rows, and only the columns they need.
+
+Per file the index stores loc_id, parent_id, admin_level and a has-geometry
+flag for every row, plus row-group sizes. It is persisted to
+CACHE_DIR/loc_index and rebuilt when the source file's size or mtime changes.
+
+- country_geometry_source(iso3) -> (parquet path, crosswalk path) using the 3-tier fallback
+- country_geometry_sources(iso3) -> every existing tier, for callers that fall through on read errors
+- load_locator(path) -> LocIndex (cached in memory and on disk)
+- LocIndex.find(loc_ids) / .children(parent_ids) -> row numbers (every row with a matching key)
+- LocIndex.read(rows, columns=None) -> DataFrame of those rows, in order
+
+Usage:
+    from mapmover.loc_index import country_geometry_source, load_locator
+
+    path, _ = country_geometry_source("USA")
+    locator = load_locator(path)
+    df = locator.read(locator.children(["USA-CA"]))
+"""
+
+import hashlib
+import logging
+import os
+
+import numpy as np
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .lru_cache import ByteBudgetLRU
+from .paths import CACHE_DIR, COUNTRIES_DIR, GEOMETRY_DIR
+
+logger = logging.getLogger("mapmover")
+
+LOC_INDEX_DIR = CACHE_DIR / "loc_index"
+
+LOC_INDEX_CACHE_BYTES = int(os.environ.get("LOC_INDEX_CACHE_MB", "128")) * 1024 * 1024
+
+
+def country_geometry_source(iso3: str):
+    """
+    Geometry parquet for a country and its crosswalk (3-tier fallback).
+
+    1. countries/{ISO3}/geometry.parquet - country-specific geometry (no crosswalk)
+    2. countries/{ISO3}/crosswalk.json + geometry/{ISO3}.parquet - GADM with crosswalk
+    3. geometry/{ISO3}.parquet - GADM fallback
+
+    Returns:
+        (parquet path or None, crosswalk path or None)
+    """
+    sources = country_geometry_sources(iso3)
+    return sources[0] if sources else (None, None)
+
+
+def country_geometry_sources(iso3: str) -> list:
+    """
+    Every existing (parquet path, crosswalk path or None) for a country, in
+    country_geometry_source priority order. Callers that can fall back to
+    GADM when the country-specific file is unreadable try them in turn.
+    """
+    sources = []
+    country_file = COUNTRIES_DIR / iso3 / "geometry.parquet"
+    if country_file.exists():
+        sources.append((country_file, None))
+    global_file = GEOMETRY_DIR / f"{iso3}.parquet"
+    if global_file.exists():
+        crosswalk_file = COUNTRIES_DIR / iso3 / "crosswalk.json"
+        sources.append((global_file, crosswalk_file if crosswalk_file.exists() else None))
+    return sources
+
+
+class LocIndex:
+    """Row lookup by loc_id and parent_id for one parquet file."""
+
+    def __init__(self, path, loc_ids: np.ndarray, parent_ids: np.ndarray, admin_levels: np.ndarray,
+                 has_geometry: np.ndarray, group_sizes: np.ndarray):
+        self.path = path
+        self.loc_ids = loc_ids
+        self.parent_ids = parent_ids
+        self.admin_levels = admin_levels
+        self.has_geometry = has_geometry
+        self.group_sizes = group_sizes
+        self.group_offsets = np.concatenate(([0], np.cumsum(group_sizes))).astype(np.int64)
+        self._metadata = None
+
+        # Sorted views for binary search
+        self._id_order = np.argsort(loc_ids, kind="stable")
+        self._sorted_ids = loc_ids[self._id_order]
+        self._parent_order = np.argsort(parent_ids, kind="stable")
+        self._sorted_parents = parent_ids[self._parent_order]
+
+    @property
+    def size(self) -> int:
+        return len(self.loc_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.loc_ids.nbytes + self.parent_ids.nbytes + self.admin_levels.nbytes +
+                self.has_geometry.nbytes + self._sorted_ids.nbytes + self._sorted_parents.nbytes +
+                self._id_order.nbytes + self._parent_order.nbytes)
+
+    @classmethod
+    def build(cls, path):
+        """Scan loc_id, parent_id, admin_level and geometry presence from a parquet file."""
+        parquet = pq.ParquetFile(path)
+        columns = [c for c in ('loc_id', 'parent_id', 'admin_level', 'geometry')
+                   if c in parquet.schema_arrow.names]
+
+        loc_ids, parent_ids, levels, has_geom = [], [], [], []
+        for batch in parquet.iter_batches(columns=columns):
+            names = batch.schema.names
+            n = batch.num_rows
+            loc_ids.append(pc.fill_null(batch.column('loc_id').cast('string'), '').to_numpy(zero_copy_only=False))
+            parent_ids.append(pc.fill_null(batch.column('parent_id').cast('string'), '').to_numpy(zero_copy_only=False)
+                              if 'parent_id' in names else np.full(n, '', dtype=object))
+            levels.append(pc.fill_null(batch.column('admin_level').cast('int16'), -1).to_numpy(zero_copy_only=False)
+                          if 'admin_level' in names else np.full(n, -1, dtype=np.int16))
+            has_geom.append(pc.is_valid(batch.column('geometry')).to_numpy(zero_copy_only=False)
+                            if 'geometry' in names else np.zeros(n, dtype=bool))
+
+        def concat(parts, dtype):
+            return np.concatenate(parts).astype(dtype) if parts else np.zeros(0, dtype=dtype)
+
+        group_sizes = np.array([parquet.metadata.row_group(i).num_rows
+                                for i in range(parquet.metadata.num_row_groups)], dtype=np.int64)
+        return cls(path, concat(loc_ids, str), concat(parent_ids, str), concat(levels, np.int16),
+                   concat(has_geom, bool), group_sizes)
+
+    @staticmethod
+    def _rows_with(sorted_keys: np.ndarray, order: np.ndarray, keys) -> np.ndarray:
+        """Row numbers (ascending) of every row whose key is any of keys."""
+        keys = np.unique(np.asarray(list(keys), dtype=str))
+        if len(keys) == 0 or len(sorted_keys) == 0:
+            return np.zeros(0, dtype=np.int64)
+        starts = np.searchsorted(sorted_keys, keys, side="left")
+        ends = np.searchsorted(sorted_keys, keys, side="right")
+        if not (ends > starts).any():
+            return np.zeros(0, dtype=np.int64)
+        rows = np.concatenate([order[s:e] for s, e in zip(starts, ends) if e > s])
+        return np.sort(rows).astype(np.int64)
+
+    def find(self, loc_ids) -> np.ndarray:
+        """
+        Row numbers (ascending) whose loc_id is any of loc_ids. A loc_id on
+        several rows (e.g. repeated across admin levels) returns all of them,
+        like filtering with isin; absent loc_ids return none.
+        """
+        return self._rows_with(self._sorted_ids, self._id_order, loc_ids)
+
+    def children(self, parent_ids) -> np.ndarray:
+        """Row numbers (ascending) whose parent_id is any of parent_ids."""
+        return self._rows_with(self._sorted_parents, self._parent_order, parent_ids)
+
+    def read(self, rows, columns: list = None):
+        """
+        Read rows (in the given order) from the parquet file.
+
+        Only the row groups containing rows are read, and only columns (all if
+        None; names not in the file are ignored).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[rows >= 0]
+        if self._metadata is None:
+            self._metadata = pq.ParquetFile(self.path).metadata
+        parquet = pq.ParquetFile(self.path, metadata=self._metadata)
+        if columns is not None:
+            columns = [c for c in columns if c in parquet.schema_arrow.names]
+        if len(rows) == 0:
+            return parquet.schema_arrow.empty_table().select(columns or parquet.schema_arrow.names).to_pandas()
+
+        groups = np.unique(np.searchsorted(self.group_offsets, rows, side="right") - 1)
+        table = parquet.read_row_groups(groups.tolist(), columns=columns)
+
+        # Position of each row within the concatenated groups
+        group_starts = np.concatenate(([0], np.cumsum(self.group_sizes[groups])[:-1]))
+        group_of_row = np.searchsorted(self.group_offsets, rows, side="right") - 1
+        local = rows - self.group_offsets[group_of_row] + group_starts[np.searchsorted(groups, group_of_row)]
+        return table.take(local).to_pandas()
+
+    def save(self, path, meta: dict):
+        """Persist arrays and source metadata (atomic write)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+        arrays = {"loc_ids": self.loc_ids, "parent_ids": self.parent_ids, "admin_levels": self.admin_levels,
+                  "has_geometry": self.has_geometry, "group_sizes": self.group_sizes}
+        for key, value in meta.items():
+            arrays[f"meta_{key}"] = np.asarray(value)
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, source, path, meta: dict):
+        """Load a persisted index if its metadata matches, else None."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                for key, value in meta.items():
+                    if f"meta_{key}" not in data or data[f"meta_{key}"].item() != value:
+                        return None
+                return cls(source, data["loc_ids"], data["parent_ids"], data["admin_levels"],
+                           data["has_geometry"], data["group_sizes"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+_locator_cache = ByteBudgetLRU("loc_index", LOC_INDEX_CACHE_BYTES, sizeof=lambda entry: entry[1].nbytes)
+
+
+def load_locator(path):
+    """
+    Get the locator for a parquet file, loading or building the persisted index.
+
+    Returns None if the file cannot be read.
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    meta = {"source": str(path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+    cached = _locator_cache.get(str(path))
+    if cached is not None and cached[0] == meta:
+        return cached[1]
+
+    digest = hashlib.sha1(str(path).encode()).hexdigest()[:16]
+    index_path = LOC_INDEX_DIR / f"{path.stem}-{digest}.npz"
+    locator = LocIndex.load(path, index_path, meta) if index_path.exists() else None
+    if locator is None:
+        try:
+            locator = LocIndex.build(path)
+        except Exception as e:
+            logger.error(f"Error building loc_id index for {path}: {e}")
+            return None
+        try:
+            locator.save(index_path, meta)
+            logger.debug(f"Saved loc_id index for {path.name} ({locator.size} rows)")
+        except OSError as e:
+            logger.warning(f"Could not persist loc_id index for {path.name}: {e}")
+
+    _locator_cache.put(str(path), (meta, locator))
+    return locator
+
+
+def locator_stats() -> dict:
+    """Statistics for the in-memory locator cache."""
+    return _locator_cache.stats()
+
+
+def clear_locators():
+    """Forget in-memory locators (persisted files are revalidated on next use)."""
+    _locator_cache.clear()
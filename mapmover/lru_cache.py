@@ -0,0 +1,135 @@
+"""
+Size-aware LRU cache shared by the in-process data caches.
+
+Entries are evicted least-recently-used first once the estimated size of all
+entries exceeds a byte budget. Size is estimated by a caller-supplied function
+(e.g. numpy nbytes for weather frames, DataFrame memory usage for geometry).
+
+Usage:
+    from mapmover.lru_cache import ByteBudgetLRU
+
+    cache = ByteBudgetLRU("weather_frames", max_bytes=256 * 1024 * 1024,
+                          sizeof=lambda frame: frame.nbytes)
+    cache.put(key, frame)
+    frame = cache.get(key)
+    cache.stats()  # entries, bytes, hits, misses, evictions
+"""
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+logger = logging.getLogger("mapmover")
+
+
+class ByteBudgetLRU:
+    """
+    Thread-safe LRU mapping bounded by total estimated bytes.
+
+    The most recently inserted entry is always kept, even if it alone exceeds
+    the budget, so a single oversized item is still served from cache once.
+    """
+
+    def __init__(self, name: str, max_bytes: int, sizeof: Callable[[Any], int] = None,
+                 log_evictions: bool = False):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or sys.getsizeof
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        # Log each eviction (for caches of large, infrequently replaced entries)
+        self.log_evictions = log_evictions
+
+        # Counters for diagnostics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value (marking it recently used) or default."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value without touching recency or counters."""
+        with self._lock:
+            return self._entries.get(key, default)
+
+    def put(self, key: Hashable, value: Any):
+        """Insert or replace an entry, then evict down to the byte budget."""
+        size = int(self._sizeof(value))
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._sizes[key]
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self._bytes += size
+            self._evict()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value."""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._bytes -= self._sizes.pop(key)
+            return self._entries.pop(key)
+
+    def keys(self) -> list:
+        """Snapshot of current keys, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def _evict(self):
+        """Evict least recently used entries until within budget. Caller holds lock."""
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key, _ = self._entries.popitem(last=False)
+            size = self._sizes.pop(key)
+            self._bytes -= size
+            self.evictions += 1
+            if self.log_evictions:
+                logger.info(f"Cache {self.name}: evicted {key!r} ({size / 1048576:.1f} MB), "
+                            f"{self._bytes / 1048576:.1f}/{self.max_bytes / 1048576:.0f} MB used")
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def current_bytes(self) -> int:
+        """Estimated bytes held by all entries."""
+        return self._bytes
+
+    def stats(self) -> Dict:
+        """Get cache statistics."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -20,7 +20,7 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Set
 from rapidfuzz import fuzz, process
 
-from .paths import GEOMETRY_DIR
+from .place_index import load_place_index
 
 
 class NameStandardizer:
@@ -493,7 +493,8 @@ class NameStandardizer:
 
         Args:
             name: Place name to look up
-            country: ISO3 country code to narrow search (e.g., 'USA')
+            country: ISO3 country code to narrow search (e.g., 'USA'); without it,
+                     only names unique across all countries resolve
             admin_level: Admin level to search (0=country, 1=state, 2=county)
 
         Returns:
@@ -524,10 +525,17 @@ class NameStandardizer:
                     if cname == canon_name:
                         return code
 
-        # For sub-national, load parquet
+        # For sub-national, use the global place index
         if country:
             return self._lookup_in_parquet(name_lower, country, admin_level)
 
+        # No country given: only an unambiguous name resolves
+        index = load_place_index()
+        if index is not None:
+            loc_ids = {m["loc_id"] for m in index.lookup(name_lower, admin_level=admin_level)}
+            if len(loc_ids) == 1:
+                return loc_ids.pop()
+
         return None
 
     def _lookup_in_parquet(
@@ -536,30 +544,13 @@ class NameStandardizer:
         country: str,
         admin_level: int = None
     ) -> Optional[str]:
-        """Look up a name in country parquet file."""
-        parquet_file = GEOMETRY_DIR / f"{country}.parquet"
-
-        if not parquet_file.exists():
+        """Look up a name in a country's geometry (first match in file order), via the place index."""
+        index = load_place_index()
+        if index is None:
             return None
 
-        try:
-            df = pd.read_parquet(parquet_file)
-
-            # Filter by admin level if specified
-            if admin_level is not None:
-                df = df[df['admin_level'] == admin_level]
-
-            # Search by name (case insensitive)
-            df['name_lower'] = df['name'].str.lower()
-            matches = df[df['name_lower'] == name_lower]
-
-            if len(matches) > 0:
-                return matches.iloc[0]['loc_id']
-
-        except Exception:
-            pass
-
-        return None
+        matches = index.lookup(name_lower, admin_level=admin_level, countries=[country])
+        return matches[0]["loc_id"] if matches else None
 
     def get_loc_id_from_fips(
         self,
@@ -0,0 +1,254 @@
+"""
+Order Builder - builds orders for unambiguous data requests without the LLM.
+
+handle_filter_intent (app.py) already answers some overlay filter questions
+from the hints alone. build_fast_order does the same for plain data requests
+("X in Y for Z"). If the preprocessor hints have:
+- one source clearly ahead of any other candidate,
+- one metric of that source named in the query (or a source with one metric,
+  or an explicit "all metrics"),
+- one country, or one regional grouping,
+- an explicit year or year range,
+
+it emits the order the LLM would return for them:
+{"type": "order", "order": {"items": [...], "summary": ...}, "summary": ...}.
+The result goes through the same validation as an LLM order (validate_order,
+then postprocess_order). If any rule or validation fails it returns None, and
+the caller falls back to interpret_request.
+
+Thresholds are configured below (env overridable).
+
+Usage:
+    result = build_fast_order(hints) or await interpret_request(query, chat_history, hints=hints)
+"""
+
+import copy
+import logging
+import os
+from typing import Optional
+
+from .catalog_index import tokenize
+from .data_loading import load_catalog, load_source_metadata
+from .order_executor import expand_region
+from .order_taker import validate_order
+from .postprocessor import postprocess_order
+
+logger = logging.getLogger("mapmover")
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Fast-path orders on/off
+FAST_ORDER = os.environ.get("FAST_ORDER", "1") == "1"
+
+# Source: best candidate's confidence, and how far ahead of the runner-up it must be
+FAST_ORDER_MIN_SOURCE_CONFIDENCE = float(os.environ.get("FAST_ORDER_MIN_SOURCE_CONFIDENCE", "0.9"))
+FAST_ORDER_SOURCE_MARGIN = float(os.environ.get("FAST_ORDER_SOURCE_MARGIN", "0.2"))
+
+# Location: confidence of the single country candidate
+FAST_ORDER_MIN_LOCATION_CONFIDENCE = float(os.environ.get("FAST_ORDER_MIN_LOCATION_CONFIDENCE", "1.0"))
+
+# Intent: data_request must be the best intent with at least this confidence
+FAST_ORDER_MIN_INTENT_CONFIDENCE = float(os.environ.get("FAST_ORDER_MIN_INTENT_CONFIDENCE", "0.3"))
+
+# Phrases asking for every metric of a source (order metric "*")
+ALL_METRICS_PHRASES = ["all metrics", "all data", "all the data", "everything", "all indicators"]
+
+# Hints that need the LLM's judgement (navigation, lookups, overlays...)
+_LLM_ONLY_HINTS = ["show_borders", "navigation", "disambiguation", "reference_lookup",
+                   "derived_intent", "filter_intent", "overlay_intent"]
+
+# Counts of built orders and of fallbacks by reason
+_fast_order_counts = {}
+
+
+def _count(outcome: str):
+    _fast_order_counts[outcome] = _fast_order_counts.get(outcome, 0) + 1
+
+
+def fast_order_stats() -> dict:
+    """Fast-path orders built and LLM fallbacks by reason."""
+    return dict(_fast_order_counts)
+
+
+# =============================================================================
+# Rules
+# =============================================================================
+
+def _pick_source(hints: dict) -> Optional[dict]:
+    """The catalog entry of the one clearly-named source, or None."""
+    candidates = (hints.get("candidates") or {}).get("sources", {}).get("candidates", [])
+    if not candidates or candidates[0]["confidence"] < FAST_ORDER_MIN_SOURCE_CONFIDENCE:
+        return None
+    if len(candidates) > 1 and candidates[0]["confidence"] - candidates[1]["confidence"] < FAST_ORDER_SOURCE_MARGIN:
+        return None
+    source_id = candidates[0]["source_id"]
+    for source in load_catalog().get("sources", []):
+        if source.get("source_id") == source_id:
+            return source
+    return None
+
+
+def _contains_phrase(words: list, phrase: list) -> bool:
+    """True if phrase occurs as consecutive words of words."""
+    n = len(phrase)
+    return n > 0 and any(words[i:i + n] == phrase for i in range(len(words) - n + 1))
+
+
+def _pick_metric(query_lower: str, source: dict, matched_text: str) -> Optional[str]:
+    """
+    Metric key named in the query: the metric whose name or key occurs as the
+    longest run of query words (ties -> None). Falls back to the only metric of
+    a single-metric source, or "*" for an explicit "all metrics".
+    """
+    metrics = source.get("metrics") or {}
+    # The text that matched the source can't also name the metric
+    words = tokenize(query_lower.replace(matched_text.lower(), " ") if matched_text else query_lower)
+
+    best_length = 0
+    best = []
+    for key, info in metrics.items():
+        name = info.get("name", key) if isinstance(info, dict) else key
+        length = max((len(p) for p in (tokenize(name), tokenize(key)) if _contains_phrase(words, p)), default=0)
+        if length > best_length:
+            best_length, best = length, [key]
+        elif length and length == best_length:
+            best.append(key)
+
+    if len(best) == 1:
+        return best[0]
+    if best:
+        return None
+    if len(metrics) == 1:
+        return next(iter(metrics))
+    if any(phrase in query_lower for phrase in ALL_METRICS_PHRASES):
+        return "*"
+    return None
+
+
+def _pick_region(hints: dict, source: dict) -> Optional[tuple]:
+    """(order region, display name) for one country or one regional grouping, or None."""
+    locations = (hints.get("candidates") or {}).get("locations", {}).get("candidates", [])
+    regions = hints.get("regions") or []
+    scope = (source.get("scope") or "global").lower()
+
+    if locations and not regions:
+        if len(locations) != 1:
+            return None
+        location = locations[0]
+        if (location.get("match_type") != "country" or location.get("is_subregion")
+                or location["confidence"] < FAST_ORDER_MIN_LOCATION_CONFIDENCE):
+            return None
+        iso3 = location.get("iso3", "")
+        if scope not in ("global", iso3.lower()):
+            return None
+        name = location.get("country_name", iso3)
+        region = name.lower() if expand_region(name.lower()) == {iso3} else iso3
+        return region, name
+
+    if regions and not locations:
+        if len(regions) != 1 or scope != "global":
+            return None
+        region = regions[0].get("match", "")
+        if not region or not expand_region(region):
+            return None
+        return region, region.replace("_", " ").title()
+
+    return None
+
+
+def _pick_years(hints: dict) -> Optional[dict]:
+    """Order year fields for an explicit year or year range, or None."""
+    time_hints = hints.get("time") or {}
+    year_start = time_hints.get("year_start")
+    year_end = time_hints.get("year_end")
+    if not year_start or not year_end:
+        return None
+    if year_start == year_end and not time_hints.get("is_time_series"):
+        return {"year": year_start}
+    return {"year_start": year_start, "year_end": year_end}
+
+
+# =============================================================================
+# Builder
+# =============================================================================
+
+def build_fast_order(hints: dict) -> Optional[dict]:
+    """
+    Build the order for an unambiguous data request from preprocessor hints.
+
+    Args:
+        hints: preprocess_query result (after any resolved_location override)
+
+    Returns:
+        Same shape as interpret_request for an order:
+        {"type": "order", "order": {...}, "summary": "..."}, or None to ask the LLM
+    """
+    if not FAST_ORDER or not hints:
+        return None
+
+    reason = _fallback_reason(hints)
+    if reason:
+        _count(reason)
+        return None
+
+    source = _pick_source(hints)
+    if source is None:
+        _count("source")
+        return None
+
+    query_lower = hints.get("original_query", "").lower()
+    matched_text = hints["candidates"]["sources"]["candidates"][0].get("matched_text", "")
+    metric = _pick_metric(query_lower, source, matched_text)
+    if metric is None:
+        _count("metric")
+        return None
+
+    picked = _pick_region(hints, source)
+    if picked is None:
+        _count("location")
+        return None
+    region, place = picked
+
+    years = _pick_years(hints)
+    if years is None:
+        _count("time")
+        return None
+
+    item = {"source_id": source["source_id"], "metric": metric, "region": region, **years}
+    if metric == "*":
+        label = f"All {source.get('source_name', source['source_id'])} metrics"
+    else:
+        info = (source.get("metrics") or {}).get(metric)
+        label = info.get("name", metric) if isinstance(info, dict) else metric
+    when = f"{years['year']}" if "year" in years else f"{years['year_start']}-{years['year_end']}"
+    summary = f"{label} for {place} {when}"
+
+    # Same checks an LLM order gets (parse_llm_response, then postprocess_order)
+    order = validate_order({"items": [item], "summary": summary})
+    if not order.get("_all_valid"):
+        _count("invalid")
+        return None
+    processed = postprocess_order(copy.deepcopy(order), hints)
+    if not processed.get("all_valid"):
+        _count("invalid")
+        return None
+
+    _count("built")
+    logger.debug(f"Fast-path order: {item}")
+    return {"type": "order", "order": order, "summary": summary}
+
+
+def _fallback_reason(hints: dict) -> Optional[str]:
+    """Why these hints need the LLM regardless of candidates, or None."""
+    for key in _LLM_ONLY_HINTS:
+        if hints.get(key):
+            return key
+    if hints.get("location") and hints["location"].get("source") == "disambiguation_selection":
+        return "resolved_location"
+    intent = ((hints.get("candidates") or {}).get("intents") or {}).get("best") or {}
+    if intent.get("type") != "data_request" or intent.get("confidence", 0) < FAST_ORDER_MIN_INTENT_CONFIDENCE:
+        return "intent"
+    return None
@@ -7,36 +7,108 @@ This replaces the old multi-LLM chat system with a simpler "Fast Food Kiosk" mod
 2. Order Taker LLM interprets and builds structured "order"
 3. User confirms/modifies order in UI
 4. System executes confirmed order directly (no second LLM)
+
+The static system prompt (catalog sources, regions, response rules) is built
+once per catalog version; only the per-query Tier 3/4 context and chat history
+follow it. It is marked as a cached prompt prefix (cache_control breakpoint)
+only when it can be cached: the API ignores prefixes shorter than the model's
+minimum (PROMPT_CACHE_MIN_TOKENS). The bundled catalog's prompt (~6.4k chars,
+~1.6k tokens) is below that, so it is sent uncached; larger catalogs get the
+cached-prefix discount.
+
+The LLM is called through one pooled AsyncAnthropic client and awaited, so a
+chat in flight does not block the event loop; at most LLM_MAX_CONCURRENT
+calls run at once.
+
+Interpretations are cached across sessions: the raw LLM reply is kept for
+INTERPRET_CACHE_TTL_S, keyed by the normalized query, the per-query context
+built from the hints (resolved location, sources, time...), the chat history
+sent and the catalog generation (so a reloaded catalog.json misses). A hit is re-parsed against the current hints
+without calling the LLM.
 """
 
+import asyncio
+import hashlib
 import json
+import logging
+import os
+import time
 from pathlib import Path
-from anthropic import Anthropic
+
+from anthropic import AsyncAnthropic
 from dotenv import load_dotenv
 
-from .data_loading import load_catalog, load_source_metadata, get_source_path
+from .data_loading import load_catalog, load_source_metadata, get_source_path, get_catalog_index, catalog_generation
 from .preprocessor import build_tier3_context, build_tier4_context
 from .constants import CHAT_HISTORY_LLM_LIMIT
+from .lru_cache import ByteBudgetLRU
 
 load_dotenv()
 
+logger = logging.getLogger("mapmover")
+
 CONVERSIONS_PATH = Path(__file__).parent / "conversions.json"
 REFERENCE_DIR = Path(__file__).parent / "reference"
 
+LLM_MODEL = "claude-haiku-4-5"
+
+# LLM client: request timeout (seconds), retries, and concurrent calls (more
+# wait for a slot; this also bounds the client's pooled connections)
+LLM_TIMEOUT_S = float(os.environ.get("LLM_TIMEOUT_S", "60"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+LLM_MAX_CONCURRENT = int(os.environ.get("LLM_MAX_CONCURRENT", "16"))
+
+_llm = None  # (event loop, AsyncAnthropic, asyncio.Semaphore)
+
+# Prompt caching: minimum cacheable prefix of LLM_MODEL in tokens (4096 for
+# Claude Haiku 4.5; 1024 or 2048 for other models). The static prompt gets a
+# cache_control breakpoint only if its estimated tokens reach it; the estimate
+# (chars / PROMPT_CHARS_PER_TOKEN) errs high, since marking a short prefix is harmless
+PROMPT_CACHE_MIN_TOKENS = int(os.environ.get("PROMPT_CACHE_MIN_TOKENS", "4096"))
+PROMPT_CHARS_PER_TOKEN = 3
+
+# Interpretation cache: on/off, entry lifetime (seconds) and byte budget
+INTERPRET_CACHE = os.environ.get("INTERPRET_CACHE", "1") == "1"
+INTERPRET_CACHE_TTL_S = float(os.environ.get("INTERPRET_CACHE_TTL_S", "3600"))
+INTERPRET_CACHE_BYTES = int(os.environ.get("INTERPRET_CACHE_MB", "8")) * 1024 * 1024
+
+# key -> (time stored, raw LLM reply)
+_interpret_cache = ByteBudgetLRU("interpretations", INTERPRET_CACHE_BYTES,
+                                 sizeof=lambda entry: 2 * len(entry[1]) + 256)
+_interpret_cache_counts = {}  # endpoint -> [hits, misses]
+_interpret_cache_expired = 0
+
+# Cache reference files and the built system prompt
+_conversions_cache = None
+_usa_admin_cache = None
+_system_prompt_cache = None  # (CatalogIndex the prompt was built for, prompt)
+
+
+def prompt_cacheable(prompt: str) -> bool:
+    """True if the prompt may reach the model's minimum cacheable prefix length."""
+    return len(prompt) / PROMPT_CHARS_PER_TOKEN >= PROMPT_CACHE_MIN_TOKENS
+
 
 def load_conversions() -> dict:
-    """Load the conversions/regional groupings."""
-    with open(CONVERSIONS_PATH, encoding='utf-8') as f:
-        return json.load(f)
+    """Load the conversions/regional groupings (cached)."""
+    global _conversions_cache
+    if _conversions_cache is None:
+        with open(CONVERSIONS_PATH, encoding='utf-8') as f:
+            _conversions_cache = json.load(f)
+    return _conversions_cache
 
 
 def load_usa_admin() -> dict:
-    """Load USA admin data from reference/usa_admin.json."""
-    usa_path = REFERENCE_DIR / "usa_admin.json"
-    if usa_path.exists():
-        with open(usa_path, encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+    """Load USA admin data from reference/usa_admin.json (cached)."""
+    global _usa_admin_cache
+    if _usa_admin_cache is None:
+        usa_path = REFERENCE_DIR / "usa_admin.json"
+        if usa_path.exists():
+            with open(usa_path, encoding='utf-8') as f:
+                _usa_admin_cache = json.load(f)
+        else:
+            _usa_admin_cache = {}
+    return _usa_admin_cache
 
 
 def build_regions_text(conversions: dict) -> str:
@@ -322,7 +394,86 @@ CLARIFYING QUESTIONS - BE SPECIFIC:
 """
 
 
-def interpret_request(user_query: str, chat_history: list = None, hints: dict = None) -> dict:
+def get_system_prompt() -> str:
+    """
+    The static system prompt, built once per catalog version (rebuilt when
+    catalog.json changes - see data_loading.get_catalog_index).
+    """
+    global _system_prompt_cache
+    index = get_catalog_index()
+    if _system_prompt_cache is None or _system_prompt_cache[0] is not index:
+        _system_prompt_cache = (index, build_system_prompt(load_catalog(), load_conversions()))
+        prompt = _system_prompt_cache[1]
+        logger.debug(f"Built order taker system prompt ({len(prompt)} chars, "
+                     f"{'cached prefix' if prompt_cacheable(prompt) else 'below the minimum cacheable prefix'})")
+    return _system_prompt_cache[1]
+
+
+def _llm_client():
+    """The shared AsyncAnthropic client and concurrency semaphore for the running event loop."""
+    global _llm
+    loop = asyncio.get_running_loop()
+    if _llm is None or _llm[0] is not loop:
+        client = AsyncAnthropic(timeout=LLM_TIMEOUT_S, max_retries=LLM_MAX_RETRIES)
+        _llm = (loop, client, asyncio.Semaphore(LLM_MAX_CONCURRENT))
+    return _llm[1], _llm[2]
+
+
+async def close_llm_client():
+    """Close the shared LLM client's connections (app shutdown)."""
+    global _llm
+    if _llm is not None:
+        client = _llm[1]
+        _llm = None
+        await client.close()
+
+
+def _normalize_query(query: str) -> str:
+    """Cache form of a query: lowercase, single spaces, no trailing punctuation."""
+    return " ".join(query.lower().split()).rstrip("?.! ")
+
+
+def _interpret_cache_key(user_query: str, context: str, history: list):
+    """Interpretation cache key: digest of what the LLM would see, plus the catalog generation."""
+    payload = json.dumps([_normalize_query(user_query), context,
+                          [[m["role"], m["content"]] for m in history]],
+                         ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest(), catalog_generation()
+
+
+def _cached_interpretation(key, endpoint: str):
+    """Raw LLM reply cached under key (None if missing or expired); counts the hit or miss."""
+    global _interpret_cache_expired
+    entry = _interpret_cache.peek(key)
+    if entry is not None and time.monotonic() - entry[0] > INTERPRET_CACHE_TTL_S:
+        _interpret_cache.pop(key)
+        _interpret_cache_expired += 1
+    entry = _interpret_cache.get(key)
+    counts = _interpret_cache_counts.setdefault(endpoint, [0, 0])
+    counts[0 if entry is not None else 1] += 1
+    return entry[1] if entry is not None else None
+
+
+def clear_interpret_cache():
+    """Drop all cached interpretations."""
+    _interpret_cache.clear()
+
+
+def interpret_cache_stats() -> dict:
+    """Interpretation cache statistics, with hits, misses and hit rate per endpoint."""
+    stats = _interpret_cache.stats()
+    stats["ttl_s"] = INTERPRET_CACHE_TTL_S
+    stats["expired"] = _interpret_cache_expired
+    stats["endpoints"] = {
+        endpoint: {"hits": hits, "misses": misses,
+                   "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+        for endpoint, (hits, misses) in _interpret_cache_counts.items()
+    }
+    return stats
+
+
+async def interpret_request(user_query: str, chat_history: list = None, hints: dict = None,
+                            endpoint: str = "chat") -> dict:
     """
     Interpret user request and return structured order or response.
 
@@ -330,18 +481,15 @@ def interpret_request(user_query: str, chat_history: list = None, hints: dict =
         user_query: The user's natural language query
         chat_history: Previous messages for context
         hints: Preprocessor hints (topics, regions, time patterns, reference lookups)
+        endpoint: Calling endpoint, for interpretation cache hit rates
 
     Returns:
         {"type": "order", "order": {...}, "summary": "..."} or
         {"type": "chat", "message": "..."} or
         {"type": "clarify", "message": "..."}
     """
-    catalog = load_catalog()
-    conversions = load_conversions()
-    system_prompt = build_system_prompt(catalog, conversions)
-
     # Build messages
-    messages = [{"role": "system", "content": system_prompt}]
+    messages = [{"role": "system", "content": get_system_prompt()}]
 
     # Inject Tier 3/Tier 4 context BEFORE chat history
     # This ensures current location/metric context takes priority over old conversations
@@ -375,27 +523,50 @@ def interpret_request(user_query: str, chat_history: list = None, hints: dict =
 
     messages.append({"role": "user", "content": user_query})
 
-    # Single LLM call using Claude
-    client = Anthropic()
-
-    # Extract system prompt from messages (Anthropic handles it separately)
+    # Extract system prompt from messages (Anthropic handles it separately).
+    # The static prompt is the cached prefix; per-query context follows the breakpoint
     system_content = ""
     chat_messages = []
-    for msg in messages:
+    for msg in messages[1:]:
         if msg["role"] == "system":
             system_content += msg["content"] + "\n\n"
         else:
             chat_messages.append(msg)
 
-    response = client.messages.create(
-        model="claude-haiku-4-5",
-        system=system_content.strip(),
-        messages=chat_messages,
-        temperature=0.3,
-        max_tokens=500
-    )
+    system = [{"type": "text", "text": messages[0]["content"]}]
+    if prompt_cacheable(messages[0]["content"]):
+        system[0]["cache_control"] = {"type": "ephemeral"}
+    if system_content.strip():
+        system.append({"type": "text", "text": system_content.strip()})
+
+    # Same query, context and history seen recently: reuse the reply
+    cache_key = _interpret_cache_key(user_query, system_content.strip(), chat_messages[:-1]) if INTERPRET_CACHE else None
+    content = _cached_interpretation(cache_key, endpoint) if cache_key is not None else None
+    if content is not None:
+        logger.debug(f"Interpretation cache hit ({endpoint}): {user_query[:60]}")
+        return parse_llm_response(content, hints=hints)
+
+    # Single LLM call using Claude (shared client; waits for a free slot)
+    client, semaphore = _llm_client()
+    async with semaphore:
+        response = await client.messages.create(
+            model=LLM_MODEL,
+            system=system,
+            messages=chat_messages,
+            temperature=0.3,
+            max_tokens=500
+        )
+
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        logger.debug(f"Order taker tokens: input={usage.input_tokens}, "
+                     f"cache_read={getattr(usage, 'cache_read_input_tokens', None)}, "
+                     f"cache_write={getattr(usage, 'cache_creation_input_tokens', None)}, "
+                     f"output={usage.output_tokens}")
 
     content = response.content[0].text.strip()
+    if cache_key is not None and content:
+        _interpret_cache.put(cache_key, (time.monotonic(), content))
 
     # Parse response
     return parse_llm_response(content, hints=hints)
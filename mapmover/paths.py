@@ -9,6 +9,7 @@ Environment Variables (in priority order):
                        e.g. DATA_ROOT=/mnt/data or DATA_ROOT=D:/county-map-data
     COUNTY_MAP_ROOT  - Path to county-map app folder
     GLOBAL_MAP_ROOT  - Path to parent folder containing all project folders
+    CACHE_DIR        - Writable folder for derived caches (rendered rasters, indexes)
 
 For deployment, only DATA_ROOT is needed. The app reads all parquet files
 from DATA_ROOT/global/, DATA_ROOT/countries/, and DATA_ROOT/geometry/.
@@ -126,6 +127,9 @@ LOGS_DIR = APP_ROOT / "logs"
 CONFIG_PATH = APP_ROOT / "config.json"
 SETTINGS_PATH = APP_ROOT / "settings.json"
 
+# Derived, rebuildable caches (DATA_ROOT may be a read-only mount)
+CACHE_DIR = Path(os.environ["CACHE_DIR"]) if os.environ.get("CACHE_DIR") else APP_ROOT / "cache"
+
 # =============================================================================
 # Private Paths (county-map-private)
 # =============================================================================
@@ -205,6 +209,7 @@ def validate_paths(verbose: bool = False) -> dict:
         "RAW_ROOT": RAW_ROOT,
         "GEOMETRY_DIR": GEOMETRY_DIR,
         "CATALOG_PATH": CATALOG_PATH,
+        "CACHE_DIR": CACHE_DIR,
     }
 
     results = {}
@@ -0,0 +1,310 @@
+"""
+Global place-name index over all country geometry parquets.
+
+Name lookups across countries (search_locations_globally, NameStandardizer)
+used to read each geometry/{ISO3}.parquet and build a per-country name dict
+the first time a country was touched, so the first global search after a
+restart read hundreds of files. This module keeps one prebuilt inverted index,
+normalized name -> postings of (loc_id, parent_id, admin_level, iso3), in a
+single file at CACHE_DIR/place_index.bin.
+
+The file is a small JSON header followed by flat arrays (strings packed as
+UTF-8 blobs plus offsets) and is memory-mapped, so loading takes milliseconds
+and pages are read on demand. Names are sorted by their UTF-8 bytes and found
+by binary search. Postings keep file row order within each country.
+
+The header records each source file's size and mtime; the index is rebuilt
+when any geometry parquet is added, removed or changed (run by warmup.py, or
+from the command line after a data update).
+
+- normalize_name(name) -> lookup key (lowercase, single spaces)
+- load_place_index() -> PlaceIndex (loaded, or rebuilt if stale)
+- place_index_generation() -> changes whenever a different index is loaded or it is cleared
+- PlaceIndex.lookup(name, admin_level=None, countries=None) -> list of postings
+
+Usage:
+    python -m mapmover.place_index    # rebuild if stale
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from .paths import CACHE_DIR, GEOMETRY_DIR
+
+logger = logging.getLogger("mapmover")
+
+PLACE_INDEX_FILE = CACHE_DIR / "place_index.bin"
+
+_MAGIC = b"MMPLACE1"
+_FORMAT_VERSION = 1
+
+_index = None
+_lock = threading.Lock()
+# Bumped each time _index is replaced or cleared (keys caches of results that used it)
+_generation = 0
+
+
+def normalize_name(name: str) -> str:
+    """Lookup key for a place name: lowercase with whitespace collapsed."""
+    return " ".join(name.lower().split())
+
+
+def _sources() -> dict:
+    """{iso3: [mtime_ns, size]} for every country geometry parquet."""
+    sources = {}
+    if GEOMETRY_DIR.exists():
+        for path in GEOMETRY_DIR.glob("*.parquet"):
+            stat = path.stat()
+            sources[path.stem] = [stat.st_mtime_ns, stat.st_size]
+    return sources
+
+
+def _pack(values: list):
+    """Strings -> (UTF-8 blob, offsets)."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class _PackedStrings:
+    """Read-only sequence of strings over a UTF-8 blob and offsets (bisect-compatible as bytes)."""
+
+    __slots__ = ('blob', 'offsets')
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+    def text(self, i: int) -> str:
+        return self[i].decode("utf-8")
+
+
+class PlaceIndex:
+    """Inverted index from normalized place name to locations."""
+
+    def __init__(self, arrays: dict, countries: list, sources: dict):
+        self.countries = countries
+        self.sources = sources
+        self._names = _PackedStrings(arrays["name_blob"], arrays["name_offsets"])
+        self._postings = arrays["post_offsets"]
+        self._loc_ids = _PackedStrings(arrays["loc_blob"], arrays["loc_offsets"])
+        self._parent_ids = _PackedStrings(arrays["parent_blob"], arrays["parent_offsets"])
+        self._levels = arrays["admin_level"]
+        self._country = arrays["country"]
+        self._country_index = {c: i for i, c in enumerate(countries)}
+
+    @property
+    def size(self) -> int:
+        """Number of distinct names."""
+        return len(self._names)
+
+    def lookup(self, name: str, admin_level: int = None, countries: list = None) -> list:
+        """
+        Locations with this name.
+
+        Args:
+            name: Place name (normalized here)
+            admin_level: Only locations at this admin level
+            countries: Only these ISO3 codes, returned in this order
+
+        Returns:
+            List of {"loc_id", "parent_id", "admin_level", "iso3"} (file order within a country)
+        """
+        key = normalize_name(name).encode("utf-8")
+        i = bisect.bisect_left(self._names, key)
+        if i >= len(self._names) or self._names[i] != key:
+            return []
+
+        rows = range(int(self._postings[i]), int(self._postings[i + 1]))
+        order = None
+        if countries is not None:
+            order = {self._country_index[c]: n for n, c in enumerate(countries) if c in self._country_index}
+            rows = [r for r in rows if int(self._country[r]) in order]
+            rows.sort(key=lambda r: order[int(self._country[r])])
+
+        results = []
+        for r in rows:
+            level = int(self._levels[r])
+            if admin_level is not None and level != admin_level:
+                continue
+            parent_id = self._parent_ids.text(r)
+            results.append({
+                "loc_id": self._loc_ids.text(r),
+                "parent_id": parent_id or None,
+                "admin_level": level if level >= 0 else None,
+                "iso3": self.countries[int(self._country[r])],
+            })
+        return results
+
+    @classmethod
+    def build(cls, sources: dict):
+        """Read loc_id, name, parent_id and admin_level from every country parquet."""
+        countries = sorted(sources)
+        entries = []  # (name bytes, country, row, loc_id, parent_id, level)
+        for ci, iso3 in enumerate(countries):
+            path = GEOMETRY_DIR / f"{iso3}.parquet"
+            try:
+                names = pq.read_schema(path).names
+                if 'name' not in names or 'loc_id' not in names:
+                    continue
+                columns = [c for c in ('loc_id', 'name', 'parent_id', 'admin_level') if c in names]
+                table = pq.read_table(path, columns=columns).to_pydict()
+            except Exception as e:
+                logger.warning(f"Place index: skipping {path.name}: {e}")
+                continue
+            n = len(table['loc_id'])
+            parents = table.get('parent_id') or [None] * n
+            levels = table.get('admin_level') or [None] * n
+            for row, (loc_id, name, parent_id, level) in enumerate(zip(table['loc_id'], table['name'], parents, levels)):
+                if not name or not isinstance(name, str) or loc_id is None:
+                    continue
+                key = normalize_name(name)
+                if not key:
+                    continue
+                entries.append((key.encode("utf-8"), ci, row, str(loc_id),
+                                parent_id if isinstance(parent_id, str) else "",
+                                int(level) if level is not None and level == level else -1))
+        entries.sort(key=lambda e: (e[0], e[1], e[2]))
+
+        # Distinct names and their posting ranges
+        keys = [e[0] for e in entries]
+        starts = [i for i in range(len(keys)) if i == 0 or keys[i] != keys[i - 1]]
+        name_blob = np.frombuffer(b"".join(keys[i] for i in starts), dtype=np.uint8)
+        name_offsets = np.zeros(len(starts) + 1, dtype=np.int64)
+        np.cumsum([len(keys[i]) for i in starts], out=name_offsets[1:])
+        post_offsets = np.array(starts + [len(entries)], dtype=np.int64)
+
+        loc_blob, loc_offsets = _pack([e[3] for e in entries])
+        parent_blob, parent_offsets = _pack([e[4] for e in entries])
+        arrays = {
+            "name_blob": name_blob,
+            "name_offsets": name_offsets,
+            "post_offsets": post_offsets,
+            "loc_blob": loc_blob,
+            "loc_offsets": loc_offsets,
+            "parent_blob": parent_blob,
+            "parent_offsets": parent_offsets,
+            "admin_level": np.array([e[5] for e in entries], dtype=np.int16),
+            "country": np.array([e[1] for e in entries], dtype=np.int16),
+        }
+        return cls(arrays, countries, sources)
+
+    def save(self, path):
+        """Write header and arrays to one file (atomic)."""
+        arrays = {
+            "name_blob": self._names.blob, "name_offsets": self._names.offsets,
+            "post_offsets": self._postings,
+            "loc_blob": self._loc_ids.blob, "loc_offsets": self._loc_ids.offsets,
+            "parent_blob": self._parent_ids.blob, "parent_offsets": self._parent_ids.offsets,
+            "admin_level": self._levels, "country": self._country,
+        }
+        layout = {}
+        offset = 0
+        for key, arr in arrays.items():
+            layout[key] = [arr.dtype.str, offset, len(arr)]
+            offset += (arr.nbytes + 7) // 8 * 8
+        header = json.dumps({"version": _FORMAT_VERSION, "countries": self.countries,
+                             "sources": self.sources, "arrays": layout}).encode("utf-8")
+        header += b" " * (-(len(_MAGIC) + 8 + len(header)) % 8)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(_MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for arr in arrays.values():
+                data = np.ascontiguousarray(arr).tobytes()
+                f.write(data)
+                f.write(b"\0" * (-len(data) % 8))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a saved index. None if missing, unreadable or another format version."""
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(_MAGIC)) != _MAGIC:
+                    return None
+                header_len = int.from_bytes(f.read(8), "little")
+                header = json.loads(f.read(header_len))
+            if header.get("version") != _FORMAT_VERSION:
+                return None
+            base = len(_MAGIC) + 8 + header_len
+            buf = np.memmap(path, dtype=np.uint8, mode="r")
+            arrays = {}
+            for key, (dtype, offset, length) in header["arrays"].items():
+                dtype = np.dtype(dtype)
+                start = base + offset
+                arrays[key] = buf[start:start + length * dtype.itemsize].view(dtype)
+            return cls(arrays, header["countries"], header["sources"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Could not load place index {path}: {e}")
+            return None
+
+
+def load_place_index(rebuild: bool = True):
+    """
+    Get the place index, loading the saved file or rebuilding it if stale.
+
+    Args:
+        rebuild: Rebuild a missing/stale index (else return None for it)
+
+    Returns:
+        PlaceIndex, or None if not available
+    """
+    global _index, _generation
+    if _index is not None:
+        return _index
+
+    with _lock:
+        if _index is not None:
+            return _index
+        sources = _sources()
+        index = PlaceIndex.load(PLACE_INDEX_FILE) if PLACE_INDEX_FILE.exists() else None
+        if index is not None and index.sources != sources:
+            index = None
+        if index is None:
+            if not rebuild:
+                return None
+            index = PlaceIndex.build(sources)
+            try:
+                index.save(PLACE_INDEX_FILE)
+                logger.info(f"Built place index: {index.size} names from {len(sources)} countries")
+            except OSError as e:
+                logger.warning(f"Could not save place index: {e}")
+        _index = index
+        _generation += 1
+        return _index
+
+
+def clear_place_index():
+    """Forget the loaded index (revalidated against the geometry files on next use)."""
+    global _index, _generation
+    with _lock:
+        _index = None
+        _generation += 1
+
+
+def place_index_generation() -> int:
+    """Version of the loaded place index; changes when it is reloaded, rebuilt or cleared."""
+    return _generation
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    index = load_place_index()
+    print(f"Place index: {index.size} names, {len(index.countries)} countries -> {PLACE_INDEX_FILE}")
@@ -16,14 +16,24 @@ The preprocessor runs BEFORE the LLM call and:
 Output is a hints dict that can be injected into LLM context.
 """
 
+import math
+import os
 import re
 import json
+import time
+from collections import deque
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 import logging
 
-from .data_loading import load_catalog, load_source_metadata, get_source_path
+from .data_loading import load_catalog, load_source_metadata, get_source_path, get_catalog_index, catalog_generation
+from .catalog_index import name_parts as source_name_parts, tokenize
 from .paths import DATA_ROOT, GEOMETRY_DIR as GEOM_DIR, COUNTRIES_DIR
+from .geometry_store import geometry_store, name_index
+from .gazetteer import NameMatcher, FuzzyNameIndex
+from .lru_cache import ByteBudgetLRU
+from .place_index import load_place_index, place_index_generation
+from .spatial_index import df_bounds
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +69,8 @@ SCORE_LOCATION_CAPITAL = 0.9         # Capital city
 SCORE_LOCATION_ADMIN1 = 0.8          # State/province
 SCORE_LOCATION_ADMIN2_VIEWPORT = 0.5 # County in viewport
 SCORE_LOCATION_PARTIAL = 0.3         # Partial word match
+SCORE_LOCATION_FUZZY_PENALTY = 0.3   # Subtracted per edit from a near match (misspelled name)
+SCORE_LOCATION_FUZZY_IN_VIEW = 0.1   # Near match located inside the viewport
 
 # Overlay intent detection - loaded from reference/disasters.json
 # Use _load_disaster_overlays() to access
@@ -70,16 +82,54 @@ CONVERSIONS_PATH = Path(__file__).parent / "conversions.json"
 REFERENCE_DIR = Path(__file__).parent / "reference"
 DATA_DIR = DATA_ROOT / "data"
 GEOMETRY_DIR = GEOM_DIR
-
-# Parquet cache for location lookups
-_PARQUET_NAMES_CACHE = {}  # iso3 -> {name_lower: loc_id}
-_PARQUET_SORTED_NAMES_CACHE = {}  # iso3 -> sorted list of names (pre-filtered, longest first)
+ISO_CODES_PATH = REFERENCE_DIR / "iso_codes.json"
+
+# Parquet location names (name dicts, sorted names and name matchers) are held
+# by geometry_store alongside each file and rebuilt when the file changes
+
+# Viewport-scoped sub-national name matching (country/capital matching is always on)
+VIEWPORT_LOCATION_MATCHING = os.environ.get("VIEWPORT_LOCATION_MATCHING", "1") == "1"
+
+# Viewports showing more countries than this skip sub-national name matching
+VIEWPORT_MATCH_MAX_COUNTRIES = int(os.environ.get("VIEWPORT_MATCH_MAX_COUNTRIES", "8"))
+
+# Ambiguous names still tied after the viewport filters go to the match that
+# shares the deepest admin unit with the map centre (reverse_geocode.py, needs shapely)
+MAP_CENTER_MATCHING = os.environ.get("MAP_CENTER_MATCHING", "1") == "1"
+
+# Typo-tolerant location matching: query phrases (up to FUZZY_MAX_WORDS words,
+# at least FUZZY_MIN_LENGTH characters) within FUZZY_MAX_EDITS edits of a
+# country, capital or viewport location name become low-confidence candidates.
+# A name needs FUZZY_MIN_LENGTH characters per edit: 5-letter names are one
+# edit from too many ordinary words (child/chile, parks/paris, tiger/niger)
+FUZZY_LOCATION_MATCHING = os.environ.get("FUZZY_LOCATION_MATCHING", "1") == "1"
+FUZZY_MAX_EDITS = int(os.environ.get("FUZZY_MAX_EDITS", "1"))
+FUZZY_MIN_LENGTH = 6
+FUZZY_MAX_WORDS = 3
+
+# Pre-LLM stage budget: preprocess_query calls slower than this are logged with
+# their slowest stages. Per-stage timings of the last PREPROCESS_TIMING_WINDOW
+# calls are kept for percentiles (get_preprocess_timing_stats)
+PREPROCESS_BUDGET_MS = float(os.environ.get("PREPROCESS_BUDGET_MS", "50"))
+PREPROCESS_TIMING_WINDOW = 1000
+
+# Memoized hints: preprocess_query results are reused for a repeated query in
+# the same viewport bucket (admin level, countries in view, bounds snapped to
+# 1/VIEWPORT_BUCKET_DIVISIONS of the view) and overlay state. Context-free
+# detector results are held separately per query. Queries are keyed
+# lowercased with whitespace collapsed (detectors fold case, and
+# preprocess_query collapses whitespace before they run), and by the catalog
+# and place index generations, so a reload of either misses the memo
+PREPROCESS_MEMO = os.environ.get("PREPROCESS_MEMO", "1") == "1"
+PREPROCESS_MEMO_BYTES = int(os.environ.get("PREPROCESS_MEMO_MB", "16")) * 1024 * 1024
+PREPROCESS_MEMO_ENTRY_BYTES = 8 * 1024  # Estimated size of one memoized entry
+VIEWPORT_BUCKET_DIVISIONS = 16
 
 # Reference file cache (loaded once per file)
 _REFERENCE_FILE_CACHE = {}  # filepath_str -> dict
 
 # Global.csv cache for viewport lookups
-_GLOBAL_CSV_CACHE = None  # DataFrame, loaded once
+_GLOBAL_CSV_CACHE = None  # (loc_ids, (n, 4) bbox array or None), loaded once
 
 # Conversions.json cache
 _CONVERSIONS_CACHE = None
@@ -89,6 +139,7 @@ _COUNTRY_INDEX_CACHE = {}  # iso3 -> dict
 
 # Caches for new reference files
 _STOPWORDS_CACHE = None
+_FUZZY_STOPWORDS_CACHE = None
 _TOPICS_CACHE = None
 _DISASTERS_CACHE = None
 
@@ -127,6 +178,31 @@ def _load_stopwords() -> set:
     #     return _STOPWORDS_CACHE
 
 
+def _load_fuzzy_stopwords() -> set:
+    """
+    Words from reference/stopwords.json and reference/common_words.json that
+    may not start or end a phrase in typo-tolerant matching. Exact matching
+    does not use them (see _load_stopwords), but near matches of common words
+    are mostly noise.
+    """
+    global _FUZZY_STOPWORDS_CACHE
+    if _FUZZY_STOPWORDS_CACHE is not None:
+        return _FUZZY_STOPWORDS_CACHE
+
+    words = set()
+    for filename in ("stopwords.json", "common_words.json"):
+        try:
+            with open(REFERENCE_DIR / filename, encoding='utf-8') as f:
+                data = json.load(f)
+            for key, value in data.items():
+                if not key.startswith("_") and isinstance(value, list):
+                    words.update(value)
+        except Exception as e:
+            logger.warning(f"Error loading {filename}: {e}")
+    _FUZZY_STOPWORDS_CACHE = words
+    return _FUZZY_STOPWORDS_CACHE
+
+
 def _load_topics() -> dict:
     """
     Load topic keywords by aggregating from catalog.
@@ -223,6 +299,234 @@ def normalize_query_for_location_matching(query: str) -> str:
     return query
 
 
+# =============================================================================
+# Parsed Query (shared by the detectors)
+# =============================================================================
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class ParsedQuery:
+    """
+    A query normalized and tokenized once for all detectors.
+
+    preprocess_query parses the query once and hands the same ParsedQuery to
+    every detector (they also accept a plain string). Detectors that run more
+    than once per query, or share a scan (country/capital name matching,
+    navigation and filter patterns, viewport name lookup), keep their results
+    in cached() for the lifetime of the ParsedQuery.
+
+    - text: the query as given
+    - lower: lowercased
+    - stripped: lowercased and stripped (start-anchored patterns)
+    - location_lower: normalize_query_for_location_matching(), lowercased
+    - location_words: [(word, start, end)] word tokens of location_lower
+    """
+
+    __slots__ = ('text', 'lower', 'stripped', '_location_text', '_location_lower',
+                 '_location_words', '_cache')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self.stripped = self.lower.strip()
+        self._location_text = None
+        self._location_lower = None
+        self._location_words = None
+        self._cache = {}
+
+    def __str__(self) -> str:
+        return self.text
+
+    @property
+    def location_text(self) -> str:
+        """Query with possessives normalized (original case)."""
+        if self._location_text is None:
+            self._location_text = normalize_query_for_location_matching(self.text)
+        return self._location_text
+
+    @property
+    def location_lower(self) -> str:
+        if self._location_lower is None:
+            self._location_lower = self.location_text.lower()
+        return self._location_lower
+
+    @property
+    def location_words(self) -> list:
+        if self._location_words is None:
+            self._location_words = [(m.group(), m.start(), m.end())
+                                    for m in _WORD_RE.finditer(self.location_lower)]
+        return self._location_words
+
+    def cached(self, key, build):
+        """Result of build() for this query, computed once per key."""
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+
+# Detectors take the query text or the ParsedQuery preprocess_query shares between them
+QueryText = Union[str, ParsedQuery]
+
+
+def parse_query(query: QueryText) -> ParsedQuery:
+    """ParsedQuery for a query string (a ParsedQuery is returned as is)."""
+    return query if isinstance(query, ParsedQuery) else ParsedQuery(query)
+
+
+class _PatternTable:
+    """
+    Ordered regex patterns compiled at import, plus one combined regex that
+    rules out a query matching none of them in a single scan. first_search /
+    first_match return the first pattern in list order that matches, as
+    looping over the patterns would.
+    """
+
+    __slots__ = ('patterns', '_any')
+
+    def __init__(self, patterns: list):
+        self.patterns = [(pattern, re.compile(pattern)) for pattern in patterns]
+        self._any = re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+    def any_search(self, text: str) -> bool:
+        """True if any pattern is found in text."""
+        return self._any.search(text) is not None
+
+    def first_search(self, text: str):
+        """(pattern, match) of the first pattern found anywhere in text, or (None, None)."""
+        if self._any.search(text):
+            for pattern, regex in self.patterns:
+                match = regex.search(text)
+                if match:
+                    return pattern, match
+        return None, None
+
+    def first_match(self, text: str):
+        """(pattern, match) of the first pattern matching at the start of text, or (None, None)."""
+        if self._any.match(text):
+            for pattern, regex in self.patterns:
+                match = regex.match(text)
+                if match:
+                    return pattern, match
+        return None, None
+
+
+# =============================================================================
+# Stage Timing
+# =============================================================================
+
+_PREPROCESS_TIMINGS = {}  # stage -> deque of recent durations (ms)
+
+
+class _StageTimer:
+    """Times the stages of one preprocess_query call."""
+
+    def __init__(self):
+        self.timings = {}
+        self._start = time.perf_counter()
+
+    def run(self, stage: str, fn, *args, **kwargs):
+        """Call fn(*args, **kwargs), adding its duration to stage."""
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + (time.perf_counter() - start) * 1000
+
+    def finish(self) -> dict:
+        """Record the timings and return them rounded, with the call's total (ms)."""
+        timings = {stage: round(ms, 3) for stage, ms in self.timings.items()}
+        timings["total"] = round((time.perf_counter() - self._start) * 1000, 3)
+        for stage, ms in timings.items():
+            samples = _PREPROCESS_TIMINGS.get(stage)
+            if samples is None:
+                samples = _PREPROCESS_TIMINGS.setdefault(stage, deque(maxlen=PREPROCESS_TIMING_WINDOW))
+            samples.append(ms)
+
+        if timings["total"] > PREPROCESS_BUDGET_MS:
+            slowest = sorted(self.timings.items(), key=lambda item: -item[1])[:3]
+            logger.warning(f"Preprocessor over budget: {timings['total']:.1f} ms > {PREPROCESS_BUDGET_MS:.0f} ms "
+                           f"(slowest: {', '.join(f'{stage} {ms:.1f} ms' for stage, ms in slowest)})")
+        return timings
+
+
+def get_preprocess_timing_stats() -> dict:
+    """
+    Per-stage preprocess_query timings over the last PREPROCESS_TIMING_WINDOW calls.
+
+    Returns:
+        {"budget_ms", "stages": {stage: {"count", "p50_ms", "p99_ms", "max_ms"}}}
+    """
+    stages = {}
+    for stage, samples in list(_PREPROCESS_TIMINGS.items()):
+        values = sorted(samples)
+        if not values:
+            continue
+        n = len(values)
+        stages[stage] = {
+            "count": n,
+            "p50_ms": values[n // 2],
+            "p99_ms": values[min(n - 1, int(n * 0.99))],
+            "max_ms": values[-1],
+        }
+    return {"budget_ms": PREPROCESS_BUDGET_MS, "stages": stages}
+
+
+# =============================================================================
+# Memoized Results
+# =============================================================================
+
+# (normalized query, catalog, place index) -> detector results that depend on the query text only
+_QUERY_MEMO = ByteBudgetLRU("preprocess_query_results", PREPROCESS_MEMO_BYTES // 2,
+                            sizeof=lambda _: PREPROCESS_MEMO_ENTRY_BYTES)
+
+# (normalized query, viewport bucket, overlay state, catalog, place index) -> resolved hints (before pass-through fields)
+_HINTS_MEMO = ByteBudgetLRU("preprocess_hints", PREPROCESS_MEMO_BYTES // 2,
+                            sizeof=lambda _: PREPROCESS_MEMO_ENTRY_BYTES)
+
+
+def _viewport_bucket(viewport: dict):
+    """
+    Coarse, hashable viewport: admin level, countries in view, and bounds
+    snapped to a power-of-two grid about 1/VIEWPORT_BUCKET_DIVISIONS of the
+    view wide (so small pans and zooms share a bucket).
+    """
+    if not viewport:
+        return None
+    level = viewport.get("adminLevel")
+    bounds = viewport.get("bounds")
+    if not bounds:
+        return (level,)
+    west, south = float(bounds.get("west", -180)), float(bounds.get("south", -90))
+    east, north = float(bounds.get("east", 180)), float(bounds.get("north", 90))
+    span = max(east - west, north - south, 1e-9)
+    step = 2.0 ** math.floor(math.log2(span / VIEWPORT_BUCKET_DIVISIONS))
+    return (level, step, round(west / step), round(south / step), round(east / step), round(north / step),
+            tuple(get_countries_in_viewport(bounds)))
+
+
+def _hints_memo_key(query: ParsedQuery, viewport: dict, active_overlays: dict):
+    """Key for _HINTS_MEMO, or None if the inputs cannot be keyed."""
+    try:
+        overlays = json.dumps(active_overlays, sort_keys=True, default=str) if active_overlays else None
+        return (query.stripped, _viewport_bucket(viewport), overlays, catalog_generation(),
+                place_index_generation())
+    except (TypeError, ValueError, AttributeError) as e:
+        logger.debug(f"Preprocessor memo: unkeyable input ({e})")
+        return None
+
+
+def clear_preprocess_memo():
+    """Forget memoized results (e.g. after catalog or geometry files are updated)."""
+    _QUERY_MEMO.clear()
+    _HINTS_MEMO.clear()
+
+
+def preprocess_memo_stats() -> list:
+    """Stats of the memoized-result caches (entries, hits, misses, hit rate)."""
+    return [_QUERY_MEMO.stats(), _HINTS_MEMO.stats()]
+
+
 def load_conversions() -> dict:
     """Load conversions.json for region resolution. Cached after first load."""
     global _CONVERSIONS_CACHE
@@ -267,28 +571,35 @@ def get_countries_in_viewport(bounds: dict) -> list:
     """
     Get list of ISO3 codes for countries visible in viewport.
     Uses global.csv bounding boxes for fast filtering.
-    DataFrame is cached after first load.
+    The loc_ids and bounding boxes are cached as arrays after first load.
     """
     global _GLOBAL_CSV_CACHE
 
     if not bounds:
         return []
 
-    # Load and cache global.csv DataFrame
+    # Load and cache global.csv loc_ids and bounding boxes
     if _GLOBAL_CSV_CACHE is None:
         global_csv = GEOMETRY_DIR / "global.csv"
         if not global_csv.exists():
             return []
         try:
             import pandas as pd
-            _GLOBAL_CSV_CACHE = pd.read_csv(global_csv)
-            logger.debug(f"Cached global.csv with {len(_GLOBAL_CSV_CACHE)} countries")
+            df = pd.read_csv(global_csv)
+            loc_ids = df['loc_id'].tolist() if 'loc_id' in df.columns else []
+            boxes = None
+            if 'bbox_min_lon' in df.columns:
+                boxes = df[['bbox_min_lon', 'bbox_min_lat', 'bbox_max_lon', 'bbox_max_lat']].to_numpy(dtype=float)
+            _GLOBAL_CSV_CACHE = (loc_ids, boxes)
+            logger.debug(f"Cached global.csv with {len(df)} countries")
         except Exception as e:
             logger.warning(f"Error loading global.csv: {e}")
             return []
 
     try:
-        df = _GLOBAL_CSV_CACHE
+        loc_ids, boxes = _GLOBAL_CSV_CACHE
+        if boxes is None:
+            return list(loc_ids)
 
         # Viewport bounds
         v_west = bounds.get("west", -180)
@@ -297,64 +608,76 @@ def get_countries_in_viewport(bounds: dict) -> list:
         v_north = bounds.get("north", 90)
 
         # Filter by bounding box intersection
-        if 'bbox_min_lon' in df.columns:
-            mask = (
-                (df['bbox_max_lon'] >= v_west) &
-                (df['bbox_min_lon'] <= v_east) &
-                (df['bbox_max_lat'] >= v_south) &
-                (df['bbox_min_lat'] <= v_north)
-            )
-            df = df[mask]
-
-        return df['loc_id'].tolist() if 'loc_id' in df.columns else []
+        mask = (
+            (boxes[:, 2] >= v_west) &
+            (boxes[:, 0] <= v_east) &
+            (boxes[:, 3] >= v_south) &
+            (boxes[:, 1] <= v_north)
+        )
+        return [loc_ids[i] for i in mask.nonzero()[0]]
     except Exception as e:
         logger.warning(f"Error getting countries in viewport: {e}")
         return []
 
 
+def get_map_center_hierarchy(viewport: dict) -> list:
+    """
+    loc_ids of the admin units under the viewport's centre, country first,
+    down to the viewport's admin level. [] without bounds or shapely.
+
+    Runs inside the chat request, so only polygons already prepared (by
+    warmup.py or earlier /geometry/locate calls) are used; a cold level ends
+    the hierarchy instead of being parsed here.
+    """
+    bounds = (viewport or {}).get("bounds")
+    if not bounds:
+        return []
+    from .reverse_geocode import locate_points, SHAPELY_AVAILABLE
+    if not SHAPELY_AVAILABLE:
+        return []
+    lon = (float(bounds.get("west", -180)) + float(bounds.get("east", 180))) / 2
+    lat = (float(bounds.get("south", -90)) + float(bounds.get("north", 90))) / 2
+    max_level = max(viewport.get("adminLevel") or 0, 1)
+    try:
+        located = locate_points([lon], [lat], max_level=max_level, loaded_only=True)[0]
+    except Exception as e:
+        logger.warning(f"Error locating map centre: {e}")
+        return []
+    return [h["loc_id"] for h in located["hierarchy"]]
+
+
+def _match_under_map_center(matches: list, viewport: dict) -> Optional[dict]:
+    """
+    The one match sharing the deepest admin unit with the map centre (the
+    unit itself or one of its ancestors), or None if none or tied.
+    """
+    hierarchy = get_map_center_hierarchy(viewport)
+    if not hierarchy:
+        return None
+
+    def depth(match):
+        loc_id = match.get("loc_id") or ""
+        shared = [i for i, unit in enumerate(hierarchy) if loc_id == unit or loc_id.startswith(unit + "-")]
+        return max(shared, default=-1)
+
+    depths = [depth(m) for m in matches]
+    best = max(depths)
+    if best < 0 or depths.count(best) != 1:
+        return None
+    return matches[depths.index(best)]
+
+
 def load_parquet_names(iso3: str) -> dict:
     """
     Load location names from a country's parquet file.
     Returns dict of {name_lower: [list of location dicts]}
     Multiple locations can share the same name (e.g., 30+ Washington Counties).
-    Cached per ISO3 code.
+    Built from geometry_store's names view and held there per file.
     """
-    global _PARQUET_NAMES_CACHE
-
-    if iso3 in _PARQUET_NAMES_CACHE:
-        return _PARQUET_NAMES_CACHE[iso3]
-
-    parquet_file = GEOMETRY_DIR / f"{iso3}.parquet"
-    if not parquet_file.exists():
-        _PARQUET_NAMES_CACHE[iso3] = {}
-        return {}
-
     try:
-        import pandas as pd
-        # Only load name columns, not geometry (much faster)
-        df = pd.read_parquet(parquet_file, columns=['loc_id', 'name', 'parent_id', 'admin_level'])
-
-        names_dict = {}
-        for _, row in df.iterrows():
-            name = row.get('name')
-            if name and isinstance(name, str):
-                name_lower = name.lower()
-                location_info = {
-                    "loc_id": row.get('loc_id'),
-                    "parent_id": row.get('parent_id'),
-                    "admin_level": row.get('admin_level')
-                }
-                # Store as list to handle duplicate names (e.g., Washington County in 30+ states)
-                if name_lower not in names_dict:
-                    names_dict[name_lower] = []
-                names_dict[name_lower].append(location_info)
-
-        _PARQUET_NAMES_CACHE[iso3] = names_dict
-        logger.debug(f"Loaded {len(names_dict)} unique location names from {iso3}.parquet")
-        return names_dict
+        return name_index(GEOMETRY_DIR / f"{iso3}.parquet")
     except Exception as e:
         logger.warning(f"Error loading parquet names for {iso3}: {e}")
-        _PARQUET_NAMES_CACHE[iso3] = {}
         return {}
 
 
@@ -364,30 +687,67 @@ def get_sorted_location_names(iso3: str) -> list:
     Names are sorted by length (longest first) and filtered to remove
     stop words, numbers, and single characters.
     """
-    global _PARQUET_SORTED_NAMES_CACHE
+    def build():
+        names = load_parquet_names(iso3)
+        stopwords = _load_stopwords()
+        sorted_names = sorted(
+            [n for n in names.keys()
+             if n not in stopwords
+             and not n.isdigit()
+             and len(n) >= 2],
+            key=len, reverse=True
+        )
+        logger.debug(f"Cached {len(sorted_names)} sorted location names for {iso3}")
+        return sorted_names
 
-    if iso3 in _PARQUET_SORTED_NAMES_CACHE:
-        return _PARQUET_SORTED_NAMES_CACHE[iso3]
+    return geometry_store.derived(GEOMETRY_DIR / f"{iso3}.parquet", "sorted_names", build) or []
 
-    # Get the names dict first (also cached)
-    names = load_parquet_names(iso3)
-    if not names:
-        _PARQUET_SORTED_NAMES_CACHE[iso3] = []
-        return []
 
-    # Build sorted list once and cache it
-    stopwords = _load_stopwords()
-    sorted_names = sorted(
-        [n for n in names.keys()
-         if n not in stopwords
-         and not n.isdigit()
-         and len(n) >= 2],
-        key=len, reverse=True
-    )
+def get_location_name_matcher(iso3: str) -> Optional[NameMatcher]:
+    """
+    Name matcher over a country's sorted location names (ranks follow
+    get_sorted_location_names). Built once per file version. None if no names.
+    """
+    def build():
+        sorted_names = get_sorted_location_names(iso3)
+        return NameMatcher(sorted_names) if sorted_names else None
+
+    return geometry_store.derived(GEOMETRY_DIR / f"{iso3}.parquet", "name_matcher", build,
+                                  sizeof=lambda matcher: matcher.nbytes)
+
+
+def get_location_fuzzy_index(iso3: str) -> Optional[FuzzyNameIndex]:
+    """
+    Near-match index over a country's sorted location names (ranks follow
+    get_sorted_location_names). Built once per file version. None if no names.
+    """
+    def build():
+        sorted_names = get_sorted_location_names(iso3)
+        return FuzzyNameIndex(sorted_names, FUZZY_MAX_EDITS, FUZZY_MIN_LENGTH) if sorted_names else None
+
+    return geometry_store.derived(GEOMETRY_DIR / f"{iso3}.parquet", "fuzzy_index", build,
+                                  sizeof=lambda index: index.nbytes)
+
+
+def get_location_centers(iso3: str) -> dict:
+    """
+    Center (lon, lat) of each location in a country's parquet, from its bbox
+    (or centroid) columns. Held per file version. {} if unavailable.
+    """
+    path = GEOMETRY_DIR / f"{iso3}.parquet"
+
+    def build():
+        df = geometry_store.get(path, view="bbox")
+        boxes = df_bounds(df) if df is not None else None
+        if boxes is None:
+            return {}
+        lons = (boxes[:, 0] + boxes[:, 2]) / 2
+        lats = (boxes[:, 1] + boxes[:, 3]) / 2
+        return {loc_id: (float(lon), float(lat))
+                for loc_id, lon, lat in zip(df['loc_id'], lons, lats)
+                if not (math.isnan(lon) or math.isnan(lat))}
 
-    _PARQUET_SORTED_NAMES_CACHE[iso3] = sorted_names
-    logger.debug(f"Cached {len(sorted_names)} sorted location names for {iso3}")
-    return sorted_names
+    return geometry_store.derived(path, "centers", build, sizeof=lambda centers: len(centers) * 200) or {}
 
 
 def search_locations_globally(name: str, admin_level: int = None, limit_countries: list = None) -> list:
@@ -395,6 +755,9 @@ def search_locations_globally(name: str, admin_level: int = None, limit_countrie
     Search for locations by name across all parquet files globally.
     Used when viewport-based search fails or isn't available.
 
+    Answered from the global place index (place_index.py) instead of reading
+    each country's parquet.
+
     Args:
         name: Location name to search for (case-insensitive)
         admin_level: Optional admin level to filter by (1=state, 2=county, 3=city)
@@ -404,7 +767,10 @@ def search_locations_globally(name: str, admin_level: int = None, limit_countrie
         List of match dicts with loc_id, matched_term, iso3, admin_level, etc.
     """
     name_lower = name.lower().strip()
-    all_matches = []
+
+    index = load_place_index()
+    if index is None:
+        return []
 
     # Get list of countries to search
     if limit_countries:
@@ -412,44 +778,23 @@ def search_locations_globally(name: str, admin_level: int = None, limit_countrie
     else:
         # Search common large countries first, then others
         priority_countries = ["USA", "CAN", "GBR", "AUS", "DEU", "FRA", "IND", "BRA", "MEX"]
-        other_countries = []
-
-        # Get all available parquet files
-        if GEOMETRY_DIR.exists():
-            for f in GEOMETRY_DIR.glob("*.parquet"):
-                iso3 = f.stem
-                if iso3 not in priority_countries:
-                    other_countries.append(iso3)
-
-        countries = priority_countries + other_countries
+        countries = priority_countries + [c for c in index.countries if c not in priority_countries]
 
-    # Search each country's parquet
-    iso_data = load_reference_file(REFERENCE_DIR / "iso_codes.json")
+    iso_data = load_reference_file(ISO_CODES_PATH)
+    iso3_to_name = iso_data.get("iso3_to_name", {}) if iso_data else {}
 
-    for iso3 in countries:
-        names = load_parquet_names(iso3)
-        if not names:
-            continue
-
-        # Look for exact name match - names[name_lower] is now a LIST of locations
-        if name_lower in names:
-            locations_list = names[name_lower]
-            country_name = iso_data.get("iso3_to_name", {}).get(iso3, iso3) if iso_data else iso3
-
-            for info in locations_list:
-                # Check admin level filter
-                if admin_level is not None and info.get("admin_level") != admin_level:
-                    continue
-
-                all_matches.append({
-                    "matched_term": name_lower,
-                    "iso3": iso3,
-                    "country_name": country_name,
-                    "loc_id": info.get("loc_id"),
-                    "parent_id": info.get("parent_id"),
-                    "admin_level": info.get("admin_level", 0),
-                    "is_subregion": info.get("admin_level", 0) > 0
-                })
+    all_matches = []
+    for info in index.lookup(name_lower, admin_level=admin_level, countries=countries):
+        level = info["admin_level"] or 0
+        all_matches.append({
+            "matched_term": name_lower,
+            "iso3": info["iso3"],
+            "country_name": iso3_to_name.get(info["iso3"], info["iso3"]),
+            "loc_id": info["loc_id"],
+            "parent_id": info["parent_id"],
+            "admin_level": level,
+            "is_subregion": level > 0
+        })
 
     return all_matches
 
@@ -486,38 +831,39 @@ def lookup_location_in_viewport(query: str, viewport: dict = None) -> dict:
         # No viewport - this is handled by existing extract_country_from_query
         return result
 
+    if len(countries_to_search) > VIEWPORT_MATCH_MAX_COUNTRIES:
+        logger.debug(f"{len(countries_to_search)} countries in viewport, skipping sub-national name lookup")
+        return result
+
     all_matches = []
+    iso_data = load_reference_file(ISO_CODES_PATH)
 
-    # Search for location names in visible countries' parquets
+    # Search for location names in visible countries' parquets (one pass per country)
     for iso3 in countries_to_search:
-        names = load_parquet_names(iso3)
-        if not names:
+        matcher = get_location_name_matcher(iso3)
+        if matcher is None:
             continue
+        names = load_parquet_names(iso3)
 
         # Get country name for display (once per country)
-        iso_data = load_reference_file(REFERENCE_DIR / "iso_codes.json")
         country_name = iso_data.get("iso3_to_name", {}).get(iso3, iso3) if iso_data else iso3
 
-        # Use cached sorted names (filtered and sorted by length, longest first)
-        sorted_names = get_sorted_location_names(iso3)
+        # Ranks follow the sorted names (longest first)
+        for rank in matcher.ranks(query_lower):
+            name = matcher.names[rank]
+            # names[name] is a LIST of locations. The matcher and names are held
+            # separately, so a name can be missing if the names failed to load
+            for info in names.get(name, ()):
+                is_subregion = info.get("admin_level", 0) > 0
 
-        for name in sorted_names:
-            # Use word boundary matching
-            pattern = r'\b' + re.escape(name) + r'\b'
-            if re.search(pattern, query_lower):
-                # names[name] is now a LIST of locations
-                locations_list = names[name]
-                for info in locations_list:
-                    is_subregion = info.get("admin_level", 0) > 0
-
-                    all_matches.append({
-                        "matched_term": name,
-                        "iso3": iso3,
-                        "country_name": country_name,
-                        "loc_id": info.get("loc_id"),
-                        "admin_level": info.get("admin_level", 0),
-                        "is_subregion": is_subregion
-                    })
+                all_matches.append({
+                    "matched_term": name,
+                    "iso3": iso3,
+                    "country_name": country_name,
+                    "loc_id": info.get("loc_id"),
+                    "admin_level": info.get("admin_level", 0),
+                    "is_subregion": is_subregion
+                })
 
     if len(all_matches) == 0:
         return result
@@ -551,7 +897,7 @@ def build_name_to_iso3() -> dict:
     if _NAME_TO_ISO3_CACHE is not None:
         return _NAME_TO_ISO3_CACHE
 
-    iso_path = REFERENCE_DIR / "iso_codes.json"
+    iso_path = ISO_CODES_PATH
     name_to_iso3 = {}
 
     if iso_path.exists():
@@ -621,7 +967,64 @@ def build_subregion_to_iso3() -> dict:
     return subregion_to_iso3
 
 
-def extract_country_from_query(query: str, viewport: dict = None) -> dict:
+_COUNTRY_MATCHER_CACHE = None
+_CAPITAL_MATCHER_CACHE = None
+
+
+def _country_name_matcher() -> NameMatcher:
+    """Matcher over country names and aliases, longest first (built once)."""
+    global _COUNTRY_MATCHER_CACHE
+    if _COUNTRY_MATCHER_CACHE is None:
+        _COUNTRY_MATCHER_CACHE = NameMatcher(sorted(build_name_to_iso3().keys(), key=len, reverse=True))
+    return _COUNTRY_MATCHER_CACHE
+
+
+def _capital_name_matcher() -> NameMatcher:
+    """Matcher over capital city names, longest first (built once)."""
+    global _CAPITAL_MATCHER_CACHE
+    if _CAPITAL_MATCHER_CACHE is None:
+        _CAPITAL_MATCHER_CACHE = NameMatcher(sorted(build_subregion_to_iso3().keys(), key=len, reverse=True))
+    return _CAPITAL_MATCHER_CACHE
+
+
+_COUNTRY_FUZZY_CACHE = None
+_CAPITAL_FUZZY_CACHE = None
+
+
+def _country_fuzzy_index() -> FuzzyNameIndex:
+    """Near-match index over country names and aliases (ranks follow _country_name_matcher)."""
+    global _COUNTRY_FUZZY_CACHE
+    if _COUNTRY_FUZZY_CACHE is None:
+        _COUNTRY_FUZZY_CACHE = FuzzyNameIndex(_country_name_matcher().names, FUZZY_MAX_EDITS, FUZZY_MIN_LENGTH)
+    return _COUNTRY_FUZZY_CACHE
+
+
+def _capital_fuzzy_index() -> FuzzyNameIndex:
+    """Near-match index over capital city names (ranks follow _capital_name_matcher)."""
+    global _CAPITAL_FUZZY_CACHE
+    if _CAPITAL_FUZZY_CACHE is None:
+        _CAPITAL_FUZZY_CACHE = FuzzyNameIndex(_capital_name_matcher().names, FUZZY_MAX_EDITS, FUZZY_MIN_LENGTH)
+    return _CAPITAL_FUZZY_CACHE
+
+
+def _country_ranks(query: ParsedQuery) -> list:
+    """Ranks of the country names in the query (see _country_name_matcher)."""
+    return query.cached("country_ranks", lambda: _country_name_matcher().ranks(query.location_lower))
+
+
+def _capital_ranks(query: ParsedQuery) -> list:
+    """Ranks of the capital names in the query (see _capital_name_matcher)."""
+    return query.cached("capital_ranks", lambda: _capital_name_matcher().ranks(query.location_lower))
+
+
+def _viewport_location_matches(query: ParsedQuery, viewport: dict) -> dict:
+    """lookup_location_in_viewport for the normalized query (shared, do not modify)."""
+    bounds = viewport.get("bounds") or {}
+    key = ("viewport_locations",) + tuple(sorted(bounds.items()))
+    return query.cached(key, lambda: lookup_location_in_viewport(query.location_text, viewport))
+
+
+def extract_country_from_query(query: QueryText, viewport: dict = None) -> dict:
     """
     Extract country from query using hierarchical resolution.
 
@@ -642,37 +1045,30 @@ def extract_country_from_query(query: str, viewport: dict = None) -> dict:
     """
     result = {"match": None, "ambiguous": False, "matches": [], "source": None}
 
-    # Normalize query to handle possessive forms (australias -> australia)
-    normalized_query = normalize_query_for_location_matching(query)
-    query_lower = normalized_query.lower()
-
-    # First try direct country match
-    name_to_iso3 = build_name_to_iso3()
-    sorted_names = sorted(name_to_iso3.keys(), key=len, reverse=True)
+    # Possessive forms are normalized (australias -> australia) in location_lower
+    query = parse_query(query)
 
-    for name in sorted_names:
-        pattern = r'\b' + re.escape(name) + r'\b'
-        if re.search(pattern, query_lower):
-            iso3 = name_to_iso3[name]
-            result["match"] = (name, iso3, False)
-            result["source"] = "country"
-            return result
+    # First try direct country match (longest name found wins)
+    ranks = _country_ranks(query)
+    if ranks:
+        name = _country_name_matcher().names[ranks[0]]
+        result["match"] = (name, build_name_to_iso3()[name], False)
+        result["source"] = "country"
+        return result
 
     # Try capital cities from reference file
-    subregion_to_iso3 = build_subregion_to_iso3()
-    sorted_subregions = sorted(subregion_to_iso3.keys(), key=len, reverse=True)
-
-    for subregion in sorted_subregions:
-        pattern = r'\b' + re.escape(subregion) + r'\b'
-        if re.search(pattern, query_lower):
-            iso3 = subregion_to_iso3[subregion]
-            result["match"] = (subregion, iso3, True)
-            result["source"] = "capital"
-            return result
+    ranks = _capital_ranks(query)
+    if ranks:
+        subregion = _capital_name_matcher().names[ranks[0]]
+        result["match"] = (subregion, build_subregion_to_iso3()[subregion], True)
+        result["source"] = "capital"
+        return result
 
-    # Viewport-based lookup DISABLED for performance
-    # Country/capital matching above handles common cases.
-    # The LLM handles location recognition; validation in postprocessor.
+    # Sub-national names in the viewport's countries (one automaton pass per country)
+    if viewport and VIEWPORT_LOCATION_MATCHING:
+        viewport_result = _viewport_location_matches(query, viewport)
+        if viewport_result.get("match"):
+            return dict(viewport_result, source="viewport")
 
     return result
 
@@ -738,8 +1134,8 @@ def get_relevant_sources_with_metrics(topics: list, iso3: str = None) -> dict:
                 "admin_counts": country_index.get("admin_counts", {}),
             }
 
-    catalog = load_catalog()
-    sources = catalog.get("sources", [])
+    index = get_catalog_index()
+    sources = index.sources
     relevant = []
 
     # Map topics to common keywords for matching source topic_tags/keywords
@@ -758,7 +1154,15 @@ def get_relevant_sources_with_metrics(topics: list, iso3: str = None) -> dict:
     for topic in topics:
         keywords_to_match.extend(topic_keywords.get(topic, [topic]))
 
-    for source in sources:
+    # Only topic-matched sources and the location's own sources can be included,
+    # most relevant to the topic keywords first
+    topic_matched = index.tag_matches(keywords_to_match) if keywords_to_match else set()
+    positions = topic_matched.union(index.scope_positions(iso3)) if iso3 else topic_matched
+    scores = index.scores(" ".join(keywords_to_match))
+    positions = sorted(positions, key=lambda position: (-scores.get(position, 0.0), position))
+
+    for position in positions:
+        source = sources[position]
         source_id = source.get("source_id", "")
         scope = source.get("scope", "global")
         topic_tags = source.get("topic_tags", [])
@@ -772,13 +1176,7 @@ def get_relevant_sources_with_metrics(topics: list, iso3: str = None) -> dict:
         is_global_source = (scope == "global")
 
         # Check topic match (for any source type)
-        topic_matches = False
-        if keywords_to_match:
-            all_source_keywords = [t.lower() for t in topic_tags + source_keywords]
-            for kw in keywords_to_match:
-                if any(kw.lower() in sk for sk in all_source_keywords):
-                    topic_matches = True
-                    break
+        topic_matches = position in topic_matched
 
         if iso3:
             # Location specified: include ALL country sources + topic-matched global
@@ -848,13 +1246,13 @@ def get_relevant_sources_with_metrics(topics: list, iso3: str = None) -> dict:
 # Use _load_topics() to access
 
 
-def extract_topics(query: str) -> list:
+def extract_topics(query: QueryText) -> list:
     """
     Extract topic categories from query based on keywords.
 
     Returns list of topic names that match.
     """
-    query_lower = query.lower()
+    query_lower = parse_query(query).lower
     matched_topics = []
 
     topics = _load_topics()
@@ -925,25 +1323,51 @@ def _get_region_aliases() -> dict:
     return _REGION_ALIASES_CACHE
 
 
-def resolve_regions(query: str) -> list:
+_REGION_MATCHER_CACHE = None
+
+
+def _region_matcher() -> NameMatcher:
+    """
+    Matcher over region aliases, grouping names (underscores as spaces) and
+    grouping codes of 3+ characters, all lowercase (built once).
+    """
+    global _REGION_MATCHER_CACHE
+    if _REGION_MATCHER_CACHE is None:
+        groupings = load_conversions().get("regional_groupings", {})
+        terms = set(_get_region_aliases())
+        for grouping_name, group_data in groupings.items():
+            terms.add(grouping_name.lower().replace("_", " "))
+            code = group_data.get("code", "").lower()
+            if code and len(code) >= 3:
+                terms.add(code)
+        _REGION_MATCHER_CACHE = NameMatcher(sorted(terms))
+    return _REGION_MATCHER_CACHE
+
+
+def resolve_regions(query: QueryText) -> list:
     """
     Detect region mentions in query and resolve to grouping names.
 
     Returns list of dicts with region info.
-    Uses word boundaries to avoid false positives.
+    Uses word boundaries to avoid false positives. All aliases, grouping
+    names and codes are found in one matcher pass.
     """
-    query_lower = query.lower()
+    query_lower = parse_query(query).lower
     conversions = load_conversions()
     groupings = conversions.get("regional_groupings", {})
 
     resolved = []
 
-    # Check aliases first - use word boundaries to avoid partial matches
+    # Terms present in the query as whole words
+    matcher = _region_matcher()
+    found = {matcher.names[rank] for rank in matcher.ranks(query_lower)}
+    if not found:
+        return resolved
+
+    # Check aliases first - word boundaries avoid partial matches
     region_aliases = _get_region_aliases()
     for alias, grouping_name in region_aliases.items():
-        # Use regex with word boundaries
-        pattern = r'\b' + re.escape(alias) + r'\b'
-        if re.search(pattern, query_lower):
+        if alias in found:
             if grouping_name in groupings:
                 group_data = groupings[grouping_name]
                 resolved.append({
@@ -956,18 +1380,12 @@ def resolve_regions(query: str) -> list:
 
     # Also check for grouping names directly (e.g., "WHO_African_Region")
     for grouping_name, group_data in groupings.items():
-        # Check if grouping name is mentioned (with word boundaries)
+        # Grouping name mentioned, or its code (only codes of 3+ chars)
         name_lower = grouping_name.lower().replace("_", " ")
-        name_pattern = r'\b' + re.escape(name_lower) + r'\b'
-
-        # Check if code is mentioned (only for codes 3+ chars, with word boundaries)
         code = group_data.get("code", "").lower()
-        code_matched = False
-        if code and len(code) >= 3:
-            code_pattern = r'\b' + re.escape(code) + r'\b'
-            code_matched = bool(re.search(code_pattern, query_lower))
+        code_matched = bool(code) and len(code) >= 3 and code in found
 
-        if re.search(name_pattern, query_lower) or code_matched:
+        if name_lower in found or code_matched:
             # Avoid duplicates from alias resolution
             if not any(r["grouping"] == grouping_name for r in resolved):
                 resolved.append({
@@ -1023,7 +1441,11 @@ TIME_PATTERNS = {
 }
 
 
-def detect_time_patterns(query: str) -> dict:
+_TIME_TABLES = {kind: _PatternTable(patterns) for kind, patterns in TIME_PATTERNS.items()}
+_TIME_ANY = _PatternTable([pattern for patterns in TIME_PATTERNS.values() for pattern in patterns])
+
+
+def detect_time_patterns(query: QueryText) -> dict:
     """
     Detect time-related patterns in query.
 
@@ -1040,60 +1462,57 @@ def detect_time_patterns(query: str) -> dict:
         "pattern_type": None,
     }
 
-    query_lower = query.lower()
+    query_lower = parse_query(query).lower
+    if not _TIME_ANY.any_search(query_lower):
+        return result
 
     # Check for explicit year ranges
-    for pattern in TIME_PATTERNS["year_range"]:
-        match = re.search(pattern, query_lower)
-        if match:
-            result["is_time_series"] = True
-            result["year_start"] = int(match.group(1))
-            result["year_end"] = int(match.group(2))
-            result["pattern_type"] = "year_range"
-            return result
+    _, match = _TIME_TABLES["year_range"].first_search(query_lower)
+    if match:
+        result["is_time_series"] = True
+        result["year_start"] = int(match.group(1))
+        result["year_end"] = int(match.group(2))
+        result["pattern_type"] = "year_range"
+        return result
 
     # Check for "year to now" patterns (e.g., "from 2010 to now")
-    for pattern in TIME_PATTERNS["year_to_now"]:
-        match = re.search(pattern, query_lower)
-        if match:
-            result["is_time_series"] = True
-            result["year_start"] = int(match.group(1))
-            result["year_end"] = 2024  # Current year
-            result["pattern_type"] = "year_to_now"
-            return result
+    _, match = _TIME_TABLES["year_to_now"].first_search(query_lower)
+    if match:
+        result["is_time_series"] = True
+        result["year_start"] = int(match.group(1))
+        result["year_end"] = 2024  # Current year
+        result["pattern_type"] = "year_to_now"
+        return result
 
     # Check for trend indicators
-    for pattern in TIME_PATTERNS["trend_indicators"]:
-        if re.search(pattern, query_lower):
-            result["is_time_series"] = True
-            result["pattern_type"] = "trend"
-            # Could set default range here, or let LLM decide
-            break
+    _, match = _TIME_TABLES["trend_indicators"].first_search(query_lower)
+    if match:
+        result["is_time_series"] = True
+        result["pattern_type"] = "trend"
+        # Could set default range here, or let LLM decide
 
     # Check for "last N years"
-    for pattern in TIME_PATTERNS["last_n_years"]:
-        match = re.search(pattern, query_lower)
-        if match:
-            result["is_time_series"] = True
-            n_years = int(match.group(1))
-            result["year_end"] = 2024  # Current year
-            result["year_start"] = 2024 - n_years
-            result["pattern_type"] = "last_n_years"
-            return result
+    _, match = _TIME_TABLES["last_n_years"].first_search(query_lower)
+    if match:
+        result["is_time_series"] = True
+        n_years = int(match.group(1))
+        result["year_end"] = 2024  # Current year
+        result["year_start"] = 2024 - n_years
+        result["pattern_type"] = "last_n_years"
+        return result
 
     # Check for "since YYYY"
-    for pattern in TIME_PATTERNS["since_year"]:
-        match = re.search(pattern, query_lower)
-        if match:
-            result["is_time_series"] = True
-            result["year_start"] = int(match.group(1))
-            result["year_end"] = 2024
-            result["pattern_type"] = "since_year"
-            return result
+    _, match = _TIME_TABLES["since_year"].first_search(query_lower)
+    if match:
+        result["is_time_series"] = True
+        result["year_start"] = int(match.group(1))
+        result["year_end"] = 2024
+        result["pattern_type"] = "since_year"
+        return result
 
     # Check for single year (not time series)
-    for pattern in TIME_PATTERNS["single_year"]:
-        match = re.search(pattern, query_lower)
+    for _, regex in _TIME_TABLES["single_year"].patterns:
+        match = regex.search(query_lower)
         if match:
             year = int(match.group(1))
             if 1900 < year < 2100:  # Sanity check
@@ -1180,13 +1599,26 @@ def lookup_country_specific_data(ref_type: str, iso3: str, country_name: str) ->
     return None
 
 
-def detect_reference_lookup(query: str) -> Optional[dict]:
+_SDG_REFERENCE_RE = re.compile(r'sdg\s*(\d+)|goal\s*(\d+)|sustainable development goal\s*(\d+)')
+
+# Data source reference patterns - "what is owid?" or "tell me about who_health"
+_SOURCE_REFERENCE_PATTERNS = [
+    (re.compile(r'\b(owid|owid_co2)\b'), "owid_co2"),
+    (re.compile(r'\b(who|who_health|world health)\b'), "who_health"),
+    (re.compile(r'\b(imf|imf_bop|balance of payments)\b'), "imf_bop"),
+    (re.compile(r'\b(census|us census)\b'), "census_population"),
+    (re.compile(r'\b(world factbook|cia factbook|factbook)\b'), "world_factbook"),
+]
+
+
+def detect_reference_lookup(query: QueryText) -> Optional[dict]:
     """
     Detect if query is asking for reference information.
 
     Returns dict with reference file path, type, and specific country data if found.
     """
-    query_lower = query.lower()
+    query = parse_query(query)
+    query_lower = query.lower
 
     # System help pattern - "how do you work?", "what can you do?", "help", etc.
     help_keywords = [
@@ -1197,7 +1629,7 @@ def detect_reference_lookup(query: str) -> Optional[dict]:
         "how do i ask", "what questions can i",
     ]
     # Match exact "help" but not "help me find earthquakes" (only short help queries)
-    is_short_help = query_lower.strip() in ["help", "?", "help me", "how"]
+    is_short_help = query.stripped in ["help", "?", "help me", "how"]
     if is_short_help or any(kw in query_lower for kw in help_keywords):
         ref_path = REFERENCE_DIR / "system_help.json"
         if ref_path.exists():
@@ -1208,7 +1640,7 @@ def detect_reference_lookup(query: str) -> Optional[dict]:
             }
 
     # SDG pattern - "What is SDG 7?" or "goal 7" or "sustainable development goal 7"
-    sdg_match = re.search(r'sdg\s*(\d+)|goal\s*(\d+)|sustainable development goal\s*(\d+)', query_lower)
+    sdg_match = _SDG_REFERENCE_RE.search(query_lower)
     if sdg_match:
         num = sdg_match.group(1) or sdg_match.group(2) or sdg_match.group(3)
         num_padded = num.zfill(2)
@@ -1227,7 +1659,7 @@ def detect_reference_lookup(query: str) -> Optional[dict]:
     if country_result.get("match"):
         matched_term, iso3, is_subregion = country_result["match"]
         # Get proper country name from ISO3 for display
-        iso_data = load_reference_file(REFERENCE_DIR / "iso_codes.json")
+        iso_data = load_reference_file(ISO_CODES_PATH)
         country_name = iso_data.get("iso3_to_name", {}).get(iso3, matched_term.title()) if iso_data else matched_term.title()
     else:
         matched_term = None
@@ -1405,15 +1837,8 @@ def detect_reference_lookup(query: str) -> Optional[dict]:
                     }
 
     # Data source reference pattern - "what is owid?" or "tell me about who_health"
-    source_patterns = [
-        (r'\b(owid|owid_co2)\b', "owid_co2"),
-        (r'\b(who|who_health|world health)\b', "who_health"),
-        (r'\b(imf|imf_bop|balance of payments)\b', "imf_bop"),
-        (r'\b(census|us census)\b', "census_population"),
-        (r'\b(world factbook|cia factbook|factbook)\b', "world_factbook"),
-    ]
-    for pattern, source_id in source_patterns:
-        if re.search(pattern, query_lower):
+    for regex, source_id in _SOURCE_REFERENCE_PATTERNS:
+        if regex.search(query_lower):
             ref_path = DATA_DIR / source_id / "reference.json"
             if ref_path.exists():
                 return {
@@ -1455,27 +1880,29 @@ DERIVED_PATTERNS = {
 }
 
 
-def detect_derived_intent(query: str) -> Optional[dict]:
+_DERIVED_TABLES = {derived_type: _PatternTable(patterns) for derived_type, patterns in DERIVED_PATTERNS.items()}
+
+
+def detect_derived_intent(query: QueryText) -> Optional[dict]:
     """
     Detect if query is asking for derived/calculated fields.
 
     Returns dict with derived type and any detected specifics.
     """
-    query_lower = query.lower()
+    query_lower = parse_query(query).lower
 
-    for derived_type, patterns in DERIVED_PATTERNS.items():
-        for pattern in patterns:
-            match = re.search(pattern, query_lower)
-            if match:
-                result = {
-                    "type": derived_type,
-                    "match": match.group(0),
-                }
-                # For ratio patterns, try to extract numerator/denominator
-                if derived_type == "ratio" and len(match.groups()) >= 2:
-                    result["numerator_hint"] = match.group(1)
-                    result["denominator_hint"] = match.group(2)
-                return result
+    for derived_type, table in _DERIVED_TABLES.items():
+        _, match = table.first_search(query_lower)
+        if match:
+            result = {
+                "type": derived_type,
+                "match": match.group(0),
+            }
+            # For ratio patterns, try to extract numerator/denominator
+            if derived_type == "ratio" and len(match.groups()) >= 2:
+                result["numerator_hint"] = match.group(1)
+                result["denominator_hint"] = match.group(2)
+            return result
 
     return None
 
@@ -1509,7 +1936,29 @@ FILTER_CHANGE_PATTERNS = [
 ]
 
 
-def detect_filter_intent(query: str, active_overlays: dict) -> Optional[dict]:
+_FILTER_READ_TABLE = _PatternTable(FILTER_READ_PATTERNS)
+_FILTER_CHANGE_TABLE = _PatternTable([pattern for pattern, _ in FILTER_CHANGE_PATTERNS])
+_FILTER_CHANGE_TYPES = dict(FILTER_CHANGE_PATTERNS)
+
+
+def _match_filter_patterns(query: ParsedQuery):
+    """
+    First filter pattern in the query: ("read", pattern, None),
+    ("change", filter_type, match) or None. Computed once per query.
+    """
+    def scan():
+        pattern, _ = _FILTER_READ_TABLE.first_search(query.lower)
+        if pattern is not None:
+            return "read", pattern, None
+        pattern, match = _FILTER_CHANGE_TABLE.first_search(query.lower)
+        if match:
+            return "change", _FILTER_CHANGE_TYPES[pattern], match
+        return None
+
+    return query.cached("filter_patterns", scan)
+
+
+def detect_filter_intent(query: QueryText, active_overlays: dict) -> Optional[dict]:
     """
     Detect if user is asking about or changing overlay filters.
 
@@ -1523,57 +1972,55 @@ def detect_filter_intent(query: str, active_overlays: dict) -> Optional[dict]:
     if not active_overlays:
         return None
 
-    query_lower = query.lower()
     overlay_type = active_overlays.get("type")
+    found = _match_filter_patterns(parse_query(query))
+    if found is None:
+        return None
+    kind, pattern_or_type, match = found
 
-    # Check for read patterns
-    for pattern in FILTER_READ_PATTERNS:
-        if re.search(pattern, query_lower):
-            return {
-                "type": "read_filters",
-                "overlay": overlay_type,
-                "pattern": pattern
-            }
-
-    # Check for change patterns
-    for pattern, filter_type in FILTER_CHANGE_PATTERNS:
-        match = re.search(pattern, query_lower)
-        if match:
-            result = {
-                "type": "change_filters",
-                "overlay": overlay_type,
-                "filter_type": filter_type,
-                "raw_match": match.group(0)
-            }
+    # Read patterns are checked first
+    if kind == "read":
+        return {
+            "type": "read_filters",
+            "overlay": overlay_type,
+            "pattern": pattern_or_type
+        }
 
-            # Extract values based on filter type
-            if filter_type == "magnitude_range":
-                result["minMagnitude"] = float(match.group(1))
-                result["maxMagnitude"] = float(match.group(2))
-            elif filter_type == "magnitude_min":
-                result["minMagnitude"] = float(match.group(1))
-            elif filter_type == "magnitude_max":
-                result["maxMagnitude"] = float(match.group(1))
-            elif filter_type == "vei_min":
-                result["minVei"] = int(match.group(1))
-            elif filter_type == "category_min":
-                result["minCategory"] = int(match.group(1))
-            elif filter_type == "scale_min":
-                result["minScale"] = int(match.group(1))
-            elif filter_type == "area_min":
-                result["minAreaKm2"] = float(match.group(1))
-            elif filter_type == "acres_min":
-                # Convert acres to km2 (1 acre = 0.00404686 km2)
-                result["minAreaKm2"] = float(match.group(1)) * 0.00404686
-            elif filter_type == "clear":
-                result["clear"] = True
+    # Change patterns
+    filter_type = pattern_or_type
+    result = {
+        "type": "change_filters",
+        "overlay": overlay_type,
+        "filter_type": filter_type,
+        "raw_match": match.group(0)
+    }
 
-            return result
+    # Extract values based on filter type
+    if filter_type == "magnitude_range":
+        result["minMagnitude"] = float(match.group(1))
+        result["maxMagnitude"] = float(match.group(2))
+    elif filter_type == "magnitude_min":
+        result["minMagnitude"] = float(match.group(1))
+    elif filter_type == "magnitude_max":
+        result["maxMagnitude"] = float(match.group(1))
+    elif filter_type == "vei_min":
+        result["minVei"] = int(match.group(1))
+    elif filter_type == "category_min":
+        result["minCategory"] = int(match.group(1))
+    elif filter_type == "scale_min":
+        result["minScale"] = int(match.group(1))
+    elif filter_type == "area_min":
+        result["minAreaKm2"] = float(match.group(1))
+    elif filter_type == "acres_min":
+        # Convert acres to km2 (1 acre = 0.00404686 km2)
+        result["minAreaKm2"] = float(match.group(1)) * 0.00404686
+    elif filter_type == "clear":
+        result["clear"] = True
 
-    return None
+    return result
 
 
-def detect_overlay_intent(query: str, active_overlays: dict = None) -> Optional[dict]:
+def detect_overlay_intent(query: QueryText, active_overlays: dict = None) -> Optional[dict]:
     """
     Detect if user is asking about a disaster overlay, even if no overlay is active.
 
@@ -1593,7 +2040,8 @@ def detect_overlay_intent(query: str, active_overlays: dict = None) -> Optional[
             "severity": {"minMagnitude": 7.0},     # if severity detected
         }
     """
-    query_lower = query.lower()
+    query = parse_query(query)
+    query_lower = query.lower
 
     # Check if any disaster keywords are mentioned
     detected_overlay = None
@@ -1675,7 +2123,57 @@ SHOW_BORDERS_PATTERNS = [
 ]
 
 
-def detect_source_from_query(query: str) -> Optional[dict]:
+_NAVIGATION_TABLE = _PatternTable(NAVIGATION_PATTERNS)
+_SHOW_BORDERS_TABLE = _PatternTable(SHOW_BORDERS_PATTERNS)
+
+_SDG_SOURCE_RE = re.compile(r'\b(?:sdg|sustainable\s+development\s+goal)[\s\-_]*(\d{1,2})\b')
+
+_SOURCE_TERMS_CACHE = None  # (CatalogIndex, [(source, source_id, source_name, name_lower, name_parts)])
+
+
+def _source_terms() -> tuple:
+    """
+    The catalog index, and each catalog source (by position) with its
+    lowercased name, name parts (split on ' - ' and ': ') and source_id words,
+    prepared once per catalog index.
+
+    Returns:
+        (CatalogIndex, list of (source, source_id, source_name, source_name_lower,
+                                [(part, part_lower)], source_id words))
+    """
+    global _SOURCE_TERMS_CACHE
+    index = get_catalog_index()
+    if _SOURCE_TERMS_CACHE is None or _SOURCE_TERMS_CACHE[0] is not index:
+        terms = []
+        for source in index.sources:
+            source_id = source.get("source_id", "")
+            source_name = source.get("source_name", "")
+            terms.append((source, source_id, source_name, source_name.lower() if source_name else "",
+                          [(part, part.lower()) for part in source_name_parts(source_name)],
+                          tuple(tokenize(source_id))))
+        _SOURCE_TERMS_CACHE = (index, terms)
+    return _SOURCE_TERMS_CACHE
+
+
+def _mentions_source_id(query: ParsedQuery, id_words: tuple) -> bool:
+    """
+    True if the source_id's words occur as consecutive whole words of the
+    query ("un_sdg_01" or "un sdg 01"). Short numeric ids like "01" must not
+    match inside other words or years such as "2019".
+    """
+    n = len(id_words)
+    if not n:
+        return False
+    words = query.cached("source_id_words", lambda: tokenize(query.lower))
+    return any(tuple(words[i:i + n]) == id_words for i in range(len(words) - n + 1))
+
+
+def _source_scores(query: ParsedQuery, index) -> dict:
+    """BM25 + phrase scores of catalog sources for the query (ties between detection rules)."""
+    return query.cached("source_scores", lambda: index.scores(query.lower))
+
+
+def detect_source_from_query(query: QueryText) -> Optional[dict]:
     """
     Detect if user mentions a specific data source by name.
     Maps human-readable source names to source_ids.
@@ -1685,9 +2183,13 @@ def detect_source_from_query(query: str) -> Optional[dict]:
     - Partial source_name matches (e.g., 'Australian Bureau of Statistics' matches 'ABS - Regional Demographics')
     - source_id matches (for power users)
     
+    Only sources the catalog index cannot rule out are tested; the most
+    relevant (BM25) wins between equally long matches.
+
     Returns dict with source_id and source_name if found, None otherwise.
     """
-    query_lower = query.lower()
+    query = parse_query(query)
+    query_lower = query.lower
     catalog = load_catalog()
 
     if not catalog:
@@ -1697,8 +2199,7 @@ def detect_source_from_query(query: str) -> Optional[dict]:
 
     # Handle common aliases and patterns BEFORE main loop
     # SDG patterns: "SDG 8", "sdg8", "SDG-8", "goal 8", "sustainable development goal 8"
-    import re
-    sdg_pattern = re.search(r'\b(?:sdg|sustainable\s+development\s+goal)[\s\-_]*(\d{1,2})\b', query_lower)
+    sdg_pattern = _SDG_SOURCE_RE.search(query_lower)
     if sdg_pattern:
         goal_num = int(sdg_pattern.group(1))
         if 1 <= goal_num <= 17:
@@ -1711,43 +2212,44 @@ def detect_source_from_query(query: str) -> Optional[dict]:
                         "source_name": source.get("source_name", f"UN SDG Goal {goal_num}")
                     }
     source_matches = []
-    
-    for source in sources:
-        source_id = source.get("source_id", "")
-        source_name = source.get("source_name", "")
-        source_name_lower = source_name.lower() if source_name else ""
-        
+    index, terms = _source_terms()
+
+    for position in index.phrase_candidates(query_lower):
+        source, source_id, source_name, source_name_lower, name_parts, id_words = terms[position]
         # Check if full source_name appears in query
         if source_name and source_name_lower in query_lower:
             source_matches.append({
                 "source_id": source_id,
                 "source_name": source_name,
-                "match_length": len(source_name)
+                "match_length": len(source_name),
+                "position": position,
             })
         # Also check if main part of source_name appears in query
         # Split by common separators like ' - ', ':', ','
         elif source_name:
-            name_parts = [p.strip() for p in source_name.replace(' - ', '|').replace(': ', '|').split('|')]
-            for part in name_parts:
-                if len(part) >= 4 and part.lower() in query_lower:
+            for part, part_lower in name_parts:
+                if len(part) >= 4 and part_lower in query_lower:
                     source_matches.append({
                         "source_id": source_id,
                         "source_name": source_name,
-                        "match_length": len(part)
+                        "match_length": len(part),
+                        "position": position,
                     })
                     break
         
-        # Check if source_id appears (for power users, underscore-separated)
-        if source_id and source_id.lower() in query_lower:
+        # Check if source_id appears as whole words (for power users, underscore-separated)
+        if source_id and _mentions_source_id(query, id_words):
             source_matches.append({
                 "source_id": source_id,
                 "source_name": source_name or source_id,
-                "match_length": len(source_id) + 10  # Boost exact source_id matches
+                "match_length": len(source_id) + 10,  # Boost exact source_id matches
+                "position": position,
             })
     
     if source_matches:
-        # Return the longest match (most specific)
-        best_match = max(source_matches, key=lambda x: x["match_length"])
+        # Return the longest match (most specific), then the most relevant
+        scores = _source_scores(query, index)
+        best_match = max(source_matches, key=lambda x: (x["match_length"], scores.get(x["position"], 0.0)))
         return {
             "source_id": best_match["source_id"],
             "source_name": best_match["source_name"]
@@ -1762,7 +2264,7 @@ def detect_source_from_query(query: str) -> Optional[dict]:
 # These functions return ALL candidates with confidence scores, letting the LLM
 # decide which interpretation is correct based on full context.
 
-def detect_source_candidates(query: str) -> dict:
+def detect_source_candidates(query: QueryText) -> dict:
     """
     Detect all possible source matches in query with confidence scores.
 
@@ -1776,14 +2278,17 @@ def detect_source_candidates(query: str) -> dict:
     - Partial name (>8 chars): 0.7
     - Partial name (4-8 chars): 0.5
     - Boost if query contains "data", "statistics", "source": +0.1
+
+    Only sources the catalog index cannot rule out are tested; equal
+    confidences are ordered by relevance (BM25).
     """
-    query_lower = query.lower()
+    query = parse_query(query)
+    query_lower = query.lower
     catalog = load_catalog()
 
     if not catalog:
         return {"candidates": [], "best": None}
 
-    sources = catalog.get("sources", [])
     candidates = []
 
     # Check for data-related keywords that boost source interpretation
@@ -1791,13 +2296,13 @@ def detect_source_candidates(query: str) -> dict:
     has_data_context = any(kw in query_lower for kw in data_keywords)
     data_boost = 0.1 if has_data_context else 0.0
 
-    for source in sources:
-        source_id = source.get("source_id", "")
-        source_name = source.get("source_name", "")
-        source_name_lower = source_name.lower() if source_name else ""
-
+    index, terms = _source_terms()
+    positions = []  # catalog position of each candidate
+    for position in index.phrase_candidates(query_lower):
+        source, source_id, source_name, source_name_lower, name_parts, id_words = terms[position]
         # Check if full source_name appears in query
         if source_name and source_name_lower in query_lower:
+            positions.append(position)
             candidates.append({
                 "source_id": source_id,
                 "source_name": source_name,
@@ -1807,15 +2312,14 @@ def detect_source_candidates(query: str) -> dict:
             })
         # Check partial name matches
         elif source_name:
-            name_parts = [p.strip() for p in source_name.replace(' - ', '|').replace(': ', '|').split('|')]
-            for part in name_parts:
-                part_lower = part.lower()
+            for part, part_lower in name_parts:
                 if len(part) >= 4 and part_lower in query_lower:
                     # Score based on match length
                     if len(part) >= 8:
                         base_score = 0.7
                     else:
                         base_score = 0.5
+                    positions.append(position)
                     candidates.append({
                         "source_id": source_id,
                         "source_name": source_name,
@@ -1825,8 +2329,9 @@ def detect_source_candidates(query: str) -> dict:
                     })
                     break  # Only add once per source
 
-        # Check if source_id appears (for power users)
-        if source_id and source_id.lower() in query_lower:
+        # Check if source_id appears as whole words (for power users)
+        if source_id and _mentions_source_id(query, id_words):
+            positions.append(position)
             candidates.append({
                 "source_id": source_id,
                 "source_name": source_name or source_id,
@@ -1835,8 +2340,11 @@ def detect_source_candidates(query: str) -> dict:
                 "matched_text": source_id
             })
 
-    # Sort by confidence (highest first)
-    candidates = sorted(candidates, key=lambda x: -x["confidence"])
+    # Sort by confidence (highest first), then relevance
+    scores = _source_scores(query, index) if candidates else {}
+    order = sorted(range(len(candidates)),
+                   key=lambda i: (-candidates[i]["confidence"], -scores.get(positions[i], 0.0)))
+    candidates = [candidates[i] for i in order]
 
     # Remove duplicates (keep highest confidence per source_id)
     seen = set()
@@ -1852,7 +2360,7 @@ def detect_source_candidates(query: str) -> dict:
     }
 
 
-def detect_location_candidates(query: str, viewport: dict = None) -> dict:
+def detect_location_candidates(query: QueryText, viewport: dict = None) -> dict:
     """
     Detect all possible location matches in query with confidence scores.
 
@@ -1864,64 +2372,73 @@ def detect_location_candidates(query: str, viewport: dict = None) -> dict:
     - Exact country name: 1.0
     - Capital city: 0.9
     - Admin1 (state/province): 0.8
-    - Admin2 (county) in viewport: 0.6
+    - Admin2+ (county, city) in viewport: 0.5
     - Partial word match: 0.4
     - Stop word match: 0.1 (very low - likely false positive)
+    - Near match of a misspelled name: the score above less 0.3 per edit
+      (+0.1 if the location is inside the viewport)
     """
-    # Normalize query to handle possessive forms
-    normalized_query = normalize_query_for_location_matching(query)
-    query_lower = normalized_query.lower()
+    # Possessive forms are normalized in location_lower
+    query = parse_query(query)
 
     candidates = []
 
+    iso_data = load_reference_file(ISO_CODES_PATH)
+    iso3_to_name = iso_data.get("iso3_to_name", {}) if iso_data else {}
+
     # 1. Check country names (highest priority)
     name_to_iso3 = build_name_to_iso3()
-    sorted_names = sorted(name_to_iso3.keys(), key=len, reverse=True)
+    matcher = _country_name_matcher()
 
-    for name in sorted_names:
-        pattern = r'\b' + re.escape(name) + r'\b'
-        if re.search(pattern, query_lower):
-            iso3 = name_to_iso3[name]
-            # Get proper country name
-            iso_data = load_reference_file(REFERENCE_DIR / "iso_codes.json")
-            country_name = iso_data.get("iso3_to_name", {}).get(iso3, name.title()) if iso_data else name.title()
-
-            candidates.append({
-                "matched_term": name,
-                "iso3": iso3,
-                "loc_id": iso3,
-                "country_name": country_name,
-                "confidence": 1.0,
-                "match_type": "country",
-                "is_subregion": False
-            })
+    for rank in _country_ranks(query):
+        name = matcher.names[rank]
+        iso3 = name_to_iso3[name]
+        candidates.append({
+            "matched_term": name,
+            "iso3": iso3,
+            "loc_id": iso3,
+            "country_name": iso3_to_name.get(iso3, name.title()),
+            "confidence": 1.0,
+            "match_type": "country",
+            "is_subregion": False
+        })
 
     # 2. Check capital cities
     subregion_to_iso3 = build_subregion_to_iso3()
-    sorted_subregions = sorted(subregion_to_iso3.keys(), key=len, reverse=True)
+    matcher = _capital_name_matcher()
 
-    for subregion in sorted_subregions:
-        pattern = r'\b' + re.escape(subregion) + r'\b'
-        if re.search(pattern, query_lower):
-            iso3 = subregion_to_iso3[subregion]
-            iso_data = load_reference_file(REFERENCE_DIR / "iso_codes.json")
-            country_name = iso_data.get("iso3_to_name", {}).get(iso3, subregion.title()) if iso_data else subregion.title()
+    for rank in _capital_ranks(query):
+        subregion = matcher.names[rank]
+        iso3 = subregion_to_iso3[subregion]
+        candidates.append({
+            "matched_term": subregion,
+            "iso3": iso3,
+            "loc_id": iso3,
+            "country_name": iso3_to_name.get(iso3, subregion.title()),
+            "confidence": 0.9,
+            "match_type": "capital",
+            "is_subregion": True
+        })
 
+    # 3. Sub-national names in the viewport's countries (states, counties, cities)
+    if viewport and VIEWPORT_LOCATION_MATCHING:
+        for m in _viewport_location_matches(query, viewport)["matches"]:
+            level = m.get("admin_level") or 0
+            if level < 1:
+                continue
             candidates.append({
-                "matched_term": subregion,
-                "iso3": iso3,
-                "loc_id": iso3,
-                "country_name": country_name,
-                "confidence": 0.9,
-                "match_type": "capital",
+                "matched_term": m["matched_term"],
+                "iso3": m["iso3"],
+                "loc_id": m["loc_id"],
+                "country_name": m["country_name"],
+                "confidence": SCORE_LOCATION_ADMIN1 if level == 1 else SCORE_LOCATION_ADMIN2_VIEWPORT,
+                "match_type": f"admin{level}",
                 "is_subregion": True
             })
 
-    # 3. Viewport location lookup DISABLED for performance
-    # The LLM is smart enough to recognize locations like "California" or "Texas"
-    # without us searching through 50,000+ parquet names on every query.
-    # Validation/disambiguation happens in postprocessor if needed.
-    # Original code searched all location names which took 8-28 seconds per query.
+    # 4. Near matches (typos) in the parts of the query no exact name covered
+    if FUZZY_LOCATION_MATCHING:
+        candidates.extend(_fuzzy_location_candidates(query, candidates, viewport, iso3_to_name))
 
     # Sort by confidence (highest first)
     candidates = sorted(candidates, key=lambda x: -x["confidence"])
@@ -1941,7 +2458,152 @@ def detect_location_candidates(query: str, viewport: dict = None) -> dict:
     }
 
 
-def detect_intent_candidates(query: str, source_candidates: dict, location_candidates: dict) -> dict:
+def _fuzzy_query_phrases(query: ParsedQuery, covered: list) -> list:
+    """
+    Phrases of 1..FUZZY_MAX_WORDS consecutive words to try as misspelled
+    names. Phrases overlapping an exact match (covered (start, end) spans),
+    starting or ending with a stop word or common word, or shorter than
+    FUZZY_MIN_LENGTH are skipped.
+    """
+    stopwords = _load_fuzzy_stopwords()
+    query_lower = query.location_lower
+    words = query.location_words
+    phrases = {}
+    for i, (first, start, _) in enumerate(words):
+        if first in stopwords:
+            continue
+        for last, _, end in words[i:i + FUZZY_MAX_WORDS]:
+            if any(s < end and start < e for s, e in covered):
+                break
+            if last in stopwords:
+                continue
+            phrase = query_lower[start:end]
+            if len(phrase) >= FUZZY_MIN_LENGTH:
+                phrases[phrase] = None
+    return list(phrases)
+
+
+def _fuzzy_lookup(index: FuzzyNameIndex, phrase: str) -> list:
+    """Near (not exact) matches of phrase, at most one edit per FUZZY_MIN_LENGTH characters of the name."""
+    return [(rank, edits) for rank, edits in index.lookup(phrase)
+            if edits and edits * FUZZY_MIN_LENGTH <= len(index.names[rank])]
+
+
+def _fuzzy_location_candidates(query: ParsedQuery, exact: list, viewport: dict, iso3_to_name: dict) -> list:
+    """
+    Near matches for misspelled country, capital and viewport location names.
+
+    Only phrases not covered by an exact candidate are tried, and countries
+    and capitals only if no exact location was found. A name matches with at
+    most one edit per FUZZY_MIN_LENGTH characters. Each hit scores
+    the exact-match confidence of its kind of place less
+    SCORE_LOCATION_FUZZY_PENALTY per edit, plus SCORE_LOCATION_FUZZY_IN_VIEW if
+    it lies inside the viewport. Returned best first: confidence, then fewer
+    edits, lower admin level, and distance from the viewport center.
+    """
+    covered = []
+    for c in exact:
+        pattern = r'\b' + re.escape(c["matched_term"]) + r'\b'
+        covered.extend(m.span() for m in re.finditer(pattern, query.location_lower))
+    phrases = _fuzzy_query_phrases(query, covered)
+    if not phrases:
+        return []
+
+    found = []  # (confidence, edits, admin_level, distance from viewport center, candidate)
+
+    def add(name, phrase, edits, confidence, level, distance, candidate):
+        candidate.update({
+            "matched_term": name,
+            "query_term": phrase,
+            "edits": edits,
+            "confidence": round(confidence, 2),
+        })
+        found.append((candidate["confidence"], edits, level, distance, candidate))
+
+    # A query that already names a place exactly is not also given a
+    # misspelled country or capital (it would block single-location orders)
+    country_phrases = phrases if not exact else []
+    name_to_iso3 = build_name_to_iso3()
+    subregion_to_iso3 = build_subregion_to_iso3()
+    country_index = _country_fuzzy_index()
+    capital_index = _capital_fuzzy_index()
+    for phrase in country_phrases:
+        for rank, edits in _fuzzy_lookup(country_index, phrase):
+            name = country_index.names[rank]
+            iso3 = name_to_iso3[name]
+            add(name, phrase, edits, SCORE_LOCATION_EXACT_COUNTRY - SCORE_LOCATION_FUZZY_PENALTY * edits, 0, 0.0, {
+                "iso3": iso3,
+                "loc_id": iso3,
+                "country_name": iso3_to_name.get(iso3, name.title()),
+                "match_type": "country_fuzzy",
+                "is_subregion": False
+            })
+        for rank, edits in _fuzzy_lookup(capital_index, phrase):
+            subregion = capital_index.names[rank]
+            iso3 = subregion_to_iso3[subregion]
+            add(subregion, phrase, edits, SCORE_LOCATION_CAPITAL - SCORE_LOCATION_FUZZY_PENALTY * edits, 0, 0.0, {
+                "iso3": iso3,
+                "loc_id": iso3,
+                "country_name": iso3_to_name.get(iso3, subregion.title()),
+                "match_type": "capital_fuzzy",
+                "is_subregion": True
+            })
+
+    # Sub-national names of the viewport's countries, ranked by proximity
+    bounds = viewport.get("bounds") if viewport and VIEWPORT_LOCATION_MATCHING else None
+    countries = get_countries_in_viewport(bounds) if bounds else []
+    if bounds and len(countries) <= VIEWPORT_MATCH_MAX_COUNTRIES:
+        west, south = bounds.get("west", -180), bounds.get("south", -90)
+        east, north = bounds.get("east", 180), bounds.get("north", 90)
+        center_lon, center_lat = (west + east) / 2, (south + north) / 2
+        for iso3 in countries:
+            index = get_location_fuzzy_index(iso3)
+            if index is None:
+                continue
+            names = load_parquet_names(iso3)
+            centers = get_location_centers(iso3)
+            country_name = iso3_to_name.get(iso3, iso3)
+            for phrase in phrases:
+                for rank, edits in _fuzzy_lookup(index, phrase):
+                    name = index.names[rank]
+                    for info in names.get(name, ()):
+                        level = info.get("admin_level") or 0
+                        if level < 1:
+                            continue
+                        confidence = SCORE_LOCATION_ADMIN1 if level == 1 else SCORE_LOCATION_ADMIN2_VIEWPORT
+                        confidence -= SCORE_LOCATION_FUZZY_PENALTY * edits
+                        center = centers.get(info.get("loc_id"))
+                        if center is None:
+                            distance = math.inf
+                        else:
+                            distance = math.hypot(center[0] - center_lon, center[1] - center_lat)
+                            if west <= center[0] <= east and south <= center[1] <= north:
+                                confidence += SCORE_LOCATION_FUZZY_IN_VIEW
+                        add(name, phrase, edits, confidence, level, distance, {
+                            "iso3": iso3,
+                            "loc_id": info.get("loc_id"),
+                            "country_name": country_name,
+                            "match_type": f"admin{level}_fuzzy",
+                            "is_subregion": True
+                        })
+
+    found.sort(key=lambda f: (-f[0], f[1], f[2], f[3]))
+    return [f[4] for f in found]
+
+
+# Reference lookup signals (capital, currency, language, SDG) and their scores
+_REFERENCE_INTENT_PATTERNS = [
+    (re.compile(r"capital of"), 0.9),
+    (re.compile(r"what.+capital"), 0.9),
+    (re.compile(r"currency"), 0.8),
+    (re.compile(r"language.+spoken"), 0.8),
+    (re.compile(r"what language"), 0.8),
+    (re.compile(r"sdg\s*\d+"), 0.9),
+    (re.compile(r"goal\s*\d+"), 0.8),
+]
+
+
+def detect_intent_candidates(query: QueryText, source_candidates: dict, location_candidates: dict) -> dict:
     """
     Detect possible user intents with confidence scores.
 
@@ -1956,7 +2618,8 @@ def detect_intent_candidates(query: str, source_candidates: dict, location_candi
     - candidates: List of intents sorted by confidence
     - best: The highest confidence intent
     """
-    query_lower = query.lower().strip()
+    query = parse_query(query)
+    query_lower = query.stripped
     candidates = []
 
     # Check for data request signals (uses config from top of file)
@@ -2000,17 +2663,8 @@ def detect_intent_candidates(query: str, source_candidates: dict, location_candi
 
     # Check for reference lookup (capital, currency, language, etc.)
     ref_score = 0.0
-    ref_patterns = [
-        (r"capital of", 0.9),
-        (r"what.+capital", 0.9),
-        (r"currency", 0.8),
-        (r"language.+spoken", 0.8),
-        (r"what language", 0.8),
-        (r"sdg\s*\d+", 0.9),
-        (r"goal\s*\d+", 0.8),
-    ]
-    for pattern, score in ref_patterns:
-        if re.search(pattern, query_lower):
+    for regex, score in _REFERENCE_INTENT_PATTERNS:
+        if regex.search(query_lower):
             ref_score = max(ref_score, score)
 
     if ref_score > 0:
@@ -2112,7 +2766,7 @@ def adjust_scores_with_context(source_candidates: dict, location_candidates: dic
     }
 
 
-def detect_show_borders_intent(query: str) -> dict:
+def detect_show_borders_intent(query: QueryText) -> dict:
     """
     Detect if query is asking to display geometry/borders without data.
     Typically used as a follow-up after disambiguation lists locations.
@@ -2132,18 +2786,16 @@ def detect_show_borders_intent(query: str) -> dict:
         "pattern": None,
     }
 
-    query_lower = query.lower().strip()
-
-    for pattern in SHOW_BORDERS_PATTERNS:
-        if re.match(pattern, query_lower):
-            result["is_show_borders"] = True
-            result["pattern"] = pattern
-            return result
+    query = parse_query(query)
+    pattern, _ = query.cached("show_borders", lambda: _SHOW_BORDERS_TABLE.first_match(query.stripped))
+    if pattern is not None:
+        result["is_show_borders"] = True
+        result["pattern"] = pattern
 
     return result
 
 
-def detect_navigation_intent(query: str) -> dict:
+def detect_navigation_intent(query: QueryText) -> dict:
     """
     Detect if query is asking to navigate to/view locations.
 
@@ -2158,17 +2810,14 @@ def detect_navigation_intent(query: str) -> dict:
         "location_text": None,
     }
 
-    query_lower = query.lower().strip()
-
-    for pattern in NAVIGATION_PATTERNS:
-        match = re.match(pattern, query_lower)
-        if match:
-            result["is_navigation"] = True
-            result["pattern"] = pattern
-            # Extract everything after the navigation verb as potential location(s)
-            after_match = query_lower[match.end():].strip()
-            result["location_text"] = after_match
-            return result
+    query = parse_query(query)
+    pattern, match = query.cached("navigation", lambda: _NAVIGATION_TABLE.first_match(query.stripped))
+    if match:
+        result["is_navigation"] = True
+        result["pattern"] = pattern
+        # Extract everything after the navigation verb as potential location(s)
+        after_match = query.stripped[match.end():].strip()
+        result["location_text"] = after_match
 
     return result
 
@@ -2368,33 +3017,51 @@ def extract_multiple_locations(query: str, viewport: dict = None) -> dict:
 # Main Preprocessor Function
 # =============================================================================
 
-def preprocess_query(query: str, viewport: dict = None, active_overlays: dict = None, cache_stats: dict = None, saved_order_names: list = None, time_state: dict = None) -> dict:
-    """
-    Main preprocessor function - extracts all hints from query.
+def _query_results(parsed: ParsedQuery, timer: _StageTimer) -> dict:
+    """Detector results that depend only on the query text (memoized per query)."""
+    key = (parsed.stripped, catalog_generation(), place_index_generation()) if PREPROCESS_MEMO else None
+    results = _QUERY_MEMO.get(key) if key is not None else None
+    if results is not None:
+        return results
+
+    results = {
+        # "Show borders" - follow-up to display geometry without data
+        "show_borders": timer.run("show_borders", detect_show_borders_intent, parsed),
+        "nav_intent": timer.run("navigation", detect_navigation_intent, parsed),
+        # Source detection - if user mentions a data source by name, this takes priority
+        # over location matching (e.g., "Australian Bureau of Statistics" should not match "Bureau County")
+        "detected_source": timer.run("source", detect_source_from_query, parsed),
+        "source_candidates": timer.run("source_candidates", detect_source_candidates, parsed),
+        "topics": timer.run("topics", extract_topics, parsed),
+        "regions": timer.run("regions", resolve_regions, parsed),
+        "time": timer.run("time", detect_time_patterns, parsed),
+        "reference_lookup": timer.run("reference_lookup", detect_reference_lookup, parsed),
+        "derived_intent": timer.run("derived_intent", detect_derived_intent, parsed),
+    }
+    if key is not None:
+        _QUERY_MEMO.put(key, results)
+    return results
 
-    Args:
-        query: User query text
-        viewport: Optional viewport dict with {center, zoom, bounds, adminLevel}
-        active_overlays: Optional dict with {type, filters, allActive} from frontend
-        cache_stats: Optional dict with per-overlay stats {overlayId: {count, years, ...}}
-        saved_order_names: Optional list of saved order names from frontend
-        time_state: Optional dict with time slider state {isLiveLocked, currentTime, etc.}
 
-    Returns a hints dict that can be injected into LLM context.
+def _resolve_hints(parsed: ParsedQuery, viewport: dict, active_overlays: dict, timer: _StageTimer) -> dict:
     """
-    # Check for "show borders" intent first - follow-up to display geometry without data
-    show_borders = detect_show_borders_intent(query)
-
-    # Check for navigation intent first
-    nav_intent = detect_navigation_intent(query)
+    Hints that depend on the query, viewport and overlay state: locations,
+    disambiguation, filter/overlay intent and candidates, plus the
+    context-free detector results (see preprocess_query).
+    """
+    context_free = _query_results(parsed, timer)
+    show_borders = context_free["show_borders"]
+    nav_intent = context_free["nav_intent"]
+    detected_source = context_free["detected_source"]
 
-    # For navigation queries, try to extract multiple locations
     navigation = None
     disambiguation = None
 
+    # For navigation queries, try to extract multiple locations
     if nav_intent.get("is_navigation") and nav_intent.get("location_text"):
         # Try to extract multiple locations from the query
-        location_result = extract_multiple_locations(nav_intent["location_text"], viewport)
+        location_result = timer.run("navigation_locations", extract_multiple_locations,
+                                    nav_intent["location_text"], viewport)
         locations = location_result.get("locations", [])
 
         if locations:
@@ -2416,16 +3083,12 @@ def preprocess_query(query: str, viewport: dict = None, active_overlays: dict =
                     "count": len(locations)
                 }
 
-    # Detect source FIRST - if user mentions a data source by name, this takes priority
-    # over location matching (e.g., "Australian Bureau of Statistics" should not match "Bureau County")
-    detected_source = detect_source_from_query(query)
-    
     # Resolve location for non-navigation queries (data orders, etc.)
     # Pass viewport to enable parquet-based city/location lookups
     location = None
 
     if not navigation and not disambiguation:
-        location_result = extract_country_from_query(query, viewport=viewport)
+        location_result = timer.run("location", extract_country_from_query, parsed, viewport=viewport)
         
         # If a source was detected, filter out false positive location matches
         # that are substrings of the source name
@@ -2439,7 +3102,7 @@ def preprocess_query(query: str, viewport: dict = None, active_overlays: dict =
         if location_result.get("match"):
             matched_term, iso3, is_subregion = location_result["match"]
             # Get proper country name from ISO3
-            iso_data = load_reference_file(REFERENCE_DIR / "iso_codes.json")
+            iso_data = load_reference_file(ISO_CODES_PATH)
             country_name = iso_data.get("iso3_to_name", {}).get(iso3, matched_term.title()) if iso_data else matched_term.title()
             location = {
                 "matched_term": matched_term,
@@ -2487,6 +3150,12 @@ def preprocess_query(query: str, viewport: dict = None, active_overlays: dict =
                             if country_matches:
                                 filtered_matches = country_matches
 
+                    # STEP 3: Prefer the match under the map centre (if still multiple matches)
+                    if len(filtered_matches) > 1 and MAP_CENTER_MATCHING:
+                        centre_match = timer.run("map_center", _match_under_map_center, filtered_matches, viewport)
+                        if centre_match is not None:
+                            filtered_matches = [centre_match]
+
                     # Check result after filtering
                     if len(filtered_matches) == 1:
                         # Single match after filtering - auto-select
@@ -2521,18 +3190,19 @@ def preprocess_query(query: str, viewport: dict = None, active_overlays: dict =
                     }
 
     # Detect filter-related intent (read or change filters)
-    filter_intent = detect_filter_intent(query, active_overlays) if active_overlays else None
+    filter_intent = timer.run("filter_intent", detect_filter_intent, parsed, active_overlays) if active_overlays else None
 
     # Detect overlay intent (works even when no overlay is active)
-    overlay_intent = detect_overlay_intent(query, active_overlays)
+    overlay_intent = timer.run("overlay_intent", detect_overlay_intent, parsed, active_overlays)
 
     # ==========================================================================
     # CANDIDATE-BASED DETECTION (Phase 1 Refactor)
     # Gather ALL candidates with confidence scores - LLM decides interpretation
     # ==========================================================================
-    source_candidates = detect_source_candidates(query)
-    location_candidates = detect_location_candidates(query, viewport)
-    intent_candidates = detect_intent_candidates(query, source_candidates, location_candidates)
+    source_candidates = context_free["source_candidates"]
+    location_candidates = timer.run("location_candidates", detect_location_candidates, parsed, viewport)
+    intent_candidates = timer.run("intent_candidates", detect_intent_candidates,
+                                  parsed, source_candidates, location_candidates)
 
     # Cross-reference to adjust scores (e.g., penalize "bureau" location if "Bureau of Statistics" source detected)
     adjusted = adjust_scores_with_context(source_candidates, location_candidates, intent_candidates)
@@ -2543,26 +3213,86 @@ def preprocess_query(query: str, viewport: dict = None, active_overlays: dict =
         "intents": adjusted["intents"],
     }
 
+    return {
+        "show_borders": show_borders if show_borders.get("is_show_borders") else None,
+        "navigation": navigation,
+        "topics": context_free["topics"],
+        "regions": context_free["regions"],
+        "location": location,
+        "disambiguation": disambiguation,
+        "time": context_free["time"],
+        "reference_lookup": context_free["reference_lookup"],
+        "derived_intent": context_free["derived_intent"],
+        "detected_source": detected_source,
+        "filter_intent": filter_intent,
+        "overlay_intent": overlay_intent,
+        "candidates": candidates,
+    }
+
+
+def preprocess_query(query: str, viewport: dict = None, active_overlays: dict = None, cache_stats: dict = None, saved_order_names: list = None, time_state: dict = None) -> dict:
+    """
+    Main preprocessor function - extracts all hints from query.
+
+    Args:
+        query: User query text
+        viewport: Optional viewport dict with {center, zoom, bounds, adminLevel}
+        active_overlays: Optional dict with {type, filters, allActive} from frontend
+        cache_stats: Optional dict with per-overlay stats {overlayId: {count, years, ...}}
+        saved_order_names: Optional list of saved order names from frontend
+        time_state: Optional dict with time slider state {isLiveLocked, currentTime, etc.}
+
+    Runs of whitespace in the query are collapsed to single spaces, then it is
+    normalized and tokenized once (ParsedQuery) and shared by all
+    detectors. Each stage's duration is returned in hints["timings"] (ms) and
+    kept for get_preprocess_timing_stats().
+
+    With PREPROCESS_MEMO, resolved hints are reused for the same query (ignoring
+    case and spacing) in the same viewport bucket and overlay state, and the
+    context-free detector results (sources, topics, regions, time, reference,
+    derived) for the same query in any viewport. Pass-through fields and the summary are built
+    per call. Nested values are shared between calls: replace, don't modify.
+
+    Returns a hints dict that can be injected into LLM context.
+    """
+    timer = _StageTimer()
+    parsed = parse_query(" ".join(query.split()))
+    query = parsed.text
+
+    # Repeated query in the same viewport bucket and overlay state: reuse its hints
+    memo_key = timer.run("memo", _hints_memo_key, parsed, viewport, active_overlays) if PREPROCESS_MEMO else None
+    resolved = _HINTS_MEMO.get(memo_key) if memo_key is not None else None
+    if resolved is None:
+        resolved = _resolve_hints(parsed, viewport, active_overlays, timer)
+        if memo_key is not None:
+            _HINTS_MEMO.put(memo_key, resolved)
+
+    navigation = resolved["navigation"]
+    location = resolved["location"]
+    disambiguation = resolved["disambiguation"]
+    filter_intent = resolved["filter_intent"]
+    overlay_intent = resolved["overlay_intent"]
+
     hints = {
         "original_query": query,
         "viewport": viewport,  # Pass through for downstream use
-        "show_borders": show_borders if show_borders.get("is_show_borders") else None,  # Display geometry without data
+        "show_borders": resolved["show_borders"],  # Display geometry without data
         "navigation": navigation,  # Navigation intent with multiple locations
-        "topics": extract_topics(query),
-        "regions": resolve_regions(query),
+        "topics": resolved["topics"],
+        "regions": resolved["regions"],
         "location": location,  # Single location resolution (city->country or direct country)
         "disambiguation": disambiguation,  # If multiple locations matched, need user clarification
-        "time": detect_time_patterns(query),
-        "reference_lookup": detect_reference_lookup(query),
-        "derived_intent": detect_derived_intent(query),
-        "detected_source": detected_source,  # Already detected earlier for location filtering
+        "time": resolved["time"],
+        "reference_lookup": resolved["reference_lookup"],
+        "derived_intent": resolved["derived_intent"],
+        "detected_source": resolved["detected_source"],  # Already detected earlier for location filtering
         # Overlay integration (Phase 1)
         "active_overlays": active_overlays,  # Current overlay state from frontend
         "cache_stats": cache_stats,  # What's currently loaded in frontend cache
         "filter_intent": filter_intent,  # User intent to read/change filters
         "overlay_intent": overlay_intent,  # Disaster overlay detection (works without active overlay)
         # CANDIDATE-BASED (Phase 1 Refactor) - all interpretations with confidence scores
-        "candidates": candidates,
+        "candidates": resolved["candidates"],
         # Saved orders (Phase 7 - Cache Unification)
         "saved_order_names": saved_order_names or [],  # Names of saved orders for load/save commands
         # Time state (live mode)
@@ -2648,6 +3378,7 @@ def preprocess_query(query: str, viewport: dict = None, active_overlays: dict =
         summary_parts.append(f"SAVED_ORDERS: {', '.join(saved_order_names)}")
 
     hints["summary"] = "; ".join(summary_parts) if summary_parts else None
+    hints["timings"] = timer.finish()
 
     return hints
 
@@ -2809,7 +3540,7 @@ def build_tier3_context(hints: dict) -> str:
             if len(countries_in_view) == 1:
                 # Single country in view - infer as user's focus
                 iso3 = countries_in_view[0]
-                iso_data = load_reference_file(REFERENCE_DIR / "iso_codes.json")
+                iso_data = load_reference_file(ISO_CODES_PATH)
                 country_name = iso_data.get("iso3_to_name", {}).get(iso3, iso3) if iso_data else iso3
                 context_parts.append(
                     f"[INFERRED LOCATION: User appears to be viewing {country_name} ({iso3}). "
@@ -0,0 +1,213 @@
+"""
+Point-in-polygon reverse geocoding over the admin hierarchy.
+
+Resolves points (lon, lat) to the loc_ids containing them at every admin
+level: country from global.csv, then each level of the country's geometry
+parquet. Polygons are parsed once per (country, level), prepared, and held
+with an STRtree in a byte-budgeted LRU. A batch of points is matched with one
+vectorized tree query plus shapely.contains_xy over the candidate pairs.
+
+Where polygons overlap at a level (e.g. slivers along borders), the match
+whose parent_id is the point's match one level up wins. Sub-county tiers
+(tracts, blocks) are not searched.
+
+Requires shapely>=2.0 (optional dependency, see requirements.txt).
+
+Usage:
+    from mapmover.reverse_geocode import locate_points
+
+    locate_points([-122.42, 2.35], [37.77, 48.86])
+    # [{"loc_id": "USA-CA-6075", "hierarchy": [{"admin_level": 0, "loc_id": "USA", "name": ...}, ...]},
+    #  {"loc_id": "FRA-...", ...}]
+"""
+
+import logging
+import os
+
+import numpy as np
+
+from .coverage_manifest import coverage_for
+from .geometry_handlers import load_global_countries, load_country_parquet
+from .lru_cache import ByteBudgetLRU
+
+logger = logging.getLogger("mapmover")
+
+try:
+    import shapely
+    SHAPELY_AVAILABLE = True
+except ImportError:
+    shapely = None
+    SHAPELY_AVAILABLE = False
+
+# Most points accepted by one batch request
+MAX_LOCATE_POINTS = 10000
+
+LOCATE_CACHE_BYTES = int(os.environ.get("LOCATE_CACHE_MB", "256")) * 1024 * 1024
+
+
+class LevelPolygons:
+    """Prepared polygons for one admin level of one country (or all countries)."""
+
+    __slots__ = ('geoms', 'tree', 'loc_ids', 'names', 'parent_ids', 'nbytes')
+
+    def __init__(self, df):
+        strs = np.array([g if isinstance(g, str) and g else None for g in df['geometry']], dtype=object)
+        geoms = shapely.from_geojson(strs, on_invalid='ignore')
+        # Polygons only (type ids 3 = Polygon, 6 = MultiPolygon)
+        keep = np.isin(shapely.get_type_id(geoms), (3, 6))
+
+        self.geoms = geoms[keep]
+        shapely.prepare(self.geoms)
+        self.tree = shapely.STRtree(self.geoms)
+        self.loc_ids = df['loc_id'].to_numpy(dtype=object)[keep]
+        self.names = np.array([n if isinstance(n, str) else None
+                               for n in (df['name'] if 'name' in df.columns else [None] * len(df))],
+                              dtype=object)[keep]
+        self.parent_ids = (df['parent_id'].to_numpy(dtype=object)[keep] if 'parent_id' in df.columns
+                           else np.full(keep.sum(), None, dtype=object))
+        # Coordinates plus prepared-geometry overhead
+        self.nbytes = int(shapely.get_num_coordinates(self.geoms).sum()) * 48 + len(self.geoms) * 400 + 1024
+
+    def match(self, xs: np.ndarray, ys: np.ndarray, parents: np.ndarray = None) -> np.ndarray:
+        """
+        Polygon index containing each point, or -1.
+
+        Args:
+            xs, ys: Point coordinates
+            parents: Optional loc_id matched one level up per point, preferred
+                     when several polygons contain a point
+        """
+        result = np.full(len(xs), -1, dtype=np.int64)
+        if len(self.geoms) == 0 or len(xs) == 0:
+            return result
+
+        pt, poly = self.tree.query(shapely.points(xs, ys))
+        if len(pt) == 0:
+            return result
+        hit = shapely.contains_xy(self.geoms[poly], xs[pt], ys[pt])
+        pt, poly = pt[hit], poly[hit]
+        if len(pt) == 0:
+            return result
+
+        if parents is not None:
+            # Parent-consistent matches first within each point
+            preferred = self.parent_ids[poly] == parents[pt]
+            order = np.lexsort((~preferred, pt))
+            pt, poly = pt[order], poly[order]
+        first = np.unique(pt, return_index=True)[1]
+        result[pt[first]] = poly[first]
+        return result
+
+
+_level_cache = ByteBudgetLRU("locate_polygons", LOCATE_CACHE_BYTES, sizeof=lambda p: p.nbytes)
+
+
+def _level_polygons(iso3: str, admin_level: int, load: bool = True):
+    """
+    Prepared polygons for a country level (iso3=None: all countries). None if
+    no data, or with load=False if they are not already prepared.
+    """
+    key = (iso3, admin_level)
+    polygons = _level_cache.get(key)
+    if polygons is not None or not load:
+        return polygons
+
+    df = load_global_countries() if iso3 is None else load_country_parquet(iso3, admin_level=admin_level)
+    if df is None or len(df) == 0 or 'geometry' not in df.columns:
+        return None
+
+    polygons = LevelPolygons(df)
+    _level_cache.put(key, polygons)
+    return polygons
+
+
+def _country_levels(iso3: str) -> list:
+    """Admin levels (1+) with geometry in a country's parquet, from the coverage manifest."""
+    counts = coverage_for(iso3, from_level=1)["geometry_counts"]
+    return sorted(int(level) for level, count in counts.items() if count > 0)
+
+
+def locate_points(lons, lats, max_level: int = None, loaded_only: bool = False) -> list:
+    """
+    Resolve points to their loc_id hierarchy.
+
+    Args:
+        lons, lats: Sequences of point coordinates (same length)
+        max_level: Deepest admin level to resolve (default: all levels with geometry)
+        loaded_only: Use only polygons already prepared (no file reads or
+            parsing); the hierarchy stops at the first level not in memory
+
+    Returns:
+        One dict per point: {"loc_id": deepest loc_id or None,
+                             "hierarchy": [{"admin_level", "loc_id", "name"}, ...]}
+
+    Raises:
+        RuntimeError: shapely is not installed
+        ValueError: lons and lats differ in length
+    """
+    if not SHAPELY_AVAILABLE:
+        raise RuntimeError("Reverse geocoding requires shapely>=2.0")
+
+    xs = np.asarray(lons, dtype=np.float64)
+    ys = np.asarray(lats, dtype=np.float64)
+    if xs.shape != ys.shape or xs.ndim != 1:
+        raise ValueError("lons and lats must be equal-length lists")
+
+    hierarchies = [[] for _ in range(len(xs))]
+
+    countries = _level_polygons(None, 0, load=not loaded_only)
+    if countries is None:
+        return [{"loc_id": None, "hierarchy": []} for _ in hierarchies]
+
+    country_idx = countries.match(xs, ys)
+    for i in np.flatnonzero(country_idx >= 0):
+        c = country_idx[i]
+        hierarchies[i].append({"admin_level": 0, "loc_id": countries.loc_ids[c], "name": countries.names[c]})
+
+    # Descend each matched country's levels with its points as one batch
+    for c in np.unique(country_idx[country_idx >= 0]):
+        iso3 = countries.loc_ids[c]
+        points = np.flatnonzero(country_idx == c)
+        parents = np.full(len(points), iso3, dtype=object)
+
+        for level in _country_levels(iso3):
+            if max_level is not None and level > max_level:
+                break
+            polygons = _level_polygons(iso3, level, load=not loaded_only)
+            if polygons is None:
+                if loaded_only:
+                    break
+                continue
+            found = polygons.match(xs[points], ys[points], parents)
+            for j in np.flatnonzero(found >= 0):
+                p = found[j]
+                hierarchies[points[j]].append(
+                    {"admin_level": level, "loc_id": polygons.loc_ids[p], "name": polygons.names[p]}
+                )
+                parents[j] = polygons.loc_ids[p]
+
+    return [{"loc_id": h[-1]["loc_id"] if h else None, "hierarchy": h} for h in hierarchies]
+
+
+def warm_polygons(countries: list, max_level: int = 1) -> int:
+    """Prepare the country polygons and levels 1..max_level of countries. Returns levels prepared."""
+    if not SHAPELY_AVAILABLE:
+        return 0
+    prepared = int(_level_polygons(None, 0) is not None)
+    for iso3 in countries:
+        for level in _country_levels(iso3):
+            if level > max_level:
+                break
+            if _level_polygons(iso3, level) is not None:
+                prepared += 1
+    return prepared
+
+
+def locate_stats() -> dict:
+    """Statistics for the prepared polygon cache."""
+    return _level_cache.stats()
+
+
+def clear_locate_cache():
+    """Drop prepared polygons (e.g. after geometry files change)."""
+    _level_cache.clear()
@@ -0,0 +1,299 @@
+"""
+Packed spatial index for bbox lookups.
+
+Viewport requests first look up which countries, regions and sub-county rows
+intersect the viewport. This module answers those lookups from a static
+packed Hilbert R-tree held in NumPy arrays: items are sorted along a Hilbert
+curve by bbox center, grouped into nodes of NODE_SIZE, and each tree level
+stores its node bboxes. A query walks down the levels with vectorized bbox
+tests, so it touches only a few nodes instead of every row.
+
+Indexes over files are persisted to CACHE_DIR/spatial_index and reused while
+the source file's size and mtime are unchanged.
+
+- BBoxIndex(boxes, ids=None) -> index; .query(bbox) -> sorted row positions
+- hilbert_key(lon, lat) -> Hilbert curve positions (also used to cluster files)
+- index_from_df(df) -> BBoxIndex over bbox columns (or centroids as points)
+- register_source(df, path, variant) - mark a loaded DataFrame's source file
+- index_for_df(df) -> BBoxIndex for a DataFrame (persisted if registered)
+
+Usage:
+    from mapmover.spatial_index import register_source, index_for_df
+
+    df = pd.read_parquet(path)
+    register_source(df, path, "all")
+    index = index_for_df(df)
+    df_in_view = df.iloc[index.query((min_lon, min_lat, max_lon, max_lat))]
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import weakref
+from pathlib import Path
+
+import numpy as np
+
+from .paths import CACHE_DIR
+
+logger = logging.getLogger("mapmover")
+
+INDEX_DIR = CACHE_DIR / "spatial_index"
+
+# Items per tree node
+NODE_SIZE = 16
+
+# Unregistered DataFrames smaller than this are filtered with a plain mask
+INDEX_MIN_ROWS = 2000
+
+_HILBERT_BITS = 16
+
+
+def _hilbert(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Hilbert curve distance for integer grid coordinates (vectorized)."""
+    n = 1 << _HILBERT_BITS
+    x = x.astype(np.int64)
+    y = y.astype(np.int64)
+    d = np.zeros(len(x), dtype=np.int64)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+        # Rotate the quadrant
+        flip = ~ry & rx
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        swap = ~ry
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+        s >>= 1
+    return d
+
+
+def hilbert_key(lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """Hilbert curve position of lon/lat points on a 2^16 grid (NaN -> grid origin)."""
+    scale = (1 << _HILBERT_BITS) - 1
+    gx = np.nan_to_num((np.asarray(lon, dtype=np.float64) + 180.0) / 360.0 * scale, nan=0.0).clip(0, scale)
+    gy = np.nan_to_num((np.asarray(lat, dtype=np.float64) + 90.0) / 180.0 * scale, nan=0.0).clip(0, scale)
+    return _hilbert(gx, gy)
+
+
+class BBoxIndex:
+    """
+    Static packed Hilbert R-tree over bounding boxes.
+
+    Rows with NaN bounds are kept but never match a query.
+    """
+
+    def __init__(self, boxes: np.ndarray, ids: np.ndarray = None, order: np.ndarray = None):
+        """
+        Args:
+            boxes: (n, 4) array of min_lon, min_lat, max_lon, max_lat in row order
+            ids: Optional per-row ids returned by query_ids()
+            order: Precomputed Hilbert order (when loading a persisted index)
+        """
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self.ids = ids
+        self.size = len(self.boxes)
+
+        if order is None:
+            order = self._hilbert_order(self.boxes)
+        self.order = order
+
+        # levels[0] = leaf boxes in Hilbert order, levels[-1] = root level
+        self.levels = [self.boxes[order]]
+        while len(self.levels[-1]) > NODE_SIZE:
+            child = self.levels[-1]
+            starts = np.arange(0, len(child), NODE_SIZE)
+            self.levels.append(np.column_stack((
+                np.fmin.reduceat(child[:, 0], starts),
+                np.fmin.reduceat(child[:, 1], starts),
+                np.fmax.reduceat(child[:, 2], starts),
+                np.fmax.reduceat(child[:, 3], starts),
+            )))
+
+    @staticmethod
+    def _hilbert_order(boxes: np.ndarray) -> np.ndarray:
+        if len(boxes) == 0:
+            return np.zeros(0, dtype=np.int64)
+        cx = (boxes[:, 0] + boxes[:, 2]) / 2
+        cy = (boxes[:, 1] + boxes[:, 3]) / 2
+        return np.argsort(hilbert_key(cx, cy), kind="stable")
+
+    def query(self, bbox: tuple) -> np.ndarray:
+        """Row positions (ascending) whose bounds intersect bbox."""
+        if self.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        min_lon, min_lat, max_lon, max_lat = bbox
+
+        candidates = np.arange(len(self.levels[-1]))
+        for depth in range(len(self.levels) - 1, -1, -1):
+            b = self.levels[depth][candidates]
+            hit = candidates[
+                (b[:, 2] >= min_lon) & (b[:, 0] <= max_lon) &
+                (b[:, 3] >= min_lat) & (b[:, 1] <= max_lat)
+            ]
+            if depth == 0 or len(hit) == 0:
+                candidates = hit
+                break
+            children = (hit[:, None] * NODE_SIZE + np.arange(NODE_SIZE)).ravel()
+            candidates = children[children < len(self.levels[depth - 1])]
+
+        return np.sort(self.order[candidates])
+
+    def query_ids(self, bbox: tuple) -> list:
+        """Ids of rows whose bounds intersect bbox (in row order)."""
+        return self.ids[self.query(bbox)].tolist()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(level.nbytes for level in self.levels) + self.boxes.nbytes + self.order.nbytes
+
+    def save(self, path: Path, meta: dict):
+        """Persist boxes, order, ids and source metadata (atomic write)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+        arrays = {"boxes": self.boxes, "order": self.order}
+        if self.ids is not None:
+            arrays["ids"] = self.ids.astype(str)
+        for key, value in meta.items():
+            arrays[f"meta_{key}"] = np.asarray(value)
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, meta: dict):
+        """Load a persisted index if its metadata matches, else None."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                for key, value in meta.items():
+                    if f"meta_{key}" not in data or data[f"meta_{key}"].item() != value:
+                        return None
+                ids = data["ids"].astype(object) if "ids" in data else None
+                return cls(data["boxes"], ids, data["order"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def has_bounds(df) -> bool:
+    """True if the DataFrame has bbox or centroid columns (df_bounds is not None)."""
+    return 'bbox_min_lon' in df.columns or ('centroid_lon' in df.columns and 'centroid_lat' in df.columns)
+
+
+def df_bounds(df) -> np.ndarray:
+    """
+    (n, 4) bounds for DataFrame rows from bbox columns, or centroids as points.
+
+    Returns None if the DataFrame has neither (see has_bounds).
+    """
+    if 'bbox_min_lon' in df.columns:
+        cols = ['bbox_min_lon', 'bbox_min_lat', 'bbox_max_lon', 'bbox_max_lat']
+        return df[cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    if 'centroid_lon' in df.columns and 'centroid_lat' in df.columns:
+        lon = df['centroid_lon'].to_numpy(dtype=np.float64, na_value=np.nan)
+        lat = df['centroid_lat'].to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.column_stack((lon, lat, lon, lat))
+    return None
+
+
+def index_from_df(df, ids=None):
+    """Build a BBoxIndex over a DataFrame's bbox (or centroid) columns, or None."""
+    boxes = df_bounds(df)
+    if boxes is None:
+        return None
+    return BBoxIndex(boxes, ids)
+
+
+def _source_meta(path: Path, variant: str, rows: int) -> dict:
+    stat = path.stat()
+    return {"source": str(path), "variant": variant, "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size, "rows": rows}
+
+
+def _index_path(path: Path, variant: str) -> Path:
+    digest = hashlib.sha1(f"{path}|{variant}".encode()).hexdigest()[:16]
+    return INDEX_DIR / f"{path.stem}-{digest}.npz"
+
+
+def load_or_build(path: Path, variant: str, rows: int, build):
+    """
+    Get a persisted index for a source file, building and saving it if stale.
+
+    Args:
+        path: Source file the index is derived from
+        variant: Distinguishes several indexes over one file (e.g. admin level)
+        rows: Expected row count
+        build: Callable returning a BBoxIndex (or None)
+    """
+    path = Path(path)
+    try:
+        meta = _source_meta(path, variant, rows)
+    except OSError:
+        return build()
+
+    index_path = _index_path(path, variant)
+    if index_path.exists():
+        index = BBoxIndex.load(index_path, meta)
+        if index is not None:
+            return index
+
+    index = build()
+    if index is not None:
+        try:
+            index.save(index_path, meta)
+            logger.debug(f"Saved spatial index for {path.name} ({variant}, {rows} rows)")
+        except OSError as e:
+            logger.warning(f"Could not persist spatial index for {path.name}: {e}")
+    return index
+
+
+# DataFrame -> index registry. Keyed by id() with a weakref to detect reuse.
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def register_source(df, path, variant: str = "all"):
+    """Record the file a DataFrame was loaded from, so its index is persisted."""
+    with _registry_lock:
+        _registry[id(df)] = (weakref.ref(df), Path(path), variant, None)
+
+
+def index_for_df(df):
+    """
+    Get the bbox index for a DataFrame, building it on first use.
+
+    Returns None if the DataFrame has no bbox/centroid columns, or is small and
+    unregistered (a plain mask is faster there).
+    """
+    key = id(df)
+    with _registry_lock:
+        entry = _registry.get(key)
+        if entry is not None and entry[0]() is not df:
+            entry = None
+    if entry is not None and entry[3] is not None:
+        return entry[3]
+
+    if entry is None and len(df) < INDEX_MIN_ROWS:
+        return None
+
+    if entry is not None:
+        index = load_or_build(entry[1], entry[2], len(df), lambda: index_from_df(df))
+    else:
+        index = index_from_df(df)
+    if index is None:
+        return None
+
+    with _registry_lock:
+        # Drop entries whose DataFrames are gone
+        for k in [k for k, e in _registry.items() if e[0]() is None]:
+            del _registry[k]
+        path, variant = (entry[1], entry[2]) if entry is not None else (None, None)
+        _registry[key] = (weakref.ref(df), path, variant, index)
+    return index
+
+
+def clear_registry():
+    """Forget in-memory indexes (persisted files are revalidated on next use)."""
+    with _registry_lock:
+        _registry.clear()
@@ -0,0 +1,334 @@
+"""
+TopoJSON-style topology encoding for admin boundary responses.
+
+Adjacent polygons share their borders. Encoding them as a topology sends
+each shared border once as an "arc", with coordinates quantized to an integer
+grid and delta-encoded, which MessagePack packs into 1-3 bytes per number
+instead of 9-byte floats. static/modules/utils/topology.js decodes it back to
+GeoJSON on the client.
+
+- build_topology(features, quantum) -> TopologyPart (arcs shared within the part)
+- TopologyWriter(quantum) composes parts into one response, keeping only
+  the arcs its geometries reference
+- encode_features(features, quantum) -> Topology dict in one step
+
+Arcs are found the TopoJSON way: a vertex is a junction when rings passing
+through it do not all share the same neighbouring vertices. Rings are cut at
+junctions and identical arcs (in either direction) are stored once; an arc
+used backwards is referenced as ~index. Rings without junctions are rotated to
+a canonical start so identical rings (e.g. an enclave and its hole) match.
+
+Output follows the TopoJSON spec with a fixed whole-world transform, so parts
+built separately (per viewport cell) can be merged without re-quantizing:
+    {"type": "Topology",
+     "transform": {"scale": [q, q], "translate": [-180, -90]},
+     "arcs": [[[x0, y0], [dx, dy], ...], ...],
+     "objects": {"features": {"type": "GeometryCollection",
+                              "geometries": [{"type", "arcs"|"coordinates", "properties"}]}}}
+
+Supported geometry types: Polygon, MultiPolygon, LineString, MultiLineString,
+Point, MultiPoint. Others are skipped.
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger("mapmover")
+
+# Quantization grid in degrees by viewport detail level (see
+# geometry_handlers.get_viewport_detail) - about a tenth of the pyramid
+# simplification tolerance, well below one screen pixel
+TOPOLOGY_QUANTUM = {
+    0: 0.005,
+    1: 0.0015,
+    2: 0.0005,
+    3: 0.00015,
+    4: 0.00005,
+    5: 0.00001,
+    6: 0.000001,
+}
+
+# Grid for full-detail geometry (drill-down children)
+DEFAULT_QUANTUM = 0.00001
+
+_TRANSLATE = (-180.0, -90.0)
+
+
+class TopologyPart:
+    """
+    Topology built from one list of features.
+
+    geometries is aligned with the input features: each entry is a dict with
+    type and arcs (part-local arc indices) or coordinates, or None if the
+    geometry was unsupported or collapsed entirely during quantization.
+    """
+
+    __slots__ = ('arcs', 'geometries', 'nbytes')
+
+    def __init__(self, arcs: list, geometries: list):
+        self.arcs = arcs
+        self.geometries = geometries
+        # Rough in-memory size of the Python int lists
+        self.nbytes = sum(len(a) for a in arcs) * 120 + len(geometries) * 200 + 64
+
+
+def _quantize(coords, quantum: float):
+    """Quantize [[lon, lat], ...] to int64 grid coordinates."""
+    q = np.asarray(coords, dtype=float)[:, :2]
+    return np.round((q - _TRANSLATE) / quantum).astype(np.int64)
+
+
+def _clean_ring(coords, quantum: float):
+    """Quantize a ring, drop repeated points and the closing point. None if degenerate."""
+    if len(coords) < 4:
+        return None
+    q = _quantize(coords, quantum)
+    keep = np.ones(len(q), dtype=bool)
+    keep[1:] = np.any(q[1:] != q[:-1], axis=1)
+    q = q[keep]
+    if len(q) > 1 and (q[0] == q[-1]).all():
+        q = q[:-1]
+    return q if len(q) >= 3 else None
+
+
+def _clean_line(coords, quantum: float):
+    """Quantize a line and drop repeated points. None if degenerate."""
+    if len(coords) < 2:
+        return None
+    q = _quantize(coords, quantum)
+    keep = np.ones(len(q), dtype=bool)
+    keep[1:] = np.any(q[1:] != q[:-1], axis=1)
+    q = q[keep]
+    return q if len(q) >= 2 else None
+
+
+def _find_junctions(rings: list) -> np.ndarray:
+    """
+    Flag junction vertices across all rings (vectorized).
+
+    Returns a bool array over the concatenated ring vertices.
+    """
+    lengths = np.array([len(r) for r in rings], dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    pts = np.concatenate(rings)
+    key = (pts[:, 0] << 32) + pts[:, 1]
+
+    # Previous / next vertex of each point within its (cyclic) ring
+    ring_start = np.repeat(starts, lengths)
+    ring_len = np.repeat(lengths, lengths)
+    pos = np.arange(len(pts)) - ring_start
+    prev_key = key[ring_start + (pos - 1) % ring_len]
+    next_key = key[ring_start + (pos + 1) % ring_len]
+    lo = np.minimum(prev_key, next_key)
+    hi = np.maximum(prev_key, next_key)
+
+    # A vertex is a junction if its occurrences disagree on their neighbours
+    order = np.lexsort((hi, lo, key))
+    k, a, b = key[order], lo[order], hi[order]
+    group_start = np.ones(len(k), dtype=bool)
+    group_start[1:] = k[1:] != k[:-1]
+    differs = np.zeros(len(k), dtype=bool)
+    differs[1:] = ~group_start[1:] & ((a[1:] != a[:-1]) | (b[1:] != b[:-1]))
+
+    group_id = np.cumsum(group_start) - 1
+    group_junction = np.zeros(group_id[-1] + 1, dtype=bool)
+    np.logical_or.at(group_junction, group_id, differs)
+
+    junction = np.empty(len(k), dtype=bool)
+    junction[order] = group_junction[group_id]
+    return junction
+
+
+def _delta_encode(arc: np.ndarray) -> list:
+    """First point absolute, then differences from the previous point."""
+    out = arc.copy()
+    out[1:] -= arc[:-1]
+    return out.tolist()
+
+
+def build_topology(features: list, quantum: float = DEFAULT_QUANTUM) -> TopologyPart:
+    """
+    Build a topology from GeoJSON features.
+
+    Args:
+        features: GeoJSON features (geometry may be a dict or PackedGeometry)
+        quantum: Grid size in degrees
+
+    Returns:
+        TopologyPart with geometries aligned to features
+    """
+    rings = []      # quantized open rings, indexed by ring id
+    lines = []      # quantized lines, indexed by line id
+    shapes = []     # per feature: (type, structure of ring/line ids or coordinates)
+
+    for feature in features:
+        geom = feature.get("geometry")
+        if geom is None:
+            shapes.append(None)
+            continue
+        if hasattr(geom, "to_dict"):
+            geom = geom.to_dict()
+        gtype = geom.get("type")
+        coords = geom.get("coordinates")
+
+        if gtype in ("Polygon", "MultiPolygon"):
+            polygons = [coords] if gtype == "Polygon" else coords
+            out = []
+            for polygon in polygons:
+                ring_ids = []
+                for i, ring in enumerate(polygon):
+                    q = _clean_ring(ring, quantum)
+                    if q is None:
+                        if i == 0:
+                            break  # Exterior collapsed - drop the polygon
+                        continue
+                    ring_ids.append(len(rings))
+                    rings.append(q)
+                if ring_ids:
+                    out.append(ring_ids)
+            shapes.append((gtype, out) if out else None)
+        elif gtype in ("LineString", "MultiLineString"):
+            parts = [coords] if gtype == "LineString" else coords
+            out = []
+            for line in parts:
+                q = _clean_line(line, quantum)
+                if q is not None:
+                    out.append(len(lines))
+                    lines.append(q)
+            shapes.append((gtype, out) if out else None)
+        elif gtype == "Point":
+            shapes.append((gtype, _quantize([coords], quantum)[0].tolist()))
+        elif gtype == "MultiPoint" and coords:
+            shapes.append((gtype, _quantize(coords, quantum).tolist()))
+        else:
+            shapes.append(None)
+
+    arcs = []
+    arc_index = {}
+
+    def add_arc(points: np.ndarray) -> int:
+        fwd = points.tobytes()
+        ref = arc_index.get(fwd)
+        if ref is not None:
+            return ref
+        rev = points[::-1].tobytes()
+        ref = arc_index.get(rev)
+        if ref is not None:
+            return ~ref
+        arc_index[fwd] = len(arcs)
+        arcs.append(_delta_encode(points))
+        return len(arcs) - 1
+
+    # Cut rings into arcs at junctions
+    ring_arcs = []
+    if rings:
+        junction = _find_junctions(rings)
+        offset = 0
+        for ring in rings:
+            n = len(ring)
+            cuts = np.flatnonzero(junction[offset:offset + n])
+            offset += n
+
+            if len(cuts) == 0:
+                # Canonical start so identical rings produce identical arcs
+                start = int(np.argmin((ring[:, 0] << 32) + ring[:, 1]))
+                closed = np.concatenate((ring[start:], ring[:start + 1]))
+                ring_arcs.append([add_arc(closed)])
+                continue
+
+            rotated = np.concatenate((ring[cuts[0]:], ring[:cuts[0] + 1]))
+            bounds = np.append(cuts - cuts[0], n)
+            ring_arcs.append([add_arc(rotated[s:e + 1]) for s, e in zip(bounds[:-1], bounds[1:])])
+
+    line_arcs = [add_arc(line) for line in lines]
+
+    geometries = []
+    for shape in shapes:
+        if shape is None:
+            geometries.append(None)
+            continue
+        gtype, structure = shape
+        if gtype == "Polygon":
+            geometries.append({"type": gtype, "arcs": [ring_arcs[r] for r in structure[0]]})
+        elif gtype == "MultiPolygon":
+            geometries.append({"type": gtype, "arcs": [[ring_arcs[r] for r in poly] for poly in structure]})
+        elif gtype == "LineString":
+            geometries.append({"type": gtype, "arcs": [line_arcs[structure[0]]]})
+        elif gtype == "MultiLineString":
+            geometries.append({"type": gtype, "arcs": [[line_arcs[l]] for l in structure]})
+        else:
+            geometries.append({"type": gtype, "coordinates": structure})
+
+    return TopologyPart(arcs, geometries)
+
+
+class TopologyWriter:
+    """
+    Compose geometries from one or more TopologyParts into a single Topology.
+
+    Only arcs referenced by added geometries are emitted, renumbered in
+    first-use order.
+    """
+
+    def __init__(self, quantum: float = DEFAULT_QUANTUM):
+        self.quantum = quantum
+        self.arcs = []
+        self.geometries = []
+        self._maps = {}  # id(part) -> (part, {local arc -> output arc})
+
+    def add(self, part: TopologyPart, index: int, properties: dict = None) -> bool:
+        """Add part.geometries[index] with properties. Returns False if it has no geometry."""
+        geom = part.geometries[index]
+        if geom is None:
+            return False
+
+        entry = self._maps.get(id(part))
+        if entry is None:
+            entry = (part, {})
+            self._maps[id(part)] = entry
+        arc_map = entry[1]
+
+        def remap(ref):
+            local = ref if ref >= 0 else ~ref
+            out = arc_map.get(local)
+            if out is None:
+                out = len(self.arcs)
+                arc_map[local] = out
+                self.arcs.append(part.arcs[local])
+            return out if ref >= 0 else ~out
+
+        gtype = geom["type"]
+        out = {"type": gtype}
+        if gtype == "Polygon" or gtype == "MultiLineString":
+            out["arcs"] = [[remap(r) for r in ring] for ring in geom["arcs"]]
+        elif gtype == "MultiPolygon":
+            out["arcs"] = [[[remap(r) for r in ring] for ring in poly] for poly in geom["arcs"]]
+        elif gtype == "LineString":
+            out["arcs"] = [remap(r) for r in geom["arcs"]]
+        else:
+            out["coordinates"] = geom["coordinates"]
+        if properties is not None:
+            out["properties"] = properties
+        self.geometries.append(out)
+        return True
+
+    def to_dict(self) -> dict:
+        """The Topology object."""
+        return {
+            "type": "Topology",
+            "transform": {"scale": [self.quantum, self.quantum], "translate": list(_TRANSLATE)},
+            "arcs": self.arcs,
+            "objects": {
+                "features": {"type": "GeometryCollection", "geometries": self.geometries}
+            },
+        }
+
+
+def encode_features(features: list, quantum: float = DEFAULT_QUANTUM) -> dict:
+    """Encode GeoJSON features as a single Topology dict."""
+    part = build_topology(features, quantum)
+    writer = TopologyWriter(quantum)
+    for i, feature in enumerate(features):
+        writer.add(part, i, feature.get("properties"))
+    return writer.to_dict()
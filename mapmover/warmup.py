@@ -0,0 +1,270 @@
+"""
+Background cache warm-up with per-component readiness.
+
+After a deploy the first requests would otherwise pay for cold loads:
+global.csv geometry, the country bounds index, the catalog and reference
+JSON, event parquet reads and the busiest countries' geometry. startup_event
+launches warmup.run() as a background task. /health reports each component's
+status with a "warming" flag and always returns 200 (liveness); /ready returns
+503 until warm-up finishes and is the deploy healthcheck (railway.toml
+healthcheckPath), so the platform holds traffic until the service is warm.
+
+Components run in order, each in a worker thread:
+    global_geometry  - global.csv (level 0 viewport geometry)
+    country_index    - persisted country bounds index
+    reference        - ISO codes, admin level names, conversions, USA admin
+    catalog          - data catalog used by the order executor, order taker system prompt
+    event_stores     - reads each disaster event parquet once (OS page cache)
+    coverage         - coverage manifest entries for debug mode (coverage_manifest.py)
+    place_index      - global place-name index (place_index.py), rebuilt if stale
+    countries        - admin levels WARMUP_LEVELS of the top-N countries by traffic
+    locate           - prepared country and admin 1 polygons of the top-N countries
+                       (reverse_geocode.py; the chat preprocessor's map-centre lookup
+                       only uses polygons that are already prepared)
+
+Country traffic is counted per request in geometry_handlers (viewport queries
+in _viewport_candidates, drill-downs in get_location_children) and merged into
+WARMUP_TRAFFIC_FILE at shutdown; with no history, WARMUP_COUNTRIES is used.
+The default file lives under CACHE_DIR, which is rebuilt on each deploy unless
+it is on a persistent volume, so the ranking only carries over between
+restarts of one deploy. Point WARMUP_TRAFFIC_FILE at a mounted volume to keep
+it across deploys.
+
+Configuration (environment variables):
+    WARMUP_ENABLED       - "0" to skip warm-up (default "1")
+    WARMUP_TOP_COUNTRIES - Number of countries to preload (default 10)
+    WARMUP_COUNTRIES     - Comma-separated fallback list (default USA,CAN,GBR,AUS,DEU,FRA,IND,BRA,MEX,JPN)
+    WARMUP_LEVELS        - Admin levels to preload per country (default "1,2")
+    WARMUP_TRAFFIC_FILE  - Saved per-country traffic (default CACHE_DIR/warmup_traffic.json)
+
+Usage:
+    from mapmover.warmup import warmup
+
+    asyncio.create_task(warmup.run())
+    warmup.status()  # {"ready": bool, "seconds": float, "components": {...}}
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter
+from pathlib import Path
+
+from .paths import CACHE_DIR, GLOBAL_DIR
+
+logger = logging.getLogger("mapmover")
+
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "1") != "0"
+WARMUP_TOP_COUNTRIES = int(os.environ.get("WARMUP_TOP_COUNTRIES", "10"))
+WARMUP_COUNTRIES = [c.strip() for c in os.environ.get(
+    "WARMUP_COUNTRIES", "USA,CAN,GBR,AUS,DEU,FRA,IND,BRA,MEX,JPN").split(",") if c.strip()]
+WARMUP_LEVELS = [int(v) for v in os.environ.get("WARMUP_LEVELS", "1,2").split(",") if v.strip()]
+
+TRAFFIC_FILE = (Path(os.environ["WARMUP_TRAFFIC_FILE"]) if os.environ.get("WARMUP_TRAFFIC_FILE")
+                else CACHE_DIR / "warmup_traffic.json")
+
+# Event parquet files read per request by the /api/* disaster endpoints (relative to GLOBAL_DIR)
+EVENT_STORE_FILES = [
+    "disasters/earthquakes/events.parquet",
+    "disasters/volcanoes/volcanoes.parquet",
+    "disasters/volcanoes/events.parquet",
+    "disasters/tsunamis/events.parquet",
+    "disasters/tsunamis/runups.parquet",
+    "disasters/landslides/events.parquet",
+    "disasters/links.parquet",
+    "disasters/floods/events_enriched.parquet",
+    "disasters/tornadoes/events.parquet",
+    "disasters/hurricanes/storms.parquet",
+    "disasters/hurricanes/positions.parquet",
+]
+
+_READ_CHUNK = 8 * 1024 * 1024
+
+
+def load_traffic() -> Counter:
+    """Load saved per-country request counts."""
+    try:
+        with open(TRAFFIC_FILE, encoding='utf-8') as f:
+            return Counter(json.load(f))
+    except (OSError, ValueError):
+        return Counter()
+
+
+def save_traffic(counts: Counter):
+    """Merge this process's per-country counts into the saved traffic file."""
+    if not counts:
+        return
+    merged = load_traffic()
+    merged.update(counts)
+    try:
+        TRAFFIC_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = TRAFFIC_FILE.with_name(f"{TRAFFIC_FILE.name}.{os.getpid()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(dict(merged.most_common(500)), f)
+        os.replace(tmp, TRAFFIC_FILE)
+    except OSError as e:
+        logger.warning(f"Could not save warm-up traffic: {e}")
+
+
+def top_countries(n: int = WARMUP_TOP_COUNTRIES) -> list:
+    """Top-n countries by saved traffic, padded with WARMUP_COUNTRIES."""
+    ranked = [iso3 for iso3, _ in load_traffic().most_common(n)]
+    for iso3 in WARMUP_COUNTRIES:
+        if len(ranked) >= n:
+            break
+        if iso3 not in ranked:
+            ranked.append(iso3)
+    return ranked[:n]
+
+
+# =============================================================================
+# Components
+# =============================================================================
+
+def _warm_global_geometry():
+    from .geometry_handlers import load_global_countries
+    df = load_global_countries()
+    return f"{len(df)} countries" if df is not None else "global.csv not available"
+
+
+def _warm_country_index():
+    from .geometry_handlers import load_country_index
+    index = load_country_index()
+    return f"{index.size} bounds" if index is not None else "not available"
+
+
+def _warm_reference():
+    from .geography import load_iso_codes, load_conversions
+    from .geometry_handlers import _load_admin_levels
+    from .order_executor import _load_conversions, _load_iso_codes, _load_usa_admin
+    load_iso_codes()
+    load_conversions()
+    _load_admin_levels()
+    _load_conversions()
+    _load_iso_codes()
+    _load_usa_admin()
+    return "loaded"
+
+
+def _warm_catalog():
+    from .order_executor import _load_catalog
+    from .order_taker import get_system_prompt
+    catalog = _load_catalog()
+    get_system_prompt()
+    return f"{len(catalog.get('sources', []))} sources" if isinstance(catalog, dict) else "loaded"
+
+
+def _warm_event_stores():
+    read = 0
+    total = 0
+    for rel in EVENT_STORE_FILES:
+        path = GLOBAL_DIR / rel
+        if not path.exists():
+            continue
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(_READ_CHUNK)
+                if not chunk:
+                    break
+                total += len(chunk)
+        read += 1
+    return f"{read} files, {total / 1048576:.0f} MB"
+
+
+def _warm_coverage():
+    from .coverage_manifest import build_manifest
+    return f"{build_manifest()} countries recomputed"
+
+
+def _warm_place_index():
+    from .place_index import load_place_index
+    index = load_place_index()
+    return f"{index.size} names" if index is not None else "not available"
+
+
+def _warm_countries():
+    from .geometry_handlers import load_country_parquet
+    countries = top_countries()
+    loaded = 0
+    for iso3 in countries:
+        for level in WARMUP_LEVELS:
+            df = load_country_parquet(iso3, admin_level=level)
+            if df is not None:
+                loaded += 1
+    return f"{loaded} country levels ({', '.join(countries)})"
+
+
+def _warm_locate():
+    from .reverse_geocode import SHAPELY_AVAILABLE, warm_polygons
+    if not SHAPELY_AVAILABLE:
+        return "shapely not installed"
+    return f"{warm_polygons(top_countries(), max_level=1)} polygon levels"
+
+
+COMPONENTS = [
+    ("global_geometry", _warm_global_geometry),
+    ("country_index", _warm_country_index),
+    ("reference", _warm_reference),
+    ("catalog", _warm_catalog),
+    ("event_stores", _warm_event_stores),
+    ("coverage", _warm_coverage),
+    ("place_index", _warm_place_index),
+    ("countries", _warm_countries),
+    ("locate", _warm_locate),
+]
+
+
+class Warmup:
+    """Runs warm-up components and tracks their readiness."""
+
+    def __init__(self, components: list = None):
+        self.components = components or COMPONENTS
+        self._status = {name: {"status": "pending"} for name, _ in self.components}
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def ready(self) -> bool:
+        """True once every component has finished (successfully or not)."""
+        return all(s["status"] in ("ready", "failed", "skipped") for s in self._status.values())
+
+    async def run(self):
+        """Run all components in order, each in a worker thread."""
+        self.started_at = time.time()
+        if not WARMUP_ENABLED:
+            for name, _ in self.components:
+                self._status[name] = {"status": "skipped"}
+            self.finished_at = time.time()
+            logger.info("Warm-up disabled (WARMUP_ENABLED=0)")
+            return
+
+        loop = asyncio.get_event_loop()
+        for name, fn in self.components:
+            self._status[name] = {"status": "running"}
+            start = time.perf_counter()
+            try:
+                detail = await loop.run_in_executor(None, fn)
+                self._status[name] = {"status": "ready", "detail": detail,
+                                      "seconds": round(time.perf_counter() - start, 2)}
+                logger.info(f"Warm-up {name}: {detail} ({time.perf_counter() - start:.1f}s)")
+            except Exception as e:
+                self._status[name] = {"status": "failed", "error": str(e),
+                                      "seconds": round(time.perf_counter() - start, 2)}
+                logger.warning(f"Warm-up {name} failed: {e}")
+
+        self.finished_at = time.time()
+        logger.info(f"Warm-up complete in {self.finished_at - self.started_at:.1f}s")
+
+    def status(self) -> dict:
+        """Readiness summary for /health and /ready."""
+        return {
+            "ready": self.ready,
+            "seconds": round((self.finished_at or time.time()) - self.started_at, 1) if self.started_at else 0,
+            "components": {name: dict(s) for name, s in self._status.items()},
+        }
+
+
+# Global warm-up instance
+warmup = Warmup()
@@ -0,0 +1,364 @@
+"""
+Weather frame reader - parallel, cached reads of per-timestamp weather parquets.
+
+Weather grids are stored as one parquet file per timestamp:
+  climate/weather/hourly/YYYY/MM/DD/HH.parquet
+  climate/weather/weekly/YYYY/WW.parquet
+  climate/weather/monthly/YYYY/MM.parquet
+
+Each file holds lat, lon and one column per variable. This module:
+- Reads frames concurrently on a bounded thread pool, projecting only the requested columns
+- Keeps decoded frames (grid-ordered numpy arrays) in an LRU bounded by bytes
+- Prefetches the next frames in the playback direction, so scrubbing into the
+  following year is served from memory
+
+Configuration (environment variables):
+    WEATHER_READ_WORKERS     - Reader thread pool size (default 8)
+    WEATHER_FRAME_CACHE_MB   - Decoded frame cache budget in MB (default 256)
+    WEATHER_PREFETCH_FRAMES  - Frames to prefetch past each request (default 24)
+    WEATHER_PREFETCH_MAX     - Most frames one request may ask to prefetch (default 168)
+    WEATHER_FRAME_INDEX_TTL_S - Seconds before the timestamp -> file index is re-listed (default 300)
+
+Usage:
+    from mapmover.weather_frames import frame_reader, list_tier_files
+
+    files = list_tier_files('weekly', 2020)
+    frames = frame_reader.read_frames(files, 'weekly', ['temp_c'])
+    frame_reader.prefetch_after(files, 'weekly', ['temp_c'], direction='forward')
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from glob import glob
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .lru_cache import ByteBudgetLRU
+from .paths import GLOBAL_DIR
+
+logger = logging.getLogger("mapmover")
+
+WEATHER_DIR = GLOBAL_DIR / "climate" / "weather"
+WEATHER_TIERS = ('hourly', 'weekly', 'monthly')
+WEATHER_VARIABLES = {
+    'temp_c', 'humidity', 'snow_depth_m',
+    'precipitation_mm', 'cloud_cover_pct', 'pressure_hpa',
+    'solar_radiation', 'soil_temp_c', 'soil_moisture'
+}
+
+READ_WORKERS = int(os.environ.get("WEATHER_READ_WORKERS", "8"))
+FRAME_CACHE_BYTES = int(os.environ.get("WEATHER_FRAME_CACHE_MB", "256")) * 1024 * 1024
+PREFETCH_FRAMES = int(os.environ.get("WEATHER_PREFETCH_FRAMES", "24"))
+PREFETCH_MAX = int(os.environ.get("WEATHER_PREFETCH_MAX", "168"))
+FRAME_INDEX_TTL_S = float(os.environ.get("WEATHER_FRAME_INDEX_TTL_S", "300"))
+
+# Position of the year directory in each tier's path (counted from the end)
+_YEAR_PART = {'hourly': -4, 'weekly': -2, 'monthly': -2}
+
+# tier -> (time listed, {timestamp_ms: filepath}) for files off the conventional paths
+_frame_index = {}
+_frame_index_lock = threading.Lock()
+
+
+def timestamp_from_path(filepath, tier: str) -> datetime:
+    """
+    Parse the frame timestamp from a weather parquet path.
+
+    monthly/YYYY/MM.parquet    -> first day of month
+    weekly/YYYY/WW.parquet     -> Monday of ISO week
+    hourly/YYYY/MM/DD/HH.parquet
+    """
+    path_parts = Path(filepath).parts
+    if tier == 'monthly':
+        yr = int(path_parts[-2])
+        mo = int(path_parts[-1].replace('.parquet', ''))
+        return datetime(yr, mo, 1, tzinfo=timezone.utc)
+    elif tier == 'weekly':
+        yr = int(path_parts[-2])
+        wk = int(path_parts[-1].replace('.parquet', ''))
+        return datetime.strptime(f'{yr}-W{wk:02d}-1', '%G-W%V-%u').replace(tzinfo=timezone.utc)
+    else:  # hourly
+        yr = int(path_parts[-4])
+        mo = int(path_parts[-3])
+        dy = int(path_parts[-2])
+        hr = int(path_parts[-1].replace('.parquet', ''))
+        return datetime(yr, mo, dy, hr, tzinfo=timezone.utc)
+
+
+def list_tier_files(tier: str, year: int = None) -> List[str]:
+    """
+    Get sorted parquet files for a tier, optionally restricted to one year.
+    """
+    tier_dir = WEATHER_DIR / tier
+    if not tier_dir.exists():
+        return []
+
+    if tier == 'monthly' and year is not None:
+        year_dir = tier_dir / str(year)
+        if not year_dir.exists():
+            return []
+        return sorted(glob(str(year_dir / "*.parquet")))
+
+    all_files = sorted(glob(str(tier_dir / "**" / "*.parquet"), recursive=True))
+    if year is None:
+        return all_files
+
+    year_part = _YEAR_PART[tier]
+    return [f for f in all_files if Path(f).parts[year_part] == str(year)]
+
+
+def find_frame_file(tier: str, timestamp_ms: int) -> Optional[str]:
+    """
+    Find the parquet file holding the frame for an exact timestamp.
+
+    Tries the conventional zero-padded path first, then a timestamp -> file
+    index of the whole tier, listed once and re-listed after
+    FRAME_INDEX_TTL_S, so a miss (e.g. an unknown timestamp in a tile URL)
+    is a dict lookup rather than a directory scan.
+    """
+    ts = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
+    tier_dir = WEATHER_DIR / tier
+
+    if tier == 'monthly':
+        candidate = tier_dir / str(ts.year) / f"{ts.month:02d}.parquet"
+    elif tier == 'weekly':
+        iso_year, iso_week, _ = ts.isocalendar()
+        candidate = tier_dir / str(iso_year) / f"{iso_week:02d}.parquet"
+    else:
+        candidate = tier_dir / str(ts.year) / f"{ts.month:02d}" / f"{ts.day:02d}" / f"{ts.hour:02d}.parquet"
+    if candidate.exists():
+        return str(candidate)
+
+    return _tier_frame_index(tier).get(timestamp_ms)
+
+
+def _tier_frame_index(tier: str) -> Dict[int, str]:
+    """{timestamp_ms: filepath} for every file of a tier (cached for FRAME_INDEX_TTL_S)."""
+    with _frame_index_lock:
+        entry = _frame_index.get(tier)
+        if entry is not None and time.monotonic() - entry[0] < FRAME_INDEX_TTL_S:
+            return entry[1]
+
+    index = {}
+    for filepath in list_tier_files(tier):
+        try:
+            index[int(timestamp_from_path(filepath, tier).timestamp() * 1000)] = filepath
+        except ValueError:
+            continue
+
+    with _frame_index_lock:
+        _frame_index[tier] = (time.monotonic(), index)
+    return index
+
+
+def _grid_info(lat: np.ndarray, lon: np.ndarray) -> Dict:
+    """Grid metadata (origin, step, shape) from a frame's coordinates."""
+    unique_lats = np.unique(lat)[::-1]  # Descending
+    unique_lons = np.unique(lon)        # Ascending
+
+    lat_step = abs(unique_lats[1] - unique_lats[0]) if len(unique_lats) > 1 else 2
+    lon_step = abs(unique_lons[1] - unique_lons[0]) if len(unique_lons) > 1 else 2
+
+    return {
+        'lat_start': float(unique_lats[0]),  # First (highest) latitude
+        'lon_start': float(unique_lons[0]),  # First (lowest) longitude
+        'lat_step': float(lat_step),
+        'lon_step': float(lon_step),
+        'rows': len(unique_lats),
+        'cols': len(unique_lons)
+    }
+
+
+def values_to_list(values: np.ndarray) -> list:
+    """Convert a frame column to a list, replacing NaN with None for msgpack."""
+    if values.dtype.kind == 'f':
+        mask = np.isnan(values)
+        if mask.any():
+            out = values.astype(object)
+            out[mask] = None
+            return out.tolist()
+    return values.tolist()
+
+
+class WeatherFrame:
+    """
+    One decoded timestamp.
+
+    columns maps variable -> values ordered by lat (desc) then lon (asc),
+    the row-major order the front-end grid renderer expects.
+    """
+
+    __slots__ = ('timestamp_ms', 'grid', 'columns', 'nbytes')
+
+    def __init__(self, timestamp_ms: int, grid: Dict, columns: Dict[str, np.ndarray]):
+        self.timestamp_ms = timestamp_ms
+        self.grid = grid
+        self.columns = columns
+        self.nbytes = sum(arr.nbytes for arr in columns.values())
+
+    def has(self, variables: List[str]) -> bool:
+        return all(v in self.columns for v in variables)
+
+    def with_columns(self, columns: Dict[str, np.ndarray]) -> "WeatherFrame":
+        """Return a new frame with extra variables merged in."""
+        return WeatherFrame(self.timestamp_ms, self.grid, {**self.columns, **columns})
+
+
+class WeatherFrameReader:
+    """
+    Bounded-concurrency weather frame reader with a byte-budgeted LRU.
+
+    Frames are cached per file; a request for variables not yet cached for a
+    file reads only the missing columns and merges them into the cached frame.
+    """
+
+    def __init__(self, max_workers: int = READ_WORKERS, cache_bytes: int = FRAME_CACHE_BYTES):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather-read")
+        self._cache = ByteBudgetLRU("weather_frames", cache_bytes, sizeof=lambda f: f.nbytes)
+        # filepath -> (future, variables) for reads already queued or running
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def _decode(self, filepath: str, tier: str, variables: List[str]) -> WeatherFrame:
+        """Read one parquet file (requested columns only) into a grid-ordered frame."""
+        df = pd.read_parquet(filepath, columns=['lat', 'lon'] + list(variables))
+        lat = df['lat'].to_numpy()
+        lon = df['lon'].to_numpy()
+
+        # Sort by lat (desc) then lon (asc) for consistent grid ordering
+        order = np.lexsort((lon, -lat))
+        columns = {var: df[var].to_numpy()[order] for var in variables}
+
+        ts = timestamp_from_path(filepath, tier)
+        return WeatherFrame(int(ts.timestamp() * 1000), _grid_info(lat, lon), columns)
+
+    def _load(self, filepath: str, tier: str, variables: List[str]) -> WeatherFrame:
+        """Return a frame holding all variables, reading only what is not cached."""
+        cached = self._cache.get(filepath)
+        if cached is not None and cached.has(variables):
+            return cached
+
+        missing = [v for v in variables if cached is None or v not in cached.columns]
+        decoded = self._decode(filepath, tier, missing)
+
+        # Another read may have populated this file meanwhile - merge into latest.
+        # If the cached frame was evicted during the read, merge into the one
+        # read above, so the variables it already held are not dropped
+        current = self._cache.peek(filepath)
+        base = current if current is not None else cached
+        frame = base.with_columns(decoded.columns) if base is not None else decoded
+        self._cache.put(filepath, frame)
+        return frame
+
+    def _submit(self, filepath: str, tier: str, variables: List[str]):
+        """Submit a read, reusing an in-flight read of the same file when it covers the variables."""
+        with self._inflight_lock:
+            inflight = self._inflight.get(filepath)
+            if inflight is not None and set(variables) <= inflight[1]:
+                return inflight[0]
+
+            future = self._pool.submit(self._load, filepath, tier, list(variables))
+            self._inflight[filepath] = (future, set(variables))
+
+        def _done(_, path=filepath, fut=future):
+            with self._inflight_lock:
+                if self._inflight.get(path, (None,))[0] is fut:
+                    del self._inflight[path]
+
+        future.add_done_callback(_done)
+        return future
+
+    def read_frames(self, files: List[str], tier: str, variables: List[str]) -> List[WeatherFrame]:
+        """
+        Read frames for files concurrently. Unreadable files are logged and skipped.
+
+        Blocking - call from a worker thread (run_in_executor), not the event loop.
+        """
+        futures = [self._submit(f, tier, variables) for f in files]
+
+        frames = []
+        for filepath, future in zip(files, futures):
+            try:
+                frames.append(future.result())
+            except Exception as e:
+                logger.warning(f"Could not read {filepath}: {e}")
+        return frames
+
+    def prefetch(self, files: List[str], tier: str, variables: List[str]) -> int:
+        """
+        Queue background reads for files not already cached. Returns number queued.
+        """
+        queued = 0
+        for filepath in files:
+            cached = self._cache.peek(filepath)
+            if cached is not None and cached.has(variables):
+                continue
+            future = self._submit(filepath, tier, variables)
+            # Errors surface on the foreground read; don't log them twice
+            future.add_done_callback(lambda f: f.exception())
+            queued += 1
+        return queued
+
+    def prefetch_after(self, files: List[str], tier: str, variables: List[str],
+                       direction: str = 'forward', count: int = PREFETCH_FRAMES) -> int:
+        """
+        Prefetch the next `count` frames beyond a requested file range in the
+        playback direction ('forward' continues past the last file, 'backward'
+        before the first).
+        """
+        if not files or count <= 0:
+            return 0
+
+        all_files = list_tier_files(tier)
+        try:
+            if direction == 'backward':
+                start = all_files.index(files[0])
+                upcoming = all_files[max(0, start - count):start][::-1]
+            else:
+                end = all_files.index(files[-1]) + 1
+                upcoming = all_files[end:end + count]
+        except ValueError:
+            return 0
+
+        queued = self.prefetch(upcoming, tier, variables)
+        if queued:
+            logger.debug(f"Prefetching {queued} {tier} weather frames ({direction})")
+        return queued
+
+    def clear(self):
+        """Drop all cached frames."""
+        self._cache.clear()
+
+    def stats(self) -> Dict:
+        """Get frame cache statistics."""
+        stats = self._cache.stats()
+        with self._inflight_lock:
+            stats["inflight"] = len(self._inflight)
+        return stats
+
+
+def frames_to_series(frames: List[WeatherFrame], variables: List[str]) -> Tuple[list, Dict[str, list], Optional[Dict]]:
+    """
+    Assemble frames into the /api/weather/grid wide format.
+
+    Returns:
+        (timestamps, values_by_variable, grid_info) sorted by timestamp.
+        grid_info is taken from the first frame read, or None if no frames.
+    """
+    grid_info = frames[0].grid if frames else None
+    ordered = sorted(frames, key=lambda f: f.timestamp_ms)
+
+    timestamps = [f.timestamp_ms for f in ordered]
+    all_values = {var: [values_to_list(f.columns[var]) for f in ordered] for var in variables}
+    return timestamps, all_values, grid_info
+
+
+# Global reader instance
+frame_reader = WeatherFrameReader()
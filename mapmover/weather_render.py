@@ -0,0 +1,318 @@
+"""
+Server-side weather raster rendering.
+
+Renders a weather frame to a colour-mapped RGBA image so clients can animate
+by swapping image sources instead of colouring every grid cell per frame.
+
+Two layouts are supported:
+- Whole globe: equirectangular image (lat 89.9 to -89.9, lon -180 to 180),
+  the same extent model-weather-grid.js uses for its canvas overlay
+- XYZ tiles: 256px Web Mercator tiles
+
+Source values are bilinearly resampled (longitude wraps, cells with a missing
+corner stay transparent) and mapped through the variable's colour stops with
+vectorized NumPy interpolation. Encoded images are cached on disk under
+CACHE_DIR/weather_raster/{variable}/{scale_version}/{tier}/{timestamp}/, so a
+colour scale edit changes the version and naturally invalidates old renders.
+
+PNG is encoded with the standard library; WebP requires Pillow (optional).
+
+Usage:
+    from mapmover.weather_render import render_weather_image
+
+    png = render_weather_image('temp_c', 'weekly', timestamp_ms)
+    tile = render_weather_image('temp_c', 'weekly', timestamp_ms, tile=(3, 2, 1))
+"""
+
+import hashlib
+import io
+import json
+import logging
+import math
+import os
+import struct
+import zlib
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .paths import CACHE_DIR
+from .weather_frames import find_frame_file, frame_reader
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+logger = logging.getLogger("mapmover")
+
+RASTER_CACHE_DIR = CACHE_DIR / "weather_raster"
+
+TILE_SIZE = 256
+MAX_TILE_ZOOM = 8
+GLOBE_LAT_MAX = 89.9
+DEFAULT_GLOBE_WIDTH = 360
+MAX_GLOBE_WIDTH = 2048
+ALPHA = 200  # ~78% opacity, matches the client-side colour LUT
+IMAGE_FORMATS = ('png', 'webp')
+
+# Color scale configuration per variable ({min, max, stops: [[value, hex], ...]})
+WEATHER_COLOR_SCALES = {
+    'temp_c': {
+        'min': -40, 'max': 45,
+        'stops': [
+            [-40, '#00008B'], [-30, '#0000FF'], [-10, '#87CEEB'],
+            [0, '#FFFFFF'], [10, '#FFFF99'], [25, '#FFA500'],
+            [35, '#FF0000'], [45, '#8B0000']
+        ]
+    },
+    'humidity': {
+        'min': 0, 'max': 100,
+        'stops': [
+            [0, '#FFFFFF'], [25, '#E0FFFF'], [50, '#87CEEB'],
+            [75, '#4682B4'], [100, '#000080']
+        ]
+    },
+    'snow_depth_m': {
+        'min': 0, 'max': 2,
+        'stops': [
+            [0, '#FFFFFF'], [0.1, '#FFFFFF'], [0.5, '#E6E6FA'],
+            [1.0, '#9370DB'], [2.0, '#4B0082']
+        ]
+    },
+    'precipitation_mm': {
+        'min': 0, 'max': 50,
+        'stops': [
+            [0, '#FFFFFF'], [1, '#E0FFE0'], [5, '#90EE90'],
+            [15, '#228B22'], [30, '#006400'], [50, '#00008B']
+        ]
+    },
+    'cloud_cover_pct': {
+        'min': 0, 'max': 100,
+        'stops': [
+            [0, '#87CEEB'], [25, '#B0C4DE'], [50, '#A9A9A9'],
+            [75, '#696969'], [100, '#404040']
+        ]
+    },
+    'pressure_hpa': {
+        'min': 970, 'max': 1050,
+        'stops': [
+            [970, '#8B0000'], [990, '#FF6347'], [1010, '#FFFFFF'],
+            [1030, '#87CEEB'], [1050, '#00008B']
+        ]
+    },
+    'solar_radiation': {
+        'min': 0, 'max': 1000,
+        'stops': [
+            [0, '#000000'], [100, '#4B0082'], [300, '#FF8C00'],
+            [600, '#FFD700'], [1000, '#FFFFFF']
+        ]
+    },
+    'soil_temp_c': {
+        'min': -20, 'max': 40,
+        'stops': [
+            [-20, '#00008B'], [-10, '#0000FF'], [0, '#8B4513'],
+            [15, '#D2691E'], [30, '#FF4500'], [40, '#8B0000']
+        ]
+    },
+    'soil_moisture': {
+        'min': 0, 'max': 0.5,
+        'stops': [
+            [0, '#DEB887'], [0.1, '#D2B48C'], [0.2, '#8FBC8F'],
+            [0.3, '#228B22'], [0.5, '#006400']
+        ]
+    }
+}
+
+
+_scale_versions: Dict[str, str] = {}
+
+
+def get_color_scale(variable: str) -> Dict:
+    """Colour scale for a variable (temperature scale as fallback)."""
+    return WEATHER_COLOR_SCALES.get(variable, WEATHER_COLOR_SCALES['temp_c'])
+
+
+def color_scale_version(variable: str) -> str:
+    """Short content hash of a variable's colour scale, used to key rendered images."""
+    version = _scale_versions.get(variable)
+    if version is None:
+        payload = json.dumps(get_color_scale(variable), sort_keys=True).encode()
+        version = hashlib.sha1(payload).hexdigest()[:8]
+        _scale_versions[variable] = version
+    return version
+
+
+def _hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
+    h = hex_color.lstrip('#')
+    if len(h) != 6:
+        return (128, 128, 128)
+    return (int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16))
+
+
+def colorize(values: np.ndarray, scale: Dict) -> np.ndarray:
+    """
+    Map a 2D value array to RGBA (uint8) by linear interpolation between colour stops.
+    NaN values become fully transparent.
+    """
+    stops = scale['stops']
+    xs = np.array([s[0] for s in stops], dtype=np.float64)
+    rgb = np.array([_hex_to_rgb(s[1]) for s in stops], dtype=np.float64)
+
+    valid = ~np.isnan(values)
+    v = np.clip(np.where(valid, values, scale['min']), scale['min'], scale['max'])
+
+    out = np.zeros(values.shape + (4,), dtype=np.uint8)
+    for channel in range(3):
+        out[..., channel] = np.rint(np.interp(v, xs, rgb[:, channel]))
+    out[..., 3] = np.where(valid, ALPHA, 0)
+    out[~valid, :3] = 0
+    return out
+
+
+def sample_bilinear(values: np.ndarray, grid: Dict, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """
+    Bilinearly sample a frame (row-major, lat descending) at lat/lon arrays.
+
+    Mirrors bilinearInterpolate() in model-weather-grid.js: longitude wraps,
+    positions outside the latitude range or next to a missing cell give NaN.
+    """
+    rows, cols = grid['rows'], grid['cols']
+    if values.size != rows * cols:
+        raise ValueError(f"Frame has {values.size} values, expected a full {rows}x{cols} grid")
+    if rows < 2 or cols < 2:
+        return np.full(lat.shape, np.nan)
+
+    field = values.astype(np.float64).reshape(rows, cols)
+
+    row_f = (grid['lat_start'] - lat) / grid['lat_step']
+    col_f = np.mod((lon - grid['lon_start']) / grid['lon_step'], cols)
+
+    row0 = np.floor(row_f).astype(np.int64)
+    in_range = (row0 >= 0) & (row0 + 1 < rows)
+    row0 = np.clip(row0, 0, rows - 2)
+    col0 = np.floor(col_f).astype(np.int64) % cols
+    col1 = (col0 + 1) % cols
+
+    ty = row_f - row0
+    tx = col_f - np.floor(col_f)
+
+    v00 = field[row0, col0]
+    v01 = field[row0, col1]
+    v10 = field[row0 + 1, col0]
+    v11 = field[row0 + 1, col1]
+
+    result = ((1 - tx) * (1 - ty) * v00 + tx * (1 - ty) * v01 +
+              (1 - tx) * ty * v10 + tx * ty * v11)
+    result[~in_range] = np.nan
+    return result
+
+
+def globe_coordinates(width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pixel lat/lon arrays for an equirectangular whole-globe image (height = width / 2)."""
+    height = width // 2
+    lats = np.linspace(GLOBE_LAT_MAX, -GLOBE_LAT_MAX, height)
+    lons = -180 + np.arange(width) * (360.0 / width)
+    return np.meshgrid(lats, lons, indexing='ij')
+
+
+def tile_coordinates(z: int, x: int, y: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pixel-centre lat/lon arrays for a Web Mercator XYZ tile."""
+    n = 2 ** z
+    px = (np.arange(TILE_SIZE) + 0.5) / TILE_SIZE
+    lons = (x + px) / n * 360.0 - 180.0
+    merc_y = math.pi * (1 - 2 * (y + px) / n)
+    lats = np.degrees(np.arctan(np.sinh(merc_y)))
+    return np.meshgrid(lats, lons, indexing='ij')
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Encode an HxWx4 uint8 array as an RGBA PNG (no third-party dependency)."""
+    height, width, _ = rgba.shape
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return (struct.pack('>I', len(data)) + tag + data +
+                struct.pack('>I', zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) + chunk(b'IEND', b''))
+
+
+def encode_image(rgba: np.ndarray, fmt: str) -> bytes:
+    """Encode RGBA pixels as 'png' or 'webp'."""
+    if fmt == 'png':
+        return encode_png(rgba)
+    if fmt == 'webp':
+        if not HAS_PIL:
+            raise ValueError("webp output requires Pillow; use format=png")
+        buf = io.BytesIO()
+        Image.fromarray(rgba, 'RGBA').save(buf, format='WEBP', quality=85)
+        return buf.getvalue()
+    raise ValueError(f"Unsupported format: {fmt}. Must be one of: {', '.join(IMAGE_FORMATS)}")
+
+
+def _cache_path(variable: str, tier: str, timestamp_ms: int, name: str, fmt: str):
+    return (RASTER_CACHE_DIR / variable / color_scale_version(variable) / tier /
+            str(timestamp_ms) / f"{name}.{fmt}")
+
+
+def render_weather_image(variable: str, tier: str, timestamp_ms: int, fmt: str = 'png',
+                         width: int = DEFAULT_GLOBE_WIDTH,
+                         tile: Optional[Tuple[int, int, int]] = None) -> bytes:
+    """
+    Render one weather frame as an encoded image, using the disk cache.
+
+    Args:
+        variable: Weather variable (e.g., 'temp_c')
+        tier: 'hourly', 'weekly', or 'monthly'
+        timestamp_ms: Exact frame timestamp (as returned by /api/weather/grid)
+        fmt: 'png' or 'webp'
+        width: Whole-globe image width in pixels (ignored for tiles)
+        tile: Optional (z, x, y) for a 256px Web Mercator tile
+
+    Raises:
+        FileNotFoundError: No frame exists for the timestamp
+        ValueError: Invalid tile/format, or frame is not a full grid
+    """
+    # fmt becomes part of the cache file name, so only known formats get this far
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}. Must be one of: {', '.join(IMAGE_FORMATS)}")
+    if tile is not None:
+        z, x, y = tile
+        if not (0 <= z <= MAX_TILE_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise ValueError(f"Invalid tile {z}/{x}/{y}")
+        name = f"{z}_{x}_{y}"
+    else:
+        width = max(90, min(int(width), MAX_GLOBE_WIDTH))
+        name = f"globe_{width}"
+
+    cache_file = _cache_path(variable, tier, timestamp_ms, name, fmt)
+    if cache_file.exists():
+        return cache_file.read_bytes()
+
+    filepath = find_frame_file(tier, timestamp_ms)
+    if filepath is None:
+        raise FileNotFoundError(f"No {tier} frame at {timestamp_ms}")
+
+    frames = frame_reader.read_frames([filepath], tier, [variable])
+    if not frames:
+        raise FileNotFoundError(f"Could not read {tier} frame at {timestamp_ms}")
+    frame = frames[0]
+
+    lat, lon = tile_coordinates(*tile) if tile is not None else globe_coordinates(width)
+    values = sample_bilinear(frame.columns[variable], frame.grid, lat, lon)
+    data = encode_image(colorize(values, get_color_scale(variable)), fmt)
+
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(cache_file.suffix + f".{os.getpid()}.tmp")
+        tmp_file.write_bytes(data)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.warning(f"Could not cache weather raster {cache_file}: {e}")
+
+    return data
@@ -0,0 +1,204 @@
+"""
+Rewrite geometry parquet files in a spatially clustered layout.
+
+Rows are sorted by admin level, then by the Hilbert curve position of their
+bbox center (centroid if there are no bbox columns), and written in small row
+groups. Each row group then covers a compact area, so the bbox min/max
+statistics parquet keeps per row group let the viewport loader read only the
+row groups that intersect the screen (see GeometryStore.read_bbox in
+mapmover/geometry_store.py). Files are marked with the key/value metadata
+mapmover.layout=hilbert; unmarked files are still loaded whole.
+
+Missing bbox columns are computed from geometry when shapely is installed.
+Rows without any position sort last.
+
+Usage:
+    python cluster_geometry.py                     # All geometry files
+    python cluster_geometry.py --dry-run           # Show what would be processed
+    python cluster_geometry.py --file <path>       # Process single file
+    python cluster_geometry.py --row-group-size 500
+"""
+
+import argparse
+import shutil
+import sys
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Add parent directory to path for mapmover imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from mapmover.paths import DATA_ROOT
+from mapmover.geometry_store import LAYOUT_KEY, LAYOUT_HILBERT
+from mapmover.spatial_index import hilbert_key, df_bounds, has_bounds
+
+# Lazy import shapely (not always installed)
+try:
+    import shapely
+    SHAPELY_AVAILABLE = True
+except ImportError:
+    SHAPELY_AVAILABLE = False
+
+# Configuration
+BACKUP_DIR = DATA_ROOT / "backups" / f"geometry_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+# Rows per row group: small enough that a street-level viewport touches a few
+# groups, large enough to keep per-group metadata and read overhead low
+DEFAULT_ROW_GROUP_SIZE = 1000
+
+# Geometry files served by the viewport endpoint
+GEOMETRY_GLOBS = [
+    "geometry/*.parquet",
+    "countries/*/geometry.parquet",
+    "countries/*/geometry_*.parquet",
+    "countries/*/geometry_*/*.parquet",
+]
+
+BBOX_COLUMNS = ['bbox_min_lon', 'bbox_min_lat', 'bbox_max_lon', 'bbox_max_lat']
+
+
+def add_bbox_columns(df) -> bool:
+    """Compute bbox_* columns from GeoJSON geometry (needs shapely). Returns True if added."""
+    if not SHAPELY_AVAILABLE or 'geometry' not in df.columns:
+        return False
+    geom_strs = np.array([g if isinstance(g, str) and g else None for g in df['geometry']], dtype=object)
+    geoms = shapely.from_geojson(geom_strs, on_invalid='ignore')
+    bounds = shapely.bounds(geoms)  # NaN for missing geometry
+    for i, column in enumerate(BBOX_COLUMNS):
+        df[column] = bounds[:, i]
+    return True
+
+
+def cluster_order(df) -> np.ndarray:
+    """Row order: admin level, then Hilbert position of the bbox center (unplaced rows last)."""
+    boxes = df_bounds(df)
+    cx = (boxes[:, 0] + boxes[:, 2]) / 2
+    cy = (boxes[:, 1] + boxes[:, 3]) / 2
+    keys = hilbert_key(cx, cy)
+    keys[np.isnan(cx) | np.isnan(cy)] = np.iinfo(np.int64).max
+
+    if 'admin_level' in df.columns:
+        levels = df['admin_level'].to_numpy(dtype=np.float64, na_value=np.inf)
+        return np.lexsort((keys, levels))
+    return np.argsort(keys, kind="stable")
+
+
+def process_parquet_file(file_path, row_group_size, dry_run=False, backup=True):
+    """Rewrite one parquet file in clustered order. Returns a result dict or None if skipped."""
+    file_path = Path(file_path)
+
+    if not file_path.exists():
+        print(f"  SKIP: File not found: {file_path}")
+        return None
+
+    metadata = pq.read_metadata(file_path)
+    size_before = file_path.stat().st_size / (1024 * 1024)  # MB
+
+    print(f"  Processing: {file_path}")
+    print(f"    Rows: {metadata.num_rows}, row groups: {metadata.num_row_groups}, size: {size_before:.2f} MB")
+
+    if dry_run:
+        print(f"    [DRY RUN] Would cluster into row groups of {row_group_size} rows")
+        return {"file": str(file_path), "size_before": size_before, "dry_run": True}
+
+    df = pd.read_parquet(file_path)
+
+    added_bbox = False
+    if 'bbox_min_lon' not in df.columns:
+        added_bbox = add_bbox_columns(df)
+    if not has_bounds(df):
+        print(f"    SKIP: No bbox, centroid or readable geometry columns")
+        return None
+
+    # Backup original
+    if backup:
+        backup_path = BACKUP_DIR / file_path.relative_to(DATA_ROOT)
+        backup_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(file_path, backup_path)
+        print(f"    Backed up to: {backup_path}")
+
+    df = df.iloc[cluster_order(df)].reset_index(drop=True)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    file_metadata = dict(table.schema.metadata or {})
+    file_metadata[LAYOUT_KEY] = LAYOUT_HILBERT
+    table = table.replace_schema_metadata(file_metadata)
+
+    # Write next to the original, then swap in
+    tmp_path = file_path.with_name(f"{file_path.name}.tmp")
+    pq.write_table(table, tmp_path, row_group_size=row_group_size, write_statistics=True)
+    tmp_path.replace(file_path)
+
+    groups = pq.read_metadata(file_path).num_row_groups
+    size_after = file_path.stat().st_size / (1024 * 1024)
+    print(f"    Row groups: {groups}" + (" (bbox columns added)" if added_bbox else ""))
+    print(f"    Size after: {size_after:.2f} MB")
+
+    return {
+        "file": str(file_path),
+        "rows": len(df),
+        "row_groups": groups,
+        "size_before": size_before,
+        "size_after": size_after,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite geometry parquet files in a spatially clustered layout")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would be processed without making changes")
+    parser.add_argument("--file", type=str, help="Process a single file")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE,
+                        help=f"Rows per row group (default {DEFAULT_ROW_GROUP_SIZE})")
+    parser.add_argument("--no-backup", action="store_true", help="Skip backup (not recommended)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Geometry Clustering Tool")
+    print("=" * 60)
+
+    if args.dry_run:
+        print("\n[DRY RUN MODE - No changes will be made]\n")
+    if not SHAPELY_AVAILABLE:
+        print("NOTE: shapely not installed - files without bbox columns are clustered by centroid")
+
+    backup = not args.no_backup
+    if backup and not args.dry_run:
+        print(f"\nBackups will be saved to: {BACKUP_DIR}")
+
+    if args.file:
+        files = [Path(args.file)]
+    else:
+        files = []
+        for pattern in GEOMETRY_GLOBS:
+            files.extend(sorted(DATA_ROOT.glob(pattern)))
+
+    all_results = []
+    for file_path in files:
+        result = process_parquet_file(file_path, args.row_group_size, args.dry_run, backup)
+        if result:
+            all_results.append(result)
+
+    # Summary
+    print("\n" + "=" * 60)
+    print("SUMMARY")
+    print("=" * 60)
+
+    if not all_results:
+        print("No files processed.")
+        return 0
+
+    print(f"Files processed: {len(all_results)}")
+    if not args.dry_run:
+        print(f"Row groups written: {sum(r['row_groups'] for r in all_results)}")
+        print(f"\nBackups saved to: {BACKUP_DIR}")
+
+    print("\nDone!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
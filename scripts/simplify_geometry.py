@@ -12,11 +12,26 @@ Tolerances by admin level:
     5 (Block Groups):  0.00005 (~5 m)
     6 (Blocks):        0.00001 (~1 m)
 
+Pyramid mode (--pyramid) leaves the geometry column untouched and instead adds
+pre-simplified columns geometry_lod0..geometry_lod4, one per viewport detail
+level (see GEOMETRY_LOD_COLUMNS in mapmover/geometry_handlers.py). The viewport
+endpoint serves the column matching the viewport area. Tolerances are about
+one screen pixel at the largest viewport of each detail level:
+    lod0 (> 3000 sq deg):  0.05
+    lod1 (> 300 sq deg):   0.015
+    lod2 (> 30 sq deg):    0.005
+    lod3 (> 3 sq deg):     0.0015
+    lod4 (> 0.3 sq deg):   0.0005
+Coordinates are rounded to a tenth of the tolerance. Rows whose admin level is
+already simplified at least that coarsely get null (the endpoint falls back to
+geometry). Simplification runs vectorized over whole columns (shapely 2.0).
+
 Usage:
     python simplify_geometry.py                    # Process all USA geometry files
     python simplify_geometry.py --dry-run          # Show what would be processed
     python simplify_geometry.py --file <path>      # Process single file
     python simplify_geometry.py --level <n>        # Process specific admin level
+    python simplify_geometry.py --pyramid          # Add LOD columns (USA files + all country geometry)
 """
 
 import argparse
@@ -26,14 +41,17 @@ import sys
 from pathlib import Path
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 
 # Add parent directory to path for mapmover imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from mapmover.paths import DATA_ROOT
+from mapmover.geometry_handlers import GEOMETRY_LOD_COLUMNS
 
 # Lazy import shapely (not always installed)
 try:
+    import shapely
     from shapely import simplify as shapely_simplify
     from shapely.geometry import shape, mapping
     SHAPELY_AVAILABLE = True
@@ -55,6 +73,21 @@ TOLERANCES = {
     6: 0.00001,   # Blocks - ~1 m
 }
 
+# Pyramid tolerance by viewport detail level (~1 screen pixel at that viewport size)
+LOD_TOLERANCES = {
+    0: 0.05,      # > 3000 sq deg (world/continent)
+    1: 0.015,     # > 300 sq deg (large country)
+    2: 0.005,     # > 30 sq deg (state)
+    3: 0.0015,    # > 3 sq deg (county)
+    4: 0.0005,    # > 0.3 sq deg (city)
+}
+
+# Additional files for --pyramid (per-country geometry read by the viewport endpoint)
+PYRAMID_GLOBS = [
+    "geometry/*.parquet",
+    "countries/*/geometry.parquet",
+]
+
 # Files to process with their admin levels
 GEOMETRY_FILES = {
     # Main USA geometry (mixed levels 0-2)
@@ -98,8 +131,46 @@ def get_tolerance_for_row(row, default_level):
         return TOLERANCES.get(default_level, 0.0001)
 
 
-def process_parquet_file(file_path, admin_level, dry_run=False, backup=True):
-    """Process a single parquet file, simplifying geometries."""
+def add_pyramid_columns(df, admin_level):
+    """
+    Add geometry_lod{n} columns holding pre-simplified copies of geometry.
+
+    Args:
+        df: DataFrame with GeoJSON string geometry column
+        admin_level: Admin level of all rows, or "mixed" to use the admin_level column
+
+    Returns:
+        Dict of column -> total GeoJSON chars (for reporting)
+    """
+    geom_strs = np.array([g if isinstance(g, str) and g else None for g in df['geometry']], dtype=object)
+    geoms = shapely.from_geojson(geom_strs, on_invalid='ignore')
+    skip_base = shapely.is_missing(geoms) | (shapely.get_type_id(geoms) == 0)  # missing or Point
+
+    # Tolerance the geometry column was already simplified with, per row
+    if admin_level == "mixed" and 'admin_level' in df.columns:
+        base_tol = df['admin_level'].map(TOLERANCES).fillna(0.001).to_numpy(dtype=float)
+    else:
+        base_tol = np.full(len(df), TOLERANCES.get(admin_level, 0.0001))
+
+    sizes = {"geometry": int(sum(len(g) for g in geom_strs if g))}
+    for detail, tolerance in LOD_TOLERANCES.items():
+        column = GEOMETRY_LOD_COLUMNS[detail]
+        decimals = int(np.ceil(-np.log10(tolerance))) + 1
+
+        simplified = shapely.simplify(geoms, tolerance, preserve_topology=True)
+        simplified = shapely.transform(simplified, lambda coords: np.round(coords, decimals))
+        out = shapely.to_geojson(simplified)
+
+        skip = skip_base | shapely.is_empty(simplified) | (base_tol >= tolerance)
+        out[skip] = None
+        df[column] = out
+        sizes[column] = int(sum(len(g) for g in out if g))
+
+    return sizes
+
+
+def process_parquet_file(file_path, admin_level, dry_run=False, backup=True, pyramid=False):
+    """Process a single parquet file, simplifying geometries (or adding LOD columns with pyramid)."""
     file_path = Path(file_path)
 
     if not file_path.exists():
@@ -114,7 +185,10 @@ def process_parquet_file(file_path, admin_level, dry_run=False, backup=True):
     print(f"    Admin level: {admin_level}")
 
     if dry_run:
-        print(f"    [DRY RUN] Would simplify with tolerance {TOLERANCES.get(admin_level, 'mixed')}")
+        if pyramid:
+            print(f"    [DRY RUN] Would add {', '.join(GEOMETRY_LOD_COLUMNS.values())}")
+        else:
+            print(f"    [DRY RUN] Would simplify with tolerance {TOLERANCES.get(admin_level, 'mixed')}")
         return {"file": str(file_path), "size_before": size_before, "dry_run": True}
 
     # Read parquet
@@ -133,6 +207,24 @@ def process_parquet_file(file_path, admin_level, dry_run=False, backup=True):
         shutil.copy2(file_path, backup_path)
         print(f"    Backed up to: {backup_path}")
 
+    if pyramid:
+        sizes = add_pyramid_columns(df, admin_level)
+        df.to_parquet(file_path, index=False)
+
+        size_after = file_path.stat().st_size / (1024 * 1024)
+        for column, chars in sizes.items():
+            pct = chars / sizes["geometry"] * 100 if sizes["geometry"] else 0
+            print(f"    {column}: {chars / (1024 * 1024):.2f} MB GeoJSON ({pct:.0f}% of geometry)")
+        print(f"    File size after: {size_after:.2f} MB")
+
+        return {
+            "file": str(file_path),
+            "rows": row_count,
+            "size_before": size_before,
+            "size_after": size_after,
+            "lod_sizes": sizes,
+        }
+
     # Sample geometry size before
     sample_before = len(df.iloc[0]['geometry']) if len(df) > 0 and df.iloc[0]['geometry'] else 0
 
@@ -177,7 +269,7 @@ def process_parquet_file(file_path, admin_level, dry_run=False, backup=True):
     }
 
 
-def process_directory(dir_path, admin_level, dry_run=False, backup=True):
+def process_directory(dir_path, admin_level, dry_run=False, backup=True, pyramid=False):
     """Process all parquet files in a directory."""
     dir_path = Path(dir_path)
 
@@ -192,7 +284,7 @@ def process_directory(dir_path, admin_level, dry_run=False, backup=True):
     print(f"  Files: {len(parquet_files)}")
 
     for pq_file in parquet_files:
-        result = process_parquet_file(pq_file, admin_level, dry_run, backup)
+        result = process_parquet_file(pq_file, admin_level, dry_run, backup, pyramid)
         if result:
             results.append(result)
 
@@ -205,6 +297,8 @@ def main():
     parser.add_argument("--file", type=str, help="Process a single file")
     parser.add_argument("--level", type=int, choices=[0,1,2,3,4,5,6], help="Process only files for this admin level")
     parser.add_argument("--no-backup", action="store_true", help="Skip backup (not recommended)")
+    parser.add_argument("--pyramid", action="store_true",
+                        help="Add multi-resolution geometry_lod{n} columns instead of simplifying in place")
     args = parser.parse_args()
 
     if not SHAPELY_AVAILABLE:
@@ -219,6 +313,7 @@ def main():
         print("\n[DRY RUN MODE - No changes will be made]\n")
 
     backup = not args.no_backup
+    pyramid = args.pyramid
     if backup and not args.dry_run:
         print(f"\nBackups will be saved to: {BACKUP_DIR}")
 
@@ -239,7 +334,7 @@ def main():
         else:
             level = "mixed"
 
-        result = process_parquet_file(file_path, level, args.dry_run, backup)
+        result = process_parquet_file(file_path, level, args.dry_run, backup, pyramid)
         if result:
             all_results.append(result)
 
@@ -252,10 +347,10 @@ def main():
             if file_level == level or (file_level == "mixed" and level <= 2):
                 full_path = DATA_ROOT / path
                 if full_path.is_dir():
-                    results = process_directory(full_path, level, args.dry_run, backup)
+                    results = process_directory(full_path, level, args.dry_run, backup, pyramid)
                     all_results.extend(results)
                 elif full_path.is_file():
-                    result = process_parquet_file(full_path, file_level, args.dry_run, backup)
+                    result = process_parquet_file(full_path, file_level, args.dry_run, backup, pyramid)
                     if result:
                         all_results.append(result)
 
@@ -267,13 +362,24 @@ def main():
             full_path = DATA_ROOT / path
 
             if full_path.is_dir():
-                results = process_directory(full_path, admin_level, args.dry_run, backup)
+                results = process_directory(full_path, admin_level, args.dry_run, backup, pyramid)
                 all_results.extend(results)
             elif full_path.is_file():
-                result = process_parquet_file(full_path, admin_level, args.dry_run, backup)
+                result = process_parquet_file(full_path, admin_level, args.dry_run, backup, pyramid)
                 if result:
                     all_results.append(result)
 
+        if pyramid:
+            # Every country's geometry is served by the viewport endpoint
+            done = {r["file"] for r in all_results}
+            for pattern in PYRAMID_GLOBS:
+                for full_path in sorted(DATA_ROOT.glob(pattern)):
+                    if str(full_path) in done:
+                        continue
+                    result = process_parquet_file(full_path, "mixed", args.dry_run, backup, pyramid)
+                    if result:
+                        all_results.append(result)
+
     # Summary
     print("\n" + "=" * 60)
     print("SUMMARY")
@@ -6,6 +6,7 @@
 import { CONFIG } from './config.js';
 import { GeometryCache } from './cache.js';
 import { fetchMsgpack } from './utils/fetch.js';
+import { topologyToGeoJSON } from './utils/topology.js';
 import { ViewportLoader, setDependencies as setViewportDeps } from './viewport-loader.js';
 import { MapAdapter, setDependencies as setMapDeps } from './map-adapter.js';
 import { NavigationManager, setDependencies as setNavDeps } from './navigation.js';
@@ -324,8 +325,12 @@ export const App = {
         }
       }
 
-      const url = CONFIG.api.children.replace('{loc_id}', locId);
+      const format = CONFIG.viewport.topology ? '?format=topojson' : '';
+      const url = CONFIG.api.children.replace('{loc_id}', locId) + format;
       const result = await fetchMsgpack(url);
+      if (result.topology) {
+        result.geojson = topologyToGeoJSON(result.topology);
+      }
 
       if (result.geojson && result.geojson.features.length > 0) {
         this.currentData = {
@@ -25,7 +25,8 @@ export const CONFIG = {
     debounceMs: 300,        // Short debounce to batch rapid pan/zoom (300ms)
     cacheExpiryMs: 120000,  // Keep features cached for 2 minutes (was 60s)
     maxFeatures: 100000,    // Increased cache for smoother panning (was 50k)
-    spinnerDelayMs: 500     // Show spinner after 500ms if still loading
+    spinnerDelayMs: 500,    // Show spinner after 500ms if still loading
+    topology: true          // Request shared-arc, quantized geometry (format=topojson)
   },
 
   // Colors
@@ -11,6 +11,10 @@
  *
  * Bilinear interpolation fills gaps between data points for smooth gradients.
  * Animation is achieved by swapping image data on each frame.
+ *
+ * Server raster mode: instead of interpolating and colouring every frame in JS,
+ * frames are fetched as pre-rendered PNGs from /api/weather/frame and the image
+ * source URL is swapped per frame. Enabled by default on low-core devices.
  */
 
 // Dependencies (set via setDependencies)
@@ -29,6 +33,10 @@ const DISPLAY_LAT_MAX = 89.9;
 const DISPLAY_LAT_MIN = -89.9;
 const DISPLAY_LON_MIN = -180;
 
+// Server-rendered frame endpoint (same extent as the display grid)
+const RASTER_FRAME_URL = '/api/weather/frame';
+const RASTER_PRELOAD_FRAMES = 2;  // Upcoming frames to warm in the browser cache
+
 /**
  * Generate unique source/layer IDs for an overlay.
  * @param {string} overlayId - Overlay identifier (temperature, humidity, snow-depth)
@@ -208,6 +216,10 @@ class WeatherGridInstance {
     // Cached interpolated frames
     this.interpolatedFrames = null;
 
+    // Server raster mode: { variable, tier, version } or null for canvas rendering
+    this.raster = null;
+    this.preloadedImages = [];
+
     // Canvas for this overlay (1-degree display grid)
     this.imageCanvas = document.createElement('canvas');
     this.imageCanvas.width = DISPLAY_COLS;
@@ -246,16 +258,71 @@ class WeatherGridInstance {
     console.log(`WeatherGridInstance[${this.overlayId}]: Interpolation complete in ${elapsed.toFixed(0)}ms`);
   }
 
+  /**
+   * Set up data for server-rendered frames (no client-side interpolation).
+   * @param {Object} yearData - { timestamps, values }
+   * @param {Object} colorScale - { min, max, stops }
+   * @param {Object} grid - Grid metadata from backend
+   * @param {Object} raster - { variable, tier, version }
+   */
+  setRasterData(yearData, colorScale, grid, raster) {
+    this.data = {
+      timestamps: yearData.timestamps,
+      values: yearData.values,
+      color_scale: colorScale,
+      grid: grid
+    };
+    this.currentFrameIndex = 0;
+    this.colorLUT = null;
+    this.interpolatedFrames = null;
+    this.raster = raster;
+    console.log(`WeatherGridInstance[${this.overlayId}]: Using server-rendered frames for ${raster.variable} (${raster.tier})`);
+  }
+
+  /**
+   * Build the server raster URL for a frame.
+   * @param {number} frameIndex - Index into data.timestamps array
+   * @returns {string} Image URL
+   */
+  rasterUrl(frameIndex) {
+    const { variable, tier, version } = this.raster;
+    const timestamp = this.data.timestamps[frameIndex];
+    return `${RASTER_FRAME_URL}?variable=${variable}&tier=${tier}&timestamp=${timestamp}&v=${version || ''}`;
+  }
+
+  /**
+   * Number of frames available for rendering.
+   * @returns {number}
+   */
+  frameCount() {
+    if (this.raster) return this.data?.timestamps?.length || 0;
+    return this.interpolatedFrames?.length || 0;
+  }
+
   /**
    * Render a specific frame (timestamp index).
    * @param {number} frameIndex - Index into data.timestamps array
    */
   renderFrame(frameIndex) {
-    if (!this.interpolatedFrames || frameIndex >= this.interpolatedFrames.length) {
+    if (frameIndex >= this.frameCount()) {
       console.warn(`WeatherGridInstance[${this.overlayId}]: Invalid frame index`, frameIndex);
       return;
     }
 
+    if (this.raster) {
+      this.updateMapSource(this.rasterUrl(frameIndex));
+      this.currentFrameIndex = frameIndex;
+
+      // Warm the browser cache for the next frames so playback doesn't stall
+      this.preloadedImages = [];
+      for (let i = 1; i <= RASTER_PRELOAD_FRAMES && frameIndex + i < this.frameCount(); i++) {
+        const img = new Image();
+        img.src = this.rasterUrl(frameIndex + i);
+        this.preloadedImages.push(img);
+      }
+      return;
+    }
+
     const values = this.interpolatedFrames[frameIndex];
     const { min, max } = this.data.color_scale;
     const range = max - min;
@@ -324,12 +391,13 @@ class WeatherGridInstance {
 
   /**
    * Update the Maplibre image source with current canvas content.
+   * @param {string} url - Optional image URL (server raster mode) instead of the canvas
    */
-  updateMapSource() {
+  updateMapSource(url = null) {
     if (!MapAdapter?.map) return;
 
     const map = MapAdapter.map;
-    const dataUrl = this.imageCanvas.toDataURL('image/png');
+    const dataUrl = url || this.imageCanvas.toDataURL('image/png');
 
     // World bounds for the 1-degree display grid (89 to -89 lat, -180 to 180 lon)
     const coordinates = [
@@ -402,6 +470,8 @@ class WeatherGridInstance {
 
     this.data = null;
     this.interpolatedFrames = null;
+    this.raster = null;
+    this.preloadedImages = [];
     this.currentFrameIndex = 0;
     this.isInitialized = false;
 
@@ -461,6 +531,9 @@ export const WeatherGridModel = {
   // Active overlay instances: overlayId -> WeatherGridInstance
   instances: {},
 
+  // Use server-rendered frames instead of client-side colouring (low-end devices)
+  serverRaster: (navigator.hardwareConcurrency || 8) <= 4,
+
   /**
    * Get or create an instance for an overlay.
    * @param {string} overlayId - Overlay ID (temperature, humidity, snow-depth)
@@ -497,20 +570,26 @@ export const WeatherGridModel = {
    * @param {Object} yearData - { timestamps: [...], values: [[...], ...] }
    * @param {Object} colorScale - { min, max, stops: [[value, color], ...] }
    * @param {Object} grid - Grid metadata { lat_start, lon_start, lat_step, lon_step, rows, cols }
+   * @param {Object} raster - Optional { variable, tier, version } for server-rendered frames
    * @returns {boolean} Success
    */
-  displayFromCache(overlayId, yearData, colorScale, grid) {
+  displayFromCache(overlayId, yearData, colorScale, grid, raster = null) {
     if (!yearData || !colorScale) {
       console.warn(`WeatherGridModel: Invalid cache data for ${overlayId}`);
       return false;
     }
 
     const instance = this.getInstance(overlayId);
-    instance.setData(yearData, colorScale, grid);
+    if (this.serverRaster && raster?.variable && raster?.tier) {
+      instance.setRasterData(yearData, colorScale, grid, raster);
+    } else {
+      instance.raster = null;
+      instance.setData(yearData, colorScale, grid);
+    }
 
-    if (instance.interpolatedFrames && instance.interpolatedFrames.length > 0) {
+    if (instance.frameCount() > 0) {
       instance.renderFrame(0);
-      console.log(`WeatherGridModel[${overlayId}]: Displayed from cache,`, instance.interpolatedFrames.length, 'frames');
+      console.log(`WeatherGridModel[${overlayId}]: Displayed from cache,`, instance.frameCount(), 'frames');
       return true;
     }
 
@@ -665,6 +665,21 @@ const VARIABLE_OVERLAY_MAP = {
   'soil_moisture': 'soil-moisture'
 };
 
+/**
+ * Server raster descriptor for a cached weather year (WeatherGridModel image mode).
+ * @param {Object} cachedData - dataCache entry for a weather overlay
+ * @param {number} year - Cached year
+ * @returns {Object|null} { variable, tier, version }
+ */
+function getWeatherRasterInfo(cachedData, year) {
+  if (!cachedData?.variable) return null;
+  return {
+    variable: cachedData.variable,
+    tier: cachedData.years?.[year]?.tier,
+    version: cachedData.colorScaleVersion
+  };
+}
+
 async function loadWeatherYearData(overlayId, year, endpoint, signal = null) {
   // Check if we already have this year's data cached (from a previous batch request)
   if (dataCache[overlayId]?.years?.[year]) {
@@ -729,6 +744,8 @@ async function loadWeatherYearData(overlayId, year, endpoint, signal = null) {
         if (data.color_scales[variable]) {
           dataCache[varOverlayId].colorScale = data.color_scales[variable];
         }
+        dataCache[varOverlayId].variable = variable;
+        dataCache[varOverlayId].colorScaleVersion = data.color_scale_versions?.[variable] || null;
         if (data.grid) {
           dataCache[varOverlayId].grid = data.grid;
         }
@@ -777,6 +794,8 @@ async function loadWeatherYearData(overlayId, year, endpoint, signal = null) {
     if (data.color_scale) {
       dataCache[overlayId].colorScale = data.color_scale;
     }
+    dataCache[overlayId].variable = data.variable;
+    dataCache[overlayId].colorScaleVersion = data.color_scale_version || null;
     if (data.grid) {
       dataCache[overlayId].grid = data.grid;
     }
@@ -3793,7 +3812,8 @@ export const OverlayController = {
         overlayId,
         cachedData.years[year],
         cachedData.colorScale,
-        cachedData.grid
+        cachedData.grid,
+        getWeatherRasterInfo(cachedData, year)
       );
 
       // Render at current time slider position
@@ -3975,7 +3995,8 @@ export const OverlayController = {
         overlayId,
         cachedData.years[year],
         cachedData.colorScale,
-        cachedData.grid
+        cachedData.grid,
+        getWeatherRasterInfo(cachedData, year)
       );
 
       // Set TimeSlider to default range (2000-present, data exists back to 1940 via chat)
@@ -0,0 +1,91 @@
+/**
+ * Topology decoding utilities
+ * Decodes the TopoJSON-style responses built by mapmover/topology.py
+ * (shared arcs, quantized + delta-encoded coordinates) back to GeoJSON.
+ */
+
+/**
+ * Decode delta-encoded, quantized arcs to [lon, lat] arrays.
+ * @param {Object} topology - Topology object
+ * @returns {Array} Decoded arcs
+ */
+function decodeArcs(topology) {
+  const [sx, sy] = topology.transform.scale;
+  const [tx, ty] = topology.transform.translate;
+
+  return topology.arcs.map(arc => {
+    let x = 0, y = 0;
+    return arc.map(([dx, dy]) => {
+      x += dx;
+      y += dy;
+      return [x * sx + tx, y * sy + ty];
+    });
+  });
+}
+
+/**
+ * Join arc references into one line/ring (~i means arc i reversed).
+ * Consecutive arcs share their joining point, which is kept once.
+ */
+function joinArcs(arcs, refs) {
+  const coords = [];
+  for (const ref of refs) {
+    let arc = ref < 0 ? arcs[~ref].slice().reverse() : arcs[ref];
+    if (coords.length > 0) arc = arc.slice(1);
+    for (const p of arc) coords.push(p);
+  }
+  return coords;
+}
+
+/**
+ * Decode one topology geometry to a GeoJSON geometry.
+ */
+function decodeGeometry(geom, arcs, topology) {
+  const [sx, sy] = topology.transform.scale;
+  const [tx, ty] = topology.transform.translate;
+  const point = ([x, y]) => [x * sx + tx, y * sy + ty];
+
+  switch (geom.type) {
+    case 'Polygon':
+      return { type: 'Polygon', coordinates: geom.arcs.map(ring => joinArcs(arcs, ring)) };
+    case 'MultiPolygon':
+      return {
+        type: 'MultiPolygon',
+        coordinates: geom.arcs.map(poly => poly.map(ring => joinArcs(arcs, ring)))
+      };
+    case 'LineString':
+      return { type: 'LineString', coordinates: joinArcs(arcs, geom.arcs) };
+    case 'MultiLineString':
+      return { type: 'MultiLineString', coordinates: geom.arcs.map(line => joinArcs(arcs, line)) };
+    case 'Point':
+      return { type: 'Point', coordinates: point(geom.coordinates) };
+    case 'MultiPoint':
+      return { type: 'MultiPoint', coordinates: geom.coordinates.map(point) };
+    default:
+      return null;
+  }
+}
+
+/**
+ * Convert a Topology to a GeoJSON FeatureCollection.
+ * @param {Object} topology - Topology object ({type: 'Topology', transform, arcs, objects})
+ * @param {string} objectName - Object to decode (default 'features')
+ * @returns {Object} GeoJSON FeatureCollection
+ */
+export function topologyToGeoJSON(topology, objectName = 'features') {
+  const arcs = decodeArcs(topology);
+  const collection = topology.objects?.[objectName];
+  const features = [];
+
+  for (const geom of collection?.geometries || []) {
+    const geometry = decodeGeometry(geom, arcs, topology);
+    if (!geometry) continue;
+    features.push({
+      type: 'Feature',
+      properties: geom.properties || {},
+      geometry
+    });
+  }
+
+  return { type: 'FeatureCollection', features };
+}
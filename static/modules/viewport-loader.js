@@ -7,6 +7,7 @@
 import { CONFIG } from './config.js';
 import { GeometryCache } from './cache.js';
 import { fetchMsgpack } from './utils/fetch.js';
+import { topologyToGeoJSON } from './utils/topology.js';
 
 // These will be set by app.js to avoid circular dependencies
 let MapAdapter = null;
@@ -39,6 +40,14 @@ export const ViewportLoader = {
   lastRequestedLevel: null,  // Track the level of the in-flight request
   lastZoom: null,  // Track zoom level to distinguish zoom from pan
 
+  // Grid cells already loaded for the current level, so pans fetch only new cells.
+  // The server snaps viewports to a fixed grid per level and reports cell_size.
+  // Cells are kept per geometry detail (the server simplifies by viewport area, see
+  // get_viewport_detail() - the same thresholds as getAdminLevelForViewport()).
+  // {level, detail, debug, cellSize, cells: Map 'cx:cy' -> loc_ids, features: Map loc_id -> feature}
+  cellState: null,
+  maxCells: 400,  // Drop off-screen cells beyond this many
+
   // Viewport area thresholds (in square degrees) for admin level selection
   // These are tunable - smaller areas = deeper admin levels
   // Area roughly corresponds to zoom: zoom 10 ~ 1-2 sq deg, zoom 14 ~ 0.01 sq deg
@@ -171,6 +180,84 @@ export const ViewportLoader = {
     }
   },
 
+  /**
+   * Get grid cell keys ('cx:cy') covering the buffered viewport.
+   * Mirrors get_viewport_cells() in geometry_handlers.py (50% buffer, clamped to world).
+   */
+  getCellKeys(bounds, cellSize) {
+    const west = bounds.getWest(), east = bounds.getEast();
+    const south = bounds.getSouth(), north = bounds.getNorth();
+    const bufLon = (east - west) * 0.5;
+    const bufLat = (north - south) * 0.5;
+
+    const x0 = Math.floor(Math.max(west - bufLon, -180) / cellSize);
+    const x1 = Math.floor(Math.min(east + bufLon, 180) / cellSize);
+    const y0 = Math.floor(Math.max(south - bufLat, -90) / cellSize);
+    const y1 = Math.floor(Math.min(north + bufLat, 90) / cellSize);
+
+    const keys = [];
+    for (let cy = y0; cy <= y1; cy++) {
+      for (let cx = x0; cx <= x1; cx++) {
+        keys.push(`${cx}:${cy}`);
+      }
+    }
+    return keys;
+  },
+
+  /**
+   * Store a response's cells and features for the current level
+   */
+  addCells(adminLevel, debug, data) {
+    const state = this.cellState;
+    const detail = data.metadata.detail;
+    if (!state || state.level !== adminLevel || state.detail !== detail || state.debug !== debug) {
+      this.cellState = {
+        level: adminLevel,
+        detail,
+        debug,
+        cellSize: data.metadata.cell_size,
+        cells: new Map(),
+        features: new Map()
+      };
+    }
+    for (const f of data.features) {
+      const locId = f.properties?.loc_id;
+      if (locId) this.cellState.features.set(locId, f);
+    }
+    for (const [key, locIds] of Object.entries(data.metadata.cells)) {
+      this.cellState.cells.set(key, locIds);
+    }
+  },
+
+  /**
+   * Collect the unique features of the given cells, pruning off-screen cells
+   * once more than maxCells are held
+   */
+  getCellFeatures(cellKeys) {
+    const state = this.cellState;
+    const seen = new Set();
+    const features = [];
+    for (const key of cellKeys) {
+      for (const locId of state.cells.get(key) || []) {
+        if (seen.has(locId)) continue;
+        seen.add(locId);
+        const f = state.features.get(locId);
+        if (f) features.push(f);
+      }
+    }
+
+    if (state.cells.size > this.maxCells) {
+      const keep = new Set(cellKeys);
+      for (const key of [...state.cells.keys()]) {
+        if (!keep.has(key)) state.cells.delete(key);
+      }
+      for (const locId of [...state.features.keys()]) {
+        if (!seen.has(locId)) state.features.delete(locId);
+      }
+    }
+    return features;
+  },
+
   /**
    * Load geometry for current viewport
    * Uses short debounce (300ms) to batch rapid viewport changes
@@ -214,6 +301,24 @@ export const ViewportLoader = {
       bounds.getNorth().toFixed(3)
     ].join(',');
 
+    // If this level's grid is known, fetch only the cells we don't already have
+    const debug = !!App?.debugMode;
+    const state = this.cellState;
+    let cellKeys = null;
+    let missingCells = null;
+    const detail = this.getAdminLevelForViewport(bounds);
+    if (state && state.level === adminLevel && state.detail === detail && state.debug === debug) {
+      cellKeys = this.getCellKeys(bounds, state.cellSize);
+      missingCells = cellKeys.filter(key => !state.cells.has(key));
+      if (missingCells.length === 0) {
+        const features = this.getCellFeatures(cellKeys);
+        console.log(`[${thisRequestId}] Level ${adminLevel}: all ${cellKeys.length} cells cached, ${features.length} features`);
+        MapAdapter.loadGeoJSONWithFade({ type: 'FeatureCollection', features });
+        document.getElementById('totalAreas').textContent = features.length;
+        return;
+      }
+    }
+
     // Start spinner timer
     this.isLoading = true;
     this.spinnerTimeout = setTimeout(() => {
@@ -224,11 +329,24 @@ export const ViewportLoader = {
 
     try {
       // Add debug param if debug mode is on (for coverage info in popups)
-      const debugParam = App?.debugMode ? '&debug=true' : '';
-      const url = `${CONFIG.api.viewport}?level=${adminLevel}&bbox=${bbox}${debugParam}`;
-      console.log(`[${thisRequestId}] Fetching level ${adminLevel}`);
-
-      const data = await fetchMsgpack(url, { signal: this.abortController.signal });
+      const debugParam = debug ? '&debug=true' : '';
+      const formatParam = CONFIG.viewport.topology ? '&format=topojson' : '';
+      const url = missingCells
+        ? `${CONFIG.api.viewport}?level=${adminLevel}&cells=${missingCells.join(',')}&bbox=${bbox}${debugParam}${formatParam}`
+        : `${CONFIG.api.viewport}?level=${adminLevel}&bbox=${bbox}${debugParam}${formatParam}`;
+      console.log(`[${thisRequestId}] Fetching level ${adminLevel}` +
+        (missingCells ? ` (${missingCells.length}/${cellKeys.length} cells)` : ''));
+
+      const response = await fetchMsgpack(url, { signal: this.abortController.signal });
+      const data = response.type === 'Topology'
+        ? { ...topologyToGeoJSON(response), metadata: response.metadata }
+        : response;
+
+      // Keep returned cells even if this response is stale - they're still valid for the level
+      const cellsComplete = data.metadata?.cells && !data.metadata.truncated;
+      if (cellsComplete && adminLevel === this.currentAdminLevel) {
+        this.addCells(adminLevel, debug, data);
+      }
 
       // Check if this request was superseded by a newer one
       if (thisRequestId !== this.requestId) {
@@ -242,21 +360,29 @@ export const ViewportLoader = {
         return;
       }
 
-      const featureCount = data.features?.length || 0;
-      console.log(`[${thisRequestId}] Level ${adminLevel} response: ${featureCount} features`);
+      // Compose the view from held cells (new + already loaded), or use the response as-is
+      let features = data.features;
+      if (cellsComplete) {
+        features = this.getCellFeatures(cellKeys || this.getCellKeys(bounds, this.cellState.cellSize));
+      } else if (data.features) {
+        this.cellState = null;
+      }
+
+      const featureCount = features?.length || 0;
+      console.log(`[${thisRequestId}] Level ${adminLevel} response: ${data.features?.length || 0} features, showing ${featureCount}`);
 
       // Always update the map when we get a response (even if empty)
       // This ensures old geometry is cleared when switching levels
-      if (data.features) {
+      if (features) {
         // Add to cache (if any features)
-        if (featureCount > 0) {
+        if (data.features.length > 0) {
           GeometryCache.add(data.features);
         }
 
         // Update map with new data (or empty to clear old geometry)
         MapAdapter.loadGeoJSONWithFade({
           type: 'FeatureCollection',
-          features: data.features
+          features
         });
 
         // Update stats
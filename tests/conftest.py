@@ -0,0 +1,66 @@
+"""
+Test setup: run against the bundled demo data (data/) with a scratch cache
+folder. paths.py reads these at import, so they are set before mapmover is.
+The fake_llm fixture stands in for the messages API.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+os.environ["DATA_ROOT"] = str(ROOT / "data")
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="county-map-tests-")
+sys.path.insert(0, str(ROOT))
+
+
+class FakeMessages:
+    """Stand-in for AsyncAnthropic().messages: records each request and replies after delay seconds."""
+
+    def __init__(self, reply, delay):
+        self.reply = reply
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, **request):
+        self.calls.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return SimpleNamespace(content=[SimpleNamespace(text=self.reply)], usage=None)
+
+
+class FakeLLM:
+    """Stand-in for AsyncAnthropic; set reply and delay before use."""
+
+    def __init__(self):
+        self.messages = FakeMessages('{"type": "chat", "message": "Hello"}', 0.0)
+
+    def __call__(self, **options):
+        return self
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Route order_taker's LLM calls (via _llm_client) to a FakeLLM, with the interpretation cache off."""
+    from mapmover import order_taker
+    fake = FakeLLM()
+    monkeypatch.setattr(order_taker, "AsyncAnthropic", fake)
+    monkeypatch.setattr(order_taker, "INTERPRET_CACHE", False)
+    monkeypatch.setattr(order_taker, "_llm", None)
+    yield fake.messages
+    order_taker._llm = None
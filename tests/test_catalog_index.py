@@ -0,0 +1,89 @@
+"""CatalogIndex phrase candidates, tag and scope lookups, and BM25 ranking."""
+
+import json
+from pathlib import Path
+
+from mapmover.catalog_index import CatalogIndex, name_parts, tokenize
+
+SOURCES = [
+    {"source_id": "owid_co2", "source_name": "OWID - CO2 and Greenhouse Gas Emissions",
+     "topic_tags": ["environment", "climate"], "keywords": ["carbon", "emissions"],
+     "metrics": {"co2": {"name": "CO2 emissions (Mt)"}, "co2_per_capita": {"name": "CO2 per capita"}}},
+    {"source_id": "abs_population", "source_name": "ABS - Regional Population", "scope": "AUS",
+     "topic_tags": ["demographics"], "keywords": ["population", "census"],
+     "metrics": {"erp": {"name": "Estimated resident population"}}},
+    {"source_id": "who_health", "source_name": "WHO Health Statistics",
+     "topic_tags": ["health"], "keywords": ["life expectancy", "mortality"],
+     "metrics": {"life_exp": {"name": "Life expectancy at birth"}}},
+]
+
+
+def substring_matches(sources, text):
+    """The exact test phrase_candidates narrows down: a name, part or source_id inside text."""
+    text = text.lower()
+    found = []
+    for position, source in enumerate(sources):
+        name = source.get("source_name", "") or ""
+        phrases = [name, *(p for p in name_parts(name) if len(p) >= 4), source.get("source_id", "") or ""]
+        if any(p and p.lower() in text for p in phrases):
+            found.append(position)
+    return found
+
+
+def test_tokenize_splits_on_underscores_and_punctuation():
+    assert tokenize("ABS_Population: CO2-emissions, 2020") == ["abs", "population", "co2", "emissions", "2020"]
+    assert tokenize("") == []
+
+
+def test_phrase_candidates_find_names_parts_and_ids():
+    index = CatalogIndex(SOURCES)
+    assert 1 in index.phrase_candidates("abs population data for sydney")
+    assert 1 in index.phrase_candidates("regional population of queensland")
+    assert 0 in index.phrase_candidates("show owid_co2")
+    assert index.phrase_candidates("zzz qqq") == []
+
+
+def test_phrase_candidates_are_a_superset_on_the_bundled_catalog():
+    catalog = json.loads((Path(__file__).resolve().parent.parent / "data" / "catalog.json").read_text(encoding="utf-8"))
+    sources = catalog["sources"]
+    index = CatalogIndex(sources)
+    texts = ["global_earthquakes since 2000", "01 poverty in kenya", "ibtracs storms in florida",
+             "global fire atlas for brazil", "smithsonian global volcanism program", "gdp of france"]
+    assert any(substring_matches(sources, text) for text in texts)
+    for text in texts:
+        assert set(substring_matches(sources, text)) <= set(index.phrase_candidates(text)), text
+
+
+def test_tag_matches_and_scope_positions():
+    index = CatalogIndex(SOURCES)
+    assert index.tag_matches(["climat"]) == {0}
+    assert index.tag_matches(["life expectancy"]) == {2}
+    assert index.tag_matches(["nothing"]) == set()
+    assert index.scope_positions("aus") == [1]
+    assert index.scope_positions("") == []
+
+
+def test_tag_matches_keep_no_per_term_state():
+    index = CatalogIndex(SOURCES)
+    before = {name: len(value) for name, value in vars(index).items() if hasattr(value, "__len__")}
+    for i in range(1000):
+        index.tag_matches([f"term{i}", "health"])
+    after = {name: len(value) for name, value in vars(index).items() if hasattr(value, "__len__")}
+    assert after == before
+    assert index.tag_matches(["health"]) == {2}
+
+
+def test_scores_rank_the_named_source_first():
+    index = CatalogIndex(SOURCES)
+    scores = index.scores("co2 emissions in china")
+    assert max(scores, key=scores.get) == 0
+    scores = index.scores("life expectancy in japan")
+    assert max(scores, key=scores.get) == 2
+    assert 1 not in scores
+
+
+def test_phrase_boost_only_for_consecutive_words():
+    index = CatalogIndex(SOURCES)
+    together = index.scores("abs population")[1]
+    apart = index.scores("population abs")[1]
+    assert together > apart
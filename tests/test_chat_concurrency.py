@@ -0,0 +1,61 @@
+"""LLM calls are awaited on the shared client: a slow chat does not hold up other requests."""
+
+import asyncio
+import time
+
+import httpx
+import msgpack
+
+from mapmover import order_taker
+from mapmover.order_taker import interpret_request
+
+
+def test_concurrent_calls_are_limited_by_the_semaphore(fake_llm, monkeypatch):
+    monkeypatch.setattr(order_taker, "LLM_MAX_CONCURRENT", 2)
+    fake_llm.delay = 0.05
+
+    async def run():
+        return await asyncio.gather(*(interpret_request(f"question {i}") for i in range(6)))
+
+    results = asyncio.run(run())
+    assert len(results) == 6 and all(r["type"] == "chat" for r in results)
+    assert len(fake_llm.calls) == 6
+    assert fake_llm.max_in_flight == 2
+
+
+def test_calls_overlap_instead_of_running_one_after_another(fake_llm):
+    fake_llm.delay = 0.2
+
+    async def run():
+        return await asyncio.gather(*(interpret_request(f"question {i}") for i in range(5)))
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    assert time.perf_counter() - start < 0.2 * 3
+    assert fake_llm.max_in_flight == 5
+
+
+def test_slow_chat_does_not_stall_other_requests(fake_llm):
+    import app
+
+    fake_llm.delay = 1.0
+    body = msgpack.packb({"query": "hello there", "chatHistory": [], "sessionId": "test"})
+
+    async def run():
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            chat = asyncio.create_task(client.post("/chat", content=body))
+            while not fake_llm.in_flight:
+                await asyncio.sleep(0.01)
+
+            start = time.perf_counter()
+            health = await client.get("/health")
+            health_seconds = time.perf_counter() - start
+            assert fake_llm.in_flight == 1  # the chat is still waiting on the LLM
+            return health, health_seconds, await chat
+
+    health, health_seconds, chat = asyncio.run(run())
+    assert health.status_code == 200
+    assert health_seconds < 0.5
+    assert chat.status_code == 200
+    assert msgpack.unpackb(chat.content, raw=False)["type"] == "chat"
@@ -0,0 +1,83 @@
+"""NameMatcher whole-word matching and FuzzyNameIndex near matches."""
+
+import re
+
+from mapmover.gazetteer import FuzzyNameIndex, NameMatcher, edit_distance
+
+NAMES = sorted(["new york", "york", "new mexico", "mexico", "niger", "nigeria", "us", "st. louis"],
+               key=len, reverse=True)
+
+
+def regex_ranks(names, text):
+    """What location detection did before NameMatcher: one \\b-anchored regex per name."""
+    return [rank for rank, name in enumerate(names) if re.search(r'\b' + re.escape(name) + r'\b', text)]
+
+
+def test_finds_every_whole_word_occurrence():
+    matcher = NameMatcher(NAMES)
+    hits = [(matcher.names[rank], start, end) for rank, start, end in matcher.find("new york and york")]
+    assert hits == [("new york", 0, 8), ("york", 4, 8), ("york", 13, 17)]
+
+
+def test_ignores_matches_inside_words():
+    matcher = NameMatcher(NAMES)
+    assert [matcher.names[r] for r in matcher.ranks("nigeria")] == ["nigeria"]
+    assert matcher.ranks("business census") == []
+    assert [matcher.names[r] for r in matcher.ranks("us, mexico.")] == ["mexico", "us"]
+
+
+def test_names_with_punctuation():
+    matcher = NameMatcher(NAMES)
+    assert [matcher.names[r] for r in matcher.ranks("crime in st. louis")] == ["st. louis"]
+
+
+def test_ranks_agree_with_per_name_regex():
+    matcher = NameMatcher(NAMES)
+    for text in ["population of new mexico", "niger and nigeria", "the us and mexico", "yorkshire",
+                 "new york city", "gdp of new-york", ""]:
+        assert matcher.ranks(text) == regex_ranks(NAMES, text), text
+
+
+def test_empty_names_are_skipped():
+    matcher = NameMatcher(["", "peru"])
+    assert len(matcher) == 2
+    assert matcher.ranks("peru") == [1]
+    assert matcher.nbytes > 0
+
+
+PLACES = ["mississippi", "missouri", "tucson", "tuscany", "kenya", "oman", "san francisco"]
+
+
+def test_fuzzy_lookup_finds_misspellings_within_max_edits():
+    index = FuzzyNameIndex(PLACES, max_edits=1)
+    assert [(index.names[r], e) for r, e in index.lookup("missisippi")] == [("mississippi", 1)]
+    assert [(index.names[r], e) for r, e in index.lookup("tuscon")] == [("tucson", 1)]
+    assert [(index.names[r], e) for r, e in index.lookup("kenya")] == [("kenya", 0)]
+    assert index.lookup("missoury") == [(1, 1)]
+    assert index.lookup("tuscanyy") == [(3, 1)]
+    assert index.lookup("mississ") == []
+
+
+def test_fuzzy_lookup_orders_by_edits_then_rank():
+    index = FuzzyNameIndex(["texas", "texan", "taxes"], max_edits=2)
+    assert index.lookup("texas") == [(0, 0), (1, 1), (2, 2)]
+    assert index.lookup("texas", max_edits=1) == [(0, 0), (1, 1)]
+
+
+def test_fuzzy_lookup_skips_short_names_and_queries():
+    index = FuzzyNameIndex(PLACES, max_edits=1, min_length=5)
+    assert index.lookup("omen") == []
+    assert index.lookup("omann") == []
+
+
+def test_fuzzy_lookup_verifies_past_the_indexed_prefix():
+    index = FuzzyNameIndex(PLACES, max_edits=1, prefix_length=7)
+    assert index.lookup("san francisca") == [(6, 1)]
+    assert index.lookup("san franciscoxx") == []
+
+
+def test_edit_distance_counts_adjacent_swaps_once():
+    assert edit_distance("tucson", "tuscon", 2) == 1
+    assert edit_distance("kenya", "kenya", 1) == 0
+    assert edit_distance("kenya", "uganda", 2) == 3
+    assert edit_distance("oman", "omanxyz", 2) == 3
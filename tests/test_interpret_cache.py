@@ -0,0 +1,69 @@
+"""Interpretation cache key normalization and entry lifetime."""
+
+import time
+
+import pytest
+
+from mapmover import data_loading, order_taker
+from mapmover.order_taker import (
+    _cached_interpretation, _interpret_cache, _interpret_cache_key,
+    clear_interpret_cache, interpret_cache_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_interpret_cache()
+    yield
+    clear_interpret_cache()
+
+
+def test_key_ignores_case_spacing_and_trailing_punctuation():
+    key = _interpret_cache_key("GDP of Kenya", "ctx", [])
+    assert _interpret_cache_key("  gdp   of kenya?", "ctx", []) == key
+    assert _interpret_cache_key("gdp of kenya!", "ctx", []) == key
+    assert _interpret_cache_key("gdp of uganda", "ctx", []) != key
+
+
+def test_key_depends_on_context_and_history():
+    history = [{"role": "user", "content": "show africa"}]
+    key = _interpret_cache_key("gdp of kenya", "ctx", [])
+    assert _interpret_cache_key("gdp of kenya", "other ctx", []) != key
+    assert _interpret_cache_key("gdp of kenya", "ctx", history) != key
+    assert _interpret_cache_key("gdp of kenya", "ctx", history) == _interpret_cache_key("gdp of kenya", "ctx", list(history))
+
+
+def test_key_changes_when_the_catalog_is_reloaded(monkeypatch):
+    key = _interpret_cache_key("gdp of kenya", "ctx", [])
+    monkeypatch.setattr(data_loading, "_catalog_cache", None)
+    data_loading.load_catalog()
+    assert _interpret_cache_key("gdp of kenya", "ctx", []) != key
+
+
+def test_entry_expires_after_ttl(monkeypatch):
+    key = _interpret_cache_key("gdp of kenya", "ctx", [])
+    _interpret_cache.put(key, (time.monotonic(), '{"type": "order"}'))
+    assert _cached_interpretation(key, "chat") == '{"type": "order"}'
+
+    # Stored an hour ago, with a one-minute lifetime
+    _interpret_cache.put(key, (time.monotonic() - 3600, '{"type": "order"}'))
+    monkeypatch.setattr(order_taker, "INTERPRET_CACHE_TTL_S", 60.0)
+    assert _cached_interpretation(key, "chat") is None
+    assert key not in _interpret_cache.keys()
+
+
+def test_stats_count_hits_misses_and_expiries(monkeypatch):
+    before = interpret_cache_stats()
+    key = _interpret_cache_key("population of peru", "ctx", [])
+    assert _cached_interpretation(key, "test") is None
+    _interpret_cache.put(key, (time.monotonic(), "reply"))
+    assert _cached_interpretation(key, "test") == "reply"
+
+    monkeypatch.setattr(order_taker, "INTERPRET_CACHE_TTL_S", -1.0)
+    assert _cached_interpretation(key, "test") is None
+
+    stats = interpret_cache_stats()
+    assert stats["endpoints"]["test"]["hits"] - before["endpoints"].get("test", {}).get("hits", 0) == 1
+    assert stats["endpoints"]["test"]["misses"] - before["endpoints"].get("test", {}).get("misses", 0) == 2
+    assert stats["expired"] - before["expired"] == 1
+    assert stats["ttl_s"] == -1.0
@@ -0,0 +1,33 @@
+"""Location candidates from query text: exact names and typo-tolerant near matches."""
+
+import pytest
+
+from mapmover.preprocessor import detect_location_candidates
+
+
+def matched(query):
+    return [(c["matched_term"], c["match_type"]) for c in detect_location_candidates(query)["candidates"]]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("gdp of frnace", [("france", "country_fuzzy")]),
+    ("population of argentna in 2010", [("argentina", "country_fuzzy")]),
+    ("gdp of brazill and germny", [("brazil", "country_fuzzy"), ("germany", "country_fuzzy")]),
+])
+def test_misspelled_countries_are_near_matches(query, expected):
+    assert matched(query) == expected
+
+
+@pytest.mark.parametrize("query", [
+    "child",
+    "while",
+    "tiger population",
+    "show national parks",
+])
+def test_common_words_are_not_near_matches(query):
+    assert matched(query) == []
+
+
+def test_exact_location_is_not_joined_by_a_near_match():
+    assert matched("child mortality in kenya for 2015") == [("kenya", "country")]
+    assert matched("population of mexcio and kenya") == [("kenya", "country")]
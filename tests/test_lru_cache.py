@@ -0,0 +1,67 @@
+"""ByteBudgetLRU eviction, recency and counters."""
+
+from mapmover.lru_cache import ByteBudgetLRU
+
+
+def make_cache(max_bytes=100):
+    return ByteBudgetLRU("test", max_bytes, sizeof=len)
+
+
+def test_evicts_least_recently_used_over_budget():
+    cache = make_cache()
+    cache.put("a", "x" * 40)
+    cache.put("b", "x" * 40)
+    cache.get("a")  # b is now least recently used
+    cache.put("c", "x" * 40)
+    assert cache.keys() == ["a", "c"]
+    assert cache.current_bytes == 80
+    assert cache.stats()["evictions"] == 1
+
+
+def test_replacing_an_entry_updates_its_size():
+    cache = make_cache()
+    cache.put("a", "x" * 60)
+    cache.put("a", "x" * 10)
+    assert cache.current_bytes == 10
+    cache.put("b", "x" * 90)
+    assert cache.keys() == ["a", "b"]
+
+
+def test_oversized_entry_is_kept_alone():
+    cache = make_cache()
+    cache.put("a", "x" * 10)
+    cache.put("big", "x" * 500)
+    assert cache.keys() == ["big"]
+    assert cache.get("big") is not None
+
+
+def test_peek_does_not_touch_recency_or_counters():
+    cache = make_cache()
+    cache.put("a", "x" * 40)
+    cache.put("b", "x" * 40)
+    assert cache.peek("a") == "x" * 40
+    cache.put("c", "x" * 40)
+    assert "a" not in cache
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_pop_and_clear_release_bytes():
+    cache = make_cache()
+    cache.put("a", "x" * 30)
+    cache.put("b", "x" * 20)
+    assert cache.pop("a") == "x" * 30
+    assert cache.pop("missing", "default") == "default"
+    assert cache.current_bytes == 20
+    cache.clear()
+    assert len(cache) == 0 and cache.current_bytes == 0
+
+
+def test_stats_hit_rate():
+    cache = make_cache()
+    cache.put("a", "x")
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
+    assert abs(stats["hit_rate"] - 2 / 3) < 1e-9
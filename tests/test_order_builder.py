@@ -0,0 +1,49 @@
+"""Fast-path orders (order_builder.py) against the bundled catalog."""
+
+from mapmover.order_builder import build_fast_order
+from mapmover.preprocessor import detect_source_candidates, preprocess_query
+
+
+def fast_order(query):
+    return build_fast_order(preprocess_query(query))
+
+
+def test_source_id_matches_whole_words_only():
+    # "2015" contains the ids "01" and "15" but names neither
+    candidates = detect_source_candidates("ind_1_1_1 from 01 for kenya in 2015")["candidates"]
+    assert [c["source_id"] for c in candidates] == ["01"]
+    candidates = detect_source_candidates("sanitation in kenya in 2015")["candidates"]
+    assert all(c["match_type"] != "source_id" for c in candidates)
+
+
+def test_builds_single_year_order():
+    result = fast_order("ind_1_1_1 from 01 for kenya in 2015")
+    assert result is not None
+    assert result["type"] == "order"
+    [item] = result["order"]["items"]
+    assert (item["source_id"], item["metric"], item["region"], item["year"]) == ("01", "ind_1_1_1", "kenya", 2015)
+    assert result["summary"] == "Proportion of population below international poverty line (%) for Kenya 2015"
+
+
+def test_builds_year_range_order():
+    result = fast_order("ind_1_1_1 from 01 for kenya from 2015 to 2019")
+    [item] = result["order"]["items"]
+    assert (item["year_start"], item["year_end"]) == (2015, 2019)
+    assert "year" not in item
+
+
+def test_ambiguous_metric_falls_back():
+    assert fast_order("show 01 data for kenya in 2019") is None
+
+
+def test_two_named_sources_fall_back():
+    assert fast_order("ind_1_1_1 from 01 and 02 for kenya in 2015") is None
+
+
+def test_missing_year_falls_back():
+    assert fast_order("ind_1_1_1 from 01 for kenya") is None
+
+
+def test_event_overlay_source_falls_back():
+    # Disaster sources are overlays: the LLM decides how to show them
+    assert fast_order("global_fire_atlas in brazil 2019") is None
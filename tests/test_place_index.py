@@ -0,0 +1,93 @@
+"""PlaceIndex build, save/load round trip, lookup filters and staleness."""
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from mapmover import place_index
+from mapmover.place_index import PlaceIndex, normalize_name
+
+
+def write_country(directory, iso3, rows):
+    columns = ["loc_id", "name", "parent_id", "admin_level"]
+    table = pa.table({c: [row[i] for row in rows] for i, c in enumerate(columns)})
+    pq.write_table(table, directory / f"{iso3}.parquet")
+
+
+@pytest.fixture
+def geometry_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "geometry"
+    directory.mkdir()
+    write_country(directory, "USA", [
+        ("USA", "United States", None, 0),
+        ("USA-GA", "Georgia", "USA", 1),
+        ("USA-TX", "Texas", "USA", 1),
+        ("USA-TX-48201", "Harris  County", "USA-TX", 2),
+        ("USA-GA-13121", "Fulton County", "USA-GA", 2),
+        ("USA-NY-36067", "Fulton County", "USA-NY", 2),
+    ])
+    write_country(directory, "GEO", [
+        ("GEO", "Georgia", None, 0),
+        ("GEO-TB", "Tbilisi", "GEO", 1),
+    ])
+    monkeypatch.setattr(place_index, "GEOMETRY_DIR", directory)
+    monkeypatch.setattr(place_index, "PLACE_INDEX_FILE", tmp_path / "cache" / "place_index.bin")
+    place_index.clear_place_index()
+    yield directory
+    place_index.clear_place_index()
+
+
+def test_normalize_name():
+    assert normalize_name("  New   York\tCity ") == "new york city"
+
+
+def test_lookup_returns_every_location_with_the_name(geometry_dir):
+    index = PlaceIndex.build(place_index._sources())
+    assert index.size == 6  # distinct names
+    assert index.lookup("GEORGIA") == [
+        {"loc_id": "GEO", "parent_id": None, "admin_level": 0, "iso3": "GEO"},
+        {"loc_id": "USA-GA", "parent_id": "USA", "admin_level": 1, "iso3": "USA"},
+    ]
+    assert [r["loc_id"] for r in index.lookup("fulton county")] == ["USA-GA-13121", "USA-NY-36067"]
+    assert [r["loc_id"] for r in index.lookup("harris county")] == ["USA-TX-48201"]
+    assert index.lookup("atlantis") == []
+    assert index.lookup("") == []
+
+
+def test_lookup_filters_by_level_and_orders_by_countries(geometry_dir):
+    index = PlaceIndex.build(place_index._sources())
+    assert [r["iso3"] for r in index.lookup("georgia", admin_level=1)] == ["USA"]
+    assert [r["iso3"] for r in index.lookup("georgia", countries=["USA", "GEO"])] == ["USA", "GEO"]
+    assert [r["iso3"] for r in index.lookup("georgia", countries=["GEO", "FRA"])] == ["GEO"]
+    assert index.lookup("georgia", countries=[]) == []
+
+
+def test_save_and_load_round_trip(geometry_dir, tmp_path):
+    built = PlaceIndex.build(place_index._sources())
+    path = tmp_path / "index.bin"
+    built.save(path)
+    loaded = PlaceIndex.load(path)
+    assert loaded.size == built.size
+    assert loaded.sources == built.sources
+    for name in ["georgia", "fulton county", "tbilisi", "united states"]:
+        assert loaded.lookup(name) == built.lookup(name)
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "not_an_index.bin"
+    path.write_bytes(b"something else entirely")
+    assert PlaceIndex.load(path) is None
+    assert PlaceIndex.load(tmp_path / "missing.bin") is None
+
+
+def test_rebuilt_when_a_geometry_file_changes(geometry_dir):
+    generation = place_index.place_index_generation()
+    assert place_index.load_place_index().lookup("tbilisi")
+    assert place_index.PLACE_INDEX_FILE.exists()
+    assert place_index.place_index_generation() != generation
+
+    write_country(geometry_dir, "GEO", [("GEO", "Georgia", None, 0), ("GEO-BA", "Batumi", "GEO", 1)])
+    place_index.clear_place_index()
+    index = place_index.load_place_index()
+    assert index.lookup("tbilisi") == []
+    assert [r["loc_id"] for r in index.lookup("batumi")] == ["GEO-BA"]
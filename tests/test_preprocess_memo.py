@@ -0,0 +1,76 @@
+"""Preprocessor memo: reuse for repeated queries, keying by viewport bucket and place index."""
+
+import pytest
+
+from mapmover import data_loading
+from mapmover.place_index import clear_place_index
+from mapmover.preprocessor import (
+    _viewport_bucket, clear_preprocess_memo, preprocess_memo_stats, preprocess_query,
+)
+
+KENYA_VIEW = {"adminLevel": 0, "bounds": {"west": 30, "south": -5, "east": 42, "north": 5}}
+
+
+@pytest.fixture(autouse=True)
+def empty_memo():
+    clear_preprocess_memo()
+    yield
+    clear_preprocess_memo()
+
+
+def hints_memo_counts():
+    stats = preprocess_memo_stats()[1]
+    return stats["hits"], stats["misses"]
+
+
+def test_repeated_query_reuses_hints():
+    hits, misses = hints_memo_counts()
+    first = preprocess_query("gdp of kenya in 2015", KENYA_VIEW)
+    second = preprocess_query("gdp of kenya in 2015", KENYA_VIEW)
+    assert hints_memo_counts() == (hits + 1, misses + 1)
+    assert second["time"] == first["time"]
+    assert second["original_query"] == "gdp of kenya in 2015"
+
+
+def test_case_and_spacing_variants_share_an_entry():
+    first = preprocess_query("Show hurricanes in Florida", KENYA_VIEW)
+    hits, misses = hints_memo_counts()
+    second = preprocess_query("  show   hurricanes in florida ", KENYA_VIEW)
+    assert hints_memo_counts() == (hits + 1, misses)
+    assert second["original_query"] == "show hurricanes in florida"
+    assert second["candidates"] == first["candidates"]
+
+
+def test_small_pan_shares_a_bucket_and_a_jump_does_not():
+    panned = {"adminLevel": 0, "bounds": {"west": 30.2, "south": -4.9, "east": 42.2, "north": 5.1}}
+    elsewhere = {"adminLevel": 0, "bounds": {"west": -80, "south": 35, "east": -68, "north": 45}}
+    assert _viewport_bucket(panned) == _viewport_bucket(KENYA_VIEW)
+    assert _viewport_bucket(elsewhere) != _viewport_bucket(KENYA_VIEW)
+    assert _viewport_bucket(dict(KENYA_VIEW, adminLevel=1)) != _viewport_bucket(KENYA_VIEW)
+
+
+def test_reloading_the_place_index_misses():
+    preprocess_query("gdp of kenya in 2015", KENYA_VIEW)
+    clear_place_index()
+    hits, misses = hints_memo_counts()
+    preprocess_query("gdp of kenya in 2015", KENYA_VIEW)
+    assert hints_memo_counts() == (hits, misses + 1)
+
+
+def test_overlay_state_is_part_of_the_key():
+    preprocess_query("earthquakes in kenya", KENYA_VIEW)
+    hits, misses = hints_memo_counts()
+    preprocess_query("earthquakes in kenya", KENYA_VIEW, active_overlays={"type": "earthquakes", "filters": {}})
+    assert hints_memo_counts() == (hits, misses + 1)
+
+
+def test_reloading_the_catalog_misses(monkeypatch):
+    preprocess_query("gdp of kenya in 2015", KENYA_VIEW)
+    generation = data_loading.catalog_generation()
+    monkeypatch.setattr(data_loading, "_catalog_cache", None)
+    data_loading.load_catalog()
+    assert data_loading.catalog_generation() != generation
+
+    hits, misses = hints_memo_counts()
+    preprocess_query("gdp of kenya in 2015", KENYA_VIEW)
+    assert hints_memo_counts() == (hits, misses + 1)
@@ -0,0 +1,55 @@
+"""System blocks sent to the messages API: static prompt as the cached prefix, per-query context after it."""
+
+import asyncio
+
+from mapmover import order_taker
+from mapmover.order_taker import get_system_prompt, interpret_request, prompt_cacheable
+from mapmover.preprocessor import preprocess_query
+
+
+def send(query, hints=None, history=None):
+    return asyncio.run(interpret_request(query, history, hints=hints))
+
+
+def test_static_prompt_is_the_first_block_and_context_follows(fake_llm, monkeypatch):
+    monkeypatch.setattr(order_taker, "PROMPT_CACHE_MIN_TOKENS", 1)
+    hints = preprocess_query("gdp of kenya in 2015")
+    history = [{"role": "user", "content": "show africa"}, {"role": "assistant", "content": "Done"}]
+    assert send("gdp of kenya in 2015", hints, history) == {"type": "chat", "message": "Hello"}
+
+    request = fake_llm.calls[0]
+    static, context = request["system"]
+    assert static == {"type": "text", "text": get_system_prompt(), "cache_control": {"type": "ephemeral"}}
+    assert "cache_control" not in context
+    assert context["text"].startswith("[CURRENT CONTEXT - USE THIS FOR THE CURRENT QUERY]")
+    assert "Kenya" in context["text"]
+    assert request["messages"] == history + [{"role": "user", "content": "gdp of kenya in 2015"}]
+    assert request["model"] == order_taker.LLM_MODEL
+
+
+def test_breakpoint_only_when_the_prompt_reaches_the_minimum(fake_llm, monkeypatch):
+    prompt = get_system_prompt()
+    tokens = len(prompt) // order_taker.PROMPT_CHARS_PER_TOKEN
+
+    monkeypatch.setattr(order_taker, "PROMPT_CACHE_MIN_TOKENS", tokens)
+    assert prompt_cacheable(prompt)
+    send("hello")
+    assert "cache_control" in fake_llm.calls[-1]["system"][0]
+
+    monkeypatch.setattr(order_taker, "PROMPT_CACHE_MIN_TOKENS", tokens + 1)
+    assert not prompt_cacheable(prompt)
+    send("hello")
+    assert "cache_control" not in fake_llm.calls[-1]["system"][0]
+
+
+def test_static_prompt_is_identical_across_queries(fake_llm):
+    send("gdp of kenya in 2015", preprocess_query("gdp of kenya in 2015"))
+    send("population of france", preprocess_query("population of france"))
+    first, second = (call["system"] for call in fake_llm.calls)
+    assert first[0] == second[0]
+    assert first[1] != second[1]
+
+
+def test_no_context_block_without_hints(fake_llm):
+    send("hello")
+    assert len(fake_llm.calls[0]["system"]) == 1
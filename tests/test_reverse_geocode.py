@@ -0,0 +1,66 @@
+"""locate_points hierarchy, and lookups limited to already-prepared polygons."""
+
+import json
+
+import pandas as pd
+import pytest
+
+from mapmover import reverse_geocode
+
+pytest.importorskip("shapely")
+
+
+def square(west, south, east, north):
+    ring = [[west, south], [east, south], [east, north], [west, north], [west, south]]
+    return json.dumps({"type": "Polygon", "coordinates": [ring]})
+
+
+LEVELS = {
+    0: pd.DataFrame({"loc_id": ["KEN"], "name": ["Kenya"], "geometry": [square(34, -4, 42, 5)]}),
+    1: pd.DataFrame({"loc_id": ["KEN-A", "KEN-B"], "name": ["A", "B"], "parent_id": ["KEN", "KEN"],
+                     "geometry": [square(34, -4, 38, 5), square(38, -4, 42, 5)]}),
+    2: pd.DataFrame({"loc_id": ["KEN-A-1"], "name": ["A1"], "parent_id": ["KEN-A"],
+                     "geometry": [square(34, -4, 38, 0)]}),
+}
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+
+    def load_country_parquet(iso3, admin_level=None):
+        calls.append((iso3, admin_level))
+        return LEVELS[admin_level]
+
+    def load_global_countries():
+        calls.append((None, 0))
+        return LEVELS[0]
+
+    monkeypatch.setattr(reverse_geocode, "load_country_parquet", load_country_parquet)
+    monkeypatch.setattr(reverse_geocode, "load_global_countries", load_global_countries)
+    monkeypatch.setattr(reverse_geocode, "_country_levels", lambda iso3: [1, 2])
+    reverse_geocode.clear_locate_cache()
+    yield calls
+    reverse_geocode.clear_locate_cache()
+
+
+def loc_ids(located):
+    return [h["loc_id"] for h in located["hierarchy"]]
+
+
+def test_locate_points_descends_every_level(loads):
+    located = reverse_geocode.locate_points([36, 40, 0], [-1, 1, 0])
+    assert [loc_ids(p) for p in located] == [["KEN", "KEN-A", "KEN-A-1"], ["KEN", "KEN-B"], []]
+    assert located[0]["loc_id"] == "KEN-A-1"
+    assert loc_ids(reverse_geocode.locate_points([36], [-1], max_level=1)[0]) == ["KEN", "KEN-A"]
+
+
+def test_loaded_only_never_reads_or_prepares_polygons(loads):
+    assert reverse_geocode.locate_points([36], [-1], loaded_only=True) == [{"loc_id": None, "hierarchy": []}]
+    assert loads == []
+
+    assert reverse_geocode.warm_polygons(["KEN"], max_level=1) == 2
+    loads.clear()
+    located = reverse_geocode.locate_points([36], [-1], loaded_only=True)[0]
+    assert loc_ids(located) == ["KEN", "KEN-A"]
+    assert loads == []
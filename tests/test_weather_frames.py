@@ -0,0 +1,71 @@
+"""WeatherFrameReader column merging and frame assembly."""
+
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from mapmover import weather_frames
+from mapmover.weather_frames import WeatherFrameReader, find_frame_file, frames_to_series
+
+
+def write_frame(directory, year, month):
+    path = directory / "monthly" / str(year) / f"{month:02d}.parquet"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({
+        "lat": [0.0, 0.0, 2.0, 2.0],
+        "lon": [0.0, 2.0, 0.0, 2.0],
+        "temp_c": [1.0, 2.0, 3.0, 4.0],
+        "humidity": [10.0, 20.0, 30.0, 40.0],
+    }).to_parquet(path)
+    return str(path)
+
+
+def test_missing_variables_are_merged_into_the_cached_frame(tmp_path):
+    path = write_frame(tmp_path, 2020, 1)
+    reader = WeatherFrameReader(max_workers=1)
+    first = reader._load(path, "monthly", ["temp_c"])
+    frame = reader._load(path, "monthly", ["temp_c", "humidity"])
+    assert set(frame.columns) == {"temp_c", "humidity"}
+    assert frame.columns["temp_c"].tolist() == first.columns["temp_c"].tolist() == [3.0, 4.0, 1.0, 2.0]
+
+
+def test_frame_evicted_during_a_read_keeps_its_variables(tmp_path, monkeypatch):
+    path = write_frame(tmp_path, 2020, 1)
+    reader = WeatherFrameReader(max_workers=1)
+    reader._load(path, "monthly", ["temp_c"])
+
+    decode = reader._decode
+
+    def decode_and_evict(*args):
+        reader.clear()
+        return decode(*args)
+
+    monkeypatch.setattr(reader, "_decode", decode_and_evict)
+    frame = reader._load(path, "monthly", ["temp_c", "humidity"])
+    assert set(frame.columns) == {"temp_c", "humidity"}
+
+    timestamps, values, grid = frames_to_series([frame], ["temp_c", "humidity"])
+    assert len(timestamps) == 1
+    assert set(values) == {"temp_c", "humidity"}
+
+
+def test_find_frame_file_lists_the_tier_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(weather_frames, "WEATHER_DIR", tmp_path)
+    monkeypatch.setattr(weather_frames, "_frame_index", {})
+    padded = write_frame(tmp_path, 2020, 1)
+    unpadded = tmp_path / "monthly" / "2020" / "2.parquet"
+    unpadded.write_bytes(b"")
+
+    listings = []
+    list_tier_files = weather_frames.list_tier_files
+    monkeypatch.setattr(weather_frames, "list_tier_files", lambda *a: listings.append(a) or list_tier_files(*a))
+
+    def ms(year, month):
+        return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+    assert find_frame_file("monthly", ms(2020, 1)) == padded
+    assert listings == []
+    assert find_frame_file("monthly", ms(2020, 2)) == str(unpadded)
+    assert find_frame_file("monthly", ms(1999, 5)) is None
+    assert find_frame_file("monthly", 12345) is None
+    assert listings == [("monthly",)]